@@ -7,9 +7,22 @@ export function apiUrl(path) {
   return `${API_BASE}${path}`;
 }
 
+// Last ETag and body per GET URL: the request is revalidated with If-None-Match and a
+// 304 (unchanged) reuses the cached body instead of downloading it again
+const etagCache = new Map();
+const MAX_ETAG_ENTRIES = 100;
+
 // Utility to handle fetch with error handling (migrated from App.jsx)
 export async function fetchWithErrorHandling(url, options = {}) {
+  const isGet = !options.method || options.method.toUpperCase() === 'GET';
+  const cached = isGet ? etagCache.get(url) : undefined;
+  if (cached) {
+    options = { ...options, headers: { ...(options.headers || {}), 'If-None-Match': cached.etag } };
+  }
   const res = await fetch(url, options);
+  if (res.status === 304 && cached) {
+    return cached.data;
+  }
   let data;
   try {
     data = await res.json();
@@ -21,5 +34,37 @@ export async function fetchWithErrorHandling(url, options = {}) {
     const errorMsg = (data && data.detail && (typeof data.detail === 'string' ? data.detail : data.detail.msg)) || res.statusText || 'Unknown error';
     throw new Error(errorMsg);
   }
+  const etag = res.headers.get('ETag');
+  if (isGet && etag) {
+    etagCache.delete(url);
+    etagCache.set(url, { etag, data });
+    if (etagCache.size > MAX_ETAG_ENTRIES) etagCache.delete(etagCache.keys().next().value);
+  }
   return data;
 }
+
+// Download several symbol/timeframe ranges in one call (shared exchange rate limit)
+export async function downloadHistoryBatch(items, maxWorkers = 4) {
+  return fetchWithErrorHandling(apiUrl("/api/history/download/batch"), {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ items, max_workers: maxWorkers })
+  });
+}
+
+// Chart data for a time range with at most maxPoints points per series (timestamps in epoch ms)
+function chartQuery(params, maxPoints) {
+  const query = new URLSearchParams({ max_points: String(maxPoints) });
+  Object.entries(params).forEach(([key, value]) => {
+    if (value) query.set(key, value);
+  });
+  return query.toString();
+}
+
+export async function fetchChartOhlcv({ symbol, timeframe, start, end }, maxPoints = 1000) {
+  return fetchWithErrorHandling(apiUrl(`/api/chart/ohlcv?${chartQuery({ symbol, timeframe, start, end }, maxPoints)}`));
+}
+
+export async function fetchChartBacktest({ strategy, symbol, timeframe, start, end }, maxPoints = 1000) {
+  return fetchWithErrorHandling(apiUrl(`/api/chart/backtest?${chartQuery({ strategy, symbol, timeframe, start, end }, maxPoints)}`));
+}
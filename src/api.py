@@ -4,15 +4,23 @@ FastAPI backend to trigger backtesting for a selected strategy.
 from fastapi import FastAPI, Query, HTTPException, Body, Request, Path
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-import subprocess
 import os
 import sys
-from typing import Optional
+from typing import Optional, List
 from fastapi.middleware.cors import CORSMiddleware
 import yaml
 import json
+from contextlib import contextmanager
+from src.serialization import FastJSONResponse, compress_response, read_json
+from src.http_cache import conditional_json, file_etag, last_modified
+from src.scheduler import PRIORITIES, QueueFull, configure_scheduler, get_scheduler
 
-app = FastAPI(title="Crypto Bot Backtest API")
+# Respuestas JSON con orjson (si está instalado) y comprimidas con brotli/gzip según Accept-Encoding
+app = FastAPI(title="Crypto Bot Backtest API", default_response_class=FastJSONResponse)
+
+@app.middleware("http")
+async def compress_responses(request: Request, call_next):
+    return await compress_response(request, await call_next(request))
 
 # Enable CORS to allow requests from the frontend
 app.add_middleware(
@@ -21,11 +29,67 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # El frontend lee el ETag para revalidar con If-None-Match
+    expose_headers=["ETag", "Last-Modified"],
 )
 
 HISTORY_DIR = os.path.join("data", "history")
 os.makedirs(HISTORY_DIR, exist_ok=True)
 
+@app.on_event("startup")
+def preload_datasets():
+    """Warm the dataset cache with the hot pairs of config.yaml (cache.preload) in the background."""
+    import threading
+    from src.dataset_cache import get_dataset_cache
+    cache_cfg = {}
+    if os.path.exists("config.yaml"):
+        with open("config.yaml", "r", encoding="utf-8") as f:
+            cache_cfg = (yaml.safe_load(f) or {}).get("cache") or {}
+    cache = get_dataset_cache()
+    if cache_cfg.get("max_mb") and not os.getenv("DATASET_CACHE_MB"):
+        cache.max_bytes = int(float(cache_cfg["max_mb"]) * 1024 * 1024)
+    pairs = [tuple(item.split()) for item in cache_cfg.get("preload") or []]
+    if pairs:
+        threading.Thread(target=cache.preload, args=(pairs,), daemon=True).start()
+
+@app.on_event("startup")
+def configure_job_scheduler():
+    """Concurrency and queue limits of the heavy endpoints from config.yaml (scheduler section)."""
+    if os.path.exists("config.yaml"):
+        with open("config.yaml", "r", encoding="utf-8") as f:
+            classes = (yaml.safe_load(f) or {}).get("scheduler")
+        if classes:
+            configure_scheduler(classes)
+
+@app.on_event("startup")
+def resume_jobs():
+    """Resume the jobs interrupted by the last shutdown (jobs.resume_on_start in config.yaml)."""
+    from src.jobs import get_job_manager
+    jobs_cfg = {}
+    if os.path.exists("config.yaml"):
+        with open("config.yaml", "r", encoding="utf-8") as f:
+            jobs_cfg = (yaml.safe_load(f) or {}).get("jobs") or {}
+    # Al crear el gestor, los trabajos que estaban en marcha quedan como 'interrupted'
+    manager = get_job_manager()
+    if jobs_cfg.get("resume_on_start"):
+        manager.resume_interrupted()
+
+@contextmanager
+def job_slot(job_class: str, request: Request):
+    """
+    Run the body once the scheduler admits the job (priority from the X-Priority header:
+    high, normal or low); 429 with Retry-After when the queue of the job class is full.
+    """
+    priority = request.headers.get("x-priority", "normal").lower()
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail={"msg": f"Invalid X-Priority: {priority}", "allowed": list(PRIORITIES)})
+    try:
+        with get_scheduler().slot(job_class, priority):
+            yield
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail={"msg": f"Too many {job_class} jobs ({e.reason}), retry later", "job_class": job_class},
+                            headers={"Retry-After": str(e.retry_after)})
+
 def get_history_filename(symbol, timeframe):
     s = symbol.replace('/', '-')
     return os.path.join(HISTORY_DIR, f"history_{s}_{timeframe}.csv")
@@ -50,6 +114,56 @@ class HistoryDownloadRequest(BaseModel):
     end_date: str = Field(..., example="2024-01-31T23:59:00Z", description="End date in ISO format")
     force_extend: bool = Field(False, example=False, description="Force extend range if not adjacent")
 
+class PortfolioBacktestRequest(BaseModel):
+    strategy: str
+    timeframe: str
+    symbols: Optional[List[str]] = None  # Default: every symbol with history for the timeframe
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+class MonteCarloRequest(BaseModel):
+    strategy: str
+    symbol: str
+    timeframe: str
+    n_sims: int = Field(10000, ge=1, le=100000)
+    method: str = Field("bootstrap", description="'bootstrap' or 'shuffle'")
+    ruin_pct: float = Field(0.5, gt=0, le=1)
+    seed: Optional[int] = None
+
+class OptimizeRequest(BaseModel):
+    strategy: str
+    symbol: str
+    timeframe: str
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    space: Optional[dict] = Field(None, example={"fast": [2, 50], "slow": [10, 300], "stop_loss_pct": [0.0, 0.1]},
+                                  description="[low, high] of every searched parameter (fast/slow/stop_loss_pct/max_position_size by default)")
+    generations: int = Field(10, ge=1, le=100)
+    population: int = Field(20, ge=1, le=500)
+    batch: int = Field(27, ge=1, le=1000)
+    seed: Optional[int] = None
+    workers: Optional[int] = Field(None, ge=1, description="Worker processes (every CPU by default)")
+
+class PaperTradeStartRequest(BaseModel):
+    strategy: str
+    symbol: str
+    timeframe: str
+    source: str = Field("historical", description="'historical' (replay local history) or 'live' (exchange)")
+    speed: Optional[float] = Field(None, description="Historical replay speed-up; empty replays as fast as possible")
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    fast: Optional[int] = None
+    slow: Optional[int] = None
+
+class PaperTradeStopRequest(BaseModel):
+    bot_id: str
+
+class JobRequest(BaseModel):
+    kind: str = Field(..., example="download", description="'download' or 'backtest'")
+    params: dict = Field(..., example={"symbol": "BTC/USDT", "timeframe": "1m", "start_date": "2020-01-01", "end_date": "2025-01-01"},
+                         description="download: symbol, timeframe, start_date, end_date[, force_extend]; backtest: strategy, symbol, timeframe[, start_date, end_date, chunksize]")
+    priority: str = Field("normal", description="'high', 'normal' or 'low'")
+
 class HistoryMetaResponse(BaseModel):
     filename: str = Field(..., example="history_BTC-USDT_1m.csv")
     min_date: str = Field(..., example="2024-01-01T00:00:00Z")
@@ -62,11 +176,23 @@ def load_strategy_config(strategy: str):
     with open(config_path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
+@app.get("/api/strategies", summary="List the registered strategies",
+         description="Strategies discovered in src/strategies/<name>/plugin.py with their default parameters, warm-up lookback and implementations.")
+def list_registered_strategies():
+    """Return the declaration of every registered strategy."""
+    from src.strategies import list_strategies
+    return {"strategies": [spec.describe() for spec in list_strategies()]}
+
 @app.post("/api/backtest/")
-def run_backtest(req: BacktestRequest):
+def run_backtest(req: BacktestRequest, request: Request):
     """
     Run the backtest for the given strategy, symbol, timeframe, and date range.
     """
+    # Cola del planificador: un número acotado de backtests a la vez
+    with job_slot("backtest", request):
+        return _run_backtest(req)
+
+def _run_backtest(req: BacktestRequest):
     # Normalizar símbolo a formato con barra para la API
     symbol = req.symbol.replace('-', '/')
     timeframe = req.timeframe
@@ -75,7 +201,7 @@ def run_backtest(req: BacktestRequest):
     filename = getattr(req, 'filename', None)
     # Validate config of the strategy
     config = load_strategy_config(req.strategy)
-    extra_args = []
+    strat_params, risk_params = {}, {}
     if config:
         allowed = config.get('allowed_symbols', [])
         if allowed and symbol not in allowed:
@@ -83,12 +209,8 @@ def run_backtest(req: BacktestRequest):
         # Remove min_date and max_date validation from config.yaml
         # Use strategy parameters
         strat_params = config.get('strategy', {}).get('params', {})
-        for k, v in strat_params.items():
-            extra_args += [f"--{k}", str(v)]
         # Use risk parameters if they are used in the backtest
         risk_params = config.get('risk', {})
-        for k, v in risk_params.items():
-            extra_args += [f"--{k}", str(v)]
     if not (start_date and end_date):
         return {"success": False, "error": "Start and end date required"}
     # Use the filename if provided, else compute it
@@ -97,24 +219,20 @@ def run_backtest(req: BacktestRequest):
     else:
         hist_file = get_history_filename(symbol, timeframe)
     meta_path = os.path.join(HISTORY_DIR, 'history_meta.json')
-    import logging
+    # Con SQLite las velas están en la base de datos, no en el CSV (el frontend envía el nombre estándar)
+    standard_file = not filename or filename == os.path.basename(get_history_filename(symbol, timeframe))
+    stored = HistoryManager.backend == 'sqlite' and standard_file
+    if stored and not HistoryManager.has_history(symbol, timeframe):
+        raise HTTPException(status_code=404, detail={"msg": f"No stored history for {symbol} {timeframe}",
+                                                     "backend": "sqlite", "symbol": symbol, "timeframe": timeframe})
     abs_hist_file = os.path.abspath(hist_file)
-    test_exists = os.path.exists(hist_file)
-    test_read = False
-    read_error = None
-    try:
-        with open(hist_file, 'r', encoding='utf-8') as f:
-            f.readline()
-            test_read = True
-    except Exception as e:
-        read_error = str(e)
-        logging.warning(f"[BACKTEST] Error reading file: {e}")
-    if not test_exists:
+    test_exists = stored or os.path.exists(hist_file)
+    test_read = stored or os.access(hist_file, os.R_OK)
+    if not (test_exists and test_read):
         detail = {
             "file": abs_hist_file,
             "exists": test_exists,
-            "readable": test_read,
-            "read_error": read_error
+            "readable": test_read
         }
         raise HTTPException(status_code=404, detail={"msg": "Historical data file not found or not readable", **detail})
     # Use global meta
@@ -135,75 +253,366 @@ def run_backtest(req: BacktestRequest):
     req_end = end_date[:10]
     if req_start < min_hist[:10] or req_end > max_hist[:10]:
         raise HTTPException(status_code=400, detail={"msg": f"Requested range {req_start} to {req_end} is outside local history range ({min_hist} to {max_hist})"})
-    # Call the backtest with the correct historical file and parameters
-    cmd = [
-        sys.executable, "-m", "src.backtest",
-        "--strategy", req.strategy,
-        "--symbol", symbol,
-        "--timeframe", timeframe,
-        "--history", hist_file
-    ] + extra_args
+    # Backtest en el propio proceso: las velas salen de la caché de datasets (CSV) o de una
+    # lectura por rango (SQLite), sin volver a leer ni parsear el histórico en cada petición
+    return _backtest_in_process(req.strategy, symbol, timeframe, start_date, end_date, strat_params, risk_params,
+                               None if standard_file else hist_file)
+
+def _backtest_in_process(strategy: str, symbol: str, timeframe: str, start_date: Optional[str], end_date: Optional[str],
+                        strat_params: dict, risk_params: dict, hist_file: Optional[str] = None) -> dict:
+    """
+    Run a backtest like `python -m src.backtest` does, in this process, and save its result files.
+
+    The candles come from HistoryManager (the cached arrays of the whole history for the CSV
+    backend, an index range read for SQLite), unless a non-standard history file is given.
+    """
+    import pandas as pd
+    from src.backtest import (backtest_summary, load_strategy_history, result_filename, run_strategy,
+                              save_backtest)
+    from src.config import STRAT_PARAMS, RISK_PARAMS
+    from src.simulation import simulate_trades
+    params = {'fast': STRAT_PARAMS.get('fast', 10), 'slow': STRAT_PARAMS.get('slow', 50), **strat_params}
+    # Mismos valores por defecto que el script
+    sim_params = {
+        'max_position_size': float(risk_params.get('max_position_size', STRAT_PARAMS.get('max_position_size', 0.01))),
+        'stop_loss_pct': float(risk_params.get('stop_loss_pct', STRAT_PARAMS.get('stop_loss_pct', 0.02))),
+        'fee_pct': float(risk_params.get('fee_pct', RISK_PARAMS.get('fee_pct', 0.001))),
+        'slippage_pct': float(risk_params.get('slippage_pct', RISK_PARAMS.get('slippage_pct', 0.0))),
+        'initial_capital': float(risk_params.get('initial_capital', RISK_PARAMS.get('initial_capital', 10000.0))),
+    }
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        out_path = os.path.join(
-            "data", "strategies", req.strategy,
-            f"backtest_{symbol}_{timeframe}.csv"
+        if hist_file:
+            df = pd.read_csv(hist_file, parse_dates=['ts']).sort_values('ts').reset_index(drop=True)
+        else:
+            df = load_strategy_history(symbol, timeframe, strategy, params, start_date, end_date)
+        result = run_strategy(df, strategy, params, start_date, end_date, timeframe=timeframe)
+        trades_df = simulate_trades(result, **sim_params)
+        summary = backtest_summary(
+            trades_df, str(result['ts'].iloc[0]) if not result.empty else None,
+            str(result['ts'].iloc[-1]) if not result.empty else None, sim_params['initial_capital'])
+        summary.update({'symbol': symbol, 'timeframe': timeframe, 'strategy': strategy,
+                        'strategy_params': {**params, **sim_params, 'start_date': start_date, 'end_date': end_date}})
+        out_path = result_filename(strategy, symbol, timeframe)
+        save_backtest(out_path, result, trades_df, summary, strategy, symbol, timeframe)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    return {"success": True, "result_file": out_path, "stdout": "", "summary": summary}
+
+@app.post("/api/portfolio/backtest/", summary="Run a multi-asset portfolio backtest",
+          description="Evaluates a strategy over all symbols of a timeframe aligned on a common index and returns per-asset and combined equity.")
+def run_portfolio_backtest(req: PortfolioBacktestRequest, request: Request):
+    """Run a portfolio backtest in-process over aligned (time x symbol) arrays."""
+    with job_slot("backtest", request):
+        return _run_portfolio_backtest(req)
+
+def _run_portfolio_backtest(req: PortfolioBacktestRequest):
+    from src.portfolio import load_aligned_history, backtest_portfolio, portfolio_summary
+    config = load_strategy_config(req.strategy) or {}
+    strat_params = config.get('strategy', {}).get('params', {})
+    risk_params = config.get('risk', {})
+    symbols = [s.replace('-', '/') for s in req.symbols] if req.symbols else None
+    allowed = config.get('allowed_symbols', [])
+    if allowed:
+        if symbols is None:
+            symbols = sorted(s for s, tfs in HistoryManager.list_all().items() if req.timeframe in tfs)
+        symbols = [s for s in symbols if s in allowed]
+    try:
+        panel = load_aligned_history(req.timeframe, symbols, req.start_date, req.end_date)
+        initial_capital = float(risk_params.get('initial_capital', 10000.0))
+        result = backtest_portfolio(
+            panel, req.strategy,
+            fast=strat_params.get('fast', 10),
+            slow=strat_params.get('slow', 50),
+            max_position_size=float(risk_params.get('max_position_size', 1.0)),
+            fee_pct=float(risk_params.get('fee_pct', 0.0)),
+            slippage_pct=float(risk_params.get('slippage_pct', 0.0)),
+            initial_capital=initial_capital
         )
-        # Reinforcement: check existence with absolute paths and case insensitivity
-        import glob
-        abs_out_path = os.path.abspath(out_path)
-        if os.path.exists(out_path) or os.path.exists(abs_out_path):
-            # Buscar y devolver el resumen JSON si existe
-            summary_path = out_path.replace('.csv', '_summary.json')
-            summary = None
-            if os.path.exists(summary_path):
-                try:
-                    with open(summary_path, 'r', encoding='utf-8') as f:
-                        summary = json.load(f)
-                except Exception as e:
-                    summary = None
-            return {
-                "success": True,
-                "result_file": out_path,
-                "stdout": result.stdout,
-                "summary": summary
-            }
-        # Search by pattern if there are naming issues
-        pattern = os.path.join("data", "strategies", req.strategy, f"backtest_{symbol.replace('/', '-')}*{timeframe}.csv")
-        matches = glob.glob(pattern)
-        if matches:
-            # Buscar y devolver el resumen JSON si existe para el primer match
-            summary_path = matches[0].replace('.csv', '_summary.json')
-            summary = None
-            if os.path.exists(summary_path):
-                try:
-                    with open(summary_path, 'r', encoding='utf-8') as f:
-                        summary = json.load(f)
-                except Exception as e:
-                    summary = None
-            return {
-                "success": True,
-                "result_file": matches[0],
-                "stdout": result.stdout,
-                "summary": summary
-            }
-        return {"success": False, "error": "Backtest completed but result file not found.", "stdout": result.stdout}
-    except subprocess.CalledProcessError as e:
-        return {"success": False, "error": str(e), "stdout": e.stdout, "stderr": e.stderr}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail={"msg": str(e)})
+    summary = portfolio_summary(panel, result, initial_capital)
+    summary.update({'strategy': req.strategy, 'timeframe': req.timeframe, 'strategy_params': strat_params})
+    return {"success": True, "summary": summary}
+
+@app.post("/api/backtest/montecarlo/", summary="Monte Carlo robustness of a backtest",
+          description="Resamples the trades of the last backtest for a strategy/symbol/timeframe and returns profit and drawdown distributions and risk of ruin.")
+def run_monte_carlo(req: MonteCarloRequest, request: Request):
+    """Run a Monte Carlo resampling over the full trade list of a backtest."""
+    with job_slot("sweep", request):
+        return _run_monte_carlo(req)
+
+def _run_monte_carlo(req: MonteCarloRequest):
+    import pandas as pd
+    from src.monte_carlo import monte_carlo, trades_filename
+    symbol = req.symbol.replace('-', '/')
+    trades_path = trades_filename(req.strategy, symbol, req.timeframe)
+    if not os.path.exists(trades_path):
+        raise HTTPException(status_code=404, detail={"msg": "Trades file not found. Run the backtest first.", "file": os.path.abspath(trades_path)})
+    trades = pd.read_csv(trades_path)
+    config = load_strategy_config(req.strategy) or {}
+    initial_capital = float(config.get('risk', {}).get('initial_capital', 10000.0))
+    try:
+        report = monte_carlo(trades['profit'].to_numpy(), n_sims=req.n_sims, method=req.method,
+                             initial_capital=initial_capital, ruin_pct=req.ruin_pct, seed=req.seed)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    return {"success": True, "report": report}
+
+@app.post("/api/optimize/", summary="Optimize strategy and risk parameters",
+          description="Evolutionary search with early pruning on partial history; returns the Pareto front of total profit vs max drawdown.")
+def run_optimize(req: OptimizeRequest, request: Request):
+    """Run the evolutionary optimizer over the stored history of a symbol/timeframe."""
+    with job_slot("sweep", request):
+        return _run_optimize(req)
+
+def _run_optimize(req: OptimizeRequest):
+    import pandas as pd
+    from src.optimizer import optimize
+    symbol = req.symbol.replace('-', '/')
+    risk = (load_strategy_config(req.strategy) or {}).get('risk', {})
+    try:
+        df = pd.DataFrame(HistoryManager.load_range(symbol, req.timeframe, req.start_date, req.end_date))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail={"msg": str(e)})
+    space = {name: tuple(bounds) for name, bounds in req.space.items()} if req.space else None
+    try:
+        result = optimize(
+            df, req.strategy, space, generations=req.generations, population=req.population, batch=req.batch,
+            max_position_size=float(risk.get('max_position_size', 1.0)), stop_loss_pct=risk.get('stop_loss_pct'),
+            fee_pct=float(risk.get('fee_pct', 0.0)), slippage_pct=float(risk.get('slippage_pct', 0.0)),
+            initial_capital=float(risk.get('initial_capital', 10000.0)), timeframe=req.timeframe,
+            workers=req.workers or os.cpu_count() or 1, seed=req.seed
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        return {"success": False, "error": str(e)}
+    return {"success": True, "front": result['front'], "stats": result['stats']}
+
+@app.get("/api/backtest/results", summary="Query stored backtest runs",
+         description="Backtest runs recorded in the SQLite database (HISTORY_BACKEND=sqlite), filtered by strategy, symbol, timeframe and parameter values (JSON object).")
+def backtest_results(
+    request: Request,
+    strategy: Optional[str] = Query(None, example="cross_sma"),
+    symbol: Optional[str] = Query(None, example="BTC/USDT"),
+    timeframe: Optional[str] = Query(None, example="1m"),
+    params: Optional[str] = Query(None, example='{"fast": 10}'),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    try:
+        param_values = json.loads(params) if params else None
+    except json.JSONDecodeError as e:
+        return {"success": False, "error": f"Invalid params JSON: {e}"}
+    if param_values is not None and not isinstance(param_values, dict):
+        return {"success": False, "error": "params must be a JSON object"}
+    if HistoryManager.backend != 'sqlite':
+        # Solo el backend SQLite registra ejecuciones (sin crear una base de datos vacía)
+        return {"success": True, "runs": []}
+    symbol = symbol.replace('-', '/') if symbol else None
+    runs = HistoryManager.get_store().query_backtests(strategy, symbol, timeframe, param_values, limit)
+    # ETag del contenido: las consultas repetidas sin runs nuevos responden 304
+    return conditional_json(request, None, lambda: {"success": True, "runs": runs})
+
+@app.get("/api/backtest/results/{run_id}/trades", summary="Trades of a stored backtest run",
+         description="Trades recorded for a backtest run, with a content ETag (revalidated with If-None-Match, 304 when unchanged).")
+def backtest_run_trades(request: Request, run_id: int = Path(..., ge=1)):
+    """Return the trades of a stored backtest run."""
+    if HistoryManager.backend != 'sqlite':
+        raise HTTPException(status_code=404, detail={"msg": "Backtest runs are only stored with HISTORY_BACKEND=sqlite"})
+    trades = HistoryManager.get_store().backtest_trades(run_id)
+    if not trades:
+        raise HTTPException(status_code=404, detail={"msg": f"No trades for backtest run {run_id}"})
+    # Un run no cambia, pero su id puede reutilizarse si se recrea la base de datos: el ETag
+    # del contenido (y no la URL) decide si la copia del cliente sigue siendo válida
+    return conditional_json(request, None, lambda: {"success": True, "run_id": run_id, "trades": trades})
+
+@app.post("/api/papertrade/start", summary="Start a paper trading bot",
+          description="Starts a strategy instance on simulated fills, fed by the exchange ('live') or by a replay of the local history ('historical').")
+def papertrade_start(req: PaperTradeStartRequest):
+    """Start a paper trading bot and return its id."""
+    from src.paper_trading import PaperBot, get_engine_thread, make_feed, SOURCES
+    if req.source not in SOURCES:
+        return {"success": False, "error": f"Unknown source: {req.source}"}
+    symbol = req.symbol.replace('-', '/')
+    config = load_strategy_config(req.strategy) or {}
+    allowed = config.get('allowed_symbols', [])
+    if allowed and symbol not in allowed:
+        return {"success": False, "error": f"Symbol {symbol} not allowed for strategy {req.strategy}"}
+    strat_params = config.get('strategy', {}).get('params', {})
+    risk_params = config.get('risk', {})
+    fast = req.fast or strat_params.get('fast', 10)
+    slow = req.slow or strat_params.get('slow', 50)
+    try:
+        bot = PaperBot(
+            req.strategy, symbol, req.timeframe, fast=fast, slow=slow,
+            max_position_size=float(risk_params.get('max_position_size', 1.0)),
+            stop_loss_pct=risk_params.get('stop_loss_pct'),
+            fee_pct=float(risk_params.get('fee_pct', 0.0)),
+            slippage_pct=float(risk_params.get('slippage_pct', 0.0)),
+            initial_capital=float(risk_params.get('initial_capital', 10000.0)),
+            source=req.source
+        )
+        feed = make_feed(req.source, symbol, req.timeframe, req.speed, req.start_date, req.end_date,
+                         warmup=slow, hub=get_engine_thread().engine.hub)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail={"msg": str(e)})
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    bot_id = get_engine_thread().start_bot(bot, feed)
+    return {"success": True, "bot_id": bot_id}
+
+@app.post("/api/papertrade/stop", summary="Stop a paper trading bot")
+def papertrade_stop(req: PaperTradeStopRequest):
+    """Stop a running paper trading bot; its state and trades are kept."""
+    from src.paper_trading import get_engine_thread
+    if not get_engine_thread().stop_bot(req.bot_id):
+        raise HTTPException(status_code=404, detail={"msg": f"Bot {req.bot_id} not found"})
+    return {"success": True, "bot_id": req.bot_id}
+
+@app.get("/api/papertrade/status", summary="Status of the paper trading bots")
+def papertrade_status():
+    """Return the state of every paper trading bot."""
+    from src.paper_trading import get_engine_thread
+    return {"bots": get_engine_thread().status()}
+
+@app.get("/api/papertrade/trades", summary="Simulated trades of a paper trading bot")
+def papertrade_trades(bot_id: str = Query(..., description="Bot id returned by /api/papertrade/start")):
+    """Return the simulated trades of a bot."""
+    from src.paper_trading import get_engine_thread
+    trades = get_engine_thread().trades(bot_id)
+    if trades is None:
+        raise HTTPException(status_code=404, detail={"msg": f"Bot {bot_id} not found"})
+    return {"bot_id": bot_id, "trades": trades}
 
 @app.get("/api/history/list", summary="List available historical files", 
          description="Returns all available historical files and their date ranges.",
          response_description="A dictionary with all available symbols and their timeframes.")
-def list_history():
+def list_history(request: Request):
     """List all available historical files and their date ranges."""
-    return HistoryManager.list_all()
+    return _history_meta_response(request)
 
 @app.get("/api/history/meta", summary="Get global history meta info", 
          description="Returns the global meta JSON for all historical files, including min/max dates.",
          response_description="A dictionary with meta info for all symbols and timeframes.")
-def get_history_meta():
+def get_history_meta(request: Request):
     """Return the full meta JSON for all historical files."""
-    return HistoryManager.list_all()
+    return _history_meta_response(request)
+
+def _history_meta_response(request: Request):
+    # El ETag sale del mtime/tamaño del meta: el polling del frontend no relee el fichero
+    from src import history_manager
+    paths = [history_manager.META_FILE]
+    return conditional_json(request, file_etag(paths), HistoryManager.list_all, modified=last_modified(paths))
+
+@app.get("/api/summary/{strategy}", summary="Summary of the last backtest of a strategy",
+         description="Summary JSON written by the last backtest of a strategy for a symbol and timeframe (by default those of the strategy's config.yaml). Supports If-None-Match / If-Modified-Since.")
+def get_summary(
+    request: Request,
+    strategy: str = Path(..., example="cross_sma"),
+    symbol: Optional[str] = Query(None, example="BTC/USDT"),
+    timeframe: Optional[str] = Query(None, example="1m")
+):
+    """Return the summary of the last backtest of a strategy."""
+    if not strategy or os.path.basename(strategy) != strategy or strategy.startswith('.'):
+        raise HTTPException(status_code=400, detail={"msg": f"Invalid strategy name: {strategy}"})
+    exchange = (load_strategy_config(strategy) or {}).get('exchange', {})
+    symbol = (symbol or exchange.get('symbol', 'BTC/USDT')).replace('/', '-')
+    timeframe = timeframe or exchange.get('timeframe', '1m')
+    path = os.path.join("data", "strategies", strategy, f"backtest_{symbol}_{timeframe}_summary.json")
+    etag = file_etag([path])
+    if etag is None:
+        raise HTTPException(status_code=404, detail={"msg": f"No backtest summary for {strategy} {symbol} {timeframe}"})
+    return conditional_json(request, etag, lambda: read_json(path), modified=last_modified([path]))
+
+@app.post("/api/jobs", summary="Start a background job",
+          description="Runs a download or a streaming backtest in the background with checkpoints: it can be cancelled and resumed from its last checkpoint, also after a restart.")
+def create_job(req: JobRequest):
+    """Start a job and return its state."""
+    from src.jobs import get_job_manager
+    try:
+        job = get_job_manager().submit(req.kind, req.params, req.priority)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    return {"success": True, "job": job.to_dict()}
+
+@app.get("/api/jobs", summary="List background jobs")
+def list_jobs():
+    """Return every job, most recent first."""
+    from src.jobs import get_job_manager
+    return {"jobs": get_job_manager().list()}
+
+def _job_action(job_id: str, action: str):
+    from src.jobs import get_job_manager
+    manager = get_job_manager()
+    try:
+        job = manager.get(job_id) if action == "get" else getattr(manager, action)(job_id)
+    except KeyError:
+        job = None
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    if job is None:
+        raise HTTPException(status_code=404, detail={"msg": f"Job not found: {job_id}"})
+    return {"success": True, "job": job.to_dict()}
+
+@app.get("/api/jobs/{job_id}", summary="State and progress of a background job")
+def get_job(job_id: str):
+    return _job_action(job_id, "get")
+
+@app.post("/api/jobs/{job_id}/cancel", summary="Cancel a background job",
+          description="The job stops at its next checkpoint (page or chunk) and keeps its progress.")
+def cancel_job(job_id: str):
+    return _job_action(job_id, "cancel")
+
+@app.post("/api/jobs/{job_id}/resume", summary="Resume a background job",
+          description="Restarts a failed, cancelled or interrupted job from its last checkpoint.")
+def resume_job(job_id: str):
+    return _job_action(job_id, "resume")
+
+@app.get("/api/scheduler/stats", summary="Job scheduler metrics",
+         description="Per job class (backtest, download, sweep): limits, running and queued jobs (by priority), admitted, rejected and timed-out counts, wait and run times.")
+def scheduler_stats():
+    """Return the queue depth and counters of every job class."""
+    return get_scheduler().stats()
+
+@app.get("/api/history/cache", summary="Dataset cache statistics",
+         description="Datasets held in memory, bytes used against the budget, hits, misses and evictions.")
+def get_history_cache():
+    """Return the statistics of the process-wide dataset cache."""
+    from src.dataset_cache import get_dataset_cache
+    return get_dataset_cache().stats()
+
+@app.get("/api/chart/ohlcv", summary="Candles for a chart at a point budget",
+         description="OHLCV of a stored history between two dates, from the finest precomputed aggregation level with at most max_points candles. Timestamps in epoch milliseconds.")
+def chart_ohlcv(
+    symbol: str = Query(..., example="BTC/USDT"),
+    timeframe: str = Query(..., example="1m"),
+    start: Optional[str] = Query(None, example="2024-01-01"),
+    end: Optional[str] = Query(None, example="2024-12-31"),
+    max_points: int = Query(1000, ge=10, le=10000)
+):
+    from src.charts import ohlcv_chart
+    symbol = symbol.replace('-', '/')
+    try:
+        return ohlcv_chart(symbol, timeframe, start, end, max_points)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail={"msg": str(e), "symbol": symbol, "timeframe": timeframe})
+
+@app.get("/api/chart/backtest", summary="Signals and equity of a backtest at a point budget",
+         description="BUY/SELL signals, equity and drawdown of the last backtest of a strategy between two dates; lines are downsampled with LTTB to max_points. Timestamps in epoch milliseconds.")
+def chart_backtest(
+    strategy: str = Query(..., example="cross_sma"),
+    symbol: str = Query(..., example="BTC/USDT"),
+    timeframe: str = Query(..., example="1m"),
+    start: Optional[str] = Query(None, example="2024-01-01"),
+    end: Optional[str] = Query(None, example="2024-12-31"),
+    max_points: int = Query(1000, ge=10, le=10000)
+):
+    from src.charts import backtest_chart
+    symbol = symbol.replace('-', '/')
+    try:
+        return backtest_chart(strategy, symbol, timeframe, start, end, max_points)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail={"msg": str(e), "strategy": strategy})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"msg": str(e)})
 
 @app.delete(
     "/api/history/{symbol:path}/{timeframe}",
@@ -216,14 +625,10 @@ def delete_history(
     timeframe: str = Path(..., example="1m", description="Timeframe, e.g. '1m', '5m', '1d'")
 ):
     """Delete a historical file and update the meta JSON."""
-    filename = HistoryManager.get_history_file(symbol, timeframe)
-    file_deleted = False
-    if os.path.exists(filename):
-        try:
-            os.remove(filename)
-            file_deleted = True
-        except Exception as e:
-            return {"success": False, "error": f"Could not delete file: {e}"}
+    try:
+        file_deleted = HistoryManager.delete_history(symbol, timeframe)
+    except Exception as e:
+        return {"success": False, "error": f"Could not delete file: {e}"}
     meta_deleted = HistoryManager.remove_meta(symbol, timeframe)
     if file_deleted or meta_deleted:
         return {"success": True, "file_deleted": file_deleted, "meta_deleted": meta_deleted}
@@ -258,167 +663,38 @@ def delete_history(
     }
 )
 def download_history(
+    request: Request,
     symbol: str = Body(..., example="BTC/USDT"),
     timeframe: str = Body(..., example="1m"),
     start_date: str = Body(..., example="2024-01-01T00:00:00Z"),
     end_date: str = Body(..., example="2024-01-31T23:59:00Z"),
     force_extend: bool = Body(False, example=False)
 ):
-    # Normalizar símbolo a formato con barra para la API
-    symbol = symbol.replace('-', '/')
     """Download historical data, save to file, and update meta JSON. No permite crear gaps: si el rango solicitado no es adyacente, sugiere el rango correcto y requiere confirmación."""
-    filename = HistoryManager.get_history_file(symbol, timeframe)
-    meta = HistoryManager.get_meta(symbol, timeframe)
-    import pandas as pd
-    from datetime import datetime, timedelta
-    req_start = pd.to_datetime(start_date)
-    req_end = pd.to_datetime(end_date)
-    min_date = max_date = None
-    max_limit = 1000
-    dfs = []
-    new_data_added = False
-    anterior_total_pages = anterior_completed_pages = 0
-    posterior_total_pages = posterior_completed_pages = 0
-    if meta:
-        min_date = pd.to_datetime(meta['min_date'])
-        max_date = pd.to_datetime(meta['max_date'])
-        # Comprobar si el rango solicitado es adyacente
-        adyacente = (
-            req_start <= min_date - pd.Timedelta(minutes=5) or
-            req_end >= max_date + pd.Timedelta(minutes=5) or
-            (req_start >= min_date and req_end <= max_date)
-        )
-        if not adyacente and not force_extend:
-            # Sugerir el rango correcto
-            new_min = min(req_start, min_date)
-            new_max = max(req_end, max_date)
-            return {
-                "success": False,
-                "error": "La descarga solicitada provocaría un gap en los datos. Solo se permiten descargas adyacentes al rango actual.",
-                "current_min_date": min_date.isoformat(),
-                "current_max_date": max_date.isoformat(),
-                "suggested_start_date": new_min.isoformat(),
-                "suggested_end_date": new_max.isoformat(),
-                "force_extend_param": True
-            }
-        # Si force_extend, ampliar el rango
-        if not adyacente and force_extend:
-            req_start = min(req_start, min_date)
-            req_end = max(req_end, max_date)
-    # Descargar tramo anterior si es necesario
-    if not min_date or req_start < min_date:
-        fetch_start = req_start
-        fetch_end = min_date - pd.Timedelta(minutes=5) if min_date else req_end
-        all_prev = []
-        current = fetch_start
-        total_minutes = int((fetch_end - fetch_start).total_seconds() // 60)
-        anterior_total_pages = (total_minutes // (5*max_limit)) + 1 if total_minutes > 0 else 0
-        while current <= fetch_end:
-            next_end = min(current + timedelta(minutes=5*max_limit-5), fetch_end)
-            limit = int((next_end - current).total_seconds() // 60 // 5) + 1
-            try:
-                df_prev = fetch_ohlcv(symbol, timeframe, limit, since=current)
-                if df_prev is not None and not df_prev.empty:
-                    all_prev.append(df_prev)
-                    current = df_prev['ts'].max() + pd.Timedelta(minutes=5)
-                    anterior_completed_pages += 1
-                    if current > fetch_end:
-                        break
-                else:
-                    break
-            except Exception as e:
-                return {"success": False, "error": f"Error downloading previous data: {e}", "anterior_total_pages": anterior_total_pages, "anterior_completed_pages": anterior_completed_pages}
-        if all_prev:
-            df_prev_all = pd.concat(all_prev, ignore_index=True)
-            df_prev_all = df_prev_all[(df_prev_all['ts'] >= fetch_start) & (df_prev_all['ts'] <= fetch_end)]
-            if not df_prev_all.empty:
-                dfs.append(df_prev_all)
-                new_data_added = True
-            else:
-                return {"success": False, "error": f"No data downloaded for requested range {fetch_start} to {fetch_end} (anterior).", "anterior_total_pages": anterior_total_pages, "anterior_completed_pages": anterior_completed_pages}
-        else:
-            return {"success": False, "error": f"No data downloaded for requested range {fetch_start} to {fetch_end} (anterior).", "anterior_total_pages": anterior_total_pages, "anterior_completed_pages": anterior_completed_pages}
-    # Leer datos locales existentes
-    if meta and os.path.exists(filename):
-        try:
-            df_local = pd.read_csv(filename, parse_dates=['ts'])
-            if not df_local.empty:
-                dfs.append(df_local)
-        except Exception as e:
-            return {"success": False, "error": f"Error reading local file: {e}"}
-    # Descargar tramo posterior si es necesario
-    if not max_date or req_end > max_date:
-        fetch_start = (max_date + pd.Timedelta(minutes=5)) if max_date else req_start
-        fetch_end = req_end
-        all_next = []
-        current = fetch_start
-        total_minutes = int((fetch_end - fetch_start).total_seconds() // 60)
-        posterior_total_pages = (total_minutes // (5*max_limit)) + 1 if total_minutes > 0 else 0
-        while current <= fetch_end:
-            next_end = min(current + timedelta(minutes=5*max_limit-5), fetch_end)
-            limit = int((next_end - current).total_seconds() // 60 // 5) + 1
-            try:
-                df_next = fetch_ohlcv(symbol, timeframe, limit, since=current)
-                if df_next is not None and not df_next.empty:
-                    all_next.append(df_next)
-                    current = df_next['ts'].max() + pd.Timedelta(minutes=5)
-                    posterior_completed_pages += 1
-                    if current > fetch_end:
-                        break
-                else:
-                    break
-            except Exception as e:
-                return {"success": False, "error": f"Error downloading next data: {e}", "posterior_total_pages": posterior_total_pages, "posterior_completed_pages": posterior_completed_pages}
-        if all_next:
-            df_next_all = pd.concat(all_next, ignore_index=True)
-            df_next_all = df_next_all[(df_next_all['ts'] >= fetch_start) & (df_next_all['ts'] <= fetch_end)]
-            if not df_next_all.empty:
-                dfs.append(df_next_all)
-                new_data_added = True
-            else:
-                return {"success": False, "error": f"No data downloaded for requested range {fetch_start} to {fetch_end} (posterior).", "posterior_total_pages": posterior_total_pages, "posterior_completed_pages": posterior_completed_pages}
-        else:
-            return {"success": False, "error": f"No data downloaded for requested range {fetch_start} to {fetch_end} (posterior).", "posterior_total_pages": posterior_total_pages, "posterior_completed_pages": posterior_completed_pages}
-    # Unir y limpiar duplicados (NO recortar al rango solicitado)
-    if dfs:
-        df_all = pd.concat(dfs, ignore_index=True)
-        df_all = df_all.drop_duplicates(subset=['ts']).sort_values('ts')
-        if df_all.empty:
-            return {"success": False, "error": "No data available for the requested range."}
-        # Solo guardar si hay datos nuevos
-        if new_data_added:
-            df_all.to_csv(filename, index=False)
-            # Actualizar meta al rango total disponible
-            min_hist = df_all['ts'].min().isoformat()
-            max_hist = df_all['ts'].max().isoformat()
-            HistoryManager.update_meta(symbol, timeframe, min_hist, max_hist, os.path.basename(filename))
-            return {
-                "success": True,
-                "updated": True,
-                "history_file": filename,
-                "min_date": min_hist,
-                "max_date": max_hist,
-                "anterior_total_pages": anterior_total_pages,
-                "anterior_completed_pages": anterior_completed_pages,
-                "posterior_total_pages": posterior_total_pages,
-                "posterior_completed_pages": posterior_completed_pages
-            }
-        else:
-            return {
-                "success": False,
-                "updated": False,
-                "error": "No new data was added. Local file already covers the requested range.",
-                "anterior_total_pages": anterior_total_pages,
-                "anterior_completed_pages": anterior_completed_pages,
-                "posterior_total_pages": posterior_total_pages,
-                "posterior_completed_pages": posterior_completed_pages
-            }
-    else:
-        # Si existe el archivo pero no hay datos, lo eliminamos
-        if os.path.exists(filename):
-            os.remove(filename)
-        HistoryManager.remove_meta(symbol, timeframe)
-        return {"success": False, "error": "No data downloaded or available for the requested range."}
+    from src.downloader import download_history_range
+    with job_slot("download", request):
+        return download_history_range(symbol, timeframe, start_date, end_date, force_extend)
+
+class HistoryDownloadItem(BaseModel):
+    symbol: str = Field(..., example="BTC/USDT")
+    timeframe: str = Field(..., example="1h")
+    start_date: str = Field(..., example="2024-01-01T00:00:00Z")
+    end_date: str = Field(..., example="2024-01-31T23:59:00Z")
+    force_extend: bool = False
+
+class HistoryBatchDownloadRequest(BaseModel):
+    items: List[HistoryDownloadItem]
+    max_workers: int = Field(4, ge=1, le=16, description="Pairs downloaded in parallel")
+
+@app.post("/api/history/download/batch", summary="Download historical data for many symbols/timeframes",
+          description="Plans the missing ranges of every symbol/timeframe from the meta JSON and downloads them concurrently under a shared exchange rate limit. Each series is written once.")
+def download_history_batch(req: HistoryBatchDownloadRequest, request: Request):
+    from src.downloader import download_batch
+    if not req.items:
+        return {"success": False, "error": "No items to download"}
+    with job_slot("download", request):
+        results = download_batch([item.model_dump() for item in req.items], max_workers=req.max_workers)
+    return {"success": all(r.get("success") for r in results), "results": results}
 
 @app.get(
     "/ping",
@@ -6,14 +6,31 @@ This module provides a function to apply a trading strategy to historical OHLCV
 Usage (as a script):
     python -m src.backtest
 
+Histories larger than memory can be processed with stream_backtest, which reads the history in
+fixed-size chunks and writes signals and trades as it goes (also `--chunksize` in the script).
+
+Usage (as a script):
+    python -m src.backtest --strategy cross_sma --history data/history/history_BTC-USDT_1m.csv --chunksize 500000
+
+Registered strategies (src/strategies/<name>/plugin.py) run with their fastest implementation
+through run_strategy, which also keeps only the warm-up bars the strategy declares before the
+requested start date.
+
 Typical usage (as a module):
-    from src.backtest import backtest_strategy
+    from src.backtest import backtest_strategy, run_strategy
     result = backtest_strategy(df, strategy, fast, slow)
+    result = run_strategy(df, 'cross_sma', {'fast': 10, 'slow': 50}, start='2024-01-01')
 """
 import os
+import numpy as np
 import pandas as pd
-from typing import Callable, List
+from typing import Callable, Dict, Iterable, List, Optional
 import logging
+from src.multi_timeframe import base_duration
+from src.signals import codes_to_labels, get_chunked_strategy
+from src.strategies import get_spec
+from src.simulation import TradeSimulator, TRADE_COLUMNS
+from src.timeframes import seconds_to_timeframe
 
 def backtest_strategy(df: pd.DataFrame, strategy: Callable, fast: int, slow: int) -> pd.DataFrame:
     """
@@ -40,12 +57,307 @@ def backtest_strategy(df: pd.DataFrame, strategy: Callable, fast: int, slow: int
     df['signal'] = signals
     return df
 
+def warmup_start(ts: pd.Series, start, warmup: int) -> int:
+    """Row where a run starting at `start` must begin so that `warmup` bars precede it."""
+    first = int(ts.searchsorted(pd.to_datetime(start), side='left'))
+    return max(0, first - warmup)
+
+def warmup_chunks(chunks: Iterable[pd.DataFrame], start, warmup: int) -> Iterable[pd.DataFrame]:
+    """
+    Ts-sorted chunks starting `warmup` rows before the first row at or after `start` (the row
+    warmup_start picks on the whole history), so a streamed run warms up like an in-memory one.
+    """
+    start = pd.to_datetime(start)
+    before = None
+    started = False
+    for chunk in chunks:
+        if started:
+            yield chunk
+            continue
+        first = int(pd.to_datetime(chunk['ts']).searchsorted(start, side='left'))
+        pending = chunk.iloc[:first] if before is None else pd.concat([before, chunk.iloc[:first]])
+        # Solo se guardan las últimas `warmup` velas anteriores a start
+        before = pending.iloc[max(0, len(pending) - warmup):] if warmup else pending.iloc[:0]
+        if first < len(chunk):
+            started = True
+            yield pd.concat([before, chunk.iloc[first:]], ignore_index=True)
+
+def load_strategy_history(symbol: str, timeframe: str, name: str, params: Optional[Dict] = None,
+                          start=None, end=None) -> pd.DataFrame:
+    """
+    Load the stored history a run of a strategy over [start, end] needs: the range itself plus
+    the warm-up bars the strategy declares (an index seek with the SQLite backend).
+    """
+    from src.history_manager import HistoryManager
+    from src.timeframes import candle_offset
+    spec = get_spec(name)
+    since = None
+    if start is not None:
+        since = pd.to_datetime(start) - spec.warmup(params, timeframe) * candle_offset(timeframe)
+    return pd.DataFrame(HistoryManager.load_range(symbol, timeframe, since, end))
+
+def run_strategy(df: pd.DataFrame, name: str, params: Optional[Dict] = None, start=None, end=None,
+                 path: Optional[str] = None, timeframe: Optional[str] = None,
+                 frames: Optional[Dict[str, Dict]] = None) -> pd.DataFrame:
+    """
+    Backtest a registered strategy with its fastest implementation.
+
+    With a start date, only the warm-up bars the strategy declares are kept before it; they
+    feed the indicators and are dropped from the result.
+
+    Args:
+        df (pd.DataFrame): ts-sorted OHLCV history.
+        name (str): Registered strategy name.
+        params (Dict, optional): Strategy parameters (defaults from its declaration).
+        start, end (optional): Date range of the result (inclusive).
+        path (str, optional): Force an implementation ('vectorized', 'chunked', 'incremental'
+            or 'per_bar'); the fastest available by default.
+        timeframe (str, optional): Timeframe of df, for multi-timeframe strategies (inferred
+            from the timestamps when omitted).
+        frames (Dict, optional): Candles of the secondary timeframes ({'1h': {'ts': ..., 'close':
+            ...}}); built from df when omitted.
+
+    Returns:
+        pd.DataFrame: Rows within [start, end] with the 'signal' column.
+    """
+    spec = get_spec(name)
+    params = spec.resolve_params(params)
+    if spec.timeframes and timeframe is None:
+        timeframe = seconds_to_timeframe(int(base_duration(df['ts'].to_numpy()) / np.timedelta64(1, 's')))
+    if start is not None:
+        df = df.iloc[warmup_start(df['ts'], start, spec.warmup(params, timeframe)):]
+    if end is not None:
+        df = df[df['ts'] <= pd.to_datetime(end)]
+    path = path or spec.fastest()
+    close = df['close'].to_numpy(dtype=float)
+    if path == 'vectorized':
+        series = {col: df[col].to_numpy(dtype=float) for col in spec.inputs if col != 'close'}
+        if spec.timeframes:
+            series.update(ts=df['ts'].to_numpy(), timeframe=timeframe, frames=frames)
+        signals = codes_to_labels(spec.load('vectorized')(close, **series, **params))
+    elif path == 'chunked':
+        signals = codes_to_labels(spec.load('chunked')(**params).update(close))
+    elif path == 'incremental':
+        strategy = spec.load('incremental')(**params)
+        signals = [strategy.update(value) for value in close]
+    else:
+        func = spec.load('per_bar')
+        signals = backtest_strategy(df, lambda sub_df, fast, slow: func(sub_df, **params), None, None)['signal']
+    result = df.assign(signal=signals)
+    if start is not None:
+        result = result[result['ts'] >= pd.to_datetime(start)]
+    return result.reset_index(drop=True)
+
+def _date_format(ts: pd.Series) -> str:
+    # pandas writes dates without time when every row is at midnight; decided once per series
+    return '%Y-%m-%d' if (ts == ts.dt.normalize()).all() else '%Y-%m-%d %H:%M:%S'
+
+def _skip_rows(chunks: Iterable[pd.DataFrame], rows: int, last_ts) -> Iterable[pd.DataFrame]:
+    """Chunks after the first `rows` rows, checking that the last skipped row is at `last_ts`."""
+    for chunk in chunks:
+        if rows:
+            skipped = min(rows, len(chunk))
+            rows -= skipped
+            if not rows and pd.Timestamp(chunk['ts'].iloc[skipped - 1]) != pd.Timestamp(last_ts):
+                raise ValueError("The history changed since the checkpoint was written")
+            chunk = chunk.iloc[skipped:]
+            if chunk.empty:
+                continue
+        yield chunk
+    if rows:
+        raise ValueError("The history is shorter than the checkpoint")
+
+def _save_checkpoint(path: str, state: Dict):
+    import pickle
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f)
+    os.replace(tmp, path)
+
+def load_checkpoint(path: str) -> Optional[Dict]:
+    """State saved by stream_backtest at its last chunk boundary (None if there is none)."""
+    import pickle
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def stream_backtest(chunks: Iterable[pd.DataFrame], strategy: str, fast: int, slow: int,
+                    out_path: Optional[str] = None, trades_path: Optional[str] = None,
+                    checkpoint: Optional[str] = None, start=None, **sim_params) -> Dict:
+    """
+    Backtest a crossover strategy over a history delivered in chunks, with bounded memory.
+
+    Indicator and position state are carried across chunk boundaries, and every chunk is written
+    to `out_path` (the OHLCV rows with their 'signal') and its closed trades to `trades_path`
+    before the next one is read, so peak memory depends on the chunk size, not on the history.
+    The files match those of backtest_strategy + simulate_trades on the whole history (SMA lines
+    are recomputed at chunk boundaries and may differ in the last bit, which only matters for
+    exact ties between the two averages).
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Consecutive ts-sorted OHLCV chunks, e.g.
+            HistoryManager.iter_history(...) or pd.read_csv(..., chunksize=n).
+        strategy (str): 'cross_sma' or 'cross_ema'.
+        fast (int): Fast period.
+        slow (int): Slow period.
+        out_path (str, optional): CSV with the backtest rows.
+        trades_path (str, optional): CSV with the closed trades.
+        checkpoint (str, optional): File where the strategy and position state are saved after
+            every chunk. If it exists, the run resumes after the rows it covers (the output
+            files are cut back to that point) instead of starting over; it is deleted at the end.
+        start (optional): First date of the results; earlier rows (e.g. the warm-up bars kept by
+            warmup_chunks) only feed the indicators and are neither simulated nor written.
+        **sim_params: TradeSimulator arguments (max_position_size, stop_loss_pct, fee_pct,
+            slippage_pct, initial_capital).
+
+    Returns:
+        Dict: 'rows' (written), 'start_date', 'end_date' and 'trades' (DataFrame of all closed trades).
+    """
+    signals = get_chunked_strategy(strategy, fast, slow)
+    simulator, date_format = None, None
+    trades: List[pd.DataFrame] = []
+    # consumed: input rows read (warm-up included); rows: rows written
+    consumed, rows, start_date, end_date, last_ts = 0, 0, None, None, None
+    start = pd.to_datetime(start) if start is not None else None
+    state = load_checkpoint(checkpoint)
+    if state is not None:
+        signals, simulator, date_format = state['signals'], state['simulator'], state['date_format']
+        rows, start_date, end_date = state['rows'], state['start_date'], state['end_date']
+        consumed, last_ts = state.get('consumed', rows), state.get('last_ts', end_date)
+        # Lo escrito después del último checkpoint se descarta y se vuelve a calcular
+        for path, size in ((out_path, state['out_size']), (trades_path, state['trades_size'])):
+            if path and os.path.exists(path):
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+        if trades_path and state['trades_size']:
+            trades.append(pd.read_csv(trades_path))
+        chunks = _skip_rows(chunks, consumed, last_ts)
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        if not pd.api.types.is_datetime64_any_dtype(chunk['ts']):
+            chunk = chunk.assign(ts=pd.to_datetime(chunk['ts']))
+        codes = signals.update(chunk['close'].to_numpy(dtype=float))
+        labels = codes_to_labels(codes, first=not consumed)
+        consumed += len(chunk)
+        last_ts = chunk['ts'].iloc[-1]
+        if start is not None and chunk['ts'].iloc[0] < start:
+            # Velas de calentamiento: solo alimentan los indicadores
+            keep = (chunk['ts'] >= start).to_numpy()
+            chunk, labels = chunk[keep].reset_index(drop=True), labels[keep]
+        if not chunk.empty:
+            if simulator is None:
+                date_format = _date_format(chunk['ts'])
+                simulator = TradeSimulator(date_format=date_format, **sim_params)
+            chunk = chunk.assign(signal=labels)
+            chunk_trades = simulator.update(chunk)
+            if out_path:
+                chunk.to_csv(out_path, mode='a' if rows else 'w', header=not rows, index=False, date_format=date_format)
+            if trades_path and (len(chunk_trades) or not trades):
+                chunk_trades.to_csv(trades_path, mode='a' if trades else 'w', header=not trades, index=False)
+            trades.append(chunk_trades)
+            start_date = start_date if start_date is not None else chunk['ts'].iloc[0]
+            end_date = chunk['ts'].iloc[-1]
+            rows += len(chunk)
+        if checkpoint:
+            _save_checkpoint(checkpoint, {
+                'signals': signals, 'simulator': simulator, 'date_format': date_format,
+                'rows': rows, 'consumed': consumed, 'last_ts': last_ts,
+                'start_date': start_date, 'end_date': end_date,
+                'out_size': os.path.getsize(out_path) if out_path and rows else 0,
+                'trades_size': os.path.getsize(trades_path) if trades_path and trades else 0})
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    closed = [t for t in trades if len(t)]
+    return {
+        'rows': rows,
+        'start_date': str(start_date) if start_date is not None else None,
+        'end_date': str(end_date) if end_date is not None else None,
+        'trades': pd.concat(closed, ignore_index=True) if closed else pd.DataFrame(columns=TRADE_COLUMNS),
+    }
+
+def result_filename(strategy: str, symbol: str, timeframe: str, output_dir: Optional[str] = None) -> str:
+    """CSV of the backtest rows of a strategy/symbol/timeframe (trades and summary are saved next to it)."""
+    strategy_dir = os.path.join(output_dir or os.path.join('data', 'strategies'), strategy)
+    return os.path.join(strategy_dir, f"backtest_{symbol.replace('/', '-')}_{timeframe}.csv")
+
+def backtest_summary(trades_df: pd.DataFrame, start_date, end_date, initial_capital: float,
+                     monte_carlo_sims: int = 1000) -> Dict:
+    """
+    Summary of the closed trades of a backtest, as saved in its *_summary.json.
+
+    Args:
+        trades_df (pd.DataFrame): Trades from simulate_trades (or stream_backtest).
+        start_date, end_date: First and last bar of the result (None if it is empty).
+        initial_capital (float): Starting equity.
+        monte_carlo_sims (int): Monte Carlo resamples of the trades (0 disables the robustness report).
+
+    Returns:
+        Dict: Totals, equity and drawdown curves (cumulative profit), robustness and the first 20 trades.
+    """
+    from src.monte_carlo import monte_carlo, robustness_summary
+    trades_list = trades_df.to_dict('records')
+    # Las operaciones abiertas al final se ignoran (salvo que salte el stop-loss)
+    summary = {'total_trades': len(trades_list), 'start_date': start_date, 'end_date': end_date}
+    # Equity curve: acumulado de profits
+    equity_curve = np.cumsum([t['profit'] for t in trades_list]).tolist() if trades_list else []
+    summary['equity_curve'] = equity_curve
+    # Drawdown
+    if equity_curve:
+        peak = np.maximum.accumulate(equity_curve)
+        drawdown = (np.array(equity_curve) - peak).tolist()
+        summary['drawdown_curve'] = drawdown
+        summary['max_drawdown'] = float(np.min(drawdown))
+    else:
+        summary['drawdown_curve'] = []
+        summary['max_drawdown'] = 0.0
+    # Ganancia/pérdida total
+    summary['total_profit'] = float(np.sum([t['profit'] for t in trades_list])) if trades_list else 0.0
+    summary['total_fees'] = float(trades_df['fees'].sum()) if trades_list else 0.0
+    summary['stop_loss_exits'] = int((trades_df['exit_reason'] == 'stop_loss').sum()) if trades_list else 0
+    summary['initial_capital'] = initial_capital
+    summary['final_equity'] = float(trades_df['equity'].iloc[-1]) if trades_list else initial_capital
+    # Robustez: remuestreo Monte Carlo de todos los trades
+    if trades_list and monte_carlo_sims > 0:
+        report = monte_carlo(trades_df['profit'].to_numpy(), n_sims=monte_carlo_sims, initial_capital=initial_capital)
+        summary['robustness'] = robustness_summary(report)
+    # Guardar los primeros 20 trades para tabla
+    summary['trades'] = trades_list[:20]
+    return summary
+
+def save_backtest(out_name: str, result: Optional[pd.DataFrame], trades_df: pd.DataFrame, summary: Dict,
+                  strategy: str, symbol: str, timeframe: str) -> Optional[int]:
+    """
+    Save the result rows (unless None, e.g. already streamed to out_name), trades and summary of
+    a backtest; with the SQLite backend the run is also recorded. Returns the stored run id.
+    """
+    from src.history_manager import HistoryManager
+    from src.serialization import write_json
+    os.makedirs(os.path.dirname(out_name) or '.', exist_ok=True)
+    trades_name = out_name.replace('.csv', '_trades.csv')
+    summary_name = out_name.replace('.csv', '_summary.json')
+    if result is not None:
+        result.to_csv(out_name, index=False)
+        trades_df.to_csv(trades_name, index=False)
+    logging.info(f"Backtest saved to {out_name}")
+    logging.info(f"Trades saved to {trades_name}")
+    write_json(summary_name, summary)
+    logging.info(f"Summary saved to {summary_name}")
+    # Con el backend SQLite, registrar también la ejecución (consultable por estrategia y parámetros)
+    if HistoryManager.backend == 'sqlite':
+        run_id = HistoryManager.get_store().save_backtest(
+            strategy, symbol, timeframe, summary.get('strategy_params', {}), summary, trades_df.to_dict('records'))
+        logging.info(f"Backtest run {run_id} stored in {HistoryManager.get_store().path}")
+        return run_id
+    return None
+
 if __name__ == "__main__":
     import sys
     import argparse
     from src.collector import fetch_ohlcv
-    from src.strategies import get_strategy
-    from src.config import SYMBOL, TIMEFRAME, STRAT_PARAMS
+    from src.config import SYMBOL, TIMEFRAME, STRAT_PARAMS, RISK_PARAMS
+    from src.simulation import simulate_trades
 
     parser = argparse.ArgumentParser()
     parser.add_argument('--strategy', type=str, default='cross_sma')
@@ -59,92 +371,102 @@ if __name__ == "__main__":
     parser.add_argument('--limit', type=int, default=STRAT_PARAMS.get('limit', 100))
     parser.add_argument('--max_position_size', type=float, default=STRAT_PARAMS.get('max_position_size', 0.01))
     parser.add_argument('--stop_loss_pct', type=float, default=STRAT_PARAMS.get('stop_loss_pct', 0.02))
+    parser.add_argument('--fee_pct', type=float, default=RISK_PARAMS.get('fee_pct', 0.001))
+    parser.add_argument('--slippage_pct', type=float, default=RISK_PARAMS.get('slippage_pct', 0.0))
+    parser.add_argument('--initial_capital', type=float, default=RISK_PARAMS.get('initial_capital', 10000.0))
+    parser.add_argument('--monte_carlo_sims', type=int, default=1000, help='Simulaciones Monte Carlo sobre los trades (0 = desactivar)')
     parser.add_argument('--output-dir', type=str, default=None, help='Directorio de salida para los resultados')
-    args = parser.parse_args()
+    parser.add_argument('--chunksize', type=int, default=None, help='Procesar el histórico por bloques de N velas (memoria acotada)')
+    parser.add_argument('--checkpoint', type=str, default=None, help='Con --chunksize: guardar el estado tras cada bloque en este fichero y reanudar desde él')
+    args, unknown = parser.parse_known_args()
+    # Parámetros adicionales de la estrategia (p. ej. los de sus reglas en config.yaml): --nombre valor
+    if len(unknown) % 2 or not all(k.startswith('--') for k in unknown[::2]):
+        parser.error(f"unrecognized arguments: {' '.join(unknown)}")
+    try:
+        declared = get_spec(args.strategy).params
+    except ValueError as e:
+        parser.error(str(e))
+    extra_params = {}
+    for k, v in zip(unknown[::2], unknown[1::2]):
+        if k[2:] not in declared:
+            parser.error(f"unknown parameter {k} for strategy {args.strategy} (declared: {', '.join(declared) or 'none'})")
+        try:
+            extra_params[k[2:]] = float(v)
+        except ValueError:
+            parser.error(f"argument {k}: invalid numeric value: {v!r}")
 
     STRATEGY_NAME = args.strategy
     SYMBOL = args.symbol
     TIMEFRAME = args.timeframe
     fast = args.fast
     slow = args.slow
-    # Puedes usar args.limit, args.max_position_size, args.stop_loss_pct según lo requiera tu lógica
 
+    from src.history_manager import HistoryManager
     HIST_CSV = args.history or "data/historico.csv"
+    # Sin --history se usa el histórico almacenado (fichero CSV o SQLite según HISTORY_BACKEND)
+    STORED = args.history is None and HistoryManager.has_history(SYMBOL, TIMEFRAME)
+    sim_params = {
+        'max_position_size': args.max_position_size,
+        'stop_loss_pct': args.stop_loss_pct,
+        'fee_pct': args.fee_pct,
+        'slippage_pct': args.slippage_pct,
+        'initial_capital': args.initial_capital
+    }
     try:
-        # Cargar o descargar histórico
-        if os.path.exists(HIST_CSV):
-            logging.info(f"Loading historical data from {HIST_CSV}")
-            df = pd.read_csv(HIST_CSV)
-            if 'ts' in df.columns:
-                df['ts'] = pd.to_datetime(df['ts'])
-        else:
-            logging.info("Downloading historical data...")
-            df = fetch_ohlcv(SYMBOL, TIMEFRAME, limit=200)
-            os.makedirs("data", exist_ok=True)
-            df.to_csv(HIST_CSV, index=False)
-            logging.info(f"Data saved to {HIST_CSV}")
-        # Filtrar por fechas si se proporcionan
-        if args.start_date:
-            df = df[df['ts'] >= pd.to_datetime(args.start_date)]
-        if args.end_date:
-            df = df[df['ts'] <= pd.to_datetime(args.end_date)]
-        strategy = get_strategy(STRATEGY_NAME)
-        result = backtest_strategy(df, strategy, fast=fast, slow=slow)
         # === NUEVO: Directorio de salida configurable ===
-        if args.output_dir:
-            strategy_dir = os.path.join(args.output_dir, STRATEGY_NAME)
+        out_name = result_filename(STRATEGY_NAME, SYMBOL, TIMEFRAME, args.output_dir)
+        os.makedirs(os.path.dirname(out_name), exist_ok=True)
+        trades_name = out_name.replace('.csv', '_trades.csv')
+        if args.chunksize:
+            # Modo streaming: el histórico se procesa por bloques y los resultados se escriben sobre la marcha
+            from src.history_manager import filter_chunks
+            from src.timeframes import candle_offset
+            # Como en memoria: las velas de calentamiento anteriores a start_date alimentan los indicadores
+            warmup = get_spec(STRATEGY_NAME).warmup({'fast': fast, 'slow': slow, **extra_params}, TIMEFRAME)
+            if not STORED and os.path.exists(HIST_CSV):
+                logging.info(f"Streaming historical data from {HIST_CSV}")
+                chunks = filter_chunks(pd.read_csv(HIST_CSV, parse_dates=['ts'], chunksize=args.chunksize),
+                                       None, args.end_date)
+            else:
+                since = None
+                if args.start_date:
+                    since = pd.to_datetime(args.start_date) - warmup * candle_offset(TIMEFRAME)
+                chunks = HistoryManager.iter_history(SYMBOL, TIMEFRAME, args.chunksize, since, args.end_date)
+            if args.start_date:
+                chunks = warmup_chunks(chunks, args.start_date, warmup)
+            streamed = stream_backtest(chunks, STRATEGY_NAME, fast, slow, out_name, trades_name,
+                                       checkpoint=args.checkpoint, start=args.start_date, **sim_params)
+            trades_df = streamed['trades']
+            start_date, end_date = streamed['start_date'], streamed['end_date']
         else:
-            strategy_dir = os.path.join('data', 'strategies', STRATEGY_NAME)
-        os.makedirs(strategy_dir, exist_ok=True)
-        out_name = os.path.join(strategy_dir, f"backtest_{SYMBOL.replace('/', '-')}_{TIMEFRAME}.csv")
-        summary_name = out_name.replace('.csv', '_summary.json')
+            # Cargar o descargar histórico
+            if STORED:
+                logging.info(f"Loading stored history of {SYMBOL} {TIMEFRAME} ({HistoryManager.backend})")
+                df = load_strategy_history(SYMBOL, TIMEFRAME, STRATEGY_NAME, {'fast': fast, 'slow': slow, **extra_params},
+                                           args.start_date, args.end_date)
+            elif os.path.exists(HIST_CSV):
+                logging.info(f"Loading historical data from {HIST_CSV}")
+                df = pd.read_csv(HIST_CSV)
+                if 'ts' in df.columns:
+                    df['ts'] = pd.to_datetime(df['ts'])
+            else:
+                logging.info("Downloading historical data...")
+                df = fetch_ohlcv(SYMBOL, TIMEFRAME, limit=200)
+                os.makedirs("data", exist_ok=True)
+                df.to_csv(HIST_CSV, index=False)
+                logging.info(f"Data saved to {HIST_CSV}")
+            if 'ts' in df.columns and not df['ts'].is_monotonic_increasing:
+                df = df.sort_values('ts').reset_index(drop=True)
+            # Filtrar por fechas (conservando las velas de calentamiento que declara la estrategia)
+            result = run_strategy(df, STRATEGY_NAME, {'fast': fast, 'slow': slow, **extra_params}, args.start_date,
+                                  args.end_date, timeframe=TIMEFRAME)
+            # Simular operaciones con tamaño de posición, stop-loss, comisiones y slippage
+            trades_df = simulate_trades(result, **sim_params)
+            start_date = str(result['ts'].iloc[0]) if not result.empty else None
+            end_date = str(result['ts'].iloc[-1]) if not result.empty else None
         # === NUEVO: Guardar resumen JSON ===
-        import numpy as np
-        import json
-        summary = {}
-        # Emparejar señales BUY/SELL para calcular trades completos
-        trades_list = []
-        open_trade = None
-        for idx, row in result.iterrows():
-            if row['signal'] == 'BUY' and open_trade is None:
-                open_trade = {
-                    'entry_time': str(row['ts']),
-                    'entry_price': float(row['close']),
-                    'entry_idx': idx
-                }
-            elif row['signal'] == 'SELL' and open_trade is not None:
-                trade = {
-                    'entry_time': open_trade['entry_time'],
-                    'entry_price': open_trade['entry_price'],
-                    'exit_time': str(row['ts']),
-                    'exit_price': float(row['close']),
-                    'profit': float(row['close']) - open_trade['entry_price']
-                }
-                trades_list.append(trade)
-                open_trade = None
-        # Si queda una operación abierta al final, la ignoramos (o podrías cerrarla al último precio)
-        summary['total_trades'] = len(trades_list)
-        summary['start_date'] = str(result['ts'].iloc[0]) if not result.empty else None
-        summary['end_date'] = str(result['ts'].iloc[-1]) if not result.empty else None
-        summary['symbol'] = SYMBOL
-        summary['timeframe'] = TIMEFRAME
-        summary['strategy'] = STRATEGY_NAME
-        # Equity curve: acumulado de profits
-        equity_curve = np.cumsum([t['profit'] for t in trades_list]).tolist() if trades_list else []
-        summary['equity_curve'] = equity_curve
-        # Drawdown
-        if equity_curve:
-            peak = np.maximum.accumulate(equity_curve)
-            drawdown = (np.array(equity_curve) - peak).tolist()
-            summary['drawdown_curve'] = drawdown
-            summary['max_drawdown'] = float(np.min(drawdown))
-        else:
-            summary['drawdown_curve'] = []
-            summary['max_drawdown'] = 0.0
-        # Ganancia/pérdida total
-        summary['total_profit'] = float(np.sum([t['profit'] for t in trades_list])) if trades_list else 0.0
-        # Guardar los primeros 20 trades para tabla
-        summary['trades'] = trades_list[:20]
+        summary = backtest_summary(trades_df, start_date, end_date, args.initial_capital, args.monte_carlo_sims)
+        summary.update({'symbol': SYMBOL, 'timeframe': TIMEFRAME, 'strategy': STRATEGY_NAME})
         # Parámetros de la estrategia
         summary['strategy_params'] = {
             'fast': fast,
@@ -152,15 +474,14 @@ if __name__ == "__main__":
             'limit': getattr(args, 'limit', None),
             'max_position_size': getattr(args, 'max_position_size', None),
             'stop_loss_pct': getattr(args, 'stop_loss_pct', None),
+            'fee_pct': getattr(args, 'fee_pct', None),
+            'slippage_pct': getattr(args, 'slippage_pct', None),
             'start_date': getattr(args, 'start_date', None),
-            'end_date': getattr(args, 'end_date', None)
+            'end_date': getattr(args, 'end_date', None),
+            **extra_params
         }
     except Exception as e:
         logging.error(f"Critical error in backtest script: {e}")
         raise
-    # Guardar archivos solo si todo fue exitoso (fuera del try)
-    result.to_csv(out_name, index=False)
-    logging.info(f"Backtest saved to {out_name}")
-    with open(summary_name, 'w', encoding='utf-8') as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
-    logging.info(f"Summary saved to {summary_name}")
+    # Guardar archivos solo si todo fue exitoso (fuera del try); en modo streaming ya están escritos
+    save_backtest(out_name, None if args.chunksize else result, trades_df, summary, STRATEGY_NAME, SYMBOL, TIMEFRAME)
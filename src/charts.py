@@ -0,0 +1,199 @@
+"""
+Chart data with bounded payloads.
+
+Candles are served from an OHLC pyramid: aggregation levels of the history (every `factor`
+candles merged into one, then `factor` of those, ...) built once per dataset version, so any
+time range is answered by slicing the finest level that fits the point budget. Lines (equity,
+drawdown) are downsampled with LTTB (Largest-Triangle-Three-Buckets), which keeps the visual
+peaks and troughs of the curve.
+
+Timestamps are returned as epoch milliseconds, the format chart libraries take directly.
+
+Typical usage (as a module):
+    from src.charts import ohlcv_chart, backtest_chart
+    candles = ohlcv_chart('BTC/USDT', '1m', start='2024-01-01', end='2024-12-31', max_points=1000)
+    lines = backtest_chart('cross_sma', 'BTC/USDT', '1m', max_points=1000)
+"""
+import os
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_FACTOR = 4
+# Levels stop being aggregated below this many candles
+MIN_LEVEL_SIZE = 256
+STRATEGIES_DIR = os.path.join('data', 'strategies')
+
+def to_ms(ts) -> np.ndarray:
+    """Epoch milliseconds of datetime-like values."""
+    return np.asarray(ts, dtype='datetime64[ms]').astype(np.int64)
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are kept; every bucket in between keeps the point forming the
+    largest triangle with the point kept in the previous bucket and the average of the next one.
+
+    Args:
+        x (np.ndarray): Increasing x values (e.g. epoch milliseconds).
+        y (np.ndarray): y values.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted indices of the kept points.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= n_out:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1], dtype=np.int64)[:max(n_out, 0)]
+    edges = np.r_[(np.arange(n_out - 2) * (n - 2) / (n_out - 2)).astype(np.int64) + 1, n - 1, n]
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_x = x[end:edges[i + 2]].mean()
+        next_y = y[end:edges[i + 2]].mean()
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.nanargmax(area)) if not np.isnan(area).all() else start
+        kept[i + 1] = a
+    return kept
+
+def _aggregate(level: Dict[str, np.ndarray], factor: int) -> Dict[str, np.ndarray]:
+    bounds = np.arange(0, len(level['ts']), factor)
+    last = np.r_[bounds[1:] - 1, len(level['ts']) - 1]
+    result = {'ts': level['ts'][bounds], 'open': level['open'][bounds], 'close': level['close'][last],
+              'high': np.maximum.reduceat(level['high'], bounds), 'low': np.minimum.reduceat(level['low'], bounds)}
+    if 'volume' in level:
+        result['volume'] = np.add.reduceat(level['volume'], bounds)
+    return result
+
+class OHLCPyramid:
+    """
+    Multi-resolution OHLC levels of one history.
+
+    Level k merges factor**k consecutive candles (opening at the time of the first one).
+
+    Args:
+        data (Dict[str, np.ndarray]): ts-sorted 'ts', 'open', 'high', 'low', 'close' (and
+            optionally 'volume') arrays.
+        factor (int): Candles merged per level step.
+    """
+    def __init__(self, data: Dict[str, np.ndarray], factor: int = DEFAULT_FACTOR):
+        if factor < 2:
+            raise ValueError("factor must be at least 2")
+        self.factor = factor
+        level = {'ts': to_ms(data['ts'])}
+        for key in ('open', 'high', 'low', 'close', 'volume'):
+            if data.get(key) is not None:
+                level[key] = np.asarray(data[key], dtype=float)
+        self.levels: List[Dict[str, np.ndarray]] = [level]
+        while len(level['ts']) > MIN_LEVEL_SIZE:
+            level = _aggregate(level, factor)
+            self.levels.append(level)
+
+    def query(self, start=None, end=None, max_points: int = 1000) -> Dict:
+        """
+        Candles of [start, end] from the finest level with at most `max_points` of them.
+
+        Returns:
+            Dict: 'candles_per_point' (base candles merged per returned one), 'ts' (epoch ms)
+            and the OHLC(V) lists.
+        """
+        start_ms = int(to_ms(pd.Timestamp(start).to_datetime64())) if start is not None else None
+        end_ms = int(to_ms(pd.Timestamp(end).to_datetime64())) if end is not None else None
+        for k, level in enumerate(self.levels):
+            lo, hi = self._range(level['ts'], start_ms, end_ms)
+            if hi - lo <= max_points or k == len(self.levels) - 1:
+                break
+        # The coarsest level can still exceed the budget for tiny budgets: stride over it
+        step = max(1, -(-(hi - lo) // max(max_points, 1)))
+        sl = slice(lo, hi, step) if step > 1 else slice(lo, hi)
+        result = {'candles_per_point': self.factor ** k * step}
+        result.update({key: values[sl].tolist() for key, values in level.items()})
+        return result
+
+    @staticmethod
+    def _range(ts: np.ndarray, start_ms: Optional[int], end_ms: Optional[int]) -> Tuple[int, int]:
+        # The merged candle containing `start` is included
+        lo = max(0, int(np.searchsorted(ts, start_ms, side='right')) - 1) if start_ms is not None else 0
+        hi = int(np.searchsorted(ts, end_ms, side='right')) if end_ms is not None else len(ts)
+        return lo, max(lo, hi)
+
+_PYRAMIDS: Dict[Tuple[str, str], Tuple[object, OHLCPyramid]] = {}
+_LOCK = threading.Lock()
+
+def get_pyramid(symbol: str, timeframe: str) -> OHLCPyramid:
+    """Pyramid of a stored history, rebuilt when the dataset cache loads a new version."""
+    from src.history_manager import HistoryManager
+    data = HistoryManager.load_arrays(symbol, timeframe)
+    with _LOCK:
+        cached = _PYRAMIDS.get((symbol, timeframe))
+        if cached is not None and cached[0] is data['ts']:
+            return cached[1]
+    pyramid = OHLCPyramid(data)
+    with _LOCK:
+        _PYRAMIDS[(symbol, timeframe)] = (data['ts'], pyramid)
+    return pyramid
+
+def ohlcv_chart(symbol: str, timeframe: str, start=None, end=None, max_points: int = 1000) -> Dict:
+    """Candles of a stored history for a time range within a point budget."""
+    return get_pyramid(symbol, timeframe).query(start, end, max_points)
+
+def downsample_line(ts: np.ndarray, values: np.ndarray, max_points: int) -> Dict:
+    """LTTB-downsampled line as {'ts': [...], 'values': [...]}."""
+    ts = to_ms(ts)
+    kept = lttb(ts, values, max_points)
+    return {'ts': ts[kept].tolist(), 'values': np.asarray(values, dtype=float)[kept].tolist()}
+
+def _in_range(ts: pd.Series, start, end) -> pd.Series:
+    mask = pd.Series(True, index=ts.index)
+    if start is not None:
+        mask &= ts >= pd.Timestamp(start)
+    if end is not None:
+        mask &= ts <= pd.Timestamp(end)
+    return mask
+
+def backtest_chart(strategy: str, symbol: str, timeframe: str, start=None, end=None,
+                   max_points: int = 1000, base_dir: str = STRATEGIES_DIR) -> Dict:
+    """
+    Signals, equity and drawdown of the last backtest of a strategy, for a time range.
+
+    Args:
+        strategy (str): Strategy name.
+        symbol (str): Trading pair.
+        timeframe (str): Candle timeframe.
+        start, end (optional): Time range (inclusive).
+        max_points (int): Point budget of each returned series.
+        base_dir (str): Folder with the per-strategy backtest outputs.
+
+    Returns:
+        Dict: 'signals' ({'ts', 'signal', 'price'}, thinned evenly beyond the budget),
+        'equity' and 'drawdown' (LTTB lines over the trade exits).
+    """
+    if not strategy or os.path.basename(strategy) != strategy or strategy.startswith('.'):
+        raise ValueError(f"Invalid strategy name: {strategy}")
+    out_path = os.path.join(base_dir, strategy, f"backtest_{symbol.replace('/', '-')}_{timeframe}.csv")
+    trades_path = out_path.replace('.csv', '_trades.csv')
+    if not os.path.exists(out_path):
+        raise FileNotFoundError(f"Backtest results not found: {out_path}")
+    result = pd.read_csv(out_path, usecols=['ts', 'close', 'signal'], parse_dates=['ts'])
+    signals = result[_in_range(result['ts'], start, end) & result['signal'].isin(['BUY', 'SELL'])]
+    if len(signals) > max_points:
+        signals = signals.iloc[np.linspace(0, len(signals) - 1, max_points).astype(np.int64)]
+    chart = {'signals': {'ts': to_ms(signals['ts']).tolist(), 'signal': signals['signal'].tolist(),
+                         'price': signals['close'].tolist()},
+             'equity': {'ts': [], 'values': []}, 'drawdown': {'ts': [], 'values': []}}
+    if os.path.exists(trades_path):
+        trades = pd.read_csv(trades_path, usecols=['exit_time', 'equity'], parse_dates=['exit_time'])
+        trades = trades[_in_range(trades['exit_time'], start, end)]
+        equity = trades['equity'].to_numpy(dtype=float)
+        drawdown = equity - np.maximum.accumulate(equity) if len(equity) else equity
+        chart['equity'] = downsample_line(trades['exit_time'], equity, max_points)
+        chart['drawdown'] = downsample_line(trades['exit_time'], drawdown, max_points)
+    return chart
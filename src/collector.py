@@ -48,9 +48,9 @@ def fetch_ohlcv(symbol, timeframe, limit=100, since=None):
     max_per_call = exchange.rateLimit if hasattr(exchange, 'rateLimit') else 1000
     max_per_call = 1000  # Binance max
     fetched = 0
+    # 'since' is already an exchange timestamp (candle open time): shifting it by the clock
+    # offset would skip the first candle when the server clock is ahead
     since_ms = int(since.timestamp() * 1000) if since else None
-    if since_ms is not None:
-        since_ms += time_offset
     while fetched < limit:
         fetch_limit = min(max_per_call, limit - fetched)
         data = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since_ms, limit=fetch_limit)
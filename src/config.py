@@ -27,3 +27,6 @@ STRAT_PARAMS = cfg["strategy"]["params"]
 LIMIT = STRAT_PARAMS.get("limit", 50)
 
 RISK_PARAMS  = cfg["risk"]
+
+# Universo del escáner (python -m src.run --scan)
+SCAN_SYMBOLS = (cfg.get("scanner") or {}).get("symbols") or [SYMBOL]
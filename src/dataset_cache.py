@@ -0,0 +1,124 @@
+"""
+Process-wide cache of parsed OHLCV histories.
+
+Histories are kept as read-only NumPy arrays per (symbol, timeframe) under a memory budget,
+with least-recently-used eviction. Every hit checks a cheap signature of the stored series
+(path, size and mtime of a CSV file; database and first/last candle for SQLite), so a history updated by another
+process is reloaded; writes through HistoryManager invalidate their entry directly.
+
+Typical usage (as a module):
+    from src.dataset_cache import get_dataset_cache
+    data = get_dataset_cache().get('BTC/USDT', '1m')   # {'ts': ..., 'close': ...}
+"""
+import logging
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+DEFAULT_MAX_MB = 512
+COLUMNS = ('ts', 'open', 'high', 'low', 'close', 'volume')
+
+class DatasetCache:
+    """
+    LRU cache of history arrays bounded by `max_bytes`.
+
+    Args:
+        max_bytes (int): Memory budget of the cached arrays; a dataset larger than the whole
+            budget is returned without being cached.
+        loader (Callable): (symbol, timeframe) -> Dict[str, np.ndarray], from storage.
+        signature (Callable): (symbol, timeframe) -> hashable version of the stored series.
+    """
+    def __init__(self, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024,
+                 loader: Optional[Callable] = None, signature: Optional[Callable] = None):
+        self.max_bytes = max_bytes
+        self.loader = loader or _load_from_storage
+        self.signature = signature or _storage_signature
+        self.entries: 'OrderedDict[Tuple[str, str], Dict]' = OrderedDict()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self.lock = threading.RLock()
+
+    def get(self, symbol: str, timeframe: str) -> Dict[str, np.ndarray]:
+        """Return the history arrays of a symbol/timeframe, loading them on a miss."""
+        key = (symbol, timeframe)
+        version = self.signature(symbol, timeframe)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry['version'] == version:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry['data']
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+        data = self.loader(symbol, timeframe)
+        for array in data.values():
+            array.flags.writeable = False
+        nbytes = sum(array.nbytes for array in data.values())
+        with self.lock:
+            if nbytes <= self.max_bytes:
+                if key in self.entries:
+                    self._drop(key)
+                self.entries[key] = {'data': data, 'version': version, 'nbytes': nbytes}
+                self.nbytes += nbytes
+                while self.nbytes > self.max_bytes:
+                    self._drop(next(iter(self.entries)))
+                    self.evictions += 1
+        return data
+
+    def _drop(self, key: Tuple[str, str]):
+        self.nbytes -= self.entries.pop(key)['nbytes']
+
+    def invalidate(self, symbol: str, timeframe: str):
+        with self.lock:
+            if (symbol, timeframe) in self.entries:
+                self._drop((symbol, timeframe))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def preload(self, pairs: Iterable[Tuple[str, str]]):
+        """Load hot pairs ahead of the first request; missing histories are skipped."""
+        for symbol, timeframe in pairs:
+            try:
+                self.get(symbol, timeframe)
+            except FileNotFoundError as e:
+                logging.warning(f"[CACHE] Not preloaded: {e}")
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {'datasets': [f"{s} {tf}" for s, tf in self.entries], 'bytes': self.nbytes,
+                    'max_bytes': self.max_bytes, 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions}
+
+def _load_from_storage(symbol: str, timeframe: str) -> Dict[str, np.ndarray]:
+    from src.history_manager import HistoryManager
+    df = HistoryManager.read_history(symbol, timeframe)
+    return {col: df[col].to_numpy(dtype=None if col == 'ts' else float) for col in COLUMNS}
+
+def _storage_signature(symbol: str, timeframe: str):
+    from src.history_manager import HistoryManager
+    if HistoryManager.backend == 'sqlite':
+        store = HistoryManager.get_store()
+        return (store.path, store.date_range(symbol, timeframe))
+    filename = HistoryManager.get_history_file(symbol, timeframe)
+    try:
+        st = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return (filename, st.st_size, st.st_mtime_ns)
+
+_cache: Optional[DatasetCache] = None
+_cache_lock = threading.Lock()
+
+def get_dataset_cache() -> DatasetCache:
+    """Return the process-wide cache (budget from DATASET_CACHE_MB, default 512 MB)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DatasetCache(int(float(os.getenv('DATASET_CACHE_MB', DEFAULT_MAX_MB)) * 1024 * 1024))
+        return _cache
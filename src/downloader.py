@@ -0,0 +1,286 @@
+"""
+History download core.
+
+Plans the ranges missing from the local history of a symbol/timeframe (before and after the
+stored range, never leaving gaps), fetches them page by page from the exchange and stores each
+series with a single write. Every exchange request goes through a RateLimiter shared by all the
+downloads of the process, so batch downloads of many pairs run concurrently while staying
+within the exchange limits.
+
+With a checkpoint folder, every fetched page is saved there as it arrives and a later call with
+the same folder reuses the saved pages, so a download interrupted by an error, a cancellation
+or a restart only fetches the pages it is missing (see src.jobs).
+
+Typical usage (as a module):
+    from src.downloader import download_history_range, download_batch
+    result = download_history_range('BTC/USDT', '1m', '2024-01-01', '2024-01-31')
+    results = download_batch([{'symbol': 'BTC/USDT', 'timeframe': '1h', 'start_date': '2024-01-01', 'end_date': '2024-06-01'}])
+"""
+import os
+import threading
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from src.history_manager import HistoryManager
+from src.jobs import JobCancelled
+from src.timeframes import align_to_candle, candle_offset, is_calendar_timeframe, timeframe_to_timedelta
+
+# Binance allows 6000 request weight per minute; stay well below to leave room for other clients
+WEIGHT_PER_MINUTE = 1200
+# Each fetch_ohlcv call: klines (weight 2) + server time (weight 1)
+REQUEST_WEIGHT = 3
+MAX_LIMIT = 1000
+
+class RateLimiter:
+    """Thread-safe token bucket of request weight, refilled continuously."""
+    def __init__(self, weight_per_minute: float = WEIGHT_PER_MINUTE):
+        self.capacity = weight_per_minute
+        self.tokens = float(weight_per_minute)
+        self.rate = weight_per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, weight: float = REQUEST_WEIGHT):
+        """Block until `weight` tokens are available and take them."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = (weight - self.tokens) / self.rate
+            time.sleep(wait)
+
+# Budget shared by every download of the process (single and batch endpoints)
+EXCHANGE_LIMITER = RateLimiter()
+
+def _utc(value) -> pd.Timestamp:
+    ts = pd.to_datetime(value)
+    return ts.tz_convert(None) if ts.tzinfo is not None else ts
+
+def plan_missing_ranges(meta: Optional[Dict], req_start: pd.Timestamp, req_end: pd.Timestamp,
+                        timeframe: str, force_extend: bool = False) -> Dict:
+    """
+    Plan the ranges to download so that the stored history grows without gaps.
+
+    The ranges always start (or end) at the edge of the stored range, so a request that
+    extends it by at least one candle on either side, or lies inside it, is accepted and
+    filled without gaps, even if it starts after the last stored candle.
+
+    Returns:
+        Dict: 'ranges' with the 'anterior' (before the stored range) and 'posterior' (after it)
+        ranges to fetch as (start, end) tuples, or 'error' with the gap response when the
+        request is not adjacent to the stored range and force_extend is not set.
+    """
+    if not meta:
+        # Sin datos locales: un único tramo con todo el rango
+        return {'ranges': {'posterior': (req_start, req_end)}}
+    min_date = _utc(meta['min_date'])
+    max_date = _utc(meta['max_date'])
+    candle = candle_offset(timeframe)
+    # Comprobar si el rango solicitado es adyacente
+    adyacente = (
+        req_start <= min_date - candle or
+        req_end >= max_date + candle or
+        (req_start >= min_date and req_end <= max_date)
+    )
+    if not adyacente and not force_extend:
+        # Sugerir el rango correcto
+        new_min = min(req_start, min_date)
+        new_max = max(req_end, max_date)
+        return {'error': {
+            "success": False,
+            "error": "La descarga solicitada provocaría un gap en los datos. Solo se permiten descargas adyacentes al rango actual.",
+            "current_min_date": min_date.isoformat(),
+            "current_max_date": max_date.isoformat(),
+            "suggested_start_date": new_min.isoformat(),
+            "suggested_end_date": new_max.isoformat(),
+            "force_extend_param": True
+        }}
+    # Si force_extend, ampliar el rango
+    if not adyacente and force_extend:
+        req_start = min(req_start, min_date)
+        req_end = max(req_end, max_date)
+    ranges = {}
+    # Tramo anterior si es necesario
+    if req_start < min_date:
+        ranges['anterior'] = (req_start, min_date - candle)
+    # Tramo posterior si es necesario
+    if req_end > max_date:
+        ranges['posterior'] = (max_date + candle, req_end)
+    return {'ranges': ranges}
+
+def plan_pages(fetch_start: pd.Timestamp, fetch_end: pd.Timestamp, timeframe: str,
+               max_limit: int = MAX_LIMIT) -> List[Tuple[pd.Timestamp, int]]:
+    """
+    Plan the exact requests that cover the candles opening within [fetch_start, fetch_end].
+
+    Returns:
+        List[Tuple[pd.Timestamp, int]]: (since, limit) of every page; since is a candle open
+        time and limits add up to the number of candles in the range.
+    """
+    first = align_to_candle(fetch_start, timeframe)
+    if first > fetch_end:
+        return []
+    if is_calendar_timeframe(timeframe):
+        opens = pd.date_range(first, fetch_end, freq=candle_offset(timeframe))
+        return [(opens[i], min(max_limit, len(opens) - i)) for i in range(0, len(opens), max_limit)]
+    tf = timeframe_to_timedelta(timeframe)
+    count = (fetch_end - first) // tf + 1
+    return [(first + i * tf, min(max_limit, count - i)) for i in range(0, count, max_limit)]
+
+def _page_file(checkpoint: str, symbol: str, timeframe: str, since: pd.Timestamp, limit: int) -> str:
+    return os.path.join(checkpoint, f"{symbol.replace('/', '-')}_{timeframe}_{since.value}_{limit}.pkl")
+
+def fetch_range(symbol: str, timeframe: str, fetch_start: pd.Timestamp, fetch_end: pd.Timestamp,
+                fetch=None, limiter: Optional[RateLimiter] = None, progress: Optional[Dict] = None,
+                checkpoint: Optional[str] = None, on_page: Optional[Callable[[Dict], None]] = None) -> Optional[pd.DataFrame]:
+    """
+    Fetch a range with the pages of plan_pages, waiting on the rate limiter before every request.
+
+    Args:
+        progress (Dict, optional): Updated in place with 'total_pages' (known up front),
+            'completed_pages' and 'reused_pages' (read from the checkpoint).
+        checkpoint (str, optional): Folder where fetched pages are saved and reused from.
+        on_page (Callable, optional): Called with `progress` before every page; it may raise
+            JobCancelled to stop the download.
+
+    Returns:
+        pd.DataFrame: Candles within [fetch_start, fetch_end], or None if nothing was returned.
+    """
+    if fetch is None:
+        from src.collector import fetch_ohlcv as fetch
+    limiter = limiter or EXCHANGE_LIMITER
+    progress = progress if progress is not None else {}
+    plan = plan_pages(fetch_start, fetch_end, timeframe)
+    progress['total_pages'] = len(plan)
+    progress['completed_pages'] = progress['reused_pages'] = 0
+    if checkpoint:
+        os.makedirs(checkpoint, exist_ok=True)
+    pages = []
+    for since, limit in plan:
+        if on_page is not None:
+            on_page(progress)
+        page_file = _page_file(checkpoint, symbol, timeframe, since, limit) if checkpoint else None
+        if page_file and os.path.exists(page_file):
+            df = pd.read_pickle(page_file)
+            progress['reused_pages'] += 1
+        else:
+            limiter.acquire()
+            df = fetch(symbol, timeframe, limit, since=since)
+            if df is None or df.empty:
+                # The exchange has nothing from here on
+                break
+            if page_file:
+                df.to_pickle(f"{page_file}.tmp")
+                os.replace(f"{page_file}.tmp", page_file)
+        pages.append(df)
+        progress['completed_pages'] += 1
+    if not pages:
+        return None
+    df = pd.concat(pages, ignore_index=True).drop_duplicates(subset=['ts'])
+    df = df[(df['ts'] >= fetch_start) & (df['ts'] <= fetch_end)]
+    return df if not df.empty else None
+
+def download_history_range(symbol: str, timeframe: str, start_date, end_date, force_extend: bool = False,
+                           fetch=None, limiter: Optional[RateLimiter] = None, checkpoint: Optional[str] = None,
+                           on_page: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Download the missing part of [start_date, end_date] for a symbol/timeframe and store it.
+
+    The new candles of both sides are merged into the stored history with a single write, and
+    the meta JSON is updated to the full available range. `checkpoint` and `on_page` as in
+    fetch_range (the progress also has the 'side' being fetched); a JobCancelled raised by
+    on_page is propagated instead of being reported in the result.
+
+    Returns:
+        Dict: The response of POST /api/history/download ('success', dates and page progress,
+        or 'error').
+    """
+    symbol = symbol.replace('-', '/')
+    filename = HistoryManager.get_history_file(symbol, timeframe)
+    meta = HistoryManager.get_meta(symbol, timeframe)
+    plan = plan_missing_ranges(meta, _utc(start_date), _utc(end_date), timeframe, force_extend)
+    if 'error' in plan:
+        return plan['error']
+    dfs = []
+    response = {}
+    for side, (fetch_start, fetch_end) in plan['ranges'].items():
+        progress = {'side': side}
+        try:
+            df = fetch_range(symbol, timeframe, fetch_start, fetch_end, fetch, limiter, progress, checkpoint, on_page)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            label = 'previous' if side == 'anterior' else 'next'
+            return {"success": False, "error": f"Error downloading {label} data: {e}",
+                    f"{side}_total_pages": progress.get('total_pages', 0),
+                    f"{side}_completed_pages": progress.get('completed_pages', 0)}
+        response[f"{side}_total_pages"] = progress['total_pages']
+        response[f"{side}_completed_pages"] = progress['completed_pages']
+        if df is None:
+            return dict({"success": False, "error": f"No data downloaded for requested range {fetch_start} to {fetch_end} ({side})."},
+                        **{k: v for k, v in response.items() if k.startswith(side)})
+        dfs.append(df)
+    pages = {f"{side}_{key}": response.get(f"{side}_{key}", 0)
+             for side in ('anterior', 'posterior') for key in ('total_pages', 'completed_pages')}
+    # Guardar solo los tramos nuevos: el almacenamiento los une con los datos locales (NO recortar al rango solicitado)
+    if dfs:
+        try:
+            dates = HistoryManager.save_history(symbol, timeframe, pd.concat(dfs, ignore_index=True))
+        except Exception as e:
+            return {"success": False, "error": f"Error saving history: {e}"}
+        if dates is None:
+            return {"success": False, "error": "No data available for the requested range."}
+        # Meta actualizada al rango total disponible
+        return dict({"success": True, "updated": True, "history_file": filename,
+                     "min_date": dates[0].isoformat(), "max_date": dates[1].isoformat()}, **pages)
+    if meta:
+        return dict({"success": False, "updated": False,
+                     "error": "No new data was added. Local file already covers the requested range."}, **pages)
+    # Si existe el archivo pero no hay datos, lo eliminamos
+    HistoryManager.delete_history(symbol, timeframe)
+    HistoryManager.remove_meta(symbol, timeframe)
+    return {"success": False, "error": "No data downloaded or available for the requested range."}
+
+def download_batch(items: Sequence[Dict], max_workers: int = 4, fetch=None,
+                   limiter: Optional[RateLimiter] = None) -> List[Dict]:
+    """
+    Download many symbol/timeframe ranges concurrently under one rate-limit budget.
+
+    Items of the same pair are merged into one range (their union), so each series is planned,
+    fetched and written once.
+
+    Args:
+        items (Sequence[Dict]): 'symbol', 'timeframe', 'start_date', 'end_date' and optional
+            'force_extend'.
+        max_workers (int): Pairs downloaded in parallel.
+
+    Returns:
+        List[Dict]: One download result per pair, with its 'symbol' and 'timeframe'.
+    """
+    pairs: Dict = {}
+    for item in items:
+        key = (item['symbol'].replace('-', '/'), item['timeframe'])
+        start, end = _utc(item['start_date']), _utc(item['end_date'])
+        if key in pairs:
+            prev = pairs[key]
+            start, end = min(start, prev['start']), max(end, prev['end'])
+            force_extend = prev['force_extend'] or item.get('force_extend', False)
+        else:
+            force_extend = item.get('force_extend', False)
+        pairs[key] = {'start': start, 'end': end, 'force_extend': force_extend}
+
+    def run(key):
+        spec = pairs[key]
+        try:
+            result = download_history_range(*key, spec['start'], spec['end'], spec['force_extend'], fetch, limiter)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        return dict({'symbol': key[0], 'timeframe': key[1]}, **result)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return list(pool.map(run, pairs))
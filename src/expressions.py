@@ -0,0 +1,355 @@
+"""
+Strategy expression language.
+
+Rules such as `cross_over(ema(close, fast), ema(close, slow)) and close > 100` are parsed once
+and compiled, for a given set of parameter values, into a DAG of vectorized operations. Equal
+subexpressions become one node, so `ema(close, slow)` used by the buy and the sell rule is
+computed once. Evaluating the DAG runs one NumPy/pandas pass per node over the whole series
+(or time x symbol array), without per-bar Python.
+
+Grammar (Python expression syntax, AND/OR/NOT accepted in any case):
+    series      open, high, low, close, volume
+    names       strategy parameters (e.g. fast, slow), replaced by their values
+    arithmetic  + - * / and unary -
+    comparison  > >= < <= == != (chained comparisons allowed)
+    logic       and, or, not
+    functions   sma(x, n), ema(x, n), highest(x, n), lowest(x, n), prev(x, n=1), abs(x),
+                min(a, b), max(a, b), cross_over(a, b), cross_under(a, b)
+    timeframes  tf('1h', x) evaluates x on 1h candles (built from the base candles unless given)
+                and forward-fills it onto the base candles without look-ahead (src.multi_timeframe)
+
+Typical usage (as a module):
+    rules = RuleStrategy(buy='cross_over(ema(close, fast), ema(close, slow))',
+                         sell='cross_under(ema(close, fast), ema(close, slow))')
+    codes = rules(close, fast=10, slow=50)   # int8: 1 = BUY, -1 = SELL, 0 = HOLD
+"""
+import ast
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+from src.indicators import sma, ema, crossover
+from src.multi_timeframe import align_asof, resample_ohlcv
+from src.strategies import StrategySpec
+from src.timeframes import candle_offset, timeframe_to_seconds
+
+SERIES = ('open', 'high', 'low', 'close', 'volume')
+
+def _rolling(values: np.ndarray, length: int, how: str) -> np.ndarray:
+    frame = pd.DataFrame(np.asarray(values, dtype=float).reshape(len(values), -1))
+    result = getattr(frame.rolling(length, min_periods=length), how)().to_numpy()
+    return result.reshape(np.shape(values))
+
+def _prev(values: np.ndarray, length: int) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    result = np.full(values.shape, np.nan)
+    if length < len(values):
+        result[length:] = values[:len(values) - length]
+    return result
+
+# name -> (implementation, number of series arguments, number of window arguments, window default)
+FUNCTIONS = {
+    'sma': (sma, 1, 1, None),
+    'ema': (ema, 1, 1, None),
+    'highest': (lambda x, n: _rolling(x, n, 'max'), 1, 1, None),
+    'lowest': (lambda x, n: _rolling(x, n, 'min'), 1, 1, None),
+    'prev': (_prev, 1, 1, 1),
+    'abs': (np.abs, 1, 0, None),
+    'min': (np.fmin, 2, 0, None),
+    'max': (np.fmax, 2, 0, None),
+    'cross_over': (lambda a, b: crossover(a, b) == 1, 2, 0, None),
+    'cross_under': (lambda a, b: crossover(a, b) == -1, 2, 0, None),
+}
+
+OPERATORS = {
+    'add': np.add, 'sub': np.subtract, 'mul': np.multiply, 'div': np.divide, 'neg': np.negative,
+    'gt': np.greater, 'ge': np.greater_equal, 'lt': np.less, 'le': np.less_equal,
+    'eq': np.equal, 'ne': np.not_equal, 'and': np.logical_and, 'or': np.logical_or, 'not': np.logical_not,
+}
+_AST_OPS = {
+    ast.Add: 'add', ast.Sub: 'sub', ast.Mult: 'mul', ast.Div: 'div',
+    ast.Gt: 'gt', ast.GtE: 'ge', ast.Lt: 'lt', ast.LtE: 'le', ast.Eq: 'eq', ast.NotEq: 'ne',
+    ast.And: 'and', ast.Or: 'or',
+}
+
+def parse(text: str) -> ast.Expression:
+    """Parse a rule and check that it only uses the supported syntax."""
+    source = re.sub(r'\b(AND|OR|NOT)\b', lambda m: m.group(1).lower(), text.strip())
+    try:
+        tree = ast.parse(source, mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression '{text}': {e.msg}") from None
+    allowed = (ast.Expression, ast.Call, ast.Name, ast.Load, ast.Constant, ast.BinOp, ast.UnaryOp,
+               ast.BoolOp, ast.Compare, ast.USub, ast.Not, *_AST_OPS)
+    timeframe_args = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, allowed):
+            raise ValueError(f"Unsupported syntax in '{text}': {type(node).__name__}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.keywords:
+                raise ValueError(f"Only plain function calls are supported in '{text}'")
+            if node.func.id == 'tf':
+                if len(node.args) != 2 or not isinstance(node.args[0], ast.Constant) \
+                        or not isinstance(node.args[0].value, str):
+                    raise ValueError(f"tf() takes a timeframe string and an expression in '{text}'")
+                candle_offset(node.args[0].value)
+                if _timeframes(node.args[1]):
+                    raise ValueError(f"Nested tf() calls are not supported in '{text}'")
+                timeframe_args.add(id(node.args[0]))
+                continue
+            if node.func.id not in FUNCTIONS:
+                raise ValueError(f"Unknown function: {node.func.id}")
+            _, n_series, n_windows, default = FUNCTIONS[node.func.id]
+            if len(node.args) != n_series + n_windows and not (default is not None and len(node.args) == n_series):
+                raise ValueError(f"{node.func.id}() takes {n_series + n_windows} arguments, got {len(node.args)}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)) \
+                and id(node) not in timeframe_args:
+            raise ValueError(f"Only numeric constants are supported in '{text}'")
+    return tree
+
+def _timeframes(tree: ast.AST) -> List[str]:
+    """Timeframes of the tf() calls in a parsed rule."""
+    return [node.args[0].value for node in ast.walk(tree)
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'tf']
+
+class Graph:
+    """
+    DAG of vectorized operations in topological order.
+
+    Nodes are (op, children, args) keys; adding an existing key returns its id, so common
+    subexpressions are shared.
+    """
+    def __init__(self):
+        self.nodes: List[Tuple] = []
+        self.ids: Dict[Tuple, int] = {}
+        self.lookbacks: List[int] = []
+
+    def add(self, op: str, children: Tuple[int, ...] = (), args: Tuple = ()) -> int:
+        key = (op, children, args)
+        if key not in self.ids:
+            self.ids[key] = len(self.nodes)
+            self.nodes.append(key)
+            self.lookbacks.append(_node_lookback(op, [self.lookbacks[c] for c in children], args))
+        return self.ids[key]
+
+    def evaluate(self, data: Dict[str, np.ndarray], outputs: List[int],
+                 frames: Optional[Dict[str, Dict]] = None) -> List[np.ndarray]:
+        values: List = []
+        for op, children, args in self.nodes:
+            if op == 'series':
+                name, timeframe = args
+                source = data if timeframe is None else frames[timeframe]
+                if source.get(name) is None:
+                    raise ValueError(f"Expression needs the '{name}' series" + (f" on {timeframe}" if timeframe else ''))
+                values.append(np.asarray(source[name], dtype=float))
+            elif op == 'align':
+                values.append(align_asof(data['ts'], frames[args[0]]['ts'], values[children[0]], args[0],
+                                         data.get('timeframe')))
+            elif op == 'const':
+                values.append(args[0])
+            elif op in FUNCTIONS:
+                values.append(FUNCTIONS[op][0](*(values[c] for c in children), *args))
+            else:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    values.append(OPERATORS[op](*(values[c] for c in children)))
+        return [values[i] for i in outputs]
+
+def _node_lookback(op: str, children: List[int], args: Tuple) -> int:
+    """Bars before the first valid value of a node."""
+    base = max(children, default=0)
+    if op in ('sma', 'highest', 'lowest'):
+        return base + args[0] - 1
+    if op == 'ema':
+        # Recursive average: three spans for the SMA seed to fade out
+        return base + 3 * args[0] - 1
+    if op == 'prev':
+        return base + args[0]
+    if op in ('cross_over', 'cross_under'):
+        return base + 1
+    if op == 'align':
+        # Counted in bars of its own timeframe (CompiledRules.timeframe_lookbacks)
+        return 0
+    return base
+
+class _Compiler:
+    def __init__(self, graph: Graph, params: Dict):
+        self.graph = graph
+        self.params = params
+        self.timeframe = None
+        self.timeframe_lookbacks: Dict[str, int] = {}
+
+    def window(self, node: ast.AST, name: str) -> int:
+        value = self.constant(node)
+        if value is None or value != int(value) or value < 1:
+            raise ValueError(f"{name}() window must be a positive integer")
+        return int(value)
+
+    def constant(self, node: ast.AST) -> Optional[float]:
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in self.params:
+            return self.params[node.id]
+        return None
+
+    def visit(self, node: ast.AST) -> int:
+        graph = self.graph
+        if isinstance(node, ast.Expression):
+            return self.visit(node.body)
+        if isinstance(node, ast.Constant):
+            return graph.add('const', args=(float(node.value),))
+        if isinstance(node, ast.Name):
+            if node.id in SERIES:
+                return graph.add('series', args=(node.id, self.timeframe))
+            if node.id not in self.params:
+                raise ValueError(f"Unknown name: {node.id}")
+            return graph.add('const', args=(float(self.params[node.id]),))
+        if isinstance(node, ast.BinOp):
+            return graph.add(_AST_OPS[type(node.op)], (self.visit(node.left), self.visit(node.right)))
+        if isinstance(node, ast.UnaryOp):
+            return graph.add('neg' if isinstance(node.op, ast.USub) else 'not', (self.visit(node.operand),))
+        if isinstance(node, ast.BoolOp):
+            result = self.visit(node.values[0])
+            for value in node.values[1:]:
+                result = graph.add(_AST_OPS[type(node.op)], (result, self.visit(value)))
+            return result
+        if isinstance(node, ast.Compare):
+            # a < b < c == (a < b) and (b < c)
+            terms = [node.left] + node.comparators
+            result = None
+            for left, op, right in zip(terms, node.ops, terms[1:]):
+                term = graph.add(_AST_OPS[type(op)], (self.visit(left), self.visit(right)))
+                result = term if result is None else graph.add('and', (result, term))
+            return result
+        if isinstance(node, ast.Call):
+            # Names and arities were checked by parse()
+            name = node.func.id
+            if name == 'tf':
+                timeframe = node.args[0].value
+                self.timeframe = timeframe
+                try:
+                    inner = self.visit(node.args[1])
+                finally:
+                    self.timeframe = None
+                self.timeframe_lookbacks[timeframe] = max(self.timeframe_lookbacks.get(timeframe, 0),
+                                                          graph.lookbacks[inner])
+                return graph.add('align', (inner,), (timeframe,))
+            _, n_series, _, default = FUNCTIONS[name]
+            args = node.args
+            if len(args) == n_series and default is not None:
+                windows = (default,)
+            else:
+                windows = tuple(self.window(arg, name) for arg in args[n_series:])
+            return graph.add(name, tuple(self.visit(arg) for arg in args[:n_series]), windows)
+        raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+class CompiledRules:
+    """Rules compiled into one shared DAG for a set of parameter values."""
+    def __init__(self, trees: Dict[str, ast.Expression], params: Dict):
+        self.graph = Graph()
+        compiler = _Compiler(self.graph, params)
+        self.outputs = {name: compiler.visit(tree) for name, tree in trees.items()}
+        self.lookback = max((self.graph.lookbacks[i] for i in self.outputs.values()), default=0)
+        # Bars of each secondary timeframe needed before its lines are valid
+        self.timeframe_lookbacks = compiler.timeframe_lookbacks
+
+    def evaluate(self, data: Dict[str, np.ndarray], frames: Optional[Dict[str, Dict]] = None) -> Dict[str, np.ndarray]:
+        names = list(self.outputs)
+        values = self.graph.evaluate(data, [self.outputs[name] for name in names], frames)
+        shape = np.shape(data['close'])
+        return {name: np.broadcast_to(np.asarray(value, dtype=bool), shape) for name, value in zip(names, values)}
+
+class RuleStrategy:
+    """
+    Vectorized strategy defined by a buy rule and a sell rule.
+
+    Bars where only the buy rule holds are BUY (1), where only the sell rule holds SELL (-1),
+    otherwise HOLD (0). Calling the strategy compiles the rules for the given parameters
+    (cached per parameter set) and evaluates them over whole arrays.
+
+    Rules with tf() calls also need the base candle open times (`ts`); the candles of each
+    secondary timeframe are built from the base series unless given in `frames`.
+
+    Args:
+        buy (str): Buy rule.
+        sell (str): Sell rule.
+        params (Dict, optional): Default parameter values.
+    """
+    def __init__(self, buy: str, sell: str, params: Optional[Dict] = None):
+        self.rules = {'buy': buy, 'sell': sell}
+        self.trees = {name: parse(text) for name, text in self.rules.items()}
+        self.params = dict(params or {})
+        self.compiled: Dict[Tuple, CompiledRules] = {}
+        names = {node.id for tree in self.trees.values() for node in ast.walk(tree) if isinstance(node, ast.Name)}
+        self.inputs = tuple(series for series in SERIES if series in names)
+        self.timeframes = tuple(sorted({tf for tree in self.trees.values() for tf in _timeframes(tree)}))
+
+    def compile(self, **params) -> CompiledRules:
+        values = dict(self.params, **params)
+        key = tuple(sorted(values.items()))
+        if key not in self.compiled:
+            self.compiled[key] = CompiledRules(self.trees, values)
+        return self.compiled[key]
+
+    def lookback(self, params: Dict, timeframe: Optional[str] = None) -> int:
+        """
+        Base bars needed before the first signal. Given the base timeframe, it also covers the
+        secondary timeframes built from the base candles (a partial first candle is dropped and a
+        candle is only visible after its close, hence two more candles).
+        """
+        compiled = self.compile(**params)
+        lookback = compiled.lookback
+        if timeframe:
+            for tf, bars in compiled.timeframe_lookbacks.items():
+                ratio = -(-timeframe_to_seconds(tf) // timeframe_to_seconds(timeframe))
+                lookback = max(lookback, (bars + 2) * ratio)
+        return lookback
+
+    def __call__(self, close: np.ndarray, open: Optional[np.ndarray] = None, high: Optional[np.ndarray] = None,
+                 low: Optional[np.ndarray] = None, volume: Optional[np.ndarray] = None, ts: Optional[np.ndarray] = None,
+                 timeframe: Optional[str] = None, frames: Optional[Dict[str, Dict]] = None, **params) -> np.ndarray:
+        data = {'open': open, 'high': high, 'low': low, 'close': close, 'volume': volume}
+        if self.timeframes:
+            if ts is None:
+                raise ValueError("Rules with tf() need the candle open times (ts)")
+            data.update(ts=ts, timeframe=timeframe)
+            frames = dict(frames or {})
+            for tf in self.timeframes:
+                if tf not in frames:
+                    frames[tf] = resample_ohlcv(ts, data, tf)
+        signals = self.compile(**params).evaluate(data, frames)
+        codes = np.zeros(np.shape(close), dtype=np.int8)
+        codes[signals['buy'] & ~signals['sell']] = 1
+        codes[signals['sell'] & ~signals['buy']] = -1
+        return codes
+
+def rules_spec(name: str, config: Dict) -> StrategySpec:
+    """
+    StrategySpec of a strategy declared with rules in the `strategy` section of its config.yaml:
+
+        strategy:
+          params: {fast: 12, slow: 26}
+          rules:
+            buy: cross_over(ema(close, fast), ema(close, slow)) AND close > sma(close, 200)
+            sell: cross_under(ema(close, fast), ema(close, slow))
+
+    Args:
+        name (str): Strategy name (the folder name).
+        config (Dict): `strategy` section of the config.
+
+    Returns:
+        StrategySpec: Spec with the compiled rules as its vectorized implementation.
+    """
+    rules = config.get('rules') or {}
+    if not rules.get('buy') or not rules.get('sell'):
+        raise ValueError(f"Strategy {name} needs a buy and a sell rule")
+    params = dict(config.get('params') or {})
+    strategy = RuleStrategy(rules['buy'], rules['sell'], params)
+    return StrategySpec(
+        name=name,
+        description=config.get('description') or f"BUY: {rules['buy']} / SELL: {rules['sell']}",
+        params=params,
+        lookback=strategy.lookback,
+        vectorized=strategy,
+        inputs=strategy.inputs,
+        timeframes=strategy.timeframes,
+    )
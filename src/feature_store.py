@@ -0,0 +1,164 @@
+"""
+Persistent store of computed indicator lines.
+
+Indicator columns (e.g. the SMA/EMA lines of crossover strategies) are saved as raw float64
+files that are memory-mapped on read, under data/features/<SYMBOL>_<timeframe>/<first ts>/.
+Each series is identified by its symbol, timeframe and first candle, and the store keeps a copy
+of the close prices it was computed from: a request whose closes share the stored prefix reuses
+the saved lines, a longer one (history extended) only computes and appends the new values, and
+a different prefix (history rewritten) discards the series and starts again.
+
+SMA lines are extended from the last length-1 closes and EMA lines from their last value, like
+the chunked indicators of src.indicators (appended SMA values may differ from a full
+recomputation in the last bit).
+
+Typical usage (as a module):
+    from src.feature_store import get_feature_store
+    line = get_feature_store().get('BTC/USDT', '1m', ts, close, 'sma', 50)   # read-only memmap
+"""
+import os
+import shutil
+import threading
+import numpy as np
+from typing import Callable, Dict, Optional, Sequence
+from src.indicators import ChunkedEMA, ChunkedSMA, ema, sma
+
+FEATURES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'features')
+DTYPE = np.dtype('<f8')
+
+# indicator name -> (f(values, length), chunked class that continues it)
+INDICATORS: Dict[str, tuple] = {
+    'sma': (sma, ChunkedSMA),
+    'ema': (ema, ChunkedEMA),
+}
+
+def _read(path: str, rows: int) -> np.ndarray:
+    return np.memmap(path, dtype=DTYPE, mode='r', shape=(rows,))
+
+def _rows(path: str) -> int:
+    return os.path.getsize(path) // DTYPE.itemsize if os.path.exists(path) else 0
+
+def _write(path: str, values: np.ndarray):
+    # Replaced, not truncated: arrays already mapped from the old file stay valid
+    tmp = f"{path}.{os.getpid()}.tmp"
+    np.ascontiguousarray(values, dtype=DTYPE).tofile(tmp)
+    os.replace(tmp, path)
+
+def _append(path: str, values: np.ndarray, rows: int):
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+        # Drops a torn write left by an interrupted append
+        f.truncate(rows * DTYPE.itemsize)
+        f.seek(0, os.SEEK_END)
+        f.write(np.ascontiguousarray(values, dtype=DTYPE).tobytes())
+
+class FeatureStore:
+    """
+    On-disk indicator lines keyed by (symbol, timeframe, first candle, indicator, length).
+
+    Args:
+        root (str): Directory of the store.
+    """
+    def __init__(self, root: str = FEATURES_DIR):
+        self.root = root
+        self.hits = self.appends = self.computes = 0
+        self.lock = threading.RLock()
+
+    def _series_dir(self, symbol: str, timeframe: str, ts: np.ndarray) -> str:
+        first = int(np.asarray(ts[:1], dtype='datetime64[ns]').astype(np.int64)[0])
+        return os.path.join(self.root, f"{symbol.replace('/', '-')}_{timeframe}", str(first))
+
+    def _sync_close(self, folder: str, close: np.ndarray) -> int:
+        """
+        Make the stored closes match `close` and return how many rows the stored lines can reuse
+        (the saved prefix, or 0 after discarding a series whose history changed).
+        """
+        path = os.path.join(folder, 'close.f8')
+        stored = _rows(path)
+        common = min(stored, len(close))
+        if common and not np.array_equal(_read(path, stored)[:common], close[:common], equal_nan=True):
+            shutil.rmtree(folder)
+            stored = common = 0
+        os.makedirs(folder, exist_ok=True)
+        if len(close) > stored:
+            _append(path, close[stored:], stored)
+        return common
+
+    def get(self, symbol: str, timeframe: str, ts: np.ndarray, close: np.ndarray,
+            indicator: str, length: int) -> np.ndarray:
+        """
+        Indicator line over `close`, from the store when possible.
+
+        Args:
+            symbol (str): Trading pair.
+            timeframe (str): Candle timeframe.
+            ts (np.ndarray): Candle open times (only the first one is used, to key the series).
+            close (np.ndarray): Close prices (1D).
+            indicator (str): Name in INDICATORS ('sma' or 'ema').
+            length (int): Indicator length.
+
+        Returns:
+            np.ndarray: Read-only array of len(close) values (memory-mapped).
+        """
+        if indicator not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {indicator}")
+        close = np.asarray(close, dtype=float)
+        if not len(close):
+            return np.empty(0)
+        func, chunked_cls = INDICATORS[indicator]
+        folder = self._series_dir(symbol, timeframe, ts)
+        with self.lock:
+            reusable = self._sync_close(folder, close)
+            path = os.path.join(folder, f"{indicator}_{int(length)}.f8")
+            done = min(_rows(path), reusable)
+            if done < len(close):
+                new = None
+                if done:
+                    new = _continue(chunked_cls, length, close, done, _read(path, done)[-1])
+                if new is None:
+                    _write(path, func(close, length))
+                    self.computes += 1
+                else:
+                    _append(path, new, done)
+                    self.appends += 1
+            else:
+                self.hits += 1
+            return _read(path, len(close))
+
+    def lines(self, symbol: str, timeframe: str, ts: np.ndarray, close: np.ndarray,
+              indicator: str, lengths: Sequence[int]) -> np.ndarray:
+        """Stack of the lines of several lengths (len(lengths) x len(close))."""
+        return np.vstack([self.get(symbol, timeframe, ts, close, indicator, length) for length in lengths])
+
+    def clear(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """Delete the stored lines of a symbol/timeframe, or the whole store."""
+        with self.lock:
+            if symbol is None:
+                shutil.rmtree(self.root, ignore_errors=True)
+            else:
+                shutil.rmtree(os.path.join(self.root, f"{symbol.replace('/', '-')}_{timeframe}"), ignore_errors=True)
+
+    def stats(self) -> Dict:
+        return {'root': self.root, 'hits': self.hits, 'appends': self.appends, 'computes': self.computes}
+
+def _continue(chunked_cls: Callable, length: int, close: np.ndarray, done: int, last: float) -> Optional[np.ndarray]:
+    """Values after the first `done` ones, continued from the stored line (None to recompute)."""
+    indicator = chunked_cls(length)
+    if isinstance(indicator, ChunkedSMA):
+        indicator.tail = close[max(0, done - indicator.length + 1):done]
+    elif np.isnan(last):
+        # EMA not seeded yet: cheaper to recompute
+        return None
+    else:
+        indicator.value = float(last)
+    return indicator.update(close[done:])
+
+_STORE: Optional[FeatureStore] = None
+_STORE_LOCK = threading.Lock()
+
+def get_feature_store() -> FeatureStore:
+    """Process-wide store under FEATURES_DIR (overridable with the FEATURES_DIR environment variable)."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = FeatureStore(os.environ.get('FEATURES_DIR', FEATURES_DIR))
+        return _STORE
@@ -2,20 +2,58 @@
 History Manager for Crypto Bot
 Manages historical data files and a global meta JSON file with min/max dates for each symbol/timeframe.
 All strategies should use the shared files in /data/history/.
+
+Candles are stored in CSV files (default) or in an embedded SQLite database, selected with the
+HISTORY_BACKEND environment variable ('csv' or 'sqlite'; database path in HISTORY_DB).
 """
 import os
 import json
+import threading
+import numpy as np
+import pandas as pd
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 
 HISTORY_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'history')
 META_FILE = os.path.join(HISTORY_DIR, 'history_meta.json')
+BACKENDS = ('csv', 'sqlite')
+# Serializes read-modify-write cycles of the meta JSON (concurrent downloads)
+_META_LOCK = threading.RLock()
 
 def symbol_to_filename(symbol: str) -> str:
     """Convierte BTC/USDT a BTC-USDT para nombres de archivo."""
     return symbol.replace('/', '-')
 
+def filter_chunks(chunks: Iterable[pd.DataFrame], start=None, end=None) -> Iterator[pd.DataFrame]:
+    """Keep the rows of ts-sorted chunks between two dates (inclusive), stopping after `end`."""
+    start = pd.to_datetime(start) if start is not None else None
+    end = pd.to_datetime(end) if end is not None else None
+    for chunk in chunks:
+        past_end = end is not None and len(chunk) > 0 and chunk['ts'].iloc[-1] > end
+        if start is not None:
+            chunk = chunk[chunk['ts'] >= start]
+        if end is not None:
+            chunk = chunk[chunk['ts'] <= end]
+        if len(chunk):
+            yield chunk
+        if past_end:
+            return
+
 class HistoryManager:
+    backend = os.getenv('HISTORY_BACKEND', 'csv')
+    db_file = os.getenv('HISTORY_DB')
+    _store = None
+
+    @staticmethod
+    def get_store():
+        """Return the SQLite store of the history (opened on first use)."""
+        from src.storage import SQLiteStore
+        path = HistoryManager.db_file or os.path.join(HISTORY_DIR, 'history.db')
+        if HistoryManager._store is None or HistoryManager._store.path != path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            HistoryManager._store = SQLiteStore(path)
+        return HistoryManager._store
+
     @staticmethod
     def load_meta() -> Dict:
         if not os.path.exists(META_FILE):
@@ -30,28 +68,30 @@ class HistoryManager:
 
     @staticmethod
     def update_meta(symbol: str, timeframe: str, min_date: str, max_date: str, filename: str):
-        meta = HistoryManager.load_meta()
-        if symbol not in meta:
-            meta[symbol] = {}
-        meta[symbol][timeframe] = {
-            'filename': filename,
-            'min_date': min_date,
-            'max_date': max_date
-        }
-        HistoryManager.save_meta(meta)
+        with _META_LOCK:
+            meta = HistoryManager.load_meta()
+            if symbol not in meta:
+                meta[symbol] = {}
+            meta[symbol][timeframe] = {
+                'filename': filename,
+                'min_date': min_date,
+                'max_date': max_date
+            }
+            HistoryManager.save_meta(meta)
 
     @staticmethod
     def remove_meta(symbol: str, timeframe: str):
-        meta = HistoryManager.load_meta()
-        changed = False
-        if symbol in meta and timeframe in meta[symbol]:
-            del meta[symbol][timeframe]
-            changed = True
-            if not meta[symbol]:
-                del meta[symbol]
-        if changed:
-            HistoryManager.save_meta(meta)
-        return changed
+        with _META_LOCK:
+            meta = HistoryManager.load_meta()
+            changed = False
+            if symbol in meta and timeframe in meta[symbol]:
+                del meta[symbol][timeframe]
+                changed = True
+                if not meta[symbol]:
+                    del meta[symbol]
+            if changed:
+                HistoryManager.save_meta(meta)
+            return changed
 
     @staticmethod
     def get_meta(symbol: str, timeframe: str) -> Optional[Dict]:
@@ -63,11 +103,148 @@ class HistoryManager:
         """Return all meta info for all historical files."""
         return HistoryManager.load_meta()
 
+    @staticmethod
+    def has_history(symbol: str, timeframe: str) -> bool:
+        """True if candles of the symbol/timeframe are stored (in the CSV file or the SQLite store)."""
+        if HistoryManager.backend == 'sqlite':
+            return HistoryManager.get_store().date_range(symbol, timeframe) is not None
+        return os.path.exists(HistoryManager.get_history_file(symbol, timeframe))
+
     @staticmethod
     def get_history_file(symbol: str, timeframe: str) -> str:
         # Usa el símbolo con barra para la API, pero guion para el nombre de archivo
         return os.path.join(HISTORY_DIR, f"history_{symbol_to_filename(symbol)}_{timeframe}.csv")
 
+    @staticmethod
+    def load_history(symbol: str, timeframe: str) -> pd.DataFrame:
+        """Load the OHLCV history of a symbol/timeframe sorted by ts (served from the dataset cache)."""
+        return pd.DataFrame(HistoryManager.load_arrays(symbol, timeframe))
+
+    @staticmethod
+    def load_arrays(symbol: str, timeframe: str) -> Dict[str, np.ndarray]:
+        """Read-only NumPy arrays of the whole history, shared through the process-wide dataset cache."""
+        from src.dataset_cache import get_dataset_cache
+        return get_dataset_cache().get(symbol, timeframe)
+
+    @staticmethod
+    def read_history(symbol: str, timeframe: str) -> pd.DataFrame:
+        """Read the OHLCV history of a symbol/timeframe from storage, bypassing the cache."""
+        if HistoryManager.backend == 'sqlite':
+            df = HistoryManager.get_store().read_frame(symbol, timeframe)
+            if df.empty:
+                raise FileNotFoundError(f"No history stored for {symbol} {timeframe}")
+            return df
+        filename = HistoryManager.get_history_file(symbol, timeframe)
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"History file not found: {filename}")
+        df = pd.read_csv(filename, parse_dates=['ts'])
+        return df.sort_values('ts').reset_index(drop=True)
+
+    @staticmethod
+    def load_range(symbol: str, timeframe: str, start=None, end=None) -> Dict[str, np.ndarray]:
+        """
+        Load the candles between two dates (inclusive) as NumPy arrays.
+
+        With the SQLite backend only the requested range is read (index seek); with CSV files
+        the range is sliced (zero-copy) out of the cached arrays of the whole file.
+        """
+        if HistoryManager.backend == 'sqlite':
+            return HistoryManager.get_store().read_range(symbol, timeframe, start, end)
+        data = HistoryManager.load_arrays(symbol, timeframe)
+        ts = data['ts']
+        lo = 0 if start is None else np.searchsorted(ts, pd.to_datetime(start).to_datetime64(), side='left')
+        hi = len(ts) if end is None else np.searchsorted(ts, pd.to_datetime(end).to_datetime64(), side='right')
+        return {col: values[lo:hi] for col, values in data.items()}
+
+    @staticmethod
+    def iter_history(symbol: str, timeframe: str, chunksize: int, start=None, end=None) -> Iterator[pd.DataFrame]:
+        """
+        Yield the history between two dates (inclusive) in DataFrames of at most `chunksize`
+        candles, without loading the whole series (CSV files are read in chunks, SQLite by pages).
+        """
+        if HistoryManager.backend == 'sqlite':
+            for data in HistoryManager.get_store().iter_range(symbol, timeframe, chunksize, start, end):
+                data['ts'] = data['ts'].astype('datetime64[ns]')
+                yield pd.DataFrame(data)
+            return
+        filename = HistoryManager.get_history_file(symbol, timeframe)
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"History file not found: {filename}")
+        yield from filter_chunks(pd.read_csv(filename, parse_dates=['ts'], chunksize=chunksize), start, end)
+
+    @staticmethod
+    def save_history(symbol: str, timeframe: str, df: pd.DataFrame) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Merge new candles into the stored history and update the meta JSON.
+
+        Candles whose ts is already stored are replaced. Returns the (min, max) dates of the
+        stored series, or None if it is empty.
+        """
+        filename = HistoryManager.get_history_file(symbol, timeframe)
+        if HistoryManager.backend == 'sqlite':
+            store = HistoryManager.get_store()
+            store.write_candles(symbol, timeframe, df)
+            dates = store.date_range(symbol, timeframe)
+        else:
+            if os.path.exists(filename):
+                df = pd.concat([pd.read_csv(filename, parse_dates=['ts']), df], ignore_index=True)
+            df = df.drop_duplicates(subset=['ts'], keep='last').sort_values('ts')
+            if not df.empty:
+                df.to_csv(filename, index=False)
+            dates = (df['ts'].min(), df['ts'].max()) if not df.empty else None
+        HistoryManager._invalidate(symbol, timeframe)
+        if dates:
+            HistoryManager.update_meta(symbol, timeframe, dates[0].isoformat(), dates[1].isoformat(), os.path.basename(filename))
+        return dates
+
+    @staticmethod
+    def append_history(symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """
+        Append candles newer than the stored ones and move max_date forward.
+
+        CSV files are opened in append mode, so the cost depends on the number of new candles,
+        not on the size of the history. Candles at or before the stored max_date are skipped.
+        Returns the number of rows written.
+        """
+        filename = HistoryManager.get_history_file(symbol, timeframe)
+        meta = HistoryManager.get_meta(symbol, timeframe)
+        if HistoryManager.backend == 'sqlite':
+            exists = meta is not None
+        else:
+            exists = os.path.exists(filename)
+        df = df.sort_values('ts')
+        if meta and exists:
+            # Solo velas posteriores a las guardadas: sin duplicados y max_date nunca retrocede
+            df = df[pd.to_datetime(df['ts']) > pd.Timestamp(meta['max_date'])]
+        if df.empty:
+            return 0
+        if HistoryManager.backend == 'sqlite':
+            HistoryManager.get_store().write_candles(symbol, timeframe, df)
+        else:
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            df.to_csv(filename, mode='a', header=not exists, index=False)
+        HistoryManager._invalidate(symbol, timeframe)
+        min_date = meta['min_date'] if meta and exists else pd.Timestamp(df['ts'].iloc[0]).isoformat()
+        HistoryManager.update_meta(symbol, timeframe, min_date, pd.Timestamp(df['ts'].iloc[-1]).isoformat(), os.path.basename(filename))
+        return len(df)
+
+    @staticmethod
+    def delete_history(symbol: str, timeframe: str) -> bool:
+        """Delete the stored candles of a symbol/timeframe; returns True if anything was deleted."""
+        HistoryManager._invalidate(symbol, timeframe)
+        if HistoryManager.backend == 'sqlite':
+            return HistoryManager.get_store().delete_series(symbol, timeframe) > 0
+        filename = HistoryManager.get_history_file(symbol, timeframe)
+        if os.path.exists(filename):
+            os.remove(filename)
+            return True
+        return False
+
+    @staticmethod
+    def _invalidate(symbol: str, timeframe: str):
+        from src.dataset_cache import get_dataset_cache
+        get_dataset_cache().invalidate(symbol, timeframe)
+
     @staticmethod
     def list_history_files():
         """Return all history CSV files in the directory."""
@@ -0,0 +1,118 @@
+"""
+HTTP conditional requests for the API.
+
+Responses built from files carry an ETag derived from the files' mtime and size (no need to read
+them to validate), other responses an ETag hashed from their serialized body. A request whose
+If-None-Match (or If-Modified-Since) matches gets an empty 304; otherwise the serialized body is
+served from a small in-memory memo keyed by the ETag, so a file that did not change is neither
+re-read nor re-serialized.
+
+Typical usage (as a module):
+    from src.http_cache import file_etag, conditional_json
+    return conditional_json(request, file_etag([META_FILE]), HistoryManager.list_all)
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Iterable, Optional
+from starlette.requests import Request
+from starlette.responses import Response
+from src.serialization import FastJSONResponse, dumps
+
+# Clients must revalidate (cheap with the ETag) before reusing a response
+REVALIDATE = 'no-cache'
+# Content that never changes at its URL (e.g. addressed by a hash of itself)
+IMMUTABLE = 'public, max-age=31536000, immutable'
+MEMO_SIZE = 64
+
+_MEMO: 'OrderedDict[str, bytes]' = OrderedDict()
+_LOCK = threading.Lock()
+
+def file_etag(paths: Iterable[str]) -> Optional[str]:
+    """Weak ETag from the mtime and size of files (None if any is missing)."""
+    parts = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        parts.append(f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}")
+    return 'W/"' + hashlib.blake2b('|'.join(parts).encode(), digest_size=12).hexdigest() + '"'
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag hashed from a response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def last_modified(paths: Iterable[str]) -> Optional[float]:
+    times = [os.stat(path).st_mtime for path in paths if os.path.exists(path)]
+    return max(times) if times else None
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110): W/ prefixes are ignored
+    tags = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+def is_fresh(request: Request, etag: Optional[str], modified: Optional[float] = None) -> bool:
+    """True when the client's copy (If-None-Match, else If-Modified-Since) is still current."""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return etag is not None and _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since and modified is not None:
+        try:
+            return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def _headers(etag: Optional[str], modified: Optional[float], cache_control: str) -> dict:
+    headers = {'Cache-Control': cache_control}
+    if etag:
+        headers['ETag'] = etag
+    if modified is not None:
+        headers['Last-Modified'] = formatdate(modified, usegmt=True)
+    return headers
+
+def _memo_get(etag: str) -> Optional[bytes]:
+    with _LOCK:
+        body = _MEMO.get(etag)
+        if body is not None:
+            _MEMO.move_to_end(etag)
+        return body
+
+def _memo_put(etag: str, body: bytes):
+    with _LOCK:
+        _MEMO[etag] = body
+        _MEMO.move_to_end(etag)
+        while len(_MEMO) > MEMO_SIZE:
+            _MEMO.popitem(last=False)
+
+def conditional_json(request: Request, etag: Optional[str], build: Callable[[], Any],
+                     modified: Optional[float] = None, cache_control: str = REVALIDATE) -> Response:
+    """
+    JSON response with validators, or 304 when the client's copy is current.
+
+    Args:
+        request (Request): Incoming request (for If-None-Match / If-Modified-Since).
+        etag (str, optional): Validator known before building the content (e.g. file_etag);
+            None to hash the serialized body.
+        build (Callable): Returns the content; only called when the body is not memoized.
+        modified (float, optional): Last modification time (epoch seconds) of the content.
+        cache_control (str): Cache-Control header (REVALIDATE or IMMUTABLE).
+    """
+    headers = _headers(etag, modified, cache_control)
+    if etag is not None:
+        if is_fresh(request, etag, modified):
+            return Response(status_code=304, headers=headers)
+        body = _memo_get(etag)
+        if body is None:
+            body = dumps(build())
+            _memo_put(etag, body)
+    else:
+        body = dumps(build())
+        headers['ETag'] = content_etag(body)
+        if is_fresh(request, headers['ETag'], modified):
+            return Response(status_code=304, headers=headers)
+    return Response(body, media_type=FastJSONResponse.media_type, headers=headers)
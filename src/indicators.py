@@ -0,0 +1,185 @@
+"""
+Vectorized technical indicators.
+
+This module provides SMA and EMA implementations that work on 1D arrays (one series) or
+2D arrays (time x symbol) and reproduce the values returned by pandas_ta, so vectorized
+backtests give the same signals as the per-call strategy functions.
+
+Typical usage (as a module):
+    from src.indicators import sma, ema
+    fast = sma(close, 10)
+"""
+import math
+import numpy as np
+import pandas as pd
+
+DEFAULT_LENGTH = 10
+
+def _length(length) -> int:
+    # pandas_ta falls back to 10 for missing or non-positive lengths
+    return int(length) if length and length > 0 else DEFAULT_LENGTH
+
+def _frame(values: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame(np.asarray(values, dtype=float).reshape(len(values), -1))
+
+def _shape_like(result: np.ndarray, values: np.ndarray) -> np.ndarray:
+    return result.reshape(np.shape(values))
+
+def sma(values: np.ndarray, length: int) -> np.ndarray:
+    """
+    Simple moving average along the first axis.
+
+    Args:
+        values (np.ndarray): 1D series or 2D (time x symbol) array of prices.
+        length (int): Window length.
+
+    Returns:
+        np.ndarray: Array with the same shape as `values`, NaN during the warm-up.
+    """
+    length = _length(length)
+    if len(values) < length:
+        return np.full(np.shape(values), np.nan)
+    result = _frame(values).rolling(length, min_periods=length).mean().to_numpy()
+    return _shape_like(result, values)
+
+def ema(values: np.ndarray, length: int) -> np.ndarray:
+    """
+    Exponential moving average along the first axis, seeded with the SMA of the first window.
+
+    Each column is seeded at its own first valid window, so 2D arrays whose symbols start at
+    different times get the same values as computing every column separately.
+
+    Args:
+        values (np.ndarray): 1D series or 2D (time x symbol) array of prices.
+        length (int): Span of the average.
+
+    Returns:
+        np.ndarray: Array with the same shape as `values`, NaN during the warm-up.
+    """
+    length = _length(length)
+    if len(values) < length:
+        return np.full(np.shape(values), np.nan)
+    seeded = _frame(values).to_numpy(copy=True)
+    for col in range(seeded.shape[1]):
+        valid = np.flatnonzero(~np.isnan(seeded[:, col]))
+        if len(valid) < length:
+            seeded[:, col] = np.nan
+            continue
+        first = valid[0]
+        seed = seeded[first:first + length, col].mean()
+        seeded[:first + length - 1, col] = np.nan
+        seeded[first + length - 1, col] = seed
+    result = pd.DataFrame(seeded).ewm(span=length, adjust=False).mean().to_numpy()
+    return _shape_like(result, values)
+
+def crossover(fast: np.ndarray, slow: np.ndarray) -> np.ndarray:
+    """
+    Detect crossovers between two lines along the first axis.
+
+    Args:
+        fast (np.ndarray): Fast line, 1D or 2D.
+        slow (np.ndarray): Slow line with the same shape.
+
+    Returns:
+        np.ndarray: int8 array with 1 where fast crosses above slow, -1 where it crosses
+        below and 0 elsewhere. Comparisons involving NaN never produce a cross.
+    """
+    fast = np.asarray(fast, dtype=float)
+    slow = np.asarray(slow, dtype=float)
+    codes = np.zeros(fast.shape, dtype=np.int8)
+    if len(fast) < 2:
+        return codes
+    prev_f, prev_s, curr_f, curr_s = fast[:-1], slow[:-1], fast[1:], slow[1:]
+    codes[1:][(prev_f < prev_s) & (curr_f > curr_s)] = 1
+    codes[1:][(prev_f > prev_s) & (curr_f < curr_s)] = -1
+    return codes
+
+class RollingSMA:
+    """
+    Incremental simple moving average with O(1) updates.
+
+    The running sum is rebuilt from the window each time the ring buffer wraps around, so
+    floating point drift stays bounded on long-running feeds.
+    """
+    def __init__(self, length: int):
+        self.length = _length(length)
+        self.window = [0.0] * self.length
+        self.count = 0
+        self.total = 0.0
+
+    def update(self, value: float) -> float:
+        pos = self.count % self.length
+        self.total += value - self.window[pos]
+        self.window[pos] = value
+        self.count += 1
+        if pos == self.length - 1:
+            self.total = math.fsum(self.window)
+        return self.total / self.length if self.count >= self.length else np.nan
+
+class RollingEMA:
+    """Incremental exponential moving average seeded with the SMA of the first window, like ema()."""
+    def __init__(self, length: int):
+        self.length = _length(length)
+        self.alpha = 2.0 / (self.length + 1)
+        self.count = 0
+        self.seed_total = 0.0
+        self.value = np.nan
+
+    def update(self, value: float) -> float:
+        self.count += 1
+        if self.count < self.length:
+            self.seed_total += value
+            return np.nan
+        if self.count == self.length:
+            self.value = (self.seed_total + value) / self.length
+        else:
+            self.value = self.alpha * value + (1 - self.alpha) * self.value
+        return self.value
+
+class ChunkedSMA:
+    """
+    Simple moving average computed chunk by chunk, carrying the last length-1 values.
+
+    Every window is averaged from its own values, so a chunk boundary can change the result
+    in the last bit with respect to sma() over the whole series (pandas keeps a compensated
+    running sum from the first bar).
+    """
+    def __init__(self, length: int):
+        self.length = _length(length)
+        self.tail = np.empty(0)
+
+    def update(self, values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values, dtype=float)
+        joined = np.concatenate([self.tail, values])
+        result = sma(joined, self.length)[len(self.tail):]
+        self.tail = joined[len(joined) - min(len(joined), self.length - 1):]
+        return result
+
+class ChunkedEMA:
+    """
+    Exponential moving average computed chunk by chunk with the same values as ema().
+
+    Until the seed window is complete the raw values are carried; afterwards only the last
+    average, which the recurrence continues exactly.
+    """
+    def __init__(self, length: int):
+        self.length = _length(length)
+        self.pending = np.empty(0)
+        self.value = None
+
+    def update(self, values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values, dtype=float)
+        if self.value is None:
+            joined = np.concatenate([self.pending, values])
+            result = ema(joined, self.length)[len(self.pending):]
+            if len(result) and not np.isnan(result[-1]):
+                self.value, self.pending = result[-1], np.empty(0)
+            else:
+                self.pending = joined
+            return result
+        if not len(values):
+            return values
+        joined = pd.Series(np.concatenate([[self.value], values]))
+        result = joined.ewm(span=self.length, adjust=False).mean().to_numpy()[1:]
+        self.value = result[-1]
+        return result
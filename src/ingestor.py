@@ -0,0 +1,219 @@
+"""
+Streaming kline ingestor.
+
+Subscribes to the exchange kline WebSocket streams of several symbol/timeframe pairs, buffers
+the closed candles and appends them in batches to the local history (CSV files or SQLite),
+updating max_date in history_meta.json without rewriting the files. On (re)connection the gap since the last stored
+candle is filled through the REST API first, so the history stays contiguous across restarts
+and disconnections.
+
+Usage (as a script):
+    python -m src.ingestor --symbols BTC/USDT ETH/USDT --timeframes 1m 5m
+
+Typical usage (as a module):
+    ingestor = KlineIngestor([('BTC/USDT', '1m')])
+    await ingestor.run()
+"""
+import asyncio
+import logging
+import os
+import aiohttp
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.history_manager import HistoryManager
+from src.timeframes import timeframe_to_timedelta
+
+BINANCE_WS_URL = 'wss://stream.binance.com:9443/stream'
+COLUMNS = ['ts', 'open', 'high', 'low', 'close', 'volume']
+
+def stream_name(symbol: str, timeframe: str) -> str:
+    """Binance stream name of a kline subscription, e.g. btcusdt@kline_1m."""
+    return f"{symbol.replace('/', '').replace('-', '').lower()}@kline_{timeframe}"
+
+def parse_kline(message: Dict) -> Tuple[Optional[str], Optional[Dict]]:
+    """
+    Parse a combined-stream kline message.
+
+    Returns:
+        Tuple[str, Dict]: Stream name and bar dict if the message carries a closed candle,
+        (None, None) otherwise.
+    """
+    kline = message.get('data', {}).get('k')
+    if not kline or not kline.get('x'):
+        return None, None
+    bar = {
+        'ts': pd.Timestamp(kline['t'], unit='ms'),
+        'open': float(kline['o']),
+        'high': float(kline['h']),
+        'low': float(kline['l']),
+        'close': float(kline['c']),
+        'volume': float(kline['v']),
+    }
+    return message.get('stream'), bar
+
+def last_stored_ts(symbol: str, timeframe: str) -> Optional[pd.Timestamp]:
+    """Timestamp of the last stored candle, from the meta file (or the stored candles if it has no meta)."""
+    meta = HistoryManager.get_meta(symbol, timeframe)
+    if meta:
+        return pd.to_datetime(meta['max_date'])
+    if HistoryManager.backend == 'sqlite':
+        dates = HistoryManager.get_store().date_range(symbol, timeframe)
+        return dates[1] if dates else None
+    filename = HistoryManager.get_history_file(symbol, timeframe)
+    if os.path.exists(filename):
+        ts = pd.read_csv(filename, usecols=['ts'], parse_dates=['ts'])['ts']
+        if not ts.empty:
+            return ts.max()
+    return None
+
+def append_history(symbol: str, timeframe: str, bars: List[Dict]) -> int:
+    """
+    Append closed candles to the history of a pair (those already stored are skipped).
+
+    Returns:
+        int: Number of rows written.
+    """
+    if not bars:
+        return 0
+    return HistoryManager.append_history(symbol, timeframe, pd.DataFrame(bars, columns=COLUMNS))
+
+class KlineIngestor:
+    """
+    Keeps the local history of several symbol/timeframe pairs current from kline streams.
+
+    Args:
+        streams (Sequence[Tuple[str, str]]): (symbol, timeframe) pairs.
+        url (str): Combined-stream WebSocket endpoint.
+        flush_interval (float): Seconds between batch appends.
+        max_batch (int): Buffered candles of a pair that trigger an immediate append.
+        fetch (callable, optional): REST fetcher used for gap-fill, fetch_ohlcv by default.
+        hub (MarketDataHub, optional): Also publish every closed candle to this hub.
+        reconnect_delay (float): Initial wait before reconnecting, doubled up to 60 seconds.
+    """
+    def __init__(self, streams: Sequence[Tuple[str, str]], url: str = BINANCE_WS_URL,
+                 flush_interval: float = 5.0, max_batch: int = 100, fetch=None, hub=None,
+                 reconnect_delay: float = 1.0):
+        self.streams = {stream_name(symbol, timeframe): (symbol, timeframe) for symbol, timeframe in streams}
+        self.url = url
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.fetch = fetch
+        self.hub = hub
+        self.reconnect_delay = reconnect_delay
+        self.buffers: Dict[Tuple[str, str], List[Dict]] = {key: [] for key in self.streams.values()}
+        self.last_ts: Dict[Tuple[str, str], Optional[pd.Timestamp]] = {}
+        self.connections = 0
+        self.written = 0
+        self._flush_lock = asyncio.Lock()
+
+    def _fetch(self, symbol: str, timeframe: str, limit: int, since) -> pd.DataFrame:
+        fetch = self.fetch
+        if fetch is None:
+            from src.collector import fetch_ohlcv as fetch
+        return fetch(symbol, timeframe, limit, since=since)
+
+    def add_bar(self, key: Tuple[str, str], bar: Dict) -> bool:
+        """Buffer a closed candle unless it is already stored or buffered."""
+        last = self.last_ts.get(key)
+        if last is not None and bar['ts'] <= last:
+            return False
+        self.last_ts[key] = bar['ts']
+        self.buffers[key].append(bar)
+        if self.hub is not None:
+            self.hub.publish(*key, bar)
+        return True
+
+    async def flush(self):
+        """Append every buffered candle to its history file."""
+        async with self._flush_lock:
+            for key, bars in self.buffers.items():
+                if bars:
+                    self.buffers[key] = []
+                    self.written += await asyncio.to_thread(append_history, *key, bars)
+
+    async def gap_fill(self):
+        """Fetch through REST the candles closed since the last stored one of every pair."""
+        now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+        for key in self.streams.values():
+            symbol, timeframe = key
+            if key not in self.last_ts:
+                self.last_ts[key] = await asyncio.to_thread(last_stored_ts, symbol, timeframe)
+            last = self.last_ts[key]
+            if last is None:
+                continue
+            tf = timeframe_to_timedelta(timeframe)
+            missing = int((now - last) // tf) - 1
+            if missing <= 0:
+                continue
+            df = await asyncio.to_thread(self._fetch, symbol, timeframe, missing, last + tf)
+            if df is None or df.empty:
+                continue
+            # Only candles that are already closed
+            for bar in df[df['ts'] + tf <= now][COLUMNS].to_dict('records'):
+                self.add_bar(key, bar)
+            logging.info(f"[INGESTOR] Gap-filled {symbol} {timeframe} from {last}")
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def _consume(self, session: aiohttp.ClientSession):
+        url = f"{self.url}?streams={'/'.join(self.streams)}"
+        async with session.ws_connect(url, heartbeat=20) as ws:
+            self.connections += 1
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    break
+                name, bar = parse_kline(msg.json())
+                if bar is None or name not in self.streams:
+                    continue
+                key = self.streams[name]
+                if self.add_bar(key, bar) and len(self.buffers[key]) >= self.max_batch:
+                    await self.flush()
+
+    async def run(self, max_connections: Optional[int] = None):
+        """
+        Ingest until cancelled (or after `max_connections` connections end).
+
+        Every connection is preceded by a REST gap-fill; buffered candles are flushed when a
+        connection drops and when the ingestor stops.
+        """
+        flusher = asyncio.create_task(self._flush_loop())
+        delay = self.reconnect_delay
+        try:
+            async with aiohttp.ClientSession() as session:
+                while max_connections is None or self.connections < max_connections:
+                    try:
+                        await self.gap_fill()
+                        await self._consume(session)
+                        delay = self.reconnect_delay
+                    except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                        logging.warning(f"[INGESTOR] Connection error: {e}")
+                    await self.flush()
+                    if max_connections is not None and self.connections >= max_connections:
+                        break
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 60.0)
+        finally:
+            flusher.cancel()
+            await self.flush()
+
+if __name__ == "__main__":
+    import argparse
+    from src.config import SYMBOL, TIMEFRAME
+
+    parser = argparse.ArgumentParser(description="Stream closed klines into the local history files.")
+    parser.add_argument('--symbols', type=str, nargs='+', default=[SYMBOL])
+    parser.add_argument('--timeframes', type=str, nargs='+', default=[TIMEFRAME])
+    parser.add_argument('--url', type=str, default=BINANCE_WS_URL)
+    parser.add_argument('--flush_interval', type=float, default=5.0, help='Segundos entre escrituras a disco')
+    args = parser.parse_args()
+
+    ingestor = KlineIngestor([(s, tf) for s in args.symbols for tf in args.timeframes],
+                             url=args.url, flush_interval=args.flush_interval)
+    try:
+        asyncio.run(ingestor.run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,299 @@
+"""
+Cancellable, resumable background jobs.
+
+Long downloads and backtests run as jobs in background threads (each one taking a slot of its
+job class in src.scheduler) and checkpoint their progress under data/jobs/<job id>/:
+
+- download: every fetched page is saved as it arrives, so a failed, cancelled or interrupted
+  download only fetches the pages it is missing when resumed.
+- backtest: a streaming backtest (python -m src.backtest --chunksize) saves its strategy and
+  position state after every chunk and continues from the last chunk boundary. It reads the
+  stored history of the active backend and needs a strategy with a chunked implementation.
+
+The state of every job is kept in a job.json next to its checkpoints. Jobs that were running
+when the process died are marked 'interrupted' on the next start and can be resumed.
+
+Typical usage (as a module):
+    from src.jobs import get_job_manager
+    job = get_job_manager().submit('download', {'symbol': 'BTC/USDT', 'timeframe': '1m',
+                                                'start_date': '2020-01-01', 'end_date': '2025-01-01'})
+    get_job_manager().cancel(job.id)
+    get_job_manager().resume(job.id)
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+JOBS_DIR = os.path.join('data', 'jobs')
+# Candles per chunk of the backtest jobs (bounded memory, one checkpoint per chunk)
+DEFAULT_CHUNKSIZE = 200000
+ACTIVE = ('pending', 'running')
+RESUMABLE = ('failed', 'cancelled', 'interrupted')
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled."""
+
+class Job:
+    """
+    State of a job, persisted to <folder>/job.json.
+
+    Args:
+        kind (str): Job kind in RUNNERS ('download' or 'backtest').
+        params (Dict): Job parameters.
+        folder (str): Folder of its state and checkpoints.
+        priority (str): Scheduler priority ('high', 'normal' or 'low').
+    """
+    def __init__(self, kind: str, params: Dict, folder: str, priority: str = 'normal',
+                 job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.folder = folder
+        self.status = 'pending'
+        self.progress: Dict = {}
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = self.updated_at = time.time()
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+
+    def checkpoint(self, **progress):
+        """Record progress; raises JobCancelled if the job was cancelled."""
+        with self.lock:
+            self.progress.update(progress)
+        self.save()
+        if self.cancel_event.is_set():
+            raise JobCancelled(self.id)
+
+    def set(self, **fields):
+        with self.lock:
+            for key, value in fields.items():
+                setattr(self, key, value)
+        self.save()
+
+    def to_dict(self) -> Dict:
+        return {'id': self.id, 'kind': self.kind, 'params': self.params, 'priority': self.priority,
+                'status': self.status, 'progress': dict(self.progress), 'result': self.result,
+                'error': self.error, 'created_at': self.created_at, 'updated_at': self.updated_at}
+
+    def save(self):
+        """Write job.json atomically."""
+        with self.lock:
+            self.updated_at = time.time()
+            state = self.to_dict()
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, 'job.json')
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, folder: str) -> 'Job':
+        with open(os.path.join(folder, 'job.json'), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        job = cls(state['kind'], state['params'], folder, state.get('priority', 'normal'), state['id'])
+        for key in ('status', 'progress', 'result', 'error', 'created_at', 'updated_at'):
+            setattr(job, key, state.get(key, getattr(job, key)))
+        return job
+
+def _run_download(job: Job) -> Dict:
+    from src.downloader import download_history_range
+    p = job.params
+    pages = os.path.join(job.folder, 'pages')
+    result = download_history_range(p['symbol'], p['timeframe'], p['start_date'], p['end_date'],
+                                    p.get('force_extend', False), checkpoint=pages,
+                                    on_page=lambda progress: job.checkpoint(**progress))
+    if result.get('success'):
+        # Las páginas ya están en el histórico
+        shutil.rmtree(pages, ignore_errors=True)
+    return result
+
+def _run_backtest(job: Job) -> Dict:
+    from src.backtest import load_checkpoint
+    from src.history_manager import HistoryManager
+    p = job.params
+    symbol = p['symbol'].replace('-', '/')
+    checkpoint = os.path.join(job.folder, 'backtest.pkl')
+    cmd = [sys.executable, '-m', 'src.backtest', '--strategy', p['strategy'], '--symbol', symbol,
+           '--timeframe', p['timeframe'], '--chunksize', str(int(p.get('chunksize') or DEFAULT_CHUNKSIZE)),
+           '--checkpoint', checkpoint]
+    # Con SQLite no hay CSV: sin --history el script lee las velas de la base de datos (iter_history)
+    if HistoryManager.backend != 'sqlite':
+        cmd += ['--history', HistoryManager.get_history_file(symbol, p['timeframe'])]
+    for key in ('start_date', 'end_date'):
+        if p.get(key):
+            cmd += [f'--{key}', str(p[key])]
+    job.checkpoint(rows=(load_checkpoint(checkpoint) or {}).get('rows', 0))
+    with open(os.path.join(job.folder, 'backtest.log'), 'ab') as log:
+        env = {**os.environ, 'HISTORY_BACKEND': HistoryManager.backend}
+        if HistoryManager.backend == 'sqlite':
+            env['HISTORY_DB'] = HistoryManager.get_store().path
+        process = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, env=env)
+        try:
+            while process.poll() is None:
+                job.cancel_event.wait(0.5)
+                state = load_checkpoint(checkpoint)
+                job.checkpoint(rows=state['rows'] if state else job.progress.get('rows', 0))
+        finally:
+            # Cancelada (o error): el subproceso se detiene; su checkpoint sigue siendo válido
+            if process.poll() is None:
+                process.terminate()
+                process.wait()
+    if process.returncode != 0:
+        with open(os.path.join(job.folder, 'backtest.log'), 'rb') as f:
+            tail = f.read()[-2000:].decode('utf-8', errors='replace')
+        return {'success': False, 'error': f"Backtest exited with code {process.returncode}: {tail}"}
+    out_path = os.path.join('data', 'strategies', p['strategy'], f"backtest_{symbol.replace('/', '-')}_{p['timeframe']}.csv")
+    return {'success': True, 'result_file': out_path, 'summary_file': out_path.replace('.csv', '_summary.json')}
+
+# job kind -> (scheduler job class, runner, required parameters)
+RUNNERS: Dict[str, tuple] = {
+    'download': ('download', _run_download, ('symbol', 'timeframe', 'start_date', 'end_date')),
+    'backtest': ('backtest', _run_backtest, ('strategy', 'symbol', 'timeframe')),
+}
+
+class JobManager:
+    """
+    Jobs of the process, persisted under `root`.
+
+    Jobs found active in `root` at construction (the process that ran them died) are marked
+    'interrupted'.
+
+    Args:
+        root (str): Folder with one subfolder per job.
+    """
+    def __init__(self, root: str = JOBS_DIR):
+        self.root = root
+        self.jobs: Dict[str, Job] = {}
+        self.threads: Dict[str, threading.Thread] = {}
+        self.lock = threading.Lock()
+        if os.path.isdir(root):
+            for name in sorted(os.listdir(root)):
+                folder = os.path.join(root, name)
+                if not os.path.exists(os.path.join(folder, 'job.json')):
+                    continue
+                job = Job.load(folder)
+                if job.status in ACTIVE:
+                    job.set(status='interrupted')
+                self.jobs[job.id] = job
+
+    def submit(self, kind: str, params: Dict, priority: str = 'normal') -> Job:
+        """Create a job and start it in the background."""
+        from src.scheduler import PRIORITIES
+        if kind not in RUNNERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        missing = [key for key in RUNNERS[kind][2] if not params.get(key)]
+        if missing:
+            raise ValueError(f"Missing parameters for a {kind} job: {', '.join(missing)}")
+        if kind == 'backtest':
+            from src.strategies import get_spec
+            # Los backtests en segundo plano son streaming: requieren la implementación por bloques
+            if not get_spec(params['strategy']).provides('chunked'):
+                raise ValueError(f"Strategy {params['strategy']} has no chunked implementation; "
+                                 f"background backtest jobs only support streaming strategies")
+        job = Job(kind, dict(params), '', priority)
+        job.folder = os.path.join(self.root, job.id)
+        job.save()
+        with self.lock:
+            self.jobs[job.id] = job
+        self._start(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[Dict]:
+        """Every job, most recent first."""
+        return [job.to_dict() for job in sorted(self.jobs.values(), key=lambda j: j.created_at, reverse=True)]
+
+    def cancel(self, job_id: str) -> Job:
+        """Ask an active job to stop at its next checkpoint (its progress is kept for resume)."""
+        job = self._job(job_id)
+        if job.status not in ACTIVE:
+            raise ValueError(f"Job {job_id} is not active ({job.status})")
+        job.cancel_event.set()
+        return job
+
+    def resume(self, job_id: str) -> Job:
+        """Restart a failed, cancelled or interrupted job from its last checkpoint."""
+        job = self._job(job_id)
+        with self.lock:
+            if job.status not in RESUMABLE or job_id in self.threads:
+                raise ValueError(f"Job {job_id} cannot be resumed ({job.status})")
+            job.cancel_event.clear()
+            job.set(status='pending', error=None)
+        self._start(job)
+        return job
+
+    def resume_interrupted(self) -> List[str]:
+        """Resume every interrupted job (e.g. at start-up); returns their ids."""
+        ids = [job.id for job in self.jobs.values() if job.status == 'interrupted']
+        for job_id in ids:
+            self.resume(job_id)
+        return ids
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Job:
+        thread = self.threads.get(job_id)
+        if thread is not None:
+            thread.join(timeout)
+        return self._job(job_id)
+
+    def _job(self, job_id: str) -> Job:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        return job
+
+    def _start(self, job: Job):
+        thread = threading.Thread(target=self._run, args=(job,), daemon=True, name=f"job-{job.id}")
+        with self.lock:
+            self.threads[job.id] = thread
+        thread.start()
+
+    def _run(self, job: Job):
+        from src.scheduler import QueueFull, get_scheduler
+        job_class, runner, _ = RUNNERS[job.kind]
+        final: Dict = {}
+        try:
+            with get_scheduler().slot(job_class, job.priority):
+                job.set(status='running')
+                job.checkpoint()
+                result = runner(job)
+            if result.get('success'):
+                final = {'status': 'done', 'result': result}
+            else:
+                final = {'status': 'failed', 'result': result, 'error': result.get('error')}
+        except JobCancelled:
+            final = {'status': 'cancelled'}
+        except QueueFull as e:
+            final = {'status': 'failed', 'error': f"Not admitted by the scheduler: {e}"}
+        except Exception as e:
+            final = {'status': 'failed', 'error': str(e)}
+        finally:
+            # El hilo se retira antes de publicar el estado final: en cuanto el job se ve
+            # cancelado o fallido ya se puede reanudar
+            with self.lock:
+                self.threads.pop(job.id, None)
+                if final:
+                    job.set(**final)
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+def get_job_manager() -> JobManager:
+    """Process-wide manager under JOBS_DIR (overridable with the JOBS_DIR environment variable)."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(os.environ.get('JOBS_DIR', JOBS_DIR))
+        return _manager
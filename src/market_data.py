@@ -0,0 +1,260 @@
+"""
+In-process market-data hub.
+
+Strategies that trade the same symbol/timeframe share a single upstream feed: the hub runs one
+feed per (symbol, timeframe) key, stores every closed candle once in a rolling NumPy buffer and
+dispatches the same bar object to every subscriber. Exchange requests and memory therefore grow
+with the number of distinct feeds, not with the number of strategies. Subscribers read history
+through read-only views of the shared buffer, without copies.
+
+Typical usage (as a module):
+    hub = MarketDataHub()
+    feed = hub.feed('BTC/USDT', '1m', warmup=150)
+    async for bar in feed.bars():   # inside the event loop
+        close = hub.window('BTC/USDT', '1m', 50)['close']
+"""
+import asyncio
+import logging
+import numpy as np
+import pandas as pd
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+class RollingBuffer:
+    """
+    Fixed-capacity OHLCV ring buffer whose latest rows are always contiguous.
+
+    Each row is written twice, at its slot and at slot + capacity, so any window of the most
+    recent bars is a plain slice of the backing arrays and can be returned as a view.
+    """
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.ts = np.zeros(2 * capacity, dtype='datetime64[ns]')
+        self.values = np.zeros((2 * capacity, len(FIELDS)))
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, bar: Dict):
+        pos = self.count % self.capacity
+        row = [bar.get(field, np.nan) for field in FIELDS]
+        ts = np.datetime64(bar['ts'], 'ns')
+        self.values[pos] = self.values[pos + self.capacity] = row
+        self.ts[pos] = self.ts[pos + self.capacity] = ts
+        self.count += 1
+
+    def window(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Return the last n bars (all buffered bars by default), oldest first.
+
+        Returns:
+            Dict[str, np.ndarray]: 'ts' and one array per OHLCV field; read-only views that
+            stay valid until the buffer wraps around them.
+        """
+        n = len(self) if n is None else min(n, len(self))
+        end = (self.count - 1) % self.capacity + self.capacity + 1 if self.count else 0
+        start = end - n
+        window = {'ts': self.ts[start:end]}
+        for i, field in enumerate(FIELDS):
+            window[field] = self.values[start:end, i]
+        for view in window.values():
+            view.flags.writeable = False
+        return window
+
+    def bars(self, n: Optional[int] = None) -> List[Dict]:
+        """Return the last n bars as dicts (used to warm up late subscribers)."""
+        window = self.window(n)
+        return [dict({'ts': pd.Timestamp(window['ts'][i])}, **{field: float(window[field][i]) for field in FIELDS})
+                for i in range(len(window['ts']))]
+
+    def resized(self, capacity: int) -> 'RollingBuffer':
+        """Return a copy with a new capacity holding the most recent bars."""
+        buffer = RollingBuffer(capacity)
+        window = self.window(capacity)
+        n = len(window['ts'])
+        buffer.ts[:n] = buffer.ts[capacity:capacity + n] = window['ts']
+        stacked = np.column_stack([window[field] for field in FIELDS]) if n else np.empty((0, len(FIELDS)))
+        buffer.values[:n] = buffer.values[capacity:capacity + n] = stacked
+        buffer.count = n
+        return buffer
+
+class _Stream:
+    def __init__(self, capacity: int, warmup: int = 0):
+        self.buffer = RollingBuffer(capacity)
+        self.warmup = warmup
+        self.queues: List[asyncio.Queue] = []
+        # Subscribers waiting for a backfill -> live bars received in the meantime
+        self.pending: Dict[asyncio.Queue, List[Dict]] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.bars_received = 0
+
+def _exchange_feed(symbol: str, timeframe: str, warmup: int):
+    from src.paper_trading import ExchangeFeed
+    return ExchangeFeed(symbol, timeframe, warmup=warmup)
+
+def _exchange_history(symbol: str, timeframe: str, limit: int, before: pd.Timestamp) -> pd.DataFrame:
+    """The `limit` candles before `before` (blocking; run in a thread)."""
+    from src.collector import fetch_ohlcv
+    from src.timeframes import timeframe_to_seconds
+    since = before - limit * pd.Timedelta(seconds=timeframe_to_seconds(timeframe))
+    df = fetch_ohlcv(symbol, timeframe, limit, since=since)
+    return df[df['ts'] < before]
+
+class HubFeed:
+    """Feed backed by a hub subscription; subscribes when iteration starts and leaves when it ends."""
+    def __init__(self, hub: 'MarketDataHub', symbol: str, timeframe: str, warmup: int = 0):
+        self.hub = hub
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.warmup = warmup
+
+    async def bars(self) -> AsyncIterator[Dict]:
+        queue = self.hub.subscribe(self.symbol, self.timeframe, self.warmup)
+        try:
+            while True:
+                bar = await queue.get()
+                if bar is None:
+                    return
+                yield bar
+        finally:
+            self.hub.unsubscribe(self.symbol, self.timeframe, queue)
+
+class MarketDataHub:
+    """
+    Publish/subscribe fan-out of candles keyed by (symbol, timeframe).
+
+    Pull feeds are started on the first subscription of a key (built by `feed_factory`, an
+    ExchangeFeed by default) and cancelled when the last subscriber leaves. Push sources can
+    call publish() directly. All methods must be called from the hub's event loop.
+
+    A subscriber asking for more warm-up bars than the key holds gets the missing older bars
+    from `history_fetch(symbol, timeframe, limit, before)` (the exchange by default), which
+    returns a DataFrame of the candles before `before`.
+    """
+    def __init__(self, feed_factory: Optional[Callable] = None, history_fetch: Optional[Callable] = None):
+        self.feed_factory = feed_factory or _exchange_feed
+        self.history_fetch = history_fetch or _exchange_history
+        self.streams: Dict[Tuple[str, str], _Stream] = {}
+
+    def feed(self, symbol: str, timeframe: str, warmup: int = 0) -> HubFeed:
+        return HubFeed(self, symbol, timeframe, warmup)
+
+    def subscribe(self, symbol: str, timeframe: str, warmup: int = 0) -> asyncio.Queue:
+        """
+        Subscribe to a key and return the queue its bars are delivered to.
+
+        The upstream feed of a new key fetches `warmup` bars. A later subscriber gets the
+        buffered bars (up to `warmup`) replayed first, flagged as warm-up; when it needs more
+        than the key holds, the older bars are fetched first and its live bars are held back
+        until they have been replayed (if the feed has delivered nothing yet, it is restarted
+        with the larger warm-up instead).
+        """
+        key = (symbol, timeframe)
+        capacity = max(warmup, 1)
+        stream = self.streams.get(key)
+        queue: asyncio.Queue = asyncio.Queue()
+        if stream is None:
+            stream = self.streams[key] = _Stream(capacity, warmup)
+            self._start_feed(key, stream)
+        else:
+            if capacity > stream.buffer.capacity:
+                stream.buffer = stream.buffer.resized(capacity)
+            if warmup > stream.warmup and stream.bars_received == 0 and stream.task is not None:
+                # Nada entregado aún: el feed vuelve a empezar pidiendo el calentamiento mayor
+                stream.task.cancel()
+                stream.warmup = warmup
+                self._start_feed(key, stream)
+            elif warmup > len(stream.buffer) > 0:
+                stream.pending[queue] = []
+                held = stream.buffer.bars(warmup)
+                asyncio.get_running_loop().create_task(self._backfill(key, stream, queue, warmup, held))
+            else:
+                for bar in stream.buffer.bars(warmup):
+                    queue.put_nowait(dict(bar, warmup=True))
+        stream.queues.append(queue)
+        return queue
+
+    def _start_feed(self, key: Tuple[str, str], stream: _Stream):
+        stream.task = asyncio.get_running_loop().create_task(self._pump(key, self.feed_factory(*key, stream.warmup)))
+
+    async def _backfill(self, key: Tuple[str, str], stream: _Stream, queue: asyncio.Queue, warmup: int,
+                        held: List[Dict]):
+        """Fetch the warm-up bars missing before `held`, then replay them to `queue` before its live bars."""
+        oldest = held[0]['ts']
+        older: List[Dict] = []
+        try:
+            df = await asyncio.to_thread(self.history_fetch, *key, warmup - len(held), oldest)
+            older = df[df['ts'] < oldest].sort_values('ts').to_dict('records')
+        except Exception as e:
+            logging.error(f"[MARKETDATA] Backfill of {key} failed: {e}")
+        if queue not in stream.pending:
+            return
+        # Los bares históricos quedan en el buffer compartido para los siguientes suscriptores
+        # (salvo que el buffer haya dado la vuelta mientras tanto)
+        if older and len(stream.buffer) and pd.Timestamp(stream.buffer.window()['ts'][0]) == oldest:
+            buffer = RollingBuffer(stream.buffer.capacity)
+            for bar in older + stream.buffer.bars():
+                buffer.append(bar)
+            stream.buffer = buffer
+        for bar in (older + held)[-warmup:]:
+            queue.put_nowait(dict(bar, warmup=True))
+        for bar in stream.pending.pop(queue):
+            queue.put_nowait(bar)
+
+    def unsubscribe(self, symbol: str, timeframe: str, queue: asyncio.Queue):
+        key = (symbol, timeframe)
+        stream = self.streams.get(key)
+        if stream is None or queue not in stream.queues:
+            return
+        stream.queues.remove(queue)
+        stream.pending.pop(queue, None)
+        if not stream.queues:
+            if stream.task is not None:
+                stream.task.cancel()
+            del self.streams[key]
+
+    async def _pump(self, key: Tuple[str, str], feed):
+        try:
+            async for bar in feed.bars():
+                self.publish(*key, bar)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"[MARKETDATA] Feed {key} failed: {e}")
+        # End of feed: release the subscribers
+        stream = self.streams.pop(key, None)
+        if stream is not None:
+            for queue in stream.queues:
+                if queue in stream.pending:
+                    stream.pending[queue].append(None)
+                else:
+                    queue.put_nowait(None)
+
+    def publish(self, symbol: str, timeframe: str, bar: Dict):
+        """Store a closed bar once and hand the same object to every subscriber of its key."""
+        stream = self.streams.get((symbol, timeframe))
+        if stream is None:
+            return
+        stream.buffer.append(bar)
+        stream.bars_received += 1
+        for queue in stream.queues:
+            if queue in stream.pending:
+                stream.pending[queue].append(bar)
+            else:
+                queue.put_nowait(bar)
+
+    def window(self, symbol: str, timeframe: str, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Read-only view of the last n buffered bars of a key."""
+        stream = self.streams.get((symbol, timeframe))
+        if stream is None:
+            raise KeyError(f"No subscribers for {symbol} {timeframe}")
+        return stream.buffer.window(n)
+
+    def stats(self) -> List[Dict]:
+        return [{'symbol': symbol, 'timeframe': timeframe, 'subscribers': len(stream.queues),
+                 'bars_received': stream.bars_received, 'buffered': len(stream.buffer)}
+                for (symbol, timeframe), stream in self.streams.items()]
@@ -0,0 +1,133 @@
+"""
+Monte Carlo robustness analysis of backtest trade lists.
+
+The trades of a backtest are resampled thousands of times, either with replacement (bootstrap)
+or by shuffling their order, and the resulting equity paths are summarized as profit and
+drawdown distributions, percentiles and risk of ruin. All simulations of a batch are one
+(simulations x trades) NumPy operation.
+
+Usage (as a script):
+    python -m src.monte_carlo --strategy cross_sma --symbol BTC/USDT --timeframe 1m --sims 10000
+
+Typical usage (as a module):
+    from src.monte_carlo import monte_carlo
+    report = monte_carlo(trades_df['profit'].to_numpy(), n_sims=10000)
+"""
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Sequence
+
+METHODS = ('bootstrap', 'shuffle')
+PERCENTILES = [5, 25, 50, 75, 95]
+# Upper bound on simulated cells per batch (~8 MB per float64 array, stays cache friendly)
+MAX_BATCH_CELLS = 1_000_000
+
+def trades_filename(strategy: str, symbol: str, timeframe: str, base_dir: str = 'data') -> str:
+    """Path of the full trade list written by the backtest script."""
+    return os.path.join(base_dir, 'strategies', strategy, f"backtest_{symbol.replace('/', '-')}_{timeframe}_trades.csv")
+
+def _resample(profits: np.ndarray, n_sims: int, method: str, rng: np.random.Generator) -> np.ndarray:
+    if method == 'bootstrap':
+        return profits[rng.integers(0, len(profits), size=(n_sims, len(profits)), dtype=np.int32)]
+    return rng.permuted(np.tile(profits, (n_sims, 1)), axis=1)
+
+def _distribution(values: np.ndarray, bins: int) -> Dict:
+    counts, edges = np.histogram(values, bins=bins)
+    return {
+        'mean': float(values.mean()),
+        'std': float(values.std()),
+        'percentiles': {str(p): float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+        'histogram': {'counts': counts.tolist(), 'edges': edges.tolist()},
+    }
+
+def monte_carlo(profits: Sequence[float], n_sims: int = 10000, method: str = 'bootstrap',
+                initial_capital: float = 10000.0, ruin_pct: float = 0.5, bins: int = 20,
+                seed: Optional[int] = None) -> Dict:
+    """
+    Resample a list of trade profits and summarize the simulated equity paths.
+
+    Args:
+        profits (Sequence[float]): Profit of each trade in quote currency, in execution order.
+        n_sims (int): Number of simulated paths.
+        method (str): 'bootstrap' (draw trades with replacement) or 'shuffle' (permute their order).
+        initial_capital (float): Equity at the start of every path.
+        ruin_pct (float): A path is ruined if its equity ever falls to initial_capital * (1 - ruin_pct).
+        bins (int): Histogram bins of the reported distributions.
+        seed (int, optional): Seed for reproducible runs.
+
+    Returns:
+        Dict: 'final_profit' and 'max_drawdown' distributions (mean, std, percentiles, histogram),
+        'risk_of_ruin' and 'probability_of_loss' as fractions of the simulations.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    if n_sims < 1:
+        raise ValueError(f"n_sims must be >= 1, got {n_sims}")
+    profits = np.asarray(profits, dtype=float)
+    if len(profits) == 0:
+        raise ValueError("No trades to resample")
+    rng = np.random.default_rng(seed)
+    ruin_level = -initial_capital * ruin_pct
+    batch = max(1, MAX_BATCH_CELLS // len(profits))
+    final_profit = np.empty(n_sims)
+    max_drawdown = np.empty(n_sims)
+    ruined = np.empty(n_sims, dtype=bool)
+    for start in range(0, n_sims, batch):
+        stop = min(start + batch, n_sims)
+        paths = _resample(profits, stop - start, method, rng)
+        np.cumsum(paths, axis=1, out=paths)
+        final_profit[start:stop] = paths[:, -1]
+        ruined[start:stop] = paths.min(axis=1) <= ruin_level
+        # The running peak starts at the initial capital (cumulative profit 0)
+        drawdown = np.maximum.accumulate(paths, axis=1)
+        np.maximum(drawdown, 0, out=drawdown)
+        np.subtract(paths, drawdown, out=drawdown)
+        max_drawdown[start:stop] = drawdown.min(axis=1)
+    return {
+        'method': method,
+        'n_sims': n_sims,
+        'n_trades': len(profits),
+        'initial_capital': initial_capital,
+        'ruin_pct': ruin_pct,
+        'final_profit': _distribution(final_profit, bins),
+        'max_drawdown': _distribution(max_drawdown, bins),
+        'risk_of_ruin': float(ruined.mean()),
+        'probability_of_loss': float((final_profit < 0).mean()),
+    }
+
+def robustness_summary(report: Dict) -> Dict:
+    """Compact version of a report (no histograms) to embed in backtest summaries."""
+    return {
+        'method': report['method'],
+        'n_sims': report['n_sims'],
+        'final_profit_percentiles': report['final_profit']['percentiles'],
+        'max_drawdown_percentiles': report['max_drawdown']['percentiles'],
+        'risk_of_ruin': report['risk_of_ruin'],
+        'probability_of_loss': report['probability_of_loss'],
+    }
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from src.config import SYMBOL, TIMEFRAME, RISK_PARAMS
+
+    parser = argparse.ArgumentParser(description="Monte Carlo resampling of backtest trades.")
+    parser.add_argument('--trades', type=str, default=None, help='CSV de trades (por defecto el del backtest)')
+    parser.add_argument('--strategy', type=str, default='cross_sma')
+    parser.add_argument('--symbol', type=str, default=SYMBOL)
+    parser.add_argument('--timeframe', type=str, default=TIMEFRAME)
+    parser.add_argument('--sims', type=int, default=10000, help='Número de simulaciones (>= 1)')
+    parser.add_argument('--method', type=str, default='bootstrap', choices=METHODS)
+    parser.add_argument('--ruin_pct', type=float, default=0.5)
+    parser.add_argument('--initial_capital', type=float, default=RISK_PARAMS.get('initial_capital', 10000.0))
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    if args.sims < 1:
+        parser.error(f"argument --sims: must be >= 1, got {args.sims}")
+
+    trades_path = args.trades or trades_filename(args.strategy, args.symbol, args.timeframe)
+    trades = pd.read_csv(trades_path)
+    report = monte_carlo(trades['profit'].to_numpy(), n_sims=args.sims, method=args.method,
+                         initial_capital=args.initial_capital, ruin_pct=args.ruin_pct, seed=args.seed)
+    print(json.dumps(robustness_summary(report), indent=2))
@@ -0,0 +1,109 @@
+"""
+Multi-timeframe alignment.
+
+A strategy running on a base timeframe (e.g. 1m) can read lines computed on higher timeframes
+(e.g. a 1h EMA). The higher-timeframe candles are built from the base history (or loaded), their
+indicators are computed once at native resolution, and the results are forward-filled onto the
+base index with a vectorized as-of join.
+
+No look-ahead: a decision is taken at the close of a base candle, and a higher-timeframe candle
+is only visible from its own close onwards. At 10:59 (the 1m candle closing at 11:00) the 10:00
+1h candle is visible; at 10:58 only the 09:00 one is.
+
+Typical usage (as a module):
+    from src.multi_timeframe import resample_ohlcv, align_asof
+    hourly = resample_ohlcv(df['ts'], {'close': df['close'].to_numpy()}, '1h')
+    trend = align_asof(df['ts'], hourly['ts'], ema(hourly['close'], 50), '1h', base_timeframe='1m')
+"""
+import numpy as np
+from typing import Dict, Optional
+from src.timeframes import candle_close, candle_open, timeframe_to_timedelta
+
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+def base_duration(ts: np.ndarray, timeframe: Optional[str] = None) -> np.timedelta64:
+    """Duration of the base candles: from the timeframe or, if not given, the smallest gap between bars."""
+    if timeframe:
+        return np.timedelta64(timeframe_to_timedelta(timeframe).value, 'ns')
+    gaps = np.diff(np.asarray(ts, dtype='datetime64[ns]'))
+    gaps = gaps[gaps > np.timedelta64(0, 'ns')]
+    if not len(gaps):
+        raise ValueError("Cannot infer the base timeframe from less than two timestamps")
+    return gaps.min()
+
+def resample_ohlcv(ts: np.ndarray, data: Dict[str, np.ndarray], timeframe: str) -> Dict[str, np.ndarray]:
+    """
+    Build the candles of a higher timeframe from ts-sorted base candles.
+
+    A first candle that is only partly covered by the base history is dropped, so its open (and
+    its high/low) are never wrong; the last one may be partial, which align_asof never exposes
+    because it is only visible after its close.
+
+    Args:
+        ts (np.ndarray): Base candle open times.
+        data (Dict[str, np.ndarray]): Any of 'open', 'high', 'low', 'close', 'volume' (1D or
+            time x symbol arrays); other keys are ignored.
+        timeframe (str): Target timeframe, e.g. '1h'.
+
+    Returns:
+        Dict[str, np.ndarray]: 'ts' (candle open times) and the aggregated series.
+    """
+    ts = np.asarray(ts, dtype='datetime64[ns]')
+    opens = candle_open(ts, timeframe)
+    starts = np.flatnonzero(np.r_[True, opens[1:] != opens[:-1]]) if len(ts) else np.empty(0, dtype=int)
+    if len(starts) and ts[0] != opens[0]:
+        starts = starts[1:]
+    result = {'ts': opens[starts]}
+    first = starts[0] if len(starts) else len(ts)
+    bounds = starts - first
+    for key in OHLCV:
+        if data.get(key) is None:
+            continue
+        values = np.asarray(data[key], dtype=float)[first:]
+        if not len(bounds):
+            result[key] = values[:0]
+        elif key == 'open':
+            result[key] = values[bounds]
+        elif key == 'close':
+            result[key] = values[np.r_[bounds[1:] - 1, len(values) - 1]]
+        elif key == 'high':
+            result[key] = np.maximum.reduceat(values, bounds, axis=0)
+        elif key == 'low':
+            result[key] = np.minimum.reduceat(values, bounds, axis=0)
+        elif key == 'volume':
+            result[key] = np.add.reduceat(values, bounds, axis=0)
+    return result
+
+def align_asof(base_ts: np.ndarray, ts: np.ndarray, values: np.ndarray, timeframe: str,
+               base_timeframe: Optional[str] = None) -> np.ndarray:
+    """
+    Forward-fill higher-timeframe values onto base candles without look-ahead.
+
+    Each base candle gets the value of the last higher-timeframe candle closed at or before its
+    own close (NaN, or False for conditions, before the first one).
+
+    Args:
+        base_ts (np.ndarray): Base candle open times (sorted).
+        ts (np.ndarray): Higher-timeframe candle open times (sorted).
+        values (np.ndarray): Values per higher-timeframe candle (1D or time x symbol).
+        timeframe (str): Higher timeframe.
+        base_timeframe (str, optional): Base timeframe; inferred from base_ts when omitted.
+
+    Returns:
+        np.ndarray: Values on the base index (first axis of length len(base_ts)).
+    """
+    base_ts = np.asarray(base_ts, dtype='datetime64[ns]')
+    if np.ndim(values) == 0:
+        return values
+    decision = base_ts + base_duration(base_ts, base_timeframe)
+    index = np.searchsorted(candle_close(ts, timeframe), decision, side='right') - 1
+    values = np.asarray(values)
+    if values.dtype != bool:
+        values = values.astype(float)
+    # Conditions are False, and lines NaN, before the first visible candle
+    missing = False if values.dtype == bool else np.nan
+    if not len(values):
+        return np.full((len(base_ts),) + values.shape[1:], missing, dtype=values.dtype)
+    result = values[np.maximum(index, 0)]
+    result[index < 0] = missing
+    return result
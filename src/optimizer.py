@@ -0,0 +1,426 @@
+"""
+Evolutionary parameter optimizer with early pruning.
+
+A grid over fast/slow periods and the risk parameters (stop_loss_pct, max_position_size) grows
+combinatorially; this module searches the same space adaptively instead. Every generation
+proposes a batch of candidates (random ones at first, then children of the best candidates
+found so far: blend crossover plus Gaussian mutation on the normalized genes) and evaluates them
+through the backtest engine (strategy signals + simulate_trades) with successive halving: the
+whole batch is backtested on a prefix of the history (1/9 of it by default), only the best
+1/eta go on to a longer prefix (1/3) and only those reach the full history. Candidates are
+ranked by Pareto dominance on (total_profit, max_drawdown), ties broken by crowding distance
+(NSGA-II), both to prune and to pick the parents. The search stops after `generations`, or
+earlier when the Pareto front has not changed for `patience` generations. Pruning on a prefix
+assumes it is long enough to hold several trades of the slowest candidates; with short histories
+pass larger `fractions`.
+
+Candidates are evaluated in parallel worker processes that attach the history from shared
+memory (src.shared_data); crossover strategies reuse the indicator line of each period across
+candidates (the lines are causal, so a prefix of the line is the line of the prefix).
+
+Usage (as a script):
+    python -m src.optimizer --strategy cross_sma --symbol BTC/USDT --timeframe 1m --generations 10 --workers 4
+
+Typical usage (as a module):
+    from src.optimizer import optimize
+    result = optimize(df, 'cross_sma', {'fast': (2, 50), 'slow': (10, 300), 'stop_loss_pct': (0.0, 0.1)})
+    result['front']        # Pareto front of total_profit vs max_drawdown
+"""
+import math
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.backtest import run_strategy
+from src.indicators import crossover
+from src.shared_data import SharedDatasetRegistry, attach
+from src.signals import codes_to_labels
+from src.simulation import simulate_trades
+from src.strategies import get_spec
+
+# name -> (low, high); int bounds give an integer parameter, float bounds a continuous one
+SEARCH_SPACE: Dict[str, Tuple] = {
+    'fast': (2, 50),
+    'slow': (10, 300),
+    'stop_loss_pct': (0.0, 0.1),
+    'max_position_size': (0.05, 1.0),
+}
+# Parameters of the trade simulator (the rest go to the strategy)
+SIM_PARAMS = ('max_position_size', 'stop_loss_pct')
+# Fractions of the history of the successive-halving rungs (the last one is the whole history)
+FRACTIONS = (1 / 9, 1 / 3, 1.0)
+# Indicator lines kept per worker process (one full-length array per period)
+LINE_CACHE_SIZE = 64
+
+# History and settings of a run; filled once per worker process by _init_worker
+_SHARED: Dict = {}
+
+def pareto_ranks(points: np.ndarray) -> np.ndarray:
+    """
+    Non-dominated sorting of points where every column is maximized.
+
+    Args:
+        points (np.ndarray): (n x objectives) array.
+
+    Returns:
+        np.ndarray: Front of every point (0 for the Pareto front, 1 for the front once it is
+        removed, ...).
+    """
+    points = np.asarray(points, dtype=float)
+    n = len(points)
+    # dominates[i, j]: i is at least as good as j everywhere and better somewhere
+    better_eq = (points[:, None, :] >= points[None, :, :]).all(axis=2)
+    better = (points[:, None, :] > points[None, :, :]).any(axis=2)
+    dominates = better_eq & better
+    ranks = np.full(n, -1)
+    remaining = np.ones(n, dtype=bool)
+    rank = 0
+    while remaining.any():
+        dominated = (dominates[remaining][:, remaining]).any(axis=0)
+        front = np.flatnonzero(remaining)[~dominated]
+        ranks[front] = rank
+        remaining[front] = False
+        rank += 1
+    return ranks
+
+def crowding_distance(points: np.ndarray) -> np.ndarray:
+    """Crowding distance of the points of one front (infinite at the extremes)."""
+    points = np.asarray(points, dtype=float)
+    n = len(points)
+    distance = np.zeros(n)
+    if n <= 2:
+        return np.full(n, np.inf)
+    for column in points.T:
+        order = np.argsort(column)
+        span = column[order[-1]] - column[order[0]]
+        distance[order[0]] = distance[order[-1]] = np.inf
+        if span > 0:
+            distance[order[1:-1]] += (column[order[2:]] - column[order[:-2]]) / span
+    return distance
+
+def select(points: np.ndarray, k: int, eligible: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Indices of the best k points: by Pareto front, then by crowding distance (NSGA-II).
+
+    Args:
+        points (np.ndarray): (n x objectives) array, every column maximized.
+        k (int): Points to keep.
+        eligible (np.ndarray, optional): Boolean mask; ineligible points come after all others.
+
+    Returns:
+        np.ndarray: Indices, best first.
+    """
+    points = np.asarray(points, dtype=float)
+    eligible = np.ones(len(points), dtype=bool) if eligible is None else np.asarray(eligible, dtype=bool)
+    ranks = np.full(len(points), len(points))
+    crowding = np.zeros(len(points))
+    if eligible.any():
+        ranks[eligible] = pareto_ranks(points[eligible])
+        for rank in np.unique(ranks[eligible]):
+            members = np.flatnonzero(eligible & (ranks == rank))
+            crowding[members] = crowding_distance(points[members])
+    order = np.lexsort((-crowding, ranks))
+    return order[:k]
+
+def _decode(genes: np.ndarray, space: Dict[str, Tuple]) -> Optional[Dict]:
+    """Parameters for normalized genes in [0, 1]; None if they are not a valid combination."""
+    params = {}
+    for gene, (name, (low, high)) in zip(genes, space.items()):
+        value = low + float(np.clip(gene, 0, 1)) * (high - low)
+        params[name] = int(round(value)) if isinstance(low, int) and isinstance(high, int) else round(value, 4)
+    if 'fast' in params and 'slow' in params and params['fast'] >= params['slow']:
+        return None
+    return params
+
+def _encode(params: Dict, space: Dict[str, Tuple]) -> np.ndarray:
+    return np.array([(params[name] - low) / (high - low) if high > low else 0.0
+                     for name, (low, high) in space.items()])
+
+def propose(parents: List[Dict], space: Dict[str, Tuple], n: int, rng: np.random.Generator,
+            seen: Optional[set] = None) -> List[Dict]:
+    """
+    New candidates: random ones without parents, otherwise children of the parents.
+
+    Each child blends two parents picked by binary tournament (parents are ordered best first)
+    and mutates every gene with probability 1/genes. Candidates already in `seen` (which is
+    updated) are not proposed again.
+
+    Args:
+        parents (List[Dict]): Parameter sets, best first.
+        space (Dict[str, Tuple]): (low, high) of every parameter.
+        n (int): Candidates to propose.
+        rng (np.random.Generator): Random generator.
+        seen (set, optional): Keys (sorted parameter items) of the candidates proposed so far.
+
+    Returns:
+        List[Dict]: Up to n new parameter sets (fewer if the space is exhausted).
+    """
+    seen = set() if seen is None else seen
+    genes = [_encode(p, space) for p in parents]
+    candidates = []
+    for _ in range(50 * n):
+        if len(candidates) == n:
+            break
+        if len(genes) >= 2:
+            a, b = (genes[min(rng.integers(len(genes), size=2))] for _ in range(2))
+            child = a + rng.uniform(-0.25, 1.25, len(space)) * (b - a)
+            mutate = rng.random(len(space)) < 1 / len(space)
+            child = np.where(mutate, child + rng.normal(0, 0.1, len(space)), child)
+        else:
+            child = rng.random(len(space))
+        params = _decode(child, space)
+        if params is None:
+            continue
+        key = tuple(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            candidates.append(params)
+    return candidates
+
+def _init_worker(data: Dict[str, np.ndarray], strategy: str, timeframe: Optional[str], costs: Dict):
+    _SHARED.update(data=data, strategy=strategy, timeframe=timeframe, costs=costs, lines=OrderedDict())
+
+def _init_shared_worker(spec: Dict, strategy: str, timeframe: Optional[str], costs: Dict):
+    _init_worker(attach(spec), strategy, timeframe, costs)
+
+def _line(period: int) -> np.ndarray:
+    lines = _SHARED['lines']
+    if period in lines:
+        lines.move_to_end(period)
+        return lines[period]
+    indicator = get_spec(_SHARED['strategy']).load('indicator')
+    lines[period] = indicator(np.asarray(_SHARED['data']['close'], dtype=float), period)
+    if len(lines) > LINE_CACHE_SIZE:
+        lines.popitem(last=False)
+    return lines[period]
+
+def evaluate(params: Dict, n_bars: int) -> Dict:
+    """
+    Backtest one candidate on the first n_bars of the worker's history.
+
+    Returns:
+        Dict: 'total_profit', 'max_drawdown' (of the equity measured from the initial capital,
+        <= 0) and 'total_trades'.
+    """
+    data = _SHARED['data']
+    strategy = _SHARED['strategy']
+    spec = get_spec(strategy)
+    frame = pd.DataFrame({key: values[:n_bars] for key, values in data.items()})
+    strat_params = spec.resolve_params({k: v for k, v in params.items() if k not in SIM_PARAMS})
+    if spec.provides('indicator') and {'fast', 'slow'} <= set(strat_params):
+        codes = crossover(_line(strat_params['fast'])[:n_bars], _line(strat_params['slow'])[:n_bars])
+        result = frame.assign(signal=codes_to_labels(codes))
+    else:
+        result = run_strategy(frame, strategy, strat_params, timeframe=_SHARED['timeframe'])
+    sim_params = {**_SHARED['costs'], **{k: v for k, v in params.items() if k in SIM_PARAMS}}
+    profit = simulate_trades(result, **sim_params)['profit'].to_numpy(dtype=float)
+    equity = np.concatenate([[0.0], np.cumsum(profit)])
+    return {
+        'total_profit': float(equity[-1]),
+        'max_drawdown': float((equity - np.maximum.accumulate(equity)).min()),
+        'total_trades': len(profit),
+    }
+
+def _objectives(results: List[Dict], min_trades: int) -> Tuple[np.ndarray, np.ndarray]:
+    points = np.array([[r['total_profit'], r['max_drawdown']] for r in results], dtype=float).reshape(-1, 2)
+    eligible = np.array([r['total_trades'] >= min_trades for r in results], dtype=bool)
+    return points, eligible
+
+def optimize(df: pd.DataFrame, strategy: str, space: Optional[Dict[str, Tuple]] = None,
+             generations: int = 10, population: int = 20, batch: int = 27, eta: int = 3,
+             fractions: Sequence[float] = FRACTIONS, patience: int = 3, min_trades: int = 1,
+             max_position_size: float = 1.0, stop_loss_pct: Optional[float] = None,
+             fee_pct: float = 0.0, slippage_pct: float = 0.0, initial_capital: float = 10000.0,
+             timeframe: Optional[str] = None, workers: int = 1, seed: Optional[int] = None) -> Dict:
+    """
+    Search the strategy and risk parameters for the Pareto front of profit vs drawdown.
+
+    Args:
+        df (pd.DataFrame): OHLCV history with 'ts' and 'close' ('open'/'low' for the stop-loss).
+        strategy (str): Registered strategy name.
+        space (Dict[str, Tuple], optional): (low, high) of every searched parameter; strategy
+            parameters and/or SIM_PARAMS (SEARCH_SPACE by default).
+        generations (int): Maximum number of generations.
+        population (int): Best candidates kept as parents.
+        batch (int): Candidates proposed per generation.
+        eta (int): Only the best 1/eta of a rung go on to the next one.
+        fractions (Sequence[float]): Increasing fractions of the history of the rungs, ending in 1.
+        patience (int): Stop after this many generations without changes in the Pareto front.
+        min_trades (int): Candidates with fewer trades are ranked after all others and are
+            never part of the front.
+        max_position_size (float): Used when it is not searched.
+        stop_loss_pct (float, optional): Used when it is not searched.
+        fee_pct (float): Fee per fill.
+        slippage_pct (float): Slippage per fill.
+        initial_capital (float): Starting equity.
+        timeframe (str, optional): Timeframe of df (multi-timeframe strategies).
+        workers (int): Worker processes; 1 evaluates in the current process.
+        seed (int, optional): Random seed (runs with the same seed give the same result).
+
+    Returns:
+        Dict: 'front' (Pareto-optimal parameter sets with their metrics, most profitable first),
+        'evaluations' (DataFrame with every candidate backtested on the whole history) and
+        'stats' (generations, proposed and pruned candidates, full evaluations and 'cost', the
+        backtested bars in units of the whole history).
+    """
+    space = dict(space or SEARCH_SPACE)
+    spec = get_spec(strategy)
+    unknown = [name for name in space if name not in spec.params and name not in SIM_PARAMS]
+    if unknown:
+        raise ValueError(f"Unknown parameters for {strategy}: {', '.join(unknown)}")
+    if any(high < low for low, high in space.values()):
+        raise ValueError("Every parameter range needs low <= high")
+    fractions = list(fractions)
+    if not fractions or fractions[-1] != 1 or any(not 0 <= a < b for a, b in zip([0] + fractions, fractions)):
+        raise ValueError("fractions must increase within (0, 1] and end in 1")
+    if eta < 2 or population < 1 or batch < 1:
+        raise ValueError("eta must be >= 2, population and batch >= 1")
+    if df.empty:
+        raise ValueError("Empty history")
+
+    columns = [c for c in ('ts', 'open', 'high', 'low', 'close', 'volume') if c in df.columns]
+    columns += [c for c in spec.inputs if c in df.columns and c not in columns]
+    data = {c: df[c].to_numpy() if c == 'ts' else df[c].to_numpy(dtype=float) for c in columns}
+    data['ts'] = np.asarray(data['ts'], dtype='datetime64[ns]')
+    costs = {'max_position_size': max_position_size, 'stop_loss_pct': stop_loss_pct, 'fee_pct': fee_pct,
+             'slippage_pct': slippage_pct, 'initial_capital': initial_capital}
+    rungs = [max(2, int(round(len(df) * f))) for f in fractions]
+    rng = np.random.default_rng(seed)
+    seen: set = set()
+    rows: List[Dict] = []
+    stats = {'generations': 0, 'proposed': 0, 'pruned': 0, 'full_evaluations': 0, 'bars': 0}
+    front_keys, stale = None, 0
+
+    with SharedDatasetRegistry() as registry:
+        pool = None
+        if workers > 1:
+            # Workers map the history from shared memory instead of receiving a copy each
+            spec_shared = registry.publish('optimizer', data)
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_shared_worker,
+                                       initargs=(spec_shared, strategy, timeframe, costs))
+        else:
+            _init_worker(data, strategy, timeframe, costs)
+        try:
+            for generation in range(generations):
+                if rows:
+                    points, eligible = _objectives(rows, min_trades)
+                    parents = [rows[i]['params'] for i in select(points, population, eligible)]
+                else:
+                    parents = []
+                candidates = propose(parents, space, batch, rng, seen)
+                if not candidates:
+                    break
+                stats['generations'] += 1
+                stats['proposed'] += len(candidates)
+                for level, n_bars in enumerate(rungs):
+                    if pool is not None:
+                        results = list(pool.map(evaluate, candidates, [n_bars] * len(candidates)))
+                    else:
+                        results = [evaluate(params, n_bars) for params in candidates]
+                    stats['bars'] += n_bars * len(candidates)
+                    if level == len(rungs) - 1:
+                        break
+                    # Poda: solo el mejor 1/eta pasa al siguiente tramo del histórico
+                    points, eligible = _objectives(results, min_trades)
+                    keep = select(points, math.ceil(len(candidates) / eta), eligible)
+                    stats['pruned'] += len(candidates) - len(keep)
+                    candidates = [candidates[i] for i in keep]
+                rows.extend({'params': params, 'generation': generation, **result}
+                            for params, result in zip(candidates, results))
+                stats['full_evaluations'] += len(candidates)
+                keys = {tuple(sorted(rows[i]['params'].items())) for i in _front(rows, min_trades)}
+                stale = stale + 1 if keys == front_keys else 0
+                front_keys = keys
+                if stale >= patience:
+                    break
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            else:
+                _SHARED.clear()
+
+    evaluations = pd.DataFrame([{**row['params'], 'generation': row['generation'],
+                                 'total_profit': row['total_profit'], 'max_drawdown': row['max_drawdown'],
+                                 'total_trades': row['total_trades']} for row in rows])
+    front = sorted((rows[i] for i in _front(rows, min_trades)), key=lambda r: -r['total_profit'])
+    stats['cost'] = stats['bars'] / len(df)
+    return {
+        'front': [{**row['params'], 'total_profit': row['total_profit'], 'max_drawdown': row['max_drawdown'],
+                   'total_trades': row['total_trades']} for row in front],
+        'evaluations': evaluations,
+        'stats': stats,
+    }
+
+def _front(rows: List[Dict], min_trades: int) -> np.ndarray:
+    if not rows:
+        return np.array([], dtype=int)
+    points, eligible = _objectives(rows, min_trades)
+    indices = np.flatnonzero(eligible)
+    return indices[pareto_ranks(points[indices]) == 0] if len(indices) else indices
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+    from src.config import SYMBOL, TIMEFRAME, RISK_PARAMS
+    from src.history_manager import HistoryManager
+    from src.serialization import write_json
+
+    parser = argparse.ArgumentParser(description="Evolutionary optimization of strategy and risk parameters (Pareto front of profit vs drawdown).")
+    parser.add_argument('--strategy', type=str, default='cross_sma')
+    parser.add_argument('--symbol', type=str, default=SYMBOL)
+    parser.add_argument('--timeframe', type=str, default=TIMEFRAME)
+    parser.add_argument('--history', type=str, default=None, help='Fichero histórico (por defecto el del símbolo/timeframe)')
+    parser.add_argument('--start_date', type=str, default=None)
+    parser.add_argument('--end_date', type=str, default=None)
+    for name, (low, high) in SEARCH_SPACE.items():
+        kind = type(low)
+        parser.add_argument(f'--{name}', type=kind, nargs=2, default=[low, high], metavar=('MIN', 'MAX'),
+                            help=f'Rango de búsqueda de {name}')
+    parser.add_argument('--fixed', type=str, nargs='*', default=[], choices=list(SEARCH_SPACE),
+                        help='Parámetros que no se buscan (se usa el valor de config.yaml)')
+    parser.add_argument('--generations', type=int, default=10)
+    parser.add_argument('--population', type=int, default=20, help='Mejores candidatos que se usan como padres')
+    parser.add_argument('--batch', type=int, default=27, help='Candidatos nuevos por generación')
+    parser.add_argument('--eta', type=int, default=3, help='Solo el mejor 1/eta de cada tramo pasa al siguiente')
+    parser.add_argument('--patience', type=int, default=3, help='Generaciones sin cambios en el frente antes de parar')
+    parser.add_argument('--min_trades', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--fee_pct', type=float, default=RISK_PARAMS.get('fee_pct', 0.001))
+    parser.add_argument('--slippage_pct', type=float, default=RISK_PARAMS.get('slippage_pct', 0.0))
+    parser.add_argument('--initial_capital', type=float, default=RISK_PARAMS.get('initial_capital', 10000.0))
+    parser.add_argument('--output-dir', type=str, default=None, help='Directorio de salida para los resultados')
+    args = parser.parse_args()
+
+    if args.history:
+        df = pd.read_csv(args.history, parse_dates=['ts']).sort_values('ts').reset_index(drop=True)
+        if args.start_date:
+            df = df[df['ts'] >= pd.to_datetime(args.start_date)]
+        if args.end_date:
+            df = df[df['ts'] <= pd.to_datetime(args.end_date)]
+    else:
+        df = pd.DataFrame(HistoryManager.load_range(args.symbol, args.timeframe, args.start_date, args.end_date))
+    space = {name: tuple(getattr(args, name)) for name in SEARCH_SPACE if name not in args.fixed}
+    result = optimize(
+        df.reset_index(drop=True), args.strategy, space, generations=args.generations, population=args.population,
+        batch=args.batch, eta=args.eta, patience=args.patience, min_trades=args.min_trades,
+        max_position_size=RISK_PARAMS.get('max_position_size', 1.0), stop_loss_pct=RISK_PARAMS.get('stop_loss_pct'),
+        fee_pct=args.fee_pct, slippage_pct=args.slippage_pct, initial_capital=args.initial_capital,
+        timeframe=args.timeframe, workers=args.workers, seed=args.seed
+    )
+    strategy_dir = os.path.join(args.output_dir or os.path.join('data', 'strategies'), args.strategy)
+    os.makedirs(strategy_dir, exist_ok=True)
+    out_name = os.path.join(strategy_dir, f"optimize_{args.symbol.replace('/', '-')}_{args.timeframe}.csv")
+    result['evaluations'].to_csv(out_name, index=False)
+    logging.info(f"Optimizer evaluations saved to {out_name}")
+    write_json(out_name.replace('.csv', '_summary.json'), {
+        'strategy': args.strategy, 'symbol': args.symbol, 'timeframe': args.timeframe,
+        'space': space, 'front': result['front'], 'stats': result['stats']})
+    stats = result['stats']
+    print(f"{args.symbol} {args.timeframe}: {stats['full_evaluations']} full backtests "
+          f"({stats['proposed']} candidates, cost {stats['cost']:.1f} history passes), "
+          f"{len(result['front'])} parameter sets on the Pareto front")
+    for row in result['front']:
+        print(row)
@@ -0,0 +1,367 @@
+"""
+Paper trading engine.
+
+Runs many strategy instances ("bots") concurrently on an asyncio event loop. Each bot consumes
+bars from a feed, either the exchange (live) or a historical replay at a configurable speed-up,
+updates its strategy incrementally in O(1) per bar and simulates fills with the same sizing,
+stop-loss, fee and slippage rules as src.simulation. Positions and trades live in memory and
+are persisted periodically to a JSON snapshot.
+
+Typical usage (as a module):
+    engine = PaperTradingEngine()
+    bot = PaperBot('cross_sma', 'BTC/USDT', '1m', fast=10, slow=50)
+    bot_id = engine.start_bot(bot, ReplayFeed(df, '1m', speed=60))  # inside a running loop
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+import pandas as pd
+from typing import AsyncIterator, Dict, List, Optional
+from src.market_data import MarketDataHub
+from src.signals import get_incremental_strategy
+from src.timeframes import timeframe_to_seconds
+
+PAPERTRADE_DIR = os.path.join('data', 'papertrade')
+STATE_FILE = os.path.join(PAPERTRADE_DIR, 'state.json')
+SOURCES = ('historical', 'live')
+
+class ReplayFeed:
+    """
+    Replays a historical OHLCV DataFrame as a bar feed.
+
+    With speed=None the bars are delivered as fast as possible (yielding to the event loop
+    between bars); otherwise one bar is delivered every timeframe / speed seconds.
+    """
+    def __init__(self, df: pd.DataFrame, timeframe: str, speed: Optional[float] = None):
+        self.df = df
+        self.interval = timeframe_to_seconds(timeframe) / speed if speed else 0
+
+    async def bars(self) -> AsyncIterator[Dict]:
+        columns = ['ts', 'open', 'high', 'low', 'close', 'volume']
+        for values in self.df[columns].itertuples(index=False, name=None):
+            yield dict(zip(columns, values))
+            await asyncio.sleep(self.interval)
+
+class ExchangeFeed:
+    """
+    Polls the exchange for closed candles, waking up at each candle close.
+
+    Only the candles after the last one delivered are requested, and the feed sleeps until
+    close_delay seconds after the next candle close (the exchange needs a moment to publish it).
+    """
+    def __init__(self, symbol: str, timeframe: str, fetch=None, warmup: int = 0, close_delay: float = 0.5):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.tf_seconds = timeframe_to_seconds(timeframe)
+        self.fetch = fetch
+        self.warmup = warmup
+        self.close_delay = close_delay
+
+    def _fetch(self, limit: int, since=None) -> pd.DataFrame:
+        fetch = self.fetch
+        if fetch is None:
+            from src.collector import fetch_ohlcv as fetch
+        return fetch(self.symbol, self.timeframe, limit, since=since)
+
+    async def bars(self) -> AsyncIterator[Dict]:
+        tf = pd.Timedelta(seconds=self.tf_seconds)
+        last_ts = None
+        while True:
+            now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+            if last_ts is None:
+                df = await asyncio.to_thread(self._fetch, self.warmup + 1)
+            else:
+                # Candles closed since the last one delivered (which closed at last_ts + tf)
+                missing = int((now - last_ts) // tf) - 1
+                df = await asyncio.to_thread(self._fetch, missing, last_ts + tf) if missing > 0 else None
+            if df is not None and not df.empty:
+                # Only candles that are already closed
+                df = df[df['ts'] + tf <= now]
+                if last_ts is not None:
+                    df = df[df['ts'] > last_ts]
+                warmup = last_ts is None
+                for bar in df.to_dict('records'):
+                    last_ts = bar['ts']
+                    # The initial window only warms up the strategy indicators
+                    bar['warmup'] = warmup
+                    yield bar
+            if last_ts is not None and last_ts + 2 * tf <= now:
+                # The exchange has not published the last closed candle yet; retry shortly
+                await asyncio.sleep(self.close_delay)
+                continue
+            next_close = (now.floor(tf) + tf - now).total_seconds()
+            await asyncio.sleep(max(next_close, 0) + self.close_delay)
+
+class PaperBot:
+    """
+    A strategy instance trading on simulated fills.
+
+    Fills follow src.simulation.simulate_trades: entries and signal exits at the bar close,
+    stop-losses checked against the low of the bars after the entry (filling at the open on
+    gaps), and no re-entry after a stop until the strategy emits a new BUY after its next SELL.
+    """
+    def __init__(self, strategy: str, symbol: str, timeframe: str, fast: int, slow: int,
+                 max_position_size: float = 1.0, stop_loss_pct: Optional[float] = None,
+                 fee_pct: float = 0.0, slippage_pct: float = 0.0, initial_capital: float = 10000.0,
+                 source: str = 'historical', bot_id: Optional[str] = None):
+        if not 0 < max_position_size <= 1:
+            raise ValueError(f"max_position_size must be in (0, 1], got {max_position_size}")
+        self.bot_id = bot_id or uuid.uuid4().hex[:12]
+        self.strategy = strategy
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.params = {'fast': fast, 'slow': slow}
+        self.risk = {'max_position_size': max_position_size, 'stop_loss_pct': stop_loss_pct,
+                     'fee_pct': fee_pct, 'slippage_pct': slippage_pct}
+        self.source = source
+        self.signal = get_incremental_strategy(strategy, fast, slow)
+        self.initial_capital = initial_capital
+        self.equity = initial_capital
+        self.signal_long = False
+        self.position: Optional[Dict] = None
+        self.trades: List[Dict] = []
+        self.last_bar: Optional[Dict] = None
+        self.last_signal: Optional[str] = None
+        self.bars_seen = 0
+        self.status = 'running'
+        self.error: Optional[str] = None
+
+    def on_bar(self, bar: Dict):
+        """
+        Process one closed bar: stop-loss check, strategy update and fills.
+
+        Bars flagged with 'warmup' only update the strategy state, without fills.
+        """
+        self.bars_seen += 1
+        self.last_bar = bar
+        if bar.get('warmup'):
+            signal = self.signal.update(bar['close'])
+            if signal in ('BUY', 'SELL'):
+                self.signal_long = signal == 'BUY'
+            return
+        if self.position is not None and self.position['stop'] is not None and bar['low'] <= self.position['stop']:
+            self._close(bar, min(bar['open'], self.position['stop']), 'stop_loss')
+        signal = self.signal.update(bar['close'])
+        self.last_signal = signal
+        if signal == 'BUY':
+            if not self.signal_long:
+                self._open(bar)
+            self.signal_long = True
+        elif signal == 'SELL':
+            if self.position is not None:
+                self._close(bar, bar['close'], 'signal')
+            self.signal_long = False
+
+    def _open(self, bar: Dict):
+        entry_fill = bar['close'] * (1 + self.risk['slippage_pct'])
+        notional = self.equity * self.risk['max_position_size']
+        stop_loss_pct = self.risk['stop_loss_pct']
+        self.position = {
+            'entry_time': str(bar['ts']),
+            'entry_price': entry_fill,
+            'notional': notional,
+            'quantity': notional / entry_fill,
+            'stop': entry_fill * (1 - stop_loss_pct) if stop_loss_pct else None,
+        }
+
+    def _close(self, bar: Dict, price: float, reason: str):
+        fee_pct = self.risk['fee_pct']
+        pos = self.position
+        exit_fill = price * (1 - self.risk['slippage_pct'])
+        ret = exit_fill / pos['entry_price'] * (1 - fee_pct) - 1 - fee_pct
+        profit = pos['notional'] * ret
+        self.equity += profit
+        self.trades.append({
+            'entry_time': pos['entry_time'],
+            'entry_price': pos['entry_price'],
+            'exit_time': str(bar['ts']),
+            'exit_price': exit_fill,
+            'exit_reason': reason,
+            'quantity': pos['quantity'],
+            'fees': pos['notional'] * fee_pct + pos['quantity'] * exit_fill * fee_pct,
+            'profit': profit,
+            'return_pct': ret * 100,
+            'equity': self.equity,
+        })
+        self.position = None
+
+    def mark_to_market(self) -> float:
+        """Equity including the unrealized result of the open position at the last close."""
+        if self.position is None or self.last_bar is None:
+            return self.equity
+        pos = self.position
+        value = pos['quantity'] * self.last_bar['close'] * (1 - self.risk['slippage_pct']) * (1 - self.risk['fee_pct'])
+        return self.equity + value - pos['notional'] * (1 + self.risk['fee_pct'])
+
+    def snapshot(self) -> Dict:
+        """Serializable state of the bot."""
+        return {
+            'bot_id': self.bot_id,
+            'strategy': self.strategy,
+            'symbol': self.symbol,
+            'timeframe': self.timeframe,
+            'source': self.source,
+            'params': self.params,
+            'risk': self.risk,
+            'status': self.status,
+            'error': self.error,
+            'initial_capital': self.initial_capital,
+            'equity': self.equity,
+            'mark_to_market': self.mark_to_market(),
+            'signal_long': self.signal_long,
+            'position': self.position,
+            'last_signal': self.last_signal,
+            'last_bar_time': str(self.last_bar['ts']) if self.last_bar else None,
+            'bars_seen': self.bars_seen,
+            'total_trades': len(self.trades),
+        }
+
+class PaperTradingEngine:
+    """
+    Runs paper bots as asyncio tasks and persists their state periodically.
+
+    start_bot must be called from the engine's event loop; synchronous callers should go
+    through EngineThread.
+    """
+    def __init__(self, state_file: str = STATE_FILE, persist_interval: float = 30.0):
+        self.state_file = state_file
+        self.persist_interval = persist_interval
+        self.bots: Dict[str, PaperBot] = {}
+        # Live bots on the same symbol/timeframe share one exchange feed
+        self.hub = MarketDataHub()
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._persist_task: Optional[asyncio.Task] = None
+
+    async def _run(self, bot: PaperBot, feed):
+        try:
+            async for bar in feed.bars():
+                bot.on_bar(bar)
+            bot.status = 'finished'
+        except asyncio.CancelledError:
+            bot.status = 'stopped'
+            raise
+        except Exception as e:
+            bot.status = 'error'
+            bot.error = str(e)
+            logging.error(f"[PAPERTRADE] Bot {bot.bot_id} failed: {e}")
+
+    async def _persist_loop(self):
+        while True:
+            await asyncio.sleep(self.persist_interval)
+            self.persist()
+
+    def start_bot(self, bot: PaperBot, feed) -> str:
+        """Schedule a bot on the running loop and return its id."""
+        loop = asyncio.get_running_loop()
+        if self._persist_task is None or self._persist_task.done():
+            self._persist_task = loop.create_task(self._persist_loop())
+        self.bots[bot.bot_id] = bot
+        self.tasks[bot.bot_id] = loop.create_task(self._run(bot, feed))
+        return bot.bot_id
+
+    async def stop_bot(self, bot_id: str) -> bool:
+        task = self.tasks.get(bot_id)
+        if task is None:
+            return False
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.persist()
+        return True
+
+    async def wait(self, bot_id: Optional[str] = None):
+        """Wait for one bot (or all of them) to finish its feed."""
+        tasks = [self.tasks[bot_id]] if bot_id else list(self.tasks.values())
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def shutdown(self):
+        for bot_id in list(self.tasks):
+            await self.stop_bot(bot_id)
+        if self._persist_task is not None:
+            self._persist_task.cancel()
+        self.persist()
+
+    def status(self) -> List[Dict]:
+        return [bot.snapshot() for bot in self.bots.values()]
+
+    def trades(self, bot_id: str) -> Optional[List[Dict]]:
+        bot = self.bots.get(bot_id)
+        return list(bot.trades) if bot else None
+
+    def persist(self):
+        """Write a snapshot of every bot (including its trades) atomically."""
+        state = {'saved_at': time.time(), 'bots': [dict(bot.snapshot(), trades=bot.trades) for bot in self.bots.values()]}
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        tmp = self.state_file + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, default=str)
+        os.replace(tmp, self.state_file)
+
+class EngineThread:
+    """Runs a PaperTradingEngine on a dedicated event loop thread for synchronous callers."""
+    def __init__(self, engine: Optional[PaperTradingEngine] = None):
+        self.engine = engine or PaperTradingEngine()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='papertrade', daemon=True)
+        self.thread.start()
+
+    def call(self, coro, timeout: float = 30.0):
+        """Run a coroutine on the engine loop and return its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def start_bot(self, bot: PaperBot, feed) -> str:
+        async def _start():
+            return self.engine.start_bot(bot, feed)
+        return self.call(_start())
+
+    def stop_bot(self, bot_id: str) -> bool:
+        return self.call(self.engine.stop_bot(bot_id))
+
+    def status(self) -> List[Dict]:
+        async def _status():
+            return self.engine.status()
+        return self.call(_status())
+
+    def trades(self, bot_id: str) -> Optional[List[Dict]]:
+        async def _trades():
+            return self.engine.trades(bot_id)
+        return self.call(_trades())
+
+_engine_thread: Optional[EngineThread] = None
+_engine_thread_lock = threading.Lock()
+
+def get_engine_thread() -> EngineThread:
+    """Return the process-wide engine thread, starting it on first use."""
+    global _engine_thread
+    with _engine_thread_lock:
+        if _engine_thread is None:
+            _engine_thread = EngineThread()
+        return _engine_thread
+
+def make_feed(source: str, symbol: str, timeframe: str, speed: Optional[float] = None,
+              start_date: Optional[str] = None, end_date: Optional[str] = None, warmup: int = 0,
+              hub: Optional[MarketDataHub] = None):
+    """
+    Build a feed for a bot: 'historical' replays the local history, 'live' polls the exchange
+    (through `hub` when given, so bots on the same symbol/timeframe share one feed).
+    """
+    if source == 'historical':
+        from src.history_manager import HistoryManager
+        df = HistoryManager.load_history(symbol, timeframe)
+        if start_date:
+            df = df[df['ts'] >= pd.to_datetime(start_date)]
+        if end_date:
+            df = df[df['ts'] <= pd.to_datetime(end_date)]
+        return ReplayFeed(df, timeframe, speed)
+    if source == 'live':
+        if hub is not None:
+            return hub.feed(symbol, timeframe, warmup=warmup)
+        return ExchangeFeed(symbol, timeframe, warmup=warmup)
+    raise ValueError(f"Unknown source: {source}")
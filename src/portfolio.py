@@ -0,0 +1,226 @@
+"""
+Multi-asset portfolio backtesting.
+
+This module loads every symbol available for a timeframe from the history meta, aligns them on a
+common ts index into 2D (time x symbol) arrays and evaluates a strategy on all columns at once.
+Capital is split between the symbols and the module reports per-asset and combined equity,
+drawdown and capital allocation.
+
+Usage (as a script):
+    python -m src.portfolio --strategy cross_sma --timeframe 1d
+
+Typical usage (as a module):
+    from src.portfolio import load_aligned_history, backtest_portfolio
+    panel = load_aligned_history('1d')
+    result = backtest_portfolio(panel, 'cross_sma', fast=10, slow=50)
+"""
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+from src.history_manager import HistoryManager
+from src.signals import get_vectorized_strategy, position_state
+
+def load_aligned_history(timeframe: str, symbols: Optional[List[str]] = None,
+                         start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict:
+    """
+    Load the histories of several symbols and align them on a common ts index.
+
+    Prices are forward-filled over bars missing for a symbol; bars before a symbol's first
+    candle stay NaN.
+
+    Args:
+        timeframe (str): Timeframe shared by all symbols (e.g. '1d').
+        symbols (List[str], optional): Symbols to load. Defaults to every symbol in the meta with this timeframe.
+        start_date (str, optional): Keep bars on or after this date.
+        end_date (str, optional): Keep bars on or before this date.
+
+    Returns:
+        Dict: {'ts': DatetimeIndex, 'symbols': list, 'open'/'high'/'low'/'close': 2D arrays (time x symbol)}.
+    """
+    if symbols is None:
+        meta = HistoryManager.load_meta()
+        symbols = sorted(s for s, tfs in meta.items() if timeframe in tfs)
+    frames = {}
+    for symbol in symbols:
+        try:
+            df = HistoryManager.load_history(symbol, timeframe)
+        except FileNotFoundError:
+            continue
+        if start_date:
+            df = df[df['ts'] >= pd.to_datetime(start_date)]
+        if end_date:
+            df = df[df['ts'] <= pd.to_datetime(end_date)]
+        if not df.empty:
+            frames[symbol] = df.drop_duplicates(subset=['ts']).set_index('ts')
+    if not frames:
+        raise ValueError(f"No history available for timeframe {timeframe}")
+    close = pd.concat({s: f['close'] for s, f in frames.items()}, axis=1).sort_index().ffill()
+    panel = {'ts': close.index, 'symbols': list(frames), 'close': close.to_numpy(dtype=float)}
+    for field in ('open', 'high', 'low'):
+        values = pd.concat({s: f[field] for s, f in frames.items()}, axis=1).reindex(close.index)
+        # Bars without a candle for a symbol are flat at the last close
+        panel[field] = values.fillna(close).to_numpy(dtype=float)
+    return panel
+
+def position_returns(close: np.ndarray, state: np.ndarray, max_position_size: float = 1.0,
+                     fee_pct: float = 0.0, slippage_pct: float = 0.0) -> np.ndarray:
+    """
+    Per-bar strategy returns for a long/flat state along the first axis.
+
+    A position opened at the close of bar t earns the close-to-close return of bar t+1 onwards.
+    Every change of state pays fees and slippage on the committed fraction.
+
+    Args:
+        close (np.ndarray): 1D or 2D (time x column) close prices.
+        state (np.ndarray): Long/flat state with the same shape (see src.signals.position_state).
+        max_position_size (float): Fraction committed while long.
+        fee_pct (float): Fee per position change.
+        slippage_pct (float): Slippage per position change.
+
+    Returns:
+        np.ndarray: Returns with the same shape as `close` (0 on the first bar).
+    """
+    state = state.astype(np.int8)
+    held = np.concatenate([np.zeros_like(state[:1]), state[:-1]])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bar_returns = np.concatenate([np.zeros_like(close[:1], dtype=float), close[1:] / close[:-1] - 1])
+    bar_returns = np.nan_to_num(bar_returns, nan=0.0, posinf=0.0, neginf=0.0)
+    turnover = np.abs(state - held)
+    return max_position_size * (held * bar_returns - turnover * (fee_pct + slippage_pct))
+
+def backtest_portfolio(panel: Dict, strategy: str, fast: int, slow: int,
+                       weights: Optional[np.ndarray] = None, max_position_size: float = 1.0,
+                       fee_pct: float = 0.0, slippage_pct: float = 0.0,
+                       initial_capital: float = 10000.0) -> Dict:
+    """
+    Evaluate a strategy on every column of an aligned panel in one vectorized pass.
+
+    Each symbol gets a sleeve of the initial capital (equal weights by default). While long, a
+    sleeve earns `max_position_size` of the bar close-to-close return; every position change
+    pays fees and slippage on the committed fraction. Stop-losses are not applied at the
+    portfolio level; use src.simulation for per-trade risk rules.
+
+    Args:
+        panel (Dict): Output of load_aligned_history.
+        strategy (str): Name of a vectorized strategy (see src.signals).
+        fast (int): Fast period parameter.
+        slow (int): Slow period parameter.
+        weights (np.ndarray, optional): Capital weights per symbol, normalized to sum 1.
+        max_position_size (float): Fraction of each sleeve committed while long.
+        fee_pct (float): Fee per position change.
+        slippage_pct (float): Slippage per position change.
+        initial_capital (float): Total starting capital.
+
+    Returns:
+        Dict: 'signals', 'state', 'returns', 'equity' (time x symbol), 'total_equity',
+        'drawdown', 'total_drawdown' and 'allocation' (invested fraction of total equity).
+    """
+    close = panel['close']
+    n_symbols = close.shape[1]
+    if weights is None:
+        weights = np.full(n_symbols, 1.0 / n_symbols)
+    weights = np.asarray(weights, dtype=float)
+    weights = weights / weights.sum()
+
+    signals = get_vectorized_strategy(strategy)(close, fast=fast, slow=slow)
+    state = position_state(signals)
+    returns = position_returns(close, state, max_position_size, fee_pct, slippage_pct)
+
+    equity = initial_capital * weights * np.cumprod(1 + returns, axis=0)
+    total_equity = equity.sum(axis=1)
+    drawdown = equity - np.maximum.accumulate(equity, axis=0)
+    total_drawdown = total_equity - np.maximum.accumulate(total_equity)
+    allocation = equity * state * max_position_size / total_equity[:, None]
+    return {
+        'signals': signals,
+        'state': state,
+        'returns': returns,
+        'equity': equity,
+        'total_equity': total_equity,
+        'drawdown': drawdown,
+        'total_drawdown': total_drawdown,
+        'allocation': allocation,
+        'weights': weights,
+    }
+
+def portfolio_summary(panel: Dict, result: Dict, initial_capital: float) -> Dict:
+    """Build the JSON summary of a portfolio backtest."""
+    ts = panel['ts']
+    total_equity = result['total_equity']
+    peak = np.maximum.accumulate(total_equity)
+    entries = (np.diff(result['state'], axis=0, prepend=0) == 1).sum(axis=0)
+    per_asset = {}
+    for i, symbol in enumerate(panel['symbols']):
+        sleeve = initial_capital * result['weights'][i]
+        per_asset[symbol] = {
+            'weight': float(result['weights'][i]),
+            'final_equity': float(result['equity'][-1, i]),
+            'total_profit': float(result['equity'][-1, i] - sleeve),
+            'max_drawdown': float(result['drawdown'][:, i].min()),
+            'trades': int(entries[i]),
+            'exposure': float(result['state'][:, i].mean()),
+            'mean_allocation': float(result['allocation'][:, i].mean()),
+        }
+    return {
+        'symbols': panel['symbols'],
+        'start_date': str(ts[0]) if len(ts) else None,
+        'end_date': str(ts[-1]) if len(ts) else None,
+        'initial_capital': initial_capital,
+        'final_equity': float(total_equity[-1]),
+        'total_profit': float(total_equity[-1] - initial_capital),
+        'max_drawdown': float(result['total_drawdown'].min()),
+        'max_drawdown_pct': float(((total_equity - peak) / peak).min() * 100),
+        'equity_curve': total_equity.tolist(),
+        'drawdown_curve': result['total_drawdown'].tolist(),
+        'mean_cash_fraction': float(1 - result['allocation'].sum(axis=1).mean()),
+        'per_asset': per_asset,
+    }
+
+def equity_frame(panel: Dict, result: Dict) -> pd.DataFrame:
+    """Per-bar equity per symbol plus the combined equity, as a DataFrame."""
+    df = pd.DataFrame(result['equity'], columns=panel['symbols'])
+    df.insert(0, 'ts', panel['ts'])
+    df['total'] = result['total_equity']
+    return df
+
+if __name__ == "__main__":
+    import argparse
+    from src.serialization import write_json
+    import logging
+    from src.config import TIMEFRAME, STRAT_PARAMS, RISK_PARAMS
+
+    parser = argparse.ArgumentParser(description="Backtest a strategy over every symbol of a timeframe.")
+    parser.add_argument('--strategy', type=str, default='cross_sma')
+    parser.add_argument('--timeframe', type=str, default=TIMEFRAME)
+    parser.add_argument('--symbols', type=str, nargs='*', default=None)
+    parser.add_argument('--start_date', type=str, default=None)
+    parser.add_argument('--end_date', type=str, default=None)
+    parser.add_argument('--fast', type=int, default=STRAT_PARAMS.get('fast', 10))
+    parser.add_argument('--slow', type=int, default=STRAT_PARAMS.get('slow', 50))
+    parser.add_argument('--max_position_size', type=float, default=RISK_PARAMS.get('max_position_size', 1.0))
+    parser.add_argument('--fee_pct', type=float, default=RISK_PARAMS.get('fee_pct', 0.001))
+    parser.add_argument('--slippage_pct', type=float, default=RISK_PARAMS.get('slippage_pct', 0.0))
+    parser.add_argument('--initial_capital', type=float, default=RISK_PARAMS.get('initial_capital', 10000.0))
+    parser.add_argument('--output-dir', type=str, default=None, help='Directorio de salida para los resultados')
+    args = parser.parse_args()
+
+    panel = load_aligned_history(args.timeframe, args.symbols, args.start_date, args.end_date)
+    result = backtest_portfolio(
+        panel, args.strategy, args.fast, args.slow,
+        max_position_size=args.max_position_size,
+        fee_pct=args.fee_pct,
+        slippage_pct=args.slippage_pct,
+        initial_capital=args.initial_capital
+    )
+    summary = portfolio_summary(panel, result, args.initial_capital)
+    summary.update({'strategy': args.strategy, 'timeframe': args.timeframe,
+                    'strategy_params': {'fast': args.fast, 'slow': args.slow}})
+    strategy_dir = os.path.join(args.output_dir or os.path.join('data', 'strategies'), args.strategy)
+    os.makedirs(strategy_dir, exist_ok=True)
+    out_name = os.path.join(strategy_dir, f"portfolio_{args.timeframe}.csv")
+    equity_frame(panel, result).to_csv(out_name, index=False)
+    logging.info(f"Portfolio equity saved to {out_name}")
+    write_json(out_name.replace('.csv', '_summary.json'), summary)
+    print(f"Portfolio {args.strategy} {args.timeframe}: {len(panel['symbols'])} symbols, "
+          f"total profit {summary['total_profit']:.2f}, max drawdown {summary['max_drawdown']:.2f}")
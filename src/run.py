@@ -1,23 +1,118 @@
 """
 Main entry point for running the trading bot.
 
-This script initializes and starts the trading bot using the configured strategies and parameters.
+This script runs the configured strategies live for one or more symbol/timeframe pairs. Each pair
+is polled right after every candle close, requesting only the candles published since the last
+one seen, and its bars are shared by every strategy through a MarketDataHub (one feed and one
+rolling window per pair). Strategies are updated incrementally.
+
+With --scan, the symbols are scanned cross-sectionally instead (src.scanner): their windows are
+stacked into one (time x symbol) array at every candle close and a table with the current
+signal of every symbol is printed (symbols from the scanner section of config.yaml by default).
+
+Usage (as a script):
+    python -m src.run --strategies cross_sma cross_ema --symbols BTC/USDT ETH/USDT --timeframes 1m 5m
+    python -m src.run --scan --strategies cross_sma --timeframes 1m
 """
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
 
-from src.collector import fetch_ohlcv
-from src.config import STRAT_PARAMS, SYMBOL, TIMEFRAME
-from src.strategies import get_strategy
+from src.config import STRAT_PARAMS, SYMBOL, SCAN_SYMBOLS, TIMEFRAME, LIMIT
+from src.market_data import MarketDataHub
+from src.paper_trading import ExchangeFeed
+from src.signals import get_incremental_strategy
 
 STRATEGY_NAME = 'cross_sma'  # or 'cross_ema'
 
+def warmup_bars(slow: int, limit: int = LIMIT) -> int:
+    """Bars requested at start-up: at least `limit` and three slow periods, so EMAs have converged."""
+    return max(limit, 3 * slow)
+
+class LiveRunner:
+    """
+    Runs one strategy on one symbol/timeframe at candle close.
+
+    The first request fetches the warm-up window; afterwards every wake-up only asks for the
+    candles closed since the last one seen, and each of them updates the strategy in O(1).
+    Runners built on the same hub share the feed and the window of each symbol/timeframe.
+    """
+    def __init__(self, strategy: str, symbol: str, timeframe: str, fast: int, slow: int,
+                 window: Optional[int] = None, hub: Optional[MarketDataHub] = None, fetch=None,
+                 close_delay: float = 0.5, on_signal: Optional[Callable[[Dict], None]] = None):
+        self.strategy = strategy
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.signal = get_incremental_strategy(strategy, fast, slow)
+        self.window_size = window or warmup_bars(slow)
+        self.hub = hub or exchange_hub(fetch, close_delay)
+        self.feed = self.hub.feed(symbol, timeframe, warmup=self.window_size)
+        self.on_signal = on_signal or self.log_signal
+        self.last_signal: Optional[str] = None
+
+    def log_signal(self, event: Dict):
+        message = f"{event['symbol']} {event['timeframe']} {event['ts']}: {event['signal']}"
+        logging.info(f"Signal: {message}")
+        print(f"Current signal: {message}")
+
+    def window(self, n: Optional[int] = None) -> Dict:
+        """Read-only view of the last n bars of this runner's symbol/timeframe."""
+        return self.hub.window(self.symbol, self.timeframe, n or self.window_size)
+
+    def on_bar(self, bar: Dict) -> Optional[str]:
+        """Update the strategy with a closed bar; returns its signal."""
+        signal = self.signal.update(bar['close'])
+        if bar.get('warmup') or signal is None:
+            return None
+        self.last_signal = signal
+        self.on_signal({'symbol': self.symbol, 'timeframe': self.timeframe,
+                        'ts': bar['ts'], 'signal': signal, 'close': bar['close']})
+        # Here you wait for the executor phase to send the order
+        return signal
+
+    async def run(self):
+        async for bar in self.feed.bars():
+            self.on_bar(bar)
+
+def exchange_hub(fetch=None, close_delay: float = 0.5) -> MarketDataHub:
+    """Hub whose feeds poll the exchange at candle close."""
+    return MarketDataHub(lambda symbol, timeframe, warmup: ExchangeFeed(
+        symbol, timeframe, fetch=fetch, warmup=warmup, close_delay=close_delay))
+
+async def run_all(runners: List):
+    """Run several live runners (or scanners) concurrently until cancelled."""
+    await asyncio.gather(*(runner.run() for runner in runners))
+
 def main():
-    df = fetch_ohlcv(SYMBOL, TIMEFRAME, limit=100)
-    strategy = get_strategy(STRATEGY_NAME)
-    sig = strategy(df,
-                   fast=STRAT_PARAMS['fast'],
-                   slow=STRAT_PARAMS['slow'])
-    print(f"Current signal: {sig}")
-    # Here you wait for the executor phase to send the order
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the trading bot live at every candle close.")
+    parser.add_argument('--strategies', type=str, nargs='+', default=[STRATEGY_NAME])
+    parser.add_argument('--symbols', type=str, nargs='+', default=None, help='Por defecto el símbolo de config.yaml (con --scan, scanner.symbols)')
+    parser.add_argument('--timeframes', type=str, nargs='+', default=[TIMEFRAME])
+    parser.add_argument('--fast', type=int, default=STRAT_PARAMS['fast'])
+    parser.add_argument('--slow', type=int, default=STRAT_PARAMS['slow'])
+    parser.add_argument('--window', type=int, default=None, help='Velas en memoria (por defecto max(limit, 3*slow))')
+    parser.add_argument('--close_delay', type=float, default=0.5, help='Segundos de espera tras el cierre de vela')
+    parser.add_argument('--scan', action='store_true', help='Escanear todos los símbolos a la vez y mostrar la tabla de señales actuales')
+    parser.add_argument('--grace', type=float, default=5.0, help='Con --scan: segundos de espera por los símbolos que se retrasan')
+    args = parser.parse_args()
+
+    # One exchange feed per symbol/timeframe, shared by all the strategies
+    hub = exchange_hub(close_delay=args.close_delay)
+    if args.scan:
+        from src.scanner import Scanner
+        symbols = args.symbols or SCAN_SYMBOLS
+        runners = [Scanner(strategy, symbols, timeframe, {'fast': args.fast, 'slow': args.slow},
+                           window=args.window, hub=hub, grace=args.grace, limit=LIMIT)
+                   for strategy in args.strategies for timeframe in args.timeframes]
+    else:
+        symbols = args.symbols or [SYMBOL]
+        runners = [LiveRunner(strategy, symbol, timeframe, args.fast, args.slow, window=args.window, hub=hub)
+                   for strategy in args.strategies for symbol in symbols for timeframe in args.timeframes]
+    try:
+        asyncio.run(run_all(runners))
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,204 @@
+"""
+Cross-sectional signal scanner.
+
+Evaluates one strategy on a universe of symbols in a single vectorized pass: the latest windows
+of every symbol are stacked into a (time x symbol) array and the indicators and crossover
+codes are computed on all columns at once, like the portfolio backtest. The result is a table
+with the current signal of every symbol.
+
+The live scanner keeps the windows in a MarketDataHub (one feed per symbol, polled at candle
+close for the new candles only) and scans once every symbol has delivered the candle that
+just closed, or `grace` seconds after the first one did.
+
+Usage (as a script):
+    python -m src.run --scan --strategies cross_sma --symbols BTC/USDT ETH/USDT SOL/USDT --timeframes 1m
+
+Typical usage (as a module):
+    from src.scanner import stack_windows, scan
+    panel = stack_windows({'BTC/USDT': btc_window, 'ETH/USDT': eth_window}, 150)
+    table = scan(panel, 'cross_sma', {'fast': 10, 'slow': 50})
+"""
+import asyncio
+import logging
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional
+from src.indicators import crossover
+from src.market_data import FIELDS, MarketDataHub
+from src.signals import BUY, SELL, position_state
+from src.strategies import get_spec
+
+SCAN_COLUMNS = ['symbol', 'ts', 'close', 'signal', 'position', 'last_signal', 'bars_since', 'stale']
+
+def stack_windows(windows: Dict[str, Dict[str, np.ndarray]], n: int) -> Dict:
+    """
+    Align the latest windows of several symbols into (time x symbol) arrays.
+
+    The index is the last `n` candle open times of the union of the windows; a symbol missing
+    some of them is forward-filled (NaN before its first candle), as in load_aligned_history.
+
+    Args:
+        windows (Dict[str, Dict[str, np.ndarray]]): Per symbol, 'ts' (sorted) and OHLCV arrays
+            (e.g. MarketDataHub.window views).
+        n (int): Bars to keep.
+
+    Returns:
+        Dict: 'ts', 'symbols', 'last_ts' (last candle of each symbol) and one 2D array per
+        OHLCV field present in the windows.
+    """
+    symbols = [s for s, w in windows.items() if len(w['ts'])]
+    fields = [f for f in FIELDS if all(f in windows[s] for s in symbols)]
+    stamps = [np.asarray(windows[s]['ts'], dtype='datetime64[ns]') for s in symbols]
+    panel = {'symbols': symbols, 'last_ts': np.array([ts[-1] for ts in stamps], dtype='datetime64[ns]')}
+    if stamps and all(len(ts) >= n and np.array_equal(ts[-n:], stamps[0][-n:]) for ts in stamps):
+        # Caso habitual: todas las ventanas terminan en la misma vela, sin huecos
+        panel['ts'] = stamps[0][-n:]
+        for field in fields:
+            panel[field] = np.column_stack([np.asarray(windows[s][field], dtype=float)[-n:] for s in symbols])
+        return panel
+    index = np.unique(np.concatenate(stamps))[-n:] if stamps else np.empty(0, dtype='datetime64[ns]')
+    panel['ts'] = index
+    for field in fields:
+        values = np.full((len(index), len(symbols)), np.nan)
+        for col, (symbol, ts) in enumerate(zip(symbols, stamps)):
+            keep = ts >= index[0]
+            values[np.searchsorted(index, ts[keep]), col] = np.asarray(windows[symbol][field], dtype=float)[keep]
+        panel[field] = pd.DataFrame(values).ffill().to_numpy()
+    return panel
+
+def scan(panel: Dict, strategy: str, params: Optional[Dict] = None, timeframe: Optional[str] = None) -> pd.DataFrame:
+    """
+    Current signal of every symbol of a panel, computed in one pass over all columns.
+
+    Crossover strategies (those declaring an indicator) also report their fast and slow lines.
+
+    Args:
+        panel (Dict): Output of stack_windows (or load_aligned_history).
+        strategy (str): Registered strategy name.
+        params (Dict, optional): Strategy parameters (defaults of the strategy otherwise).
+        timeframe (str, optional): Timeframe of the panel (multi-timeframe strategies).
+
+    Returns:
+        pd.DataFrame: One row per symbol: 'symbol', 'ts' (its last candle), 'close', 'signal'
+        on the last bar ('BUY', 'SELL' or 'HOLD'), 'position' ('long' or 'flat'),
+        'last_signal' and 'bars_since' it (within the window), 'stale' (no candle at the last
+        bar of the panel) and, for crossovers, 'fast' and 'slow'.
+    """
+    spec = get_spec(strategy)
+    params = spec.resolve_params(params)
+    close = np.asarray(panel['close'], dtype=float)
+    lines = None
+    if spec.provides('indicator') and {'fast', 'slow'} <= set(params):
+        indicator = spec.load('indicator')
+        lines = indicator(close, params['fast']), indicator(close, params['slow'])
+        codes = crossover(*lines)
+    else:
+        kwargs = {key: panel[key] for key in spec.inputs if key != 'close'}
+        if spec.timeframes:
+            kwargs.update(ts=panel['ts'], timeframe=timeframe)
+        codes = np.asarray(spec.load('vectorized')(close, **kwargs, **params)).reshape(close.shape)
+    n_symbols = len(panel['symbols'])
+    if not len(codes):
+        return pd.DataFrame(columns=SCAN_COLUMNS)
+    last_ts = np.asarray(panel.get('last_ts', np.repeat(panel['ts'][-1:], n_symbols)), dtype='datetime64[ns]')
+    # Última señal (BUY/SELL) de cada columna dentro de la ventana
+    marked = codes != 0
+    last_idx = np.where(marked.any(axis=0), len(codes) - 1 - np.argmax(marked[::-1], axis=0), -1)
+    last_codes = codes[np.maximum(last_idx, 0), np.arange(n_symbols)]
+    label = lambda code: 'BUY' if code == BUY else 'SELL' if code == SELL else 'HOLD'
+    table = pd.DataFrame({
+        'symbol': panel['symbols'],
+        'ts': pd.to_datetime(last_ts),
+        'close': close[-1],
+        'signal': [label(code) for code in codes[-1]],
+        'position': np.where(position_state(codes)[-1] == 1, 'long', 'flat'),
+        'last_signal': [label(code) if i >= 0 else None for code, i in zip(last_codes, last_idx)],
+        'bars_since': np.where(last_idx >= 0, len(codes) - 1 - last_idx, -1),
+        'stale': last_ts < np.datetime64(panel['ts'][-1], 'ns'),
+    })
+    if lines is not None:
+        table['fast'] = lines[0][-1]
+        table['slow'] = lines[1][-1]
+    return table
+
+class Scanner:
+    """
+    Live cross-sectional scanner over a MarketDataHub.
+
+    Args:
+        strategy (str): Registered strategy name.
+        symbols (List[str]): Universe to scan.
+        timeframe (str): Candle timeframe.
+        params (Dict, optional): Strategy parameters.
+        window (int, optional): Bars kept per symbol (default: max(limit, 3 * warm-up)).
+        hub (MarketDataHub, optional): Hub providing the feeds (exchange feeds by default).
+        grace (float): Seconds to wait for late symbols after the first one delivers a candle;
+            the scan then runs with those symbols marked stale.
+        on_scan (Callable, optional): Called with every scan table (printed by default).
+    """
+    def __init__(self, strategy: str, symbols: List[str], timeframe: str, params: Optional[Dict] = None,
+                 window: Optional[int] = None, hub: Optional[MarketDataHub] = None, grace: float = 5.0,
+                 on_scan: Optional[Callable[[pd.DataFrame], None]] = None, limit: int = 100):
+        self.strategy = strategy
+        self.symbols = list(dict.fromkeys(symbols))
+        self.timeframe = timeframe
+        self.params = get_spec(strategy).resolve_params(params)
+        self.window_size = window or max(limit, 3 * (get_spec(strategy).warmup(self.params, timeframe) + 1))
+        self.hub = hub or MarketDataHub()
+        self.grace = grace
+        self.on_scan = on_scan or self.print_scan
+        self.arrived: Dict = {}
+        self.last_scanned = None
+        self.timers: Dict = {}
+
+    def print_scan(self, table: pd.DataFrame):
+        signals = table[table['signal'] != 'HOLD']
+        logging.info(f"Scan {self.strategy} {self.timeframe}: {len(table)} symbols, {len(signals)} signals")
+        print(table.to_string(index=False))
+
+    def scan(self) -> pd.DataFrame:
+        """Scan the current windows of the hub."""
+        windows = {}
+        for symbol in self.symbols:
+            try:
+                windows[symbol] = self.hub.window(symbol, self.timeframe, self.window_size)
+            except KeyError:
+                continue
+        return scan(stack_windows(windows, self.window_size), self.strategy, self.params, self.timeframe)
+
+    def on_bar(self, symbol: str, bar: Dict):
+        """Record a closed candle; scans once every symbol has delivered it (or after `grace`)."""
+        if bar.get('warmup'):
+            return
+        ts = pd.Timestamp(bar['ts'])
+        if self.last_scanned is not None and ts <= self.last_scanned:
+            return
+        arrived = self.arrived.setdefault(ts, set())
+        arrived.add(symbol)
+        if len(arrived) == len(self.symbols):
+            self._flush(ts)
+        elif ts not in self.timers:
+            self.timers[ts] = asyncio.get_running_loop().call_later(self.grace, self._flush, ts)
+
+    def _flush(self, ts: pd.Timestamp):
+        if self.last_scanned is not None and ts <= self.last_scanned:
+            return
+        self.last_scanned = ts
+        for key in [k for k in self.arrived if k <= ts]:
+            del self.arrived[key]
+            timer = self.timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+        self.on_scan(self.scan())
+
+    async def _consume(self, symbol: str):
+        async for bar in self.hub.feed(symbol, self.timeframe, warmup=self.window_size).bars():
+            self.on_bar(symbol, bar)
+
+    async def run(self):
+        """Scan at every candle close until cancelled (or until every feed ends)."""
+        try:
+            await asyncio.gather(*(self._consume(symbol) for symbol in self.symbols))
+        finally:
+            for timer in self.timers.values():
+                timer.cancel()
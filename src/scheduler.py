@@ -0,0 +1,177 @@
+"""
+Admission control for heavy API work.
+
+Each job class (backtest, download, sweep) runs at most `concurrency` jobs at once; further
+requests wait in a bounded priority queue (high before normal before low, FIFO within a level)
+and are rejected straight away when the queue is full, or after `max_wait` seconds in it. A
+finishing job hands its slot directly to the next waiter, so a burst is drained at the
+configured concurrency instead of every request competing for CPU and memory.
+
+The API endpoints are synchronous, so a queued request holds a worker of the AnyIO threadpool
+(THREADPOOL_SIZE threads) while it waits. The running plus queued jobs of all the classes are
+therefore capped at THREADPOOL_SIZE - RESERVED_WORKERS, which keeps RESERVED_WORKERS threads
+for the cheap endpoints however many heavy requests pile up.
+
+Typical usage (as a module):
+    from src.scheduler import get_scheduler, QueueFull
+    with get_scheduler().slot('backtest', priority='high'):
+        run_backtest()
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+PRIORITIES = {'high': 0, 'normal': 1, 'low': 2}
+# Hilos del threadpool de AnyIO (por defecto 40) en el que FastAPI ejecuta los endpoints síncronos
+THREADPOOL_SIZE = 40
+# Hilos que los trabajos pesados (en marcha o en cola) nunca pueden ocupar
+RESERVED_WORKERS = 5
+# job class -> settings (overridable from the scheduler section of config.yaml)
+DEFAULT_CLASSES: Dict[str, Dict] = {
+    'backtest': {'concurrency': 2, 'max_queue': 8, 'max_wait': 600},
+    'download': {'concurrency': 2, 'max_queue': 16, 'max_wait': 600},
+    'sweep': {'concurrency': 1, 'max_queue': 4, 'max_wait': 600},
+}
+
+class QueueFull(Exception):
+    """A job was not admitted; retry_after is a rough estimate (seconds) of when a slot frees up."""
+    def __init__(self, job_class: str, retry_after: int, reason: str = 'queue full'):
+        super().__init__(f"{job_class} {reason}")
+        self.job_class = job_class
+        self.retry_after = retry_after
+        self.reason = reason
+
+class JobClass:
+    """
+    Slots and wait queue of one kind of job.
+
+    Args:
+        name (str): Job class name.
+        concurrency (int): Jobs running at once.
+        max_queue (int): Jobs waiting at most; more are rejected.
+        max_wait (float, optional): Seconds a job may wait before being rejected (None: no limit).
+    """
+    def __init__(self, name: str, concurrency: int, max_queue: int, max_wait: Optional[float] = None):
+        if concurrency < 1 or max_queue < 0:
+            raise ValueError(f"Invalid limits for job class {name}: concurrency >= 1 and max_queue >= 0 required")
+        self.name = name
+        self.concurrency = int(concurrency)
+        self.max_queue = int(max_queue)
+        self.max_wait = max_wait
+        self.running = 0
+        self.waiters = []
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.admitted = self.rejected = self.timed_out = self.completed = 0
+        self.wait_time = self.max_wait_seen = self.run_time = 0.0
+
+    def acquire(self, priority: str = 'normal'):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        start = time.monotonic()
+        with self.lock:
+            if self.running < self.concurrency and not self.waiters:
+                self.running += 1
+                self.admitted += 1
+                return
+            if len(self.waiters) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(self.name, self._retry_after())
+            waiter = [PRIORITIES[priority], next(self.counter), threading.Event()]
+            heapq.heappush(self.waiters, waiter)
+        if not waiter[2].wait(self.max_wait):
+            with self.lock:
+                # The slot may have been handed over between the timeout and the lock
+                if not waiter[2].is_set():
+                    self.waiters.remove(waiter)
+                    heapq.heapify(self.waiters)
+                    self.timed_out += 1
+                    raise QueueFull(self.name, self._retry_after(), reason='queue wait timed out')
+        waited = time.monotonic() - start
+        with self.lock:
+            self.admitted += 1
+            self.wait_time += waited
+            self.max_wait_seen = max(self.max_wait_seen, waited)
+
+    def release(self, elapsed: float = 0.0):
+        with self.lock:
+            self.completed += 1
+            self.run_time += elapsed
+            if self.waiters:
+                # Hand-off: the slot goes to the next waiter (running stays the same)
+                heapq.heappop(self.waiters)[2].set()
+            else:
+                self.running -= 1
+
+    def _retry_after(self) -> int:
+        mean_run = self.run_time / self.completed if self.completed else 1.0
+        return max(1, math.ceil(mean_run * (len(self.waiters) + 1) / self.concurrency))
+
+    def stats(self) -> Dict:
+        with self.lock:
+            queued = {name: sum(1 for w in self.waiters if w[0] == level) for name, level in PRIORITIES.items()}
+            return {'concurrency': self.concurrency, 'max_queue': self.max_queue, 'running': self.running,
+                    'queued': len(self.waiters), 'queued_by_priority': queued, 'admitted': self.admitted,
+                    'rejected': self.rejected, 'timed_out': self.timed_out, 'completed': self.completed,
+                    'mean_wait_s': self.wait_time / self.admitted if self.admitted else 0.0,
+                    'max_wait_s': self.max_wait_seen,
+                    'mean_run_s': self.run_time / self.completed if self.completed else 0.0}
+
+class Scheduler:
+    """
+    Job classes of the API.
+
+    Args:
+        classes (Dict[str, Dict], optional): Settings per job class ('concurrency', 'max_queue',
+            'max_wait'), merged over DEFAULT_CLASSES.
+        max_workers (int): Cap on the running plus queued jobs of all the classes together
+            (each one may hold a threadpool worker).
+    """
+    def __init__(self, classes: Optional[Dict[str, Dict]] = None,
+                 max_workers: int = THREADPOOL_SIZE - RESERVED_WORKERS):
+        settings = {name: dict(values) for name, values in DEFAULT_CLASSES.items()}
+        for name, values in (classes or {}).items():
+            settings.setdefault(name, {'concurrency': 1, 'max_queue': 0, 'max_wait': None}).update(values or {})
+        self.classes = {name: JobClass(name, **values) for name, values in settings.items()}
+        occupied = sum(jobs.concurrency + jobs.max_queue for jobs in self.classes.values())
+        if occupied > max_workers:
+            raise ValueError(f"Scheduler limits allow {occupied} running and queued jobs, more than the "
+                             f"{max_workers} threadpool workers available to them; lower concurrency or max_queue")
+
+    @contextmanager
+    def slot(self, job_class: str, priority: str = 'normal'):
+        """Run the body once admitted; raises QueueFull if the job is rejected."""
+        if job_class not in self.classes:
+            raise ValueError(f"Unknown job class: {job_class}")
+        jobs = self.classes[job_class]
+        jobs.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            jobs.release(time.monotonic() - start)
+
+    def stats(self) -> Dict:
+        return {name: jobs.stats() for name, jobs in self.classes.items()}
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> Scheduler:
+    """Process-wide scheduler with the default job classes (see configure_scheduler)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
+
+def configure_scheduler(classes: Optional[Dict[str, Dict]]) -> Scheduler:
+    """Replace the process-wide scheduler (jobs already admitted finish on the old one)."""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = Scheduler(classes)
+        return _scheduler
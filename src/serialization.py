@@ -0,0 +1,132 @@
+"""
+JSON serialization and response compression.
+
+`dumps` uses orjson when it is installed (several times faster than the json module, with NumPy
+arrays and scalars serialized natively) and falls back to the json module otherwise; both write
+compact JSON, NaN as null and unknown objects (timestamps, ...) as strings. Summary files are
+written compact with write_json.
+
+API responses go through FastJSONResponse and are compressed with brotli (if installed) or gzip,
+negotiated per request from Accept-Encoding.
+
+Typical usage (as a module):
+    from src.serialization import dumps, write_json, read_json
+    write_json('summary.json', {'equity_curve': np.cumsum(profits)})
+"""
+import gzip
+import json
+import math
+import numpy as np
+from typing import Any, Optional
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies below this size are sent uncompressed (the headers would eat the gain)
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript')
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+def _finite(obj: Any) -> Any:
+    # json.dumps writes NaN/Infinity, which is not valid JSON; orjson writes null
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return _finite(_default(obj))
+    return obj
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON of obj (NumPy arrays and scalars included)."""
+    if orjson is not None:
+        # Datetimes go through _default (str), like the json module with default=str
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                            | orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(_finite(obj), default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def loads(data) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def write_json(path: str, obj: Any):
+    """Write obj as compact JSON."""
+    with open(path, 'wb') as f:
+        f.write(dumps(obj))
+
+def read_json(path: str) -> Any:
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps (orjson when available)."""
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def _accepted(accept_encoding: str) -> dict:
+    codings = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            codings[name.lower()] = q
+    return codings
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """'br', 'gzip' or None for an Accept-Encoding header (brotli only if installed)."""
+    codings = _accepted(accept_encoding or '')
+    if brotli is not None and codings.get('br', 0) > 0:
+        return 'br'
+    if codings.get('gzip', codings.get('*', 0)) > 0:
+        return 'gzip'
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+async def compress_response(request, response):
+    """
+    Compress a buffered response body for the client (used as an HTTP middleware).
+
+    Streaming bodies are buffered, so the middleware only handles types in COMPRESSIBLE_TYPES
+    and leaves everything else (files, already encoded responses) untouched.
+    """
+    content_type = response.headers.get('content-type', '')
+    encoding = negotiate_encoding(request.headers.get('accept-encoding'))
+    if response.headers.get('content-encoding') or not content_type.startswith(COMPRESSIBLE_TYPES):
+        return response
+    body = b''.join([chunk async for chunk in response.body_iterator])
+    from starlette.responses import Response
+    compressed = Response(status_code=response.status_code, background=response.background)
+    compressed.raw_headers = [(k, v) for k, v in response.raw_headers if k != b'content-length']
+    vary = compressed.headers.get('vary')
+    compressed.headers['vary'] = f"{vary}, Accept-Encoding" if vary else 'Accept-Encoding'
+    if encoding is not None and len(body) >= MIN_COMPRESS_SIZE:
+        body = compress(body, encoding)
+        compressed.headers['content-encoding'] = encoding
+    compressed.body = body
+    compressed.headers['content-length'] = str(len(body))
+    return compressed
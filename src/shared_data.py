@@ -0,0 +1,117 @@
+"""
+Shared-memory datasets for worker processes.
+
+The parent process copies a set of NumPy arrays (e.g. the ts/open/high/low/close/volume of a
+history) once into a multiprocessing.shared_memory block and hands the workers a small, picklable
+spec; every worker attaches read-only views of the same memory by name. N parallel evaluations of
+a long series need one copy of it in RAM instead of N, and nothing is pickled per task.
+
+Typical usage (as a module):
+    with SharedDatasetRegistry() as registry:
+        spec = registry.publish_history('BTC/USDT', '1m')
+        with ProcessPoolExecutor(initializer=init_worker, initargs=(spec,)) as pool:
+            ...
+    # in the worker
+    data = attach(spec)          # {'ts': ..., 'close': ...} read-only views
+"""
+import secrets
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+ALIGNMENT = 64
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    try:
+        # Python >= 3.13: the creating process owns the block, attaching ones must not unlink it
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+# Blocks attached by this process, kept open while their views are in use
+_ATTACHED: Dict[str, Dict] = {}
+
+def publish(arrays: Dict[str, np.ndarray], name: Optional[str] = None):
+    """
+    Copy arrays into a new shared-memory block.
+
+    Args:
+        arrays (Dict[str, np.ndarray]): Arrays of any numeric or datetime dtype.
+        name (str, optional): Block name; a random one by default.
+
+    Returns:
+        Tuple[SharedMemory, Dict]: The block (owned by the caller, who must close and unlink it)
+        and the spec to pass to attach().
+    """
+    layout = {}
+    offset = 0
+    for key, array in arrays.items():
+        array = np.asarray(array)
+        if array.dtype.hasobject:
+            raise ValueError(f"Array '{key}' has object dtype and cannot be shared")
+        layout[key] = (offset, array.shape, array.dtype.str)
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    block = shared_memory.SharedMemory(name=name or f"tb_{secrets.token_hex(6)}", create=True, size=max(offset, 1))
+    for key, array in arrays.items():
+        start, shape, dtype = layout[key]
+        np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=start)[...] = array
+    return block, {'name': block.name, 'layout': layout}
+
+def attach(spec: Dict) -> Dict[str, np.ndarray]:
+    """Read-only views of a published dataset; attaching twice in a process reuses the block."""
+    name = spec['name']
+    if name not in _ATTACHED:
+        block = _open_block(name)
+        views = {}
+        for key, (start, shape, dtype) in spec['layout'].items():
+            view = np.ndarray(tuple(shape), dtype=dtype, buffer=block.buf, offset=start)
+            view.flags.writeable = False
+            views[key] = view
+        _ATTACHED[name] = {'block': block, 'views': views}
+    return _ATTACHED[name]['views']
+
+def detach(spec: Dict):
+    """Drop this process's views of a dataset and close its mapping."""
+    entry = _ATTACHED.pop(spec['name'], None)
+    if entry is not None:
+        entry['views'].clear()
+        entry['block'].close()
+
+class SharedDatasetRegistry:
+    """
+    Datasets published by the parent process, unlinked together when the registry is closed.
+
+    Publishing the same key twice returns the existing spec.
+    """
+    def __init__(self):
+        self.blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self.specs: Dict[str, Dict] = {}
+
+    def publish(self, key: str, arrays: Dict[str, np.ndarray]) -> Dict:
+        if key not in self.specs:
+            block, spec = publish(arrays)
+            self.blocks[key] = block
+            self.specs[key] = spec
+        return self.specs[key]
+
+    def publish_history(self, symbol: str, timeframe: str) -> Dict:
+        """Load a history once (through the dataset cache) and publish its OHLCV arrays."""
+        from src.history_manager import HistoryManager
+        return self.publish(f"{symbol} {timeframe}", HistoryManager.load_arrays(symbol, timeframe))
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.specs.get(key)
+
+    def close(self):
+        """Release every published block (workers must have finished using them)."""
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks.clear()
+        self.specs.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
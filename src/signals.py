@@ -0,0 +1,126 @@
+"""
+Vectorized signal generation for the built-in strategies.
+
+The per-call strategy functions in src/strategies/ evaluate one bar at a time. The functions
+here compute the same BUY/SELL/HOLD decisions for a whole series (or a time x symbol array)
+in a single pass, encoded as int8 codes: 1 = BUY, -1 = SELL, 0 = HOLD.
+
+Typical usage (as a module):
+    from src.signals import get_vectorized_strategy
+    codes = get_vectorized_strategy('cross_sma')(close, fast=10, slow=50)
+"""
+import numpy as np
+from typing import Callable, Optional
+from src.indicators import sma, ema, crossover, RollingSMA, RollingEMA, ChunkedSMA, ChunkedEMA
+from src.strategies import get_spec
+
+BUY, HOLD, SELL = 1, 0, -1
+
+def cross_sma_signals(close: np.ndarray, fast: int, slow: int) -> np.ndarray:
+    """Return crossover codes for the SMA crossover strategy."""
+    return crossover(sma(close, fast), sma(close, slow))
+
+def cross_ema_signals(close: np.ndarray, fast: int, slow: int) -> np.ndarray:
+    """Return crossover codes for the EMA crossover strategy."""
+    return crossover(ema(close, fast), ema(close, slow))
+
+def codes_to_labels(codes: np.ndarray, first: bool = True) -> np.ndarray:
+    """
+    Convert 1D signal codes to the labels used in backtest results.
+
+    The first bar has no signal (None), like in backtest_strategy; pass first=False for the
+    codes of a chunk that continues a series.
+    """
+    labels = np.where(codes == BUY, 'BUY', np.where(codes == SELL, 'SELL', 'HOLD')).astype(object)
+    if first and len(labels):
+        labels[0] = None
+    return labels
+
+def position_state(codes: np.ndarray) -> np.ndarray:
+    """
+    Forward-fill signal codes into a long/flat state along the first axis.
+
+    Returns:
+        np.ndarray: int8 array with 1 while long (after a BUY) and 0 while flat.
+    """
+    codes = np.asarray(codes)
+    marked = codes != HOLD
+    idx = np.where(marked, np.arange(len(codes)).reshape((-1,) + (1,) * (codes.ndim - 1)), -1)
+    if len(idx):
+        idx = np.maximum.accumulate(idx, axis=0)
+    filled = np.take_along_axis(codes, np.maximum(idx, 0), axis=0) if codes.ndim > 1 else codes[np.maximum(idx, 0)]
+    return ((idx >= 0) & (filled == BUY)).astype(np.int8)
+
+class IncrementalCrossover:
+    """
+    Per-bar crossover strategy with O(1) updates.
+
+    Feeding the closes of a series one by one returns the same decisions as the vectorized
+    functions above, as labels: None for the first bar, then 'BUY', 'SELL' or 'HOLD'.
+    """
+    def __init__(self, indicator_cls, fast: int, slow: int):
+        self.fast = indicator_cls(fast)
+        self.slow = indicator_cls(slow)
+        self.prev = None
+
+    def update(self, close: float) -> Optional[str]:
+        curr = (self.fast.update(close), self.slow.update(close))
+        prev, self.prev = self.prev, curr
+        if prev is None:
+            return None
+        if prev[0] < prev[1] and curr[0] > curr[1]:
+            return 'BUY'
+        if prev[0] > prev[1] and curr[0] < curr[1]:
+            return 'SELL'
+        return 'HOLD'
+
+class ChunkedCrossover:
+    """
+    Crossover strategy evaluated over consecutive chunks of a series.
+
+    The indicator state and the last pair of line values are carried across chunk boundaries,
+    so the codes of all chunks concatenated are those of the whole series.
+    """
+    def __init__(self, indicator_cls, fast: int, slow: int):
+        self.fast = indicator_cls(fast)
+        self.slow = indicator_cls(slow)
+        self.prev = None
+
+    def update(self, close: np.ndarray) -> np.ndarray:
+        """Return the int8 signal codes of the next chunk of closes."""
+        fast, slow = self.fast.update(close), self.slow.update(close)
+        if not len(fast):
+            return np.zeros(0, dtype=np.int8)
+        if self.prev is None:
+            codes = crossover(fast, slow)
+        else:
+            codes = crossover(np.concatenate([[self.prev[0]], fast]), np.concatenate([[self.prev[1]], slow]))[1:]
+        self.prev = (fast[-1], slow[-1])
+        return codes
+
+def cross_sma_incremental(fast: int, slow: int) -> IncrementalCrossover:
+    return IncrementalCrossover(RollingSMA, fast, slow)
+
+def cross_ema_incremental(fast: int, slow: int) -> IncrementalCrossover:
+    return IncrementalCrossover(RollingEMA, fast, slow)
+
+def cross_sma_chunked(fast: int, slow: int) -> ChunkedCrossover:
+    return ChunkedCrossover(ChunkedSMA, fast, slow)
+
+def cross_ema_chunked(fast: int, slow: int) -> ChunkedCrossover:
+    return ChunkedCrossover(ChunkedEMA, fast, slow)
+
+# Lookups by strategy name go through the plugin registry (src/strategies/<name>/plugin.py)
+
+def get_incremental_strategy(name: str, fast: int, slow: int) -> IncrementalCrossover:
+    return get_spec(name).load('incremental')(fast=fast, slow=slow)
+
+def get_chunked_strategy(name: str, fast: int, slow: int) -> ChunkedCrossover:
+    return get_spec(name).load('chunked')(fast=fast, slow=slow)
+
+def get_strategy_indicator(name: str) -> Callable:
+    """Return the indicator whose fast/slow lines a crossover strategy compares."""
+    return get_spec(name).load('indicator')
+
+def get_vectorized_strategy(name: str) -> Callable:
+    return get_spec(name).load('vectorized')
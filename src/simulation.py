@@ -0,0 +1,213 @@
+"""
+Position and risk simulation for backtest results.
+
+This module turns the BUY/SELL signals produced by the backtest engine into sized trades,
+applying position sizing, stop-loss triggers checked against each bar's low, fees and slippage.
+Everything runs as NumPy array passes, so the cost grows linearly with the history size.
+
+Typical usage (as a module):
+    from src.simulation import simulate_trades
+    trades = simulate_trades(result, max_position_size=0.01, stop_loss_pct=0.02)
+"""
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+TRADE_COLUMNS = [
+    'entry_time', 'entry_price', 'exit_time', 'exit_price', 'exit_reason',
+    'quantity', 'fees', 'profit', 'return_pct', 'equity'
+]
+
+def signal_state(signals: np.ndarray, initial: int = 0) -> np.ndarray:
+    """
+    Convert a signal array into a long/flat state array.
+
+    A 'BUY' sets the state to 1 and a 'SELL' sets it back to 0. Any other value keeps the
+    previous state, so repeated BUY signals while long are ignored, like in the original
+    row-by-row pairing.
+
+    Args:
+        signals (np.ndarray): Array of 'BUY', 'SELL', 'HOLD' or None values.
+        initial (int): State before the first row (1 when continuing an open position).
+
+    Returns:
+        np.ndarray: int8 array with 1 while a position is open and 0 otherwise.
+    """
+    signals = np.asarray(signals, dtype=object)
+    buy = signals == 'BUY'
+    sell = signals == 'SELL'
+    marked = buy | sell
+    # Forward fill the last BUY/SELL seen at each row
+    last = np.where(marked, np.arange(len(signals)), -1)
+    last = np.maximum.accumulate(last) if len(last) else last
+    state = np.where(last >= 0, buy[np.maximum(last, 0)], bool(initial))
+    return state.astype(np.int8)
+
+class TradeSimulator:
+    """
+    Trade simulation over consecutive chunks of a backtest result.
+
+    The position state, the open trade (entry fill and stop level) and the compounded equity
+    are carried across chunks, so feeding the chunks of a result one after the other returns
+    the same trades as simulating the whole result at once. Each update returns the trades
+    closed within the chunk. Arguments as in simulate_trades; `date_format` (optional) fixes
+    how trade times are written, so every chunk formats them alike.
+    """
+    def __init__(self, max_position_size: float = 1.0, stop_loss_pct: Optional[float] = None,
+                 fee_pct: float = 0.0, slippage_pct: float = 0.0, initial_capital: float = 10000.0,
+                 date_format: Optional[str] = None):
+        if not 0 < max_position_size <= 1:
+            raise ValueError(f"max_position_size must be in (0, 1], got {max_position_size}")
+        self.max_position_size = max_position_size
+        self.stop_loss_pct = stop_loss_pct
+        self.fee_pct = fee_pct
+        self.slippage_pct = slippage_pct
+        self.initial_capital = initial_capital
+        self.date_format = date_format
+        self.state = 0
+        # Trade open at the end of the last chunk: entry time and fill, stop level, stopped out
+        self.open: Optional[dict] = None
+        self.growth = 1.0
+        self.rows = 0
+
+    def _times(self, ts: pd.Series, idx: np.ndarray) -> list:
+        times = ts.iloc[idx]
+        if self.date_format and pd.api.types.is_datetime64_any_dtype(times):
+            return times.dt.strftime(self.date_format).tolist()
+        return times.astype(str).tolist()
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Simulate the next chunk; returns one row per trade closed in it (TRADE_COLUMNS)."""
+        if df.empty or 'signal' not in df.columns:
+            return pd.DataFrame(columns=TRADE_COLUMNS)
+        close = df['close'].to_numpy(dtype=float)
+        low = df['low'].to_numpy(dtype=float) if 'low' in df.columns else close
+        open_ = df['open'].to_numpy(dtype=float) if 'open' in df.columns else None
+        n = len(close)
+        ts = df['ts'] if 'ts' in df.columns else pd.Series(np.arange(self.rows, self.rows + n))
+        self.rows += n
+
+        state = signal_state(df['signal'].to_numpy(), self.state)
+        prev_state = np.concatenate(([self.state], state[:-1]))
+        self.state = int(state[-1])
+        new_entries = np.flatnonzero((state == 1) & (prev_state == 0))
+        signal_exits = np.flatnonzero((state == 0) & (prev_state == 1))
+        carried = self.open
+        # The trade carried from the previous chunk is segment 0, entered "before" row 0
+        entries = np.concatenate(([-1], new_entries)) if carried else new_entries
+        if len(entries) == 0:
+            return pd.DataFrame(columns=TRADE_COLUMNS)
+
+        # Pair each entry with the first SELL after it (n means "still open at the end")
+        pos = np.searchsorted(signal_exits, entries, side='right')
+        exits = np.append(signal_exits, n)[pos]
+        reasons = np.full(len(entries), 'signal', dtype=object)
+
+        entry_fill = close[new_entries] * (1 + self.slippage_pct)
+        if carried:
+            entry_fill = np.concatenate(([carried['entry_fill']], entry_fill))
+        exit_price = np.where(exits < n, close[np.minimum(exits, n - 1)], np.nan)
+
+        stop_level = np.full(len(entries), -np.inf)
+        if self.stop_loss_pct:
+            stop_level = entry_fill * (1 - self.stop_loss_pct)
+            if carried:
+                # A trade already stopped out only waits for its SELL
+                stop_level[0] = -np.inf if carried['stopped'] else carried['stop_level']
+            # Bars inside a position are those whose previous bar was long; label them by trade number
+            in_position = prev_state == 1
+            seg_id = np.cumsum((state == 1) & (prev_state == 0)) - (0 if carried else 1)
+            seg_prev = np.concatenate(([0], seg_id[:-1]))
+            hit = in_position & (low <= stop_level[np.maximum(seg_prev, 0)])
+            hit_idx = np.flatnonzero(hit)
+            if len(hit_idx):
+                hit_seg = seg_prev[hit_idx]
+                first_seg, first_pos = np.unique(hit_seg, return_index=True)
+                stop_idx = hit_idx[first_pos]
+                stopped = stop_idx <= exits[first_seg]
+                first_seg, stop_idx = first_seg[stopped], stop_idx[stopped]
+                level = stop_level[first_seg]
+                fill = np.minimum(open_[stop_idx], level) if open_ is not None else level
+                exits[first_seg] = stop_idx
+                exit_price[first_seg] = fill
+                reasons[first_seg] = 'stop_loss'
+
+        stopped_before = bool(carried and carried['stopped'])
+        if stopped_before:
+            # Its exit was already reported
+            exits[0] = n
+        if self.state == 1:
+            # The last segment is still long: carry it (already closed if its stop was hit)
+            last_entry = entries[-1]
+            self.open = {'entry_time': carried['entry_time'] if last_entry < 0 else self._times(ts, [last_entry])[0],
+                         'entry_fill': entry_fill[-1], 'stop_level': stop_level[-1],
+                         'stopped': bool(exits[-1] < n) or (last_entry < 0 and stopped_before)}
+        else:
+            self.open = None
+
+        closed = exits < n
+        entries, exits, reasons = entries[closed], exits[closed], reasons[closed]
+        entry_fill, exit_price = entry_fill[closed], exit_price[closed]
+        if len(entries) == 0:
+            return pd.DataFrame(columns=TRADE_COLUMNS)
+        entry_times = self._times(ts, entries[entries >= 0])
+        if entries[0] < 0:
+            entry_times.insert(0, carried['entry_time'])
+        exit_fill = exit_price * (1 - self.slippage_pct)
+
+        # Per-trade return on the committed notional, then compounded equity
+        returns = exit_fill / entry_fill * (1 - self.fee_pct) - 1 - self.fee_pct
+        growth = np.cumprod(np.concatenate(([self.growth], 1 + self.max_position_size * returns)))
+        equity_before = self.initial_capital * growth[:-1]
+        growth = growth[1:]
+        self.growth = growth[-1]
+        notional = equity_before * self.max_position_size
+        quantity = notional / entry_fill
+        fees = notional * self.fee_pct + quantity * exit_fill * self.fee_pct
+        profit = notional * returns
+
+        return pd.DataFrame({
+            'entry_time': entry_times,
+            'entry_price': entry_fill,
+            'exit_time': self._times(ts, exits),
+            'exit_price': exit_fill,
+            'exit_reason': reasons,
+            'quantity': quantity,
+            'fees': fees,
+            'profit': profit,
+            'return_pct': returns * 100,
+            'equity': self.initial_capital * growth,
+        }, columns=TRADE_COLUMNS)
+
+def simulate_trades(
+    df: pd.DataFrame,
+    max_position_size: float = 1.0,
+    stop_loss_pct: Optional[float] = None,
+    fee_pct: float = 0.0,
+    slippage_pct: float = 0.0,
+    initial_capital: float = 10000.0,
+) -> pd.DataFrame:
+    """
+    Simulate long trades from a backtest result with sizing, stop-loss, fees and slippage.
+
+    Entries and signal exits are filled at the close of the signal bar. While a position is open,
+    the stop-loss is checked against the low of every following bar (including the exit bar);
+    if the bar opens below the stop the fill happens at the open. After a stop-out the simulator
+    stays flat until the strategy emits a new BUY after its next SELL. Trades still open at the
+    end of the data are ignored, like in the original summary.
+
+    Each trade commits `max_position_size` of the current equity, so equity compounds as
+    initial_capital * cumprod(1 + max_position_size * trade_return).
+
+    Args:
+        df (pd.DataFrame): Backtest result with 'ts', 'close' and 'signal' columns ('open'/'low' optional).
+        max_position_size (float): Fraction of equity committed to each trade (0 < x <= 1).
+        stop_loss_pct (float, optional): Stop distance below the entry fill, e.g. 0.02 for 2%. None or 0 disables it.
+        fee_pct (float): Fee charged on the notional of each fill, e.g. 0.001 for 0.1%.
+        slippage_pct (float): Adverse price move applied to every fill.
+        initial_capital (float): Starting equity in quote currency.
+
+    Returns:
+        pd.DataFrame: One row per closed trade with the columns in TRADE_COLUMNS.
+    """
+    return TradeSimulator(max_position_size, stop_loss_pct, fee_pct, slippage_pct, initial_capital).update(df)
@@ -0,0 +1,212 @@
+"""
+Embedded SQLite storage for OHLCV history and backtest results.
+
+Candles live in a WITHOUT ROWID table keyed by (symbol, timeframe, ts), so range reads are
+index seeks and re-downloaded candles are upserted instead of duplicated. The database runs in
+WAL mode: readers (API, backtests, bots) never block the writer (downloads, ingestor). Range
+reads return NumPy arrays directly. Backtest runs are stored with their parameters and summary
+as JSON, queryable by strategy, symbol, timeframe and any parameter value.
+
+Typical usage (as a module):
+    store = SQLiteStore('data/history/history.db')
+    store.write_candles('BTC/USDT', '1m', df)
+    data = store.read_range('BTC/USDT', '1m', start='2024-01-01', end='2024-02-01')
+    runs = store.query_backtests('cross_sma', params={'fast': 10})
+"""
+import json
+import sqlite3
+import threading
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, List, Optional, Tuple
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+CANDLE_DTYPE = np.dtype([('ts', 'i8')] + [(field, 'f8') for field in FIELDS])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    symbol TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (symbol, timeframe, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS backtests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    strategy TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    params TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_backtests_strategy ON backtests (strategy, symbol, timeframe, params);
+CREATE TABLE IF NOT EXISTS backtest_trades (
+    run_id INTEGER NOT NULL REFERENCES backtests (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    trade TEXT NOT NULL,
+    PRIMARY KEY (run_id, seq)
+) WITHOUT ROWID;
+"""
+
+def _to_ms(value) -> int:
+    return int(pd.Timestamp(value).value // 1_000_000)
+
+def _arrays(rows: List) -> Dict[str, np.ndarray]:
+    table = np.array(rows, dtype=CANDLE_DTYPE)
+    data = {'ts': table['ts'].astype('datetime64[ms]')}
+    for field in FIELDS:
+        data[field] = np.ascontiguousarray(table[field])
+    return data
+
+def _params_json(params: Dict) -> str:
+    # Canonical form so equal parameter sets compare equal as text
+    return json.dumps(params, sort_keys=True, default=str)
+
+class SQLiteStore:
+    """
+    SQLite database of candles and backtest runs.
+
+    Each thread gets its own connection, so the store can be shared by the API workers, the
+    paper-trading loop and background downloads.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def write_candles(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """
+        Upsert candles in a single transaction.
+
+        Args:
+            df (pd.DataFrame): Columns 'ts', 'open', 'high', 'low', 'close', 'volume'.
+
+        Returns:
+            int: Number of rows written.
+        """
+        if df.empty:
+            return 0
+        ts = pd.to_datetime(df['ts']).to_numpy(dtype='datetime64[ms]').astype(np.int64).tolist()
+        values = df[list(FIELDS)].to_numpy(dtype=float).tolist()
+        rows = ((symbol, timeframe, t, *v) for t, v in zip(ts, values))
+        with self.connection() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO candles (symbol, timeframe, ts, open, high, low, close, volume) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(ts)
+
+    def read_range(self, symbol: str, timeframe: str, start=None, end=None) -> Dict[str, np.ndarray]:
+        """
+        Read the candles of a series between two dates (inclusive) as NumPy arrays.
+
+        Returns:
+            Dict[str, np.ndarray]: 'ts' (datetime64[ms]) and one float array per OHLCV field.
+        """
+        sql = 'SELECT ts, open, high, low, close, volume FROM candles WHERE symbol = ? AND timeframe = ?'
+        args: List = [symbol, timeframe]
+        if start is not None:
+            sql += ' AND ts >= ?'
+            args.append(_to_ms(start))
+        if end is not None:
+            sql += ' AND ts <= ?'
+            args.append(_to_ms(end))
+        rows = self.connection().execute(sql + ' ORDER BY ts', args).fetchall()
+        return _arrays(rows)
+
+    def iter_range(self, symbol: str, timeframe: str, chunksize: int, start=None, end=None) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield read_range chunks of at most `chunksize` candles in ts order (keyset pagination)."""
+        since = start
+        while True:
+            sql = 'SELECT ts, open, high, low, close, volume FROM candles WHERE symbol = ? AND timeframe = ?'
+            args: List = [symbol, timeframe]
+            if since is not None:
+                sql += ' AND ts >= ?' if since is start else ' AND ts > ?'
+                args.append(_to_ms(since))
+            if end is not None:
+                sql += ' AND ts <= ?'
+                args.append(_to_ms(end))
+            rows = self.connection().execute(sql + ' ORDER BY ts LIMIT ?', args + [chunksize]).fetchall()
+            if not rows:
+                return
+            data = _arrays(rows)
+            yield data
+            if len(rows) < chunksize:
+                return
+            since = data['ts'][-1]
+
+    def read_frame(self, symbol: str, timeframe: str, start=None, end=None) -> pd.DataFrame:
+        """Same as read_range, as a DataFrame with the CSV history columns."""
+        data = self.read_range(symbol, timeframe, start, end)
+        data['ts'] = data['ts'].astype('datetime64[ns]')
+        return pd.DataFrame(data)
+
+    def date_range(self, symbol: str, timeframe: str) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """First and last candle of a series (two index seeks), or None if it is empty."""
+        row = self.connection().execute(
+            'SELECT MIN(ts), MAX(ts) FROM candles WHERE symbol = ? AND timeframe = ?', (symbol, timeframe)).fetchone()
+        if row[0] is None:
+            return None
+        return pd.Timestamp(row[0], unit='ms'), pd.Timestamp(row[1], unit='ms')
+
+    def delete_series(self, symbol: str, timeframe: str) -> int:
+        with self.connection() as conn:
+            return conn.execute('DELETE FROM candles WHERE symbol = ? AND timeframe = ?', (symbol, timeframe)).rowcount
+
+    def save_backtest(self, strategy: str, symbol: str, timeframe: str, params: Dict, summary: Dict,
+                      trades: Optional[List[Dict]] = None) -> int:
+        """Store a backtest run with its full trade list and return its id."""
+        with self.connection() as conn:
+            cur = conn.execute(
+                'INSERT INTO backtests (strategy, symbol, timeframe, params, summary, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (strategy, symbol, timeframe, _params_json(params), json.dumps(summary, default=str), time.time()))
+            run_id = cur.lastrowid
+            conn.executemany('INSERT INTO backtest_trades (run_id, seq, trade) VALUES (?, ?, ?)',
+                             ((run_id, i, json.dumps(t, default=str)) for i, t in enumerate(trades or [])))
+        return run_id
+
+    def query_backtests(self, strategy: Optional[str] = None, symbol: Optional[str] = None,
+                        timeframe: Optional[str] = None, params: Optional[Dict] = None,
+                        limit: int = 100) -> List[Dict]:
+        """
+        Find backtest runs, most recent first.
+
+        Args:
+            params (Dict, optional): Parameter values the runs must have (a subset is enough).
+        """
+        sql = 'SELECT id, strategy, symbol, timeframe, params, summary, created_at FROM backtests WHERE 1 = 1'
+        args: List = []
+        for column, value in (('strategy', strategy), ('symbol', symbol), ('timeframe', timeframe)):
+            if value is not None:
+                sql += f' AND {column} = ?'
+                args.append(value)
+        for key, value in (params or {}).items():
+            sql += ' AND json_extract(params, ?) = ?'
+            args.extend([f'$.{key}', value])
+        sql += ' ORDER BY id DESC LIMIT ?'
+        args.append(limit)
+        return [{'id': row[0], 'strategy': row[1], 'symbol': row[2], 'timeframe': row[3],
+                 'params': json.loads(row[4]), 'summary': json.loads(row[5]), 'created_at': row[6]}
+                for row in self.connection().execute(sql, args)]
+
+    def backtest_trades(self, run_id: int) -> List[Dict]:
+        rows = self.connection().execute('SELECT trade FROM backtest_trades WHERE run_id = ? ORDER BY seq', (run_id,))
+        return [json.loads(row[0]) for row in rows]
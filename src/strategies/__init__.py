@@ -1,11 +1,154 @@
-from .cross_sma_func import cross_sma
-from .cross_ema_func import cross_ema
+"""
+Strategy plugin registry.
 
-def get_strategy(name):
-    if name == 'cross_sma':
-        return cross_sma
-    elif name == 'cross_ema':
-        return cross_ema
-    else:
+Every strategy is a package in src/strategies/<name>/ with a `plugin.py` module that declares a
+StrategySpec: its default parameters, the warm-up lookback it needs and the implementations it
+provides:
+
+    per_bar      f(df, **params) -> 'BUY' | 'SELL' | 'HOLD', evaluated on the history up to a bar
+    vectorized   f(close, **params) -> int8 codes for a whole series (or time x symbol array);
+                 strategies that read other series list them in `inputs` and get them as keywords
+    incremental  f(**params) -> object whose update(close) returns the signal of each new bar
+    chunked      f(**params) -> object whose update(closes) returns the codes of each chunk
+    indicator    f(values, length) -> the line compared by crossover strategies
+
+A package without plugin.py can instead declare buy/sell rules in the `strategy` section of its
+config.yaml; they are compiled by src.expressions into a vectorized implementation.
+
+Plugins are discovered on the first lookup, and implementations may be given as
+'module:attribute' strings that are imported on first use, so heavy dependencies (pandas_ta for
+the per-bar functions) are only loaded by the code paths that need them.
+
+Typical usage (as a module):
+    from src.strategies import get_spec, get_strategy
+    spec = get_spec('cross_sma')
+    codes = spec.load('vectorized')(close, fast=10, slow=50)
+    warmup = spec.warmup({'slow': 50})
+"""
+import importlib
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Union
+
+ENTRY_POINTS = ('per_bar', 'vectorized', 'incremental', 'chunked', 'indicator')
+# Fastest first: used to pick the implementation of a backtest
+BACKTEST_PATHS = ('vectorized', 'chunked', 'incremental', 'per_bar')
+
+@dataclass
+class StrategySpec:
+    """
+    Declaration of a strategy plugin.
+
+    Args:
+        name (str): Strategy name used by the API, the scripts and the config folders.
+        params (Dict): Parameter names with their default values.
+        lookback (Callable): params -> bars of history needed before the first signal.
+        description (str): One-line description.
+        per_bar, vectorized, incremental, chunked, indicator: Implementations (callables or
+            'module:attribute' strings); None when not provided.
+        inputs (tuple): OHLCV series the vectorized implementation reads ('close' by default).
+        timeframes (tuple): Secondary timeframes it reads; it then also gets the candle open
+            times and the base timeframe as `ts` and `timeframe` keywords, and its lookback
+            takes the base timeframe as a second argument.
+    """
+    name: str
+    params: Dict = field(default_factory=dict)
+    lookback: Callable[[Dict], int] = lambda params: 0
+    description: str = ''
+    per_bar: Union[Callable, str, None] = None
+    vectorized: Union[Callable, str, None] = None
+    incremental: Union[Callable, str, None] = None
+    chunked: Union[Callable, str, None] = None
+    indicator: Union[Callable, str, None] = None
+    inputs: tuple = ('close',)
+    timeframes: tuple = ()
+
+    def provides(self, entry_point: str) -> bool:
+        return getattr(self, entry_point) is not None
+
+    def load(self, entry_point: str) -> Callable:
+        """Return an implementation, importing its module on first use."""
+        if entry_point not in ENTRY_POINTS:
+            raise ValueError(f"Unknown entry point: {entry_point}")
+        target = getattr(self, entry_point)
+        if target is None:
+            raise ValueError(f"Strategy {self.name} has no {entry_point} implementation")
+        if isinstance(target, str):
+            module, _, attr = target.partition(':')
+            target = getattr(importlib.import_module(module), attr)
+            setattr(self, entry_point, target)
+        return target
+
+    def resolve_params(self, params: Optional[Dict] = None) -> Dict:
+        """Defaults overridden by the given values (unknown names are ignored)."""
+        resolved = dict(self.params)
+        resolved.update({k: v for k, v in (params or {}).items() if k in self.params})
+        return resolved
+
+    def warmup(self, params: Optional[Dict] = None, timeframe: Optional[str] = None) -> int:
+        """Bars of history needed before the first bar that can produce a signal."""
+        if self.timeframes:
+            return int(self.lookback(self.resolve_params(params), timeframe))
+        return int(self.lookback(self.resolve_params(params)))
+
+    def fastest(self, paths=BACKTEST_PATHS) -> str:
+        """Name of the fastest implementation provided among `paths`."""
+        for path in paths:
+            if self.provides(path):
+                return path
+        raise ValueError(f"Strategy {self.name} provides none of: {', '.join(paths)}")
+
+    def describe(self) -> Dict:
+        return {'name': self.name, 'description': self.description, 'params': dict(self.params),
+                'lookback': self.warmup(), 'implementations': [e for e in ENTRY_POINTS if self.provides(e)],
+                'inputs': list(self.inputs), 'timeframes': list(self.timeframes)}
+
+_REGISTRY: Dict[str, StrategySpec] = {}
+_DISCOVERED = False
+_LOCK = threading.Lock()
+
+def register(spec: StrategySpec) -> StrategySpec:
+    """Add (or replace) a strategy in the registry."""
+    _REGISTRY[spec.name] = spec
+    return spec
+
+def _load_config(path: str) -> Dict:
+    import yaml
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+def discover():
+    """Import the plugin.py, or compile the config.yaml rules, of every strategy package (once)."""
+    global _DISCOVERED
+    with _LOCK:
+        if _DISCOVERED:
+            return
+        base = os.path.dirname(__file__)
+        for name in sorted(os.listdir(base)):
+            config_path = os.path.join(base, name, 'config.yaml')
+            if os.path.exists(os.path.join(base, name, 'plugin.py')):
+                plugin = importlib.import_module(f"{__name__}.{name}.plugin")
+                if getattr(plugin, 'STRATEGY', None) is not None:
+                    register(plugin.STRATEGY)
+            elif os.path.exists(config_path):
+                config = _load_config(config_path).get('strategy') or {}
+                if config.get('rules'):
+                    from src.expressions import rules_spec
+                    register(rules_spec(name, config))
+        _DISCOVERED = True
+
+def get_spec(name: str) -> StrategySpec:
+    discover()
+    if name not in _REGISTRY:
         # Always raise the error in English for test compatibility
         raise ValueError(f"Unknown strategy: {name}")
+    return _REGISTRY[name]
+
+def list_strategies() -> List[StrategySpec]:
+    discover()
+    return [_REGISTRY[name] for name in sorted(_REGISTRY)]
+
+def get_strategy(name):
+    """Per-bar strategy function f(df, fast, slow) -> 'BUY' | 'SELL' | 'HOLD'."""
+    return get_spec(name).load('per_bar')
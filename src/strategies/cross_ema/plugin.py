@@ -0,0 +1,19 @@
+"""
+Plugin declaration of the EMA crossover strategy (cross_ema).
+
+BUY when the fast EMA crosses above the slow EMA, SELL when it crosses below.
+"""
+from src.strategies import StrategySpec
+
+STRATEGY = StrategySpec(
+    name='cross_ema',
+    description='Fast/slow EMA crossover',
+    params={'fast': 10, 'slow': 50},
+    # Recursive average: three slow periods for the SMA seed to fade out
+    lookback=lambda params: 3 * params['slow'],
+    per_bar='src.strategies.cross_ema_func:cross_ema',
+    vectorized='src.signals:cross_ema_signals',
+    incremental='src.signals:cross_ema_incremental',
+    chunked='src.signals:cross_ema_chunked',
+    indicator='src.indicators:ema',
+)
@@ -0,0 +1,19 @@
+"""
+Plugin declaration of the SMA crossover strategy (cross_sma).
+
+BUY when the fast SMA crosses above the slow SMA, SELL when it crosses below.
+"""
+from src.strategies import StrategySpec
+
+STRATEGY = StrategySpec(
+    name='cross_sma',
+    description='Fast/slow SMA crossover',
+    params={'fast': 10, 'slow': 50},
+    # A cross needs both averages on the previous bar too
+    lookback=lambda params: params['slow'],
+    per_bar='src.strategies.cross_sma_func:cross_sma',
+    vectorized='src.signals:cross_sma_signals',
+    incremental='src.signals:cross_sma_incremental',
+    chunked='src.signals:cross_sma_chunked',
+    indicator='src.indicators:sma',
+)
@@ -0,0 +1,87 @@
+"""
+Timeframe helpers.
+
+Converts exchange timeframe strings such as '1m', '5m', '1h' or '1d' into durations and aligns
+timestamps to candle open times.
+"""
+import numpy as np
+import pandas as pd
+
+UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'M': 2592000, 'y': 31536000}
+
+def timeframe_to_seconds(timeframe: str) -> int:
+    """Return the duration of one candle in seconds (months count as 30 days, like ccxt)."""
+    amount, unit = timeframe[:-1], timeframe[-1]
+    if unit not in UNIT_SECONDS or not amount.isdigit():
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+    return int(amount) * UNIT_SECONDS[unit]
+
+def timeframe_to_timedelta(timeframe: str) -> pd.Timedelta:
+    """Return the duration of one candle as a pandas Timedelta."""
+    return pd.Timedelta(seconds=timeframe_to_seconds(timeframe))
+
+# Candles open at multiples of the timeframe since the epoch, except weekly ones (Mondays)
+WEEK_ORIGIN = pd.Timestamp('1970-01-05')
+EPOCH = pd.Timestamp('1970-01-01')
+
+def is_calendar_timeframe(timeframe: str) -> bool:
+    """Monthly and yearly candles have no fixed duration."""
+    return timeframe[-1] in ('M', 'y')
+
+def calendar_months(timeframe: str) -> int:
+    """Length in months of a monthly or yearly timeframe."""
+    return int(timeframe[:-1]) * (12 if timeframe[-1] == 'y' else 1)
+
+def candle_offset(timeframe: str):
+    """Offset between consecutive candle open times (a DateOffset for calendar timeframes)."""
+    if is_calendar_timeframe(timeframe):
+        return pd.DateOffset(months=calendar_months(timeframe))
+    return timeframe_to_timedelta(timeframe)
+
+def align_to_candle(ts: pd.Timestamp, timeframe: str, ceil: bool = True) -> pd.Timestamp:
+    """
+    Round a timestamp to a candle open time of the timeframe.
+
+    Args:
+        ceil (bool): True for the first candle opening at or after ts, False for the candle
+            containing ts.
+    """
+    ts = pd.Timestamp(ts)
+    if is_calendar_timeframe(timeframe):
+        months = calendar_months(timeframe)
+        index = (ts.year - 1970) * 12 + ts.month - 1
+        start = index - index % months
+        floor = pd.Timestamp(year=1970 + start // 12, month=start % 12 + 1, day=1)
+        if ceil and floor < ts:
+            return floor + pd.DateOffset(months=months)
+        return floor
+    tf = timeframe_to_timedelta(timeframe)
+    origin = WEEK_ORIGIN if timeframe[-1] == 'w' else EPOCH
+    elapsed, step = (ts - origin).value, tf.value
+    steps = -(-elapsed // step) if ceil else elapsed // step
+    return origin + steps * tf
+
+def seconds_to_timeframe(seconds: int) -> str:
+    """Inverse of timeframe_to_seconds for fixed-duration timeframes, e.g. 3600 -> '1h'."""
+    for unit in ('w', 'd', 'h', 'm', 's'):
+        if seconds >= UNIT_SECONDS[unit] and seconds % UNIT_SECONDS[unit] == 0:
+            return f"{seconds // UNIT_SECONDS[unit]}{unit}"
+    raise ValueError(f"Invalid candle duration: {seconds} seconds")
+
+def candle_open(ts: np.ndarray, timeframe: str) -> np.ndarray:
+    """Vectorized align_to_candle(ceil=False): open time of the candle containing each timestamp."""
+    ts = np.asarray(ts, dtype='datetime64[ns]')
+    if is_calendar_timeframe(timeframe):
+        months = ts.astype('datetime64[M]').astype(np.int64)
+        return (months - months % calendar_months(timeframe)).astype('datetime64[M]').astype('datetime64[ns]')
+    origin = np.datetime64(WEEK_ORIGIN if timeframe[-1] == 'w' else EPOCH, 'ns')
+    step = timeframe_to_timedelta(timeframe).value
+    elapsed = (ts - origin).astype(np.int64)
+    return origin + (elapsed - elapsed % step).astype('timedelta64[ns]')
+
+def candle_close(ts: np.ndarray, timeframe: str) -> np.ndarray:
+    """Close time (open time of the next candle) of candles opening at `ts`."""
+    ts = np.asarray(ts, dtype='datetime64[ns]')
+    if is_calendar_timeframe(timeframe):
+        return (pd.DatetimeIndex(ts) + candle_offset(timeframe)).to_numpy(dtype='datetime64[ns]')
+    return ts + np.timedelta64(timeframe_to_timedelta(timeframe).value, 'ns')
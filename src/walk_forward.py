@@ -0,0 +1,250 @@
+"""
+Walk-forward optimization for the crossover strategies.
+
+The history is sliced into rolling (or anchored) train/test windows. On each train window every
+fast/slow combination of the grid is scored and the best one is evaluated on the following test
+window; the test windows are stitched into a single out-of-sample equity curve.
+
+Indicator lines are computed once over the whole history for every length of the grid and shared
+by all windows (they are causal, so slicing them introduces no look-ahead). Windows are evaluated
+in parallel worker processes that attach the close prices and indicator lines from shared memory
+(one copy for all workers), and inside a window all parameter sets are scored in one vectorized
+(time x combination) pass. With a symbol and timeframe the lines come from the feature store
+(src.feature_store), so repeated runs over the same (or an extended) history reuse them.
+
+Usage (as a script):
+    python -m src.walk_forward --strategy cross_sma --timeframe 1m --fast 5 10 20 --slow 30 50 100 --train 43200 --test 10080
+
+Typical usage (as a module):
+    from src.walk_forward import walk_forward
+    result = walk_forward(df, 'cross_sma', fast_values=[5, 10], slow_values=[30, 50], train_size=1000, test_size=250)
+"""
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.feature_store import INDICATORS, get_feature_store
+from src.indicators import crossover
+from src.portfolio import position_returns
+from src.shared_data import SharedDatasetRegistry, attach
+from src.signals import get_strategy_indicator, position_state
+
+OBJECTIVES = ('return', 'sharpe')
+
+# Arrays shared by the windows of a run; filled once per worker process by _init_worker
+_SHARED: Dict = {}
+
+def walk_forward_windows(n: int, train_size: int, test_size: int, anchored: bool = False) -> List[Tuple[int, int, int, int]]:
+    """
+    Build consecutive train/test windows over n bars.
+
+    Test windows follow each other without overlap; the last one may be shorter.
+
+    Args:
+        n (int): Number of bars in the history.
+        train_size (int): Bars in each train window (the first one when anchored).
+        test_size (int): Bars in each test window.
+        anchored (bool): If True every train window starts at bar 0 (expanding window).
+
+    Returns:
+        List[Tuple[int, int, int, int]]: (train_start, train_end, test_start, test_end), ends exclusive.
+    """
+    if train_size < 2 or test_size < 1:
+        raise ValueError("train_size must be >= 2 and test_size >= 1")
+    windows = []
+    test_start = train_size
+    while test_start < n:
+        train_start = 0 if anchored else test_start - train_size
+        windows.append((train_start, test_start, test_start, min(test_start + test_size, n)))
+        test_start += test_size
+    return windows
+
+def parameter_grid(fast_values: Sequence[int], slow_values: Sequence[int]) -> List[Tuple[int, int]]:
+    """Return every (fast, slow) combination with fast < slow."""
+    return [(f, s) for f in fast_values for s in slow_values if f < s]
+
+def score_returns(returns: np.ndarray, objective: str = 'return') -> np.ndarray:
+    """Score the columns of a (time x combination) returns array."""
+    if objective == 'return':
+        return np.prod(1 + returns, axis=0) - 1
+    if objective == 'sharpe':
+        std = returns.std(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = returns.mean(axis=0) / std * np.sqrt(len(returns))
+        return np.where(std > 0, sharpe, 0.0)
+    raise ValueError(f"Unknown objective: {objective}")
+
+def _init_worker(close: np.ndarray, lines: np.ndarray, fast_idx: np.ndarray, slow_idx: np.ndarray, costs: Dict):
+    _SHARED.update(close=close, lines=lines, fast_idx=fast_idx, slow_idx=slow_idx, costs=costs)
+
+def _init_shared_worker(spec: Dict, fast_idx: np.ndarray, slow_idx: np.ndarray, costs: Dict):
+    data = attach(spec)
+    _init_worker(data['close'], data['lines'], fast_idx, slow_idx, costs)
+
+def _window_returns(start: int, end: int, combos: np.ndarray) -> np.ndarray:
+    close = _SHARED['close'][start:end]
+    lines = _SHARED['lines'][:, start:end]
+    fast = lines[_SHARED['fast_idx'][combos]].T
+    slow = lines[_SHARED['slow_idx'][combos]].T
+    # Every window starts flat; the first bar of the slice cannot produce a cross
+    state = position_state(crossover(fast, slow))
+    return position_returns(close[:, None], state, **_SHARED['costs'])
+
+def _run_window(window: Tuple[int, int, int, int], objective: str) -> Dict:
+    train_start, train_end, test_start, test_end = window
+    all_combos = np.arange(len(_SHARED['fast_idx']))
+    scores = score_returns(_window_returns(train_start, train_end, all_combos), objective)
+    best = int(np.argmax(scores))
+    test_returns = _window_returns(test_start, test_end, np.array([best]))[:, 0]
+    return {'best': best, 'train_score': float(scores[best]), 'test_returns': test_returns}
+
+def walk_forward(df: pd.DataFrame, strategy: str, fast_values: Sequence[int], slow_values: Sequence[int],
+                 train_size: int, test_size: int, anchored: bool = False, objective: str = 'return',
+                 max_position_size: float = 1.0, fee_pct: float = 0.0, slippage_pct: float = 0.0,
+                 initial_capital: float = 10000.0, workers: int = 1, symbol: Optional[str] = None,
+                 timeframe: Optional[str] = None) -> Dict:
+    """
+    Run a walk-forward optimization of a crossover strategy.
+
+    Args:
+        df (pd.DataFrame): OHLCV history with 'ts' and 'close' columns.
+        strategy (str): 'cross_sma' or 'cross_ema'.
+        fast_values (Sequence[int]): Candidate fast periods.
+        slow_values (Sequence[int]): Candidate slow periods.
+        train_size (int): Bars per train window.
+        test_size (int): Bars per test window.
+        anchored (bool): Use expanding train windows starting at bar 0.
+        objective (str): 'return' (compounded return) or 'sharpe' (per-bar Sharpe ratio).
+        max_position_size (float): Fraction committed while long.
+        fee_pct (float): Fee per position change.
+        slippage_pct (float): Slippage per position change.
+        initial_capital (float): Starting capital of the stitched out-of-sample curve.
+        workers (int): Worker processes; 1 evaluates the windows in the current process.
+        symbol (str, optional): Symbol of the history; with the timeframe, the indicator lines
+            are read from (and saved to) the feature store instead of being recomputed.
+        timeframe (str, optional): Timeframe of the history.
+
+    Returns:
+        Dict: 'windows' (one dict per window with dates, best params and scores), 'ts',
+        'oos_returns' and 'oos_equity' for the stitched out-of-sample period.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    combos = parameter_grid(fast_values, slow_values)
+    if not combos:
+        raise ValueError("No valid (fast, slow) combinations with fast < slow")
+    windows = walk_forward_windows(len(df), train_size, test_size, anchored)
+    if not windows:
+        raise ValueError(f"History too short ({len(df)} bars) for train_size={train_size}")
+
+    close = df['close'].to_numpy(dtype=float)
+    lengths = sorted({length for combo in combos for length in combo})
+    indicator = get_strategy_indicator(strategy)
+    if symbol and timeframe and indicator.__name__ in INDICATORS:
+        lines = get_feature_store().lines(symbol, timeframe, df['ts'].to_numpy(), close, indicator.__name__, lengths)
+    else:
+        lines = np.vstack([indicator(close, length) for length in lengths])
+    position = {length: i for i, length in enumerate(lengths)}
+    fast_idx = np.array([position[f] for f, _ in combos])
+    slow_idx = np.array([position[s] for _, s in combos])
+    costs = {'max_position_size': max_position_size, 'fee_pct': fee_pct, 'slippage_pct': slippage_pct}
+
+    if workers > 1 and len(windows) > 1:
+        # Workers map the arrays from shared memory instead of receiving a copy each
+        with SharedDatasetRegistry() as registry:
+            spec = registry.publish('walk_forward', {'close': close, 'lines': lines})
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_shared_worker,
+                                     initargs=(spec, fast_idx, slow_idx, costs)) as pool:
+                results = list(pool.map(_run_window, windows, [objective] * len(windows)))
+    else:
+        _init_worker(close, lines, fast_idx, slow_idx, costs)
+        results = [_run_window(window, objective) for window in windows]
+        _SHARED.clear()
+
+    ts = df['ts'].astype(str).to_numpy()
+    window_info = []
+    for (train_start, train_end, test_start, test_end), res in zip(windows, results):
+        fast, slow = combos[res['best']]
+        window_info.append({
+            'train_start': ts[train_start],
+            'train_end': ts[train_end - 1],
+            'test_start': ts[test_start],
+            'test_end': ts[test_end - 1],
+            'fast': fast,
+            'slow': slow,
+            'train_score': res['train_score'],
+            'test_return': float(np.prod(1 + res['test_returns']) - 1),
+        })
+    oos_returns = np.concatenate([res['test_returns'] for res in results])
+    return {
+        'windows': window_info,
+        'ts': ts[windows[0][2]:windows[-1][3]],
+        'oos_returns': oos_returns,
+        'oos_equity': initial_capital * np.cumprod(1 + oos_returns),
+    }
+
+def walk_forward_summary(result: Dict, initial_capital: float) -> Dict:
+    """Build the JSON summary of a walk-forward run."""
+    equity = result['oos_equity']
+    drawdown = equity - np.maximum.accumulate(equity)
+    return {
+        'windows': result['windows'],
+        'start_date': str(result['ts'][0]),
+        'end_date': str(result['ts'][-1]),
+        'initial_capital': initial_capital,
+        'final_equity': float(equity[-1]),
+        'total_profit': float(equity[-1] - initial_capital),
+        'max_drawdown': float(drawdown.min()),
+        'profitable_windows': int(sum(w['test_return'] > 0 for w in result['windows'])),
+    }
+
+if __name__ == "__main__":
+    import argparse
+    from src.serialization import write_json
+    import logging
+    from src.config import SYMBOL, TIMEFRAME, STRAT_PARAMS, RISK_PARAMS
+    from src.history_manager import HistoryManager
+
+    parser = argparse.ArgumentParser(description="Walk-forward optimization of fast/slow periods.")
+    parser.add_argument('--strategy', type=str, default='cross_sma')
+    parser.add_argument('--symbols', type=str, nargs='+', default=[SYMBOL])
+    parser.add_argument('--timeframe', type=str, default=TIMEFRAME)
+    parser.add_argument('--history', type=str, default=None, help='Fichero histórico (solo con un símbolo)')
+    parser.add_argument('--fast', type=int, nargs='+', default=[5, 10, 20])
+    parser.add_argument('--slow', type=int, nargs='+', default=[30, 50, 100])
+    parser.add_argument('--train', type=int, required=True, help='Velas por ventana de entrenamiento')
+    parser.add_argument('--test', type=int, required=True, help='Velas por ventana de test')
+    parser.add_argument('--anchored', action='store_true')
+    parser.add_argument('--objective', type=str, default='return', choices=OBJECTIVES)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--max_position_size', type=float, default=RISK_PARAMS.get('max_position_size', 1.0))
+    parser.add_argument('--fee_pct', type=float, default=RISK_PARAMS.get('fee_pct', 0.001))
+    parser.add_argument('--slippage_pct', type=float, default=RISK_PARAMS.get('slippage_pct', 0.0))
+    parser.add_argument('--initial_capital', type=float, default=RISK_PARAMS.get('initial_capital', 10000.0))
+    parser.add_argument('--output-dir', type=str, default=None, help='Directorio de salida para los resultados')
+    args = parser.parse_args()
+
+    strategy_dir = os.path.join(args.output_dir or os.path.join('data', 'strategies'), args.strategy)
+    os.makedirs(strategy_dir, exist_ok=True)
+    for symbol in args.symbols:
+        if args.history and len(args.symbols) == 1:
+            df = pd.read_csv(args.history, parse_dates=['ts'])
+        else:
+            df = HistoryManager.load_history(symbol, args.timeframe)
+        result = walk_forward(
+            df, args.strategy, args.fast, args.slow, args.train, args.test,
+            anchored=args.anchored, objective=args.objective,
+            max_position_size=args.max_position_size, fee_pct=args.fee_pct,
+            slippage_pct=args.slippage_pct, initial_capital=args.initial_capital,
+            workers=args.workers, symbol=symbol, timeframe=args.timeframe
+        )
+        summary = walk_forward_summary(result, args.initial_capital)
+        summary.update({'symbol': symbol, 'timeframe': args.timeframe, 'strategy': args.strategy,
+                        'objective': args.objective, 'train_size': args.train, 'test_size': args.test})
+        out_name = os.path.join(strategy_dir, f"walkforward_{symbol.replace('/', '-')}_{args.timeframe}.csv")
+        pd.DataFrame({'ts': result['ts'], 'returns': result['oos_returns'], 'equity': result['oos_equity']}).to_csv(out_name, index=False)
+        logging.info(f"Walk-forward equity saved to {out_name}")
+        write_json(out_name.replace('.csv', '_summary.json'), summary)
+        print(f"{symbol} {args.timeframe}: {len(result['windows'])} windows, "
+              f"out-of-sample profit {summary['total_profit']:.2f}")
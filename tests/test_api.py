@@ -306,3 +306,67 @@ def test_ping():
     response = client.get("/ping")
     assert response.status_code == 200
     assert response.json()["status"] == "ok"
+
+def sqlite_history(tmp_path, monkeypatch, backend="sqlite"):
+    """Store 1m candles in a temporary history (SQLite by default) and run from tmp_path."""
+    import numpy as np
+    import pandas as pd
+    import src.api as api
+    import src.history_manager as hm
+    from src.history_manager import HistoryManager
+    import shutil
+    shutil.copy("config.yaml", tmp_path / "config.yaml")
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "data" / "history").mkdir(parents=True)
+    monkeypatch.setattr(hm, "HISTORY_DIR", str(tmp_path / "data" / "history"))
+    monkeypatch.setattr(hm, "META_FILE", str(tmp_path / "data" / "history" / "history_meta.json"))
+    monkeypatch.setattr(api, "HISTORY_DIR", str(tmp_path / "data" / "history"))
+    monkeypatch.setattr(HistoryManager, "backend", backend)
+    monkeypatch.setattr(HistoryManager, "db_file", str(tmp_path / "history.db"))
+    monkeypatch.setattr(HistoryManager, "_store", None)
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, 3000)))
+    df = pd.DataFrame({"ts": pd.date_range("2025-06-01", periods=3000, freq="min"), "open": close,
+                       "high": close * 1.001, "low": close * 0.999, "close": close, "volume": 1.0})
+    HistoryManager.save_history("BTC/USDT", "1m", df)
+    return df
+
+def test_backtest_sqlite_backend(tmp_path, monkeypatch):
+    sqlite_history(tmp_path, monkeypatch)
+    body = {"strategy": "cross_sma", "symbol": "BTC/USDT", "timeframe": "1m", "filename": "history_BTC-USDT_1m.csv",
+            "start_date": "2025-06-01 10:00", "end_date": "2025-06-02"}
+    response = client.post("/api/backtest/", json=body)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["success"] and data["summary"]["total_trades"] > 0
+    assert data["summary"]["start_date"] == "2025-06-01 10:00:00"
+    assert not (tmp_path / "data" / "history" / "history_BTC-USDT_1m.csv").exists()
+    missing = client.post("/api/backtest/", json={**body, "symbol": "ETH/USDT"})
+    assert missing.status_code == 404
+
+def test_backtest_reuses_cached_history(tmp_path, monkeypatch):
+    from src.dataset_cache import get_dataset_cache
+    sqlite_history(tmp_path, monkeypatch, backend="csv")
+    cache = get_dataset_cache()
+    cache.clear()
+    body = {"strategy": "cross_sma", "symbol": "BTC/USDT", "timeframe": "1m", "filename": "history_BTC-USDT_1m.csv",
+            "start_date": "2025-06-01 10:00", "end_date": "2025-06-02"}
+    first = client.post("/api/backtest/", json=body).json()
+    before = cache.stats()
+    second = client.post("/api/backtest/", json=body).json()
+    after = cache.stats()
+    assert first["success"] and second["summary"]["trades"] == first["summary"]["trades"]
+    # La segunda petición sirve las velas de la caché sin releer el CSV
+    assert after["misses"] == before["misses"] and after["hits"] > before["hits"]
+
+def test_backtest_results_without_sqlite(tmp_path, monkeypatch):
+    import src.history_manager as hm
+    from src.history_manager import HistoryManager
+    monkeypatch.setattr(hm, "HISTORY_DIR", str(tmp_path))
+    monkeypatch.setattr(HistoryManager, "backend", "csv")
+    monkeypatch.setattr(HistoryManager, "db_file", None)
+    monkeypatch.setattr(HistoryManager, "_store", None)
+    assert client.get("/api/backtest/results").json() == {"success": True, "runs": []}
+    assert client.get("/api/backtest/results/1/trades").status_code == 404
+    assert not (tmp_path / "history.db").exists()
@@ -291,13 +291,27 @@ def test_backtest_script_main_empty_after_filter(monkeypatch, tmp_path):
         out_path = tmp_path / "cross_sma" / "backtest_BTC-USDT_1m.csv"
         assert out_path.exists()
         df_out = pd.read_csv(out_path)
-        # Debe tener una fila con todo NaN y signal None
-        assert len(df_out) == 1
-        assert df_out.iloc[0].isnull().all() or pd.isna(df_out.iloc[0]["ts"])
+        # Sin velas en el rango: solo la cabecera (con la columna signal)
+        assert len(df_out) == 0
         assert "signal" in df_out.columns
     finally:
         sys.argv = sys_argv
 
+@pytest.mark.parametrize("extra, message", [
+    (["--trnd", "40"], "unknown parameter --trnd"),
+    (["--trend", "abc"], "invalid numeric value"),
+])
+def test_backtest_script_rejects_bad_strategy_params(capsys, tmp_path, extra, message):
+    import sys
+    sys_argv = sys.argv
+    sys.argv = ["backtest.py", "--strategy", "ema_trend", "--history", str(tmp_path / "hist.csv"), *extra]
+    try:
+        with pytest.raises(SystemExit):
+            exec(open("src/backtest.py").read(), {"__name__": "__main__"})
+        assert message in capsys.readouterr().err
+    finally:
+        sys.argv = sys_argv
+
 def test_backtest_script_main_no_trades(monkeypatch, tmp_path):
     import sys
     import pandas as pd
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+import src.history_manager as hm
+from src.api import app
+from src.charts import OHLCPyramid, backtest_chart, lttb, to_ms
+from src.dataset_cache import get_dataset_cache
+from src.history_manager import HistoryManager
+
+client = TestClient(app)
+
+def _history(n=10000, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    return pd.DataFrame({'ts': pd.date_range('2025-01-01', periods=n, freq='min'), 'open': close - 0.1,
+                         'high': close + 0.3, 'low': close - 0.3, 'close': close, 'volume': 1.0})
+
+def test_lttb_keeps_ends_and_spikes():
+    x = np.arange(5000, dtype=float)
+    y = np.sin(x / 300)
+    y[1234] = 50.0
+    y[4321] = -50.0
+    kept = lttb(x, y, 200)
+    assert len(kept) == 200 and kept[0] == 0 and kept[-1] == 4999
+    assert np.all(np.diff(kept) > 0) and {1234, 4321} <= set(kept.tolist())
+    np.testing.assert_array_equal(lttb(x[:50], y[:50], 200), np.arange(50))
+
+def test_pyramid_levels_and_budget():
+    df = _history()
+    pyramid = OHLCPyramid({c: df[c].to_numpy() for c in df.columns})
+    full = pyramid.query(max_points=1000)
+    assert len(full['ts']) <= 1000 and full['candles_per_point'] == 16
+    # Level candles aggregate the base candles
+    groups = df.groupby(np.arange(len(df)) // 16)
+    np.testing.assert_allclose(full['high'], groups['high'].max().to_numpy())
+    np.testing.assert_allclose(full['low'], groups['low'].min().to_numpy())
+    np.testing.assert_allclose(full['close'], groups['close'].last().to_numpy())
+    np.testing.assert_allclose(full['volume'], groups['volume'].sum().to_numpy())
+    # A zoomed range is served at full resolution
+    zoom = pyramid.query(start='2025-01-02 00:00', end='2025-01-02 03:00', max_points=1000)
+    assert zoom['candles_per_point'] == 1 and len(zoom['ts']) == 181
+    assert zoom['ts'][0] == to_ms(np.datetime64('2025-01-02T00:00'))
+    assert len(pyramid.query(max_points=10)['ts']) <= 10
+
+def test_chart_endpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(hm, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(hm, 'META_FILE', str(tmp_path / 'history_meta.json'))
+    monkeypatch.setattr(HistoryManager, 'backend', 'csv')
+    HistoryManager.save_history('BTC/USDT', '1m', _history())
+    response = client.get('/api/chart/ohlcv', params={'symbol': 'BTC-USDT', 'timeframe': '1m', 'max_points': 500})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data['ts']) <= 500 and data['candles_per_point'] == 64
+    assert client.get('/api/chart/ohlcv', params={'symbol': 'ETH/USDT', 'timeframe': '1m'}).status_code == 404
+    assert client.get('/api/chart/backtest', params={'strategy': '../x', 'symbol': 'BTC/USDT', 'timeframe': '1m'}).status_code == 400
+    get_dataset_cache().clear()
+
+def test_backtest_chart(tmp_path):
+    df = _history(5000)
+    df['signal'] = np.where(np.arange(5000) % 7 == 0, 'BUY', np.where(np.arange(5000) % 7 == 3, 'SELL', 'HOLD'))
+    folder = tmp_path / 'cross_sma'
+    folder.mkdir()
+    df.to_csv(folder / 'backtest_BTC-USDT_1m.csv', index=False)
+    trades = pd.DataFrame({'exit_time': df['ts'].iloc[3::7], 'equity': 10000 + np.cumsum(np.random.default_rng(1).normal(0, 5, 714))})
+    trades.to_csv(folder / 'backtest_BTC-USDT_1m_trades.csv', index=False)
+    chart = backtest_chart('cross_sma', 'BTC/USDT', '1m', max_points=100, base_dir=str(tmp_path))
+    assert len(chart['signals']['ts']) == 100 and set(chart['signals']['signal']) == {'BUY', 'SELL'}
+    assert len(chart['equity']['ts']) == 100 and chart['equity']['values'][-1] == trades['equity'].iloc[-1]
+    assert max(chart['drawdown']['values']) == 0.0
+    ranged = backtest_chart('cross_sma', 'BTC/USDT', '1m', start='2025-01-01 01:00', end='2025-01-01 02:00',
+                            max_points=1000, base_dir=str(tmp_path))
+    assert len(ranged['signals']['ts']) == sum(1 for i in range(60, 121) if i % 7 in (0, 3))
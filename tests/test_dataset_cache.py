@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+import src.history_manager as hm
+from src.api import app
+from src.dataset_cache import DatasetCache, get_dataset_cache
+from src.history_manager import HistoryManager
+
+def candles(start, n, price=100.0):
+    ts = pd.date_range(start, periods=n, freq='min')
+    close = price + np.arange(n, dtype=float)
+    return pd.DataFrame({'ts': ts, 'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': 1.0})
+
+def arrays(n):
+    return {'ts': np.arange(n).astype('datetime64[m]'), 'close': np.ones(n)}
+
+@pytest.fixture
+def csv_history(tmp_path, monkeypatch):
+    monkeypatch.setattr(hm, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(hm, 'META_FILE', str(tmp_path / 'history_meta.json'))
+    monkeypatch.setattr(HistoryManager, 'backend', 'csv')
+    get_dataset_cache().clear()
+    yield tmp_path
+    get_dataset_cache().clear()
+
+def test_lru_eviction_within_budget():
+    loads = []
+
+    def loader(symbol, timeframe):
+        loads.append(symbol)
+        return arrays(100)   # 800 + 800 bytes
+
+    cache = DatasetCache(max_bytes=3500, loader=loader, signature=lambda s, tf: 0)
+    cache.get('A', '1m')
+    cache.get('B', '1m')
+    cache.get('A', '1m')            # A becomes the most recently used
+    cache.get('C', '1m')            # evicts B
+    assert loads == ['A', 'B', 'C']
+    stats = cache.stats()
+    assert stats['datasets'] == ['A 1m', 'C 1m']
+    assert stats['bytes'] == 3200 and stats['evictions'] == 1
+    assert (stats['hits'], stats['misses']) == (1, 3)
+    cache.get('B', '1m')
+    assert loads[-1] == 'B' and cache.stats()['datasets'] == ['C 1m', 'B 1m']
+
+def test_oversized_dataset_is_not_cached():
+    cache = DatasetCache(max_bytes=1000, loader=lambda s, tf: arrays(100), signature=lambda s, tf: 0)
+    data = cache.get('A', '1m')
+    assert len(data['close']) == 100 and not data['close'].flags.writeable
+    assert cache.stats()['bytes'] == 0 and cache.stats()['datasets'] == []
+
+def test_signature_change_reloads():
+    version = {'v': 1}
+    cache = DatasetCache(loader=lambda s, tf: arrays(version['v']), signature=lambda s, tf: version['v'])
+    assert len(cache.get('A', '1m')['ts']) == 1
+    version['v'] = 2
+    assert len(cache.get('A', '1m')['ts']) == 2
+    assert cache.stats()['misses'] == 2
+
+def test_history_writes_invalidate_cache(csv_history):
+    HistoryManager.save_history('BTC/USDT', '1m', candles('2025-01-01', 50))
+    first = HistoryManager.load_history('BTC/USDT', '1m')
+    cache = get_dataset_cache()
+    hits = cache.stats()['hits']
+    HistoryManager.load_history('BTC/USDT', '1m')
+    assert cache.stats()['hits'] == hits + 1
+    # Returned frames are private copies of the cached arrays
+    first.loc[0, 'close'] = -1.0
+    assert HistoryManager.load_arrays('BTC/USDT', '1m')['close'][0] == 100.0
+    HistoryManager.append_history('BTC/USDT', '1m', candles('2025-01-01 00:50', 10, price=150.0))
+    assert 'BTC/USDT 1m' not in cache.stats()['datasets']
+    df = HistoryManager.load_history('BTC/USDT', '1m')
+    assert len(df) == 60 and df['close'].iloc[-1] == 159.0
+    data = HistoryManager.load_range('BTC/USDT', '1m', start='2025-01-01 00:10', end='2025-01-01 00:19')
+    assert len(data['close']) == 10 and data['close'][0] == 110.0
+    HistoryManager.delete_history('BTC/USDT', '1m')
+    with pytest.raises(FileNotFoundError):
+        HistoryManager.load_history('BTC/USDT', '1m')
+
+def test_preload_skips_missing_and_stats_endpoint(csv_history):
+    HistoryManager.save_history('ETH/USDT', '5m', candles('2025-01-01', 20))
+    misses = get_dataset_cache().stats()['misses']
+    get_dataset_cache().preload([('ETH/USDT', '5m'), ('XRP/USDT', '1h')])
+    stats = TestClient(app).get('/api/history/cache').json()
+    assert stats['datasets'] == ['ETH/USDT 5m'] and stats['misses'] == misses + 2
+
+def test_process_cache_is_created_once(monkeypatch):
+    import threading
+    import time
+    import src.dataset_cache as dc
+    created = []
+
+    class SlowCache(DatasetCache):
+        def __init__(self, *args, **kwargs):
+            time.sleep(0.05)
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(dc, '_cache', None)
+    monkeypatch.setattr(dc, 'DatasetCache', SlowCache)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_dataset_cache())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Un único presupuesto de memoria y un único contador de aciertos para todo el proceso
+    assert len(created) == 1 and all(cache is created[0] for cache in results)
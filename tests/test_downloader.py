@@ -0,0 +1,133 @@
+import threading
+import time
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+import src.downloader as downloader
+import src.history_manager as hm
+from src.api import app
+from src.downloader import RateLimiter, download_batch, download_history_range, plan_missing_ranges, plan_pages
+from src.history_manager import HistoryManager
+from src.timeframes import align_to_candle, candle_offset
+
+EXCHANGE_END = pd.Timestamp('2024-03-01')
+
+class FakeExchange:
+    """Serves candles of any timeframe up to EXCHANGE_END and records the requests."""
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, symbol, timeframe, limit, since=None):
+        with self.lock:
+            self.calls.append((symbol, timeframe, limit, since))
+        ts = pd.date_range(since, periods=limit, freq=candle_offset(timeframe))
+        ts = ts[ts <= EXCHANGE_END]
+        close = [float(t.value // 10**9 % 997) for t in ts]
+        return pd.DataFrame({'ts': ts, 'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1.0})
+
+@pytest.fixture
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(hm, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(hm, 'META_FILE', str(tmp_path / 'history_meta.json'))
+    monkeypatch.setattr(HistoryManager, 'backend', 'csv')
+    return tmp_path
+
+def test_rate_limiter_waits_for_refill():
+    limiter = RateLimiter(weight_per_minute=600)
+    limiter.tokens = 0
+    start = time.monotonic()
+    limiter.acquire(3)
+    assert 0.25 < time.monotonic() - start < 1.0
+
+def test_plan_missing_ranges():
+    start, end = pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-10')
+    # No local data: the whole range is fetched once
+    assert plan_missing_ranges(None, start, end, '1h') == {'ranges': {'posterior': (start, end)}}
+    meta = {'min_date': '2024-01-05T00:00:00', 'max_date': '2024-01-08T00:00:00'}
+    ranges = plan_missing_ranges(meta, start, end, '1h')['ranges']
+    assert ranges == {'anterior': (start, pd.Timestamp('2024-01-04 23:00')),
+                      'posterior': (pd.Timestamp('2024-01-08 01:00'), end)}
+    # Inside the stored range: nothing to fetch
+    assert plan_missing_ranges(meta, pd.Timestamp('2024-01-06'), pd.Timestamp('2024-01-07'), '1h') == {'ranges': {}}
+    # A request past the stored range is filled from its edge, so it leaves no gap
+    late = (pd.Timestamp('2024-01-09'), pd.Timestamp('2024-01-12'))
+    assert plan_missing_ranges(meta, *late, '1h')['ranges'] == {
+        'posterior': (pd.Timestamp('2024-01-08 01:00'), late[1])}
+    early = (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-03'))
+    assert plan_missing_ranges(meta, *early, '1d')['ranges'] == {'anterior': (early[0], pd.Timestamp('2024-01-04'))}
+    # Less than one candle beyond the stored range (and not inside it) is rejected
+    partial = (pd.Timestamp('2024-01-04 23:30'), pd.Timestamp('2024-01-06'))
+    gap = plan_missing_ranges(meta, *partial, '1h')
+    assert gap['error']['force_extend_param'] and gap['error']['suggested_start_date'] == '2024-01-04T23:30:00'
+
+@pytest.mark.parametrize('timeframe, start, end, pages', [
+    ('1m', '2024-01-01 00:00:30', '2024-01-01 23:59', [('2024-01-01 00:01', 1000), ('2024-01-01 16:41', 439)]),
+    ('5m', '2024-01-01', '2024-01-01 01:00', [('2024-01-01', 13)]),
+    ('1h', '2024-01-01', '2024-03-01', [('2024-01-01', 1000), ('2024-02-11 16:00', 441)]),
+    ('1d', '2020-01-01', '2024-01-01', [('2020-01-01', 1000), ('2022-09-27', 462)]),
+    ('1w', '2024-01-03', '2024-02-01', [('2024-01-08', 4)]),
+    ('1M', '2023-12-15', '2024-06-01', [('2024-01-01', 6)]),
+])
+def test_plan_pages_counts_real_candles(timeframe, start, end, pages):
+    assert plan_pages(pd.Timestamp(start), pd.Timestamp(end), timeframe) == [(pd.Timestamp(s), n) for s, n in pages]
+    assert plan_pages(pd.Timestamp(end) + pd.Timedelta(seconds=1), pd.Timestamp(end), timeframe) == []
+
+@pytest.mark.parametrize('timeframe, start, end', [
+    ('1m', '2024-01-01', '2024-01-03'), ('1h', '2023-06-01', '2024-01-01'), ('1d', '2020-01-01', '2024-01-01')])
+def test_fetch_range_makes_exactly_the_planned_requests(history_dir, timeframe, start, end):
+    fetch = FakeExchange()
+    result = download_history_range('BTC/USDT', timeframe, start, end, fetch=fetch, limiter=RateLimiter(10**6))
+    df = HistoryManager.load_history('BTC/USDT', timeframe)
+    expected = pd.date_range(start, end, freq=candle_offset(timeframe))
+    assert df['ts'].tolist() == list(expected)
+    assert len(fetch.calls) == result['posterior_total_pages'] == result['posterior_completed_pages'] == -(-len(expected) // 1000)
+    assert all(since == align_to_candle(since, timeframe) for _, _, _, since in fetch.calls)
+
+def test_download_history_range_extends_and_stores(history_dir):
+    fetch = FakeExchange()
+    result = download_history_range('BTC-USDT', '5m', '2024-01-01', '2024-01-02', fetch=fetch, limiter=RateLimiter(10**6))
+    assert result['success'] and result['min_date'] == '2024-01-01T00:00:00'
+    assert result['max_date'] == '2024-01-02T00:00:00'
+    result = download_history_range('BTC/USDT', '5m', '2024-01-01 12:00', '2024-01-03T00:00:00Z', fetch=fetch, limiter=RateLimiter(10**6))
+    assert result['success'] and result['max_date'] == '2024-01-03T00:00:00'
+    df = HistoryManager.load_history('BTC/USDT', '5m')
+    assert len(df) == 2 * 288 + 1 and df['ts'].diff().dropna().eq(pd.Timedelta(minutes=5)).all()
+    result = download_history_range('BTC/USDT', '5m', '2024-01-01', '2024-01-02', fetch=fetch)
+    assert not result['success'] and 'no new data' in result['error'].lower()
+
+def test_download_batch_merges_pairs_and_shares_limiter(history_dir, monkeypatch):
+    fetch = FakeExchange()
+    saves = []
+    save_history = HistoryManager.save_history
+    monkeypatch.setattr(HistoryManager, 'save_history', lambda s, t, df: saves.append((s, t)) or save_history(s, t, df))
+
+    class CountingLimiter(RateLimiter):
+        acquired = 0
+        def acquire(self, weight=downloader.REQUEST_WEIGHT):
+            CountingLimiter.acquired += 1
+            super().acquire(weight)
+
+    items = [
+        {'symbol': 'BTC/USDT', 'timeframe': '5m', 'start_date': '2024-01-01', 'end_date': '2024-01-02'},
+        {'symbol': 'BTC-USDT', 'timeframe': '5m', 'start_date': '2024-01-02', 'end_date': '2024-01-05'},
+        {'symbol': 'ETH/USDT', 'timeframe': '5m', 'start_date': '2024-02-01', 'end_date': '2024-02-02'},
+    ]
+    results = download_batch(items, max_workers=2, fetch=fetch, limiter=CountingLimiter(10**6))
+    assert [(r['symbol'], r['success']) for r in results] == [('BTC/USDT', True), ('ETH/USDT', True)]
+    assert results[0]['min_date'] == '2024-01-01T00:00:00' and results[0]['max_date'] == '2024-01-05T00:00:00'
+    assert sorted(saves) == [('BTC/USDT', '5m'), ('ETH/USDT', '5m')]
+    assert CountingLimiter.acquired == len(fetch.calls)
+
+def test_batch_download_endpoint(monkeypatch):
+    calls = []
+    monkeypatch.setattr(downloader, 'download_history_range',
+                        lambda *a: calls.append(a) or {'success': a[0] != 'BAD/USDT'})
+    client = TestClient(app)
+    body = {'items': [{'symbol': 'BTC/USDT', 'timeframe': '1h', 'start_date': '2024-01-01', 'end_date': '2024-02-01'},
+                      {'symbol': 'BAD/USDT', 'timeframe': '1h', 'start_date': '2024-01-01', 'end_date': '2024-02-01'}]}
+    data = client.post('/api/history/download/batch', json=body).json()
+    assert not data['success']
+    assert [r['success'] for r in data['results']] == [True, False]
+    assert len(calls) == 2
+    assert not client.post('/api/history/download/batch', json={'items': []}).json()['success']
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.backtest import run_strategy
+from src.expressions import RuleStrategy, parse, rules_spec
+from src.signals import cross_ema_signals, cross_sma_signals
+from src.strategies import get_spec, register
+
+EMA_CROSS = ('cross_over(ema(close, fast), ema(close, slow))', 'cross_under(ema(close, fast), ema(close, slow))')
+
+def _close(n=1500, seed=3):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 1, n))
+
+def test_rules_match_vectorized_crossovers():
+    close = _close()
+    ema_rules = RuleStrategy(*EMA_CROSS)
+    np.testing.assert_array_equal(ema_rules(close, fast=5, slow=20), cross_ema_signals(close, fast=5, slow=20))
+    sma_rules = RuleStrategy('cross_over(sma(close, fast), sma(close, slow))',
+                             'cross_under(sma(close, fast), sma(close, slow))', {'fast': 10, 'slow': 50})
+    np.testing.assert_array_equal(sma_rules(close), cross_sma_signals(close, fast=10, slow=50))
+    # Time x symbol arrays are evaluated in the same pass
+    panel = np.column_stack([close, _close(seed=4)])
+    codes = ema_rules(panel, fast=5, slow=20)
+    np.testing.assert_array_equal(codes[:, 1], cross_ema_signals(panel[:, 1], fast=5, slow=20))
+
+def test_common_subexpressions_are_shared():
+    rules = RuleStrategy(*EMA_CROSS, {'fast': 10, 'slow': 50})
+    compiled = rules.compile()
+    # close, 2 EMAs, cross_over, cross_under
+    assert len(compiled.graph.nodes) == 5
+    assert rules.compile() is compiled and rules.compile(slow=60) is not compiled
+    # A parameter and the literal with its value are the same node
+    same = RuleStrategy('ema(close, fast) > ema(close, 10)', 'close < 0', {'fast': 10}).compile()
+    buy = same.graph.nodes[same.outputs['buy']]
+    assert buy[1][0] == buy[1][1]
+
+def test_logic_and_thresholds():
+    close = _close(300)
+    rules = RuleStrategy('close > sma(close, n) AND NOT close > limit', 'close < prev(close) or close >= limit',
+                         {'n': 20, 'limit': 105})
+    avg = pd.Series(close).rolling(20).mean().to_numpy()
+    prev = np.concatenate([[np.nan], close[:-1]])
+    buy = (close > avg) & ~(close > 105)
+    sell = (close < prev) | (close >= 105)
+    expected = np.where(buy & ~sell, 1, np.where(sell & ~buy, -1, 0))
+    np.testing.assert_array_equal(rules(close), expected)
+    assert rules.lookback({'n': 20, 'limit': 105}) == 19
+    assert RuleStrategy(*EMA_CROSS).lookback({'fast': 5, 'slow': 20}) == 60
+
+@pytest.mark.parametrize('text', ['close.real > 1', '__import__("os")', 'foo(close)', 'sma(close) > 1',
+                                  'close >', '"a" > close'])
+def test_invalid_expressions(text):
+    with pytest.raises(ValueError):
+        RuleStrategy(text, 'close < 0')
+
+@pytest.mark.parametrize('text', ['close > unknown', 'sma(close, 2.5) > 1', 'ema(close, n) > 1'])
+def test_invalid_parameters(text):
+    # Names and windows are resolved when the rules are compiled for a parameter set
+    rules = RuleStrategy(text, 'close < 0', {'n': 0})
+    with pytest.raises(ValueError):
+        rules(_close(50))
+
+def test_parse_accepts_uppercase_logic():
+    assert parse('close > 1 AND close < 2 OR NOT close > 3') is not None
+
+def test_rules_spec_uses_extra_series():
+    spec = register(rules_spec('test_breakout', {
+        'params': {'n': 5},
+        'rules': {'buy': 'close > prev(highest(high, n))', 'sell': 'close < prev(lowest(low, n))'}}))
+    assert get_spec('test_breakout') is spec
+    assert spec.inputs == ('high', 'low', 'close') and spec.warmup() == 5 and spec.fastest() == 'vectorized'
+    close = _close(200)
+    df = pd.DataFrame({'ts': pd.date_range('2025-01-01', periods=200, freq='h'), 'open': close,
+                       'high': close + 0.5, 'low': close - 0.5, 'close': close, 'volume': 1.0})
+    result = run_strategy(df, 'test_breakout')
+    high = df['high'].rolling(5).max().shift(1)
+    low = df['low'].rolling(5).min().shift(1)
+    assert (result['signal'] == 'BUY').sum() == (df['close'] > high).sum()
+    assert (result['signal'] == 'SELL').sum() == (df['close'] < low).sum()
+    with pytest.raises(ValueError):
+        spec.load('vectorized')(close, n=5)
+
+def test_config_rules_strategy_is_discovered():
+    spec = get_spec('ema_trend')
+    assert spec.provides('vectorized') and spec.warmup() == 78 and spec.timeframes == ('1h',)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.feature_store import FeatureStore
+from src.indicators import ema, sma
+from src.walk_forward import walk_forward
+
+def _series(n=2000, seed=7):
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range('2025-01-01', periods=n, freq='min').to_numpy()
+    return ts, 100 + np.cumsum(rng.normal(0, 1, n))
+
+def test_lines_are_saved_and_memory_mapped(tmp_path):
+    ts, close = _series()
+    store = FeatureStore(str(tmp_path))
+    first = store.get('BTC/USDT', '1m', ts, close, 'ema', 20)
+    np.testing.assert_array_equal(first, ema(close, 20))
+    again = FeatureStore(str(tmp_path)).get('BTC/USDT', '1m', ts, close, 'ema', 20)
+    assert isinstance(again, np.memmap) and not again.flags.writeable
+    np.testing.assert_array_equal(again, first)
+    assert store.stats()['computes'] == 1
+    # A prefix of the history is served from the same file
+    np.testing.assert_array_equal(store.get('BTC/USDT', '1m', ts[:500], close[:500], 'ema', 20), first[:500])
+    assert store.hits == 1
+
+@pytest.mark.parametrize('indicator, func', [('sma', sma), ('ema', ema)])
+def test_extended_history_only_appends(tmp_path, indicator, func):
+    ts, close = _series()
+    store = FeatureStore(str(tmp_path))
+    for end in (5, 700, 701, 1500, 2000):
+        line = store.get('BTC/USDT', '1m', ts[:end], close[:end], indicator, 30)
+        np.testing.assert_allclose(line, func(close[:end], 30), rtol=1e-12)
+        assert np.array_equal(np.isnan(line), np.isnan(func(close[:end], 30)))
+    assert store.appends >= 3 and store.computes <= 2
+
+def test_rewritten_history_is_recomputed(tmp_path):
+    ts, close = _series()
+    store = FeatureStore(str(tmp_path))
+    store.get('BTC/USDT', '1m', ts, close, 'sma', 10)
+    changed = close.copy()
+    changed[100] += 1
+    np.testing.assert_array_equal(store.get('BTC/USDT', '1m', ts, changed, 'sma', 10), sma(changed, 10))
+    # Another start is another series
+    np.testing.assert_array_equal(store.get('BTC/USDT', '1m', ts[10:], close[10:], 'sma', 10), sma(close[10:], 10))
+    assert store.computes == 3
+    store.clear('BTC/USDT', '1m')
+    assert not (tmp_path / 'BTC-USDT_1m').exists()
+    with pytest.raises(ValueError):
+        store.get('BTC/USDT', '1m', ts, close, 'rsi', 14)
+
+def test_walk_forward_reads_lines_from_store(tmp_path, monkeypatch):
+    import src.walk_forward as wf
+    store = FeatureStore(str(tmp_path))
+    monkeypatch.setattr(wf, 'get_feature_store', lambda: store)
+    ts, close = _series(1200)
+    df = pd.DataFrame({'ts': ts, 'close': close})
+    kwargs = dict(train_size=300, test_size=150)
+    plain = walk_forward(df, 'cross_ema', [3, 5], [10, 20], **kwargs)
+    stored = walk_forward(df, 'cross_ema', [3, 5], [10, 20], symbol='BTC/USDT', timeframe='1m', **kwargs)
+    again = walk_forward(df, 'cross_ema', [3, 5], [10, 20], symbol='BTC/USDT', timeframe='1m', **kwargs)
+    np.testing.assert_array_equal(stored['oos_returns'], plain['oos_returns'])
+    np.testing.assert_array_equal(again['oos_returns'], plain['oos_returns'])
+    assert store.computes == 4 and store.hits == 4
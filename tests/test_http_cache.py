@@ -0,0 +1,72 @@
+import os
+import pytest
+from fastapi.testclient import TestClient
+import src.history_manager as hm
+from src.api import app
+from src.history_manager import HistoryManager
+from src.http_cache import REVALIDATE, content_etag, file_etag
+from src.serialization import write_json
+
+client = TestClient(app)
+
+@pytest.fixture
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(hm, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(hm, 'META_FILE', str(tmp_path / 'history_meta.json'))
+    monkeypatch.setattr(HistoryManager, 'backend', 'sqlite')
+    monkeypatch.setattr(HistoryManager, 'db_file', str(tmp_path / 'history.db'))
+    monkeypatch.setattr(HistoryManager, '_store', None)
+    return tmp_path
+
+def test_etags(tmp_path):
+    path = tmp_path / 'a.json'
+    assert file_etag([str(path)]) is None
+    path.write_text('{}')
+    etag = file_etag([str(path)])
+    assert etag.startswith('W/"') and etag == file_etag([str(path)])
+    os.utime(path, ns=(0, 10 ** 9))
+    assert file_etag([str(path)]) != etag
+    assert content_etag(b'{}') == content_etag(b'{}') != content_etag(b'[]')
+
+def test_history_meta_revalidation(history_dir):
+    HistoryManager.save_meta({'BTC/USDT': {'1m': {'min_date': '2025-01-01', 'max_date': '2025-01-02'}}})
+    first = client.get('/api/history/meta')
+    assert first.status_code == 200 and first.headers['cache-control'] == 'no-cache'
+    etag, modified = first.headers['etag'], first.headers['last-modified']
+    unchanged = client.get('/api/history/list', headers={'If-None-Match': etag})
+    assert unchanged.status_code == 304 and unchanged.content == b''
+    assert client.get('/api/history/meta', headers={'If-Modified-Since': modified}).status_code == 304
+    HistoryManager.save_meta({'ETH/USDT': {}})
+    os.utime(hm.META_FILE, ns=(0, 10 ** 9))
+    changed = client.get('/api/history/meta', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.json() == {'ETH/USDT': {}}
+
+def test_summary_endpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert client.get('/api/summary/cross_sma').status_code == 404
+    assert client.get('/api/summary/.hidden').status_code == 400
+    folder = tmp_path / 'data' / 'strategies' / 'cross_sma'
+    folder.mkdir(parents=True)
+    write_json(str(folder / 'backtest_BTC-USDT_1m_summary.json'), {'total_profit': 1.5})
+    response = client.get('/api/summary/cross_sma', params={'symbol': 'BTC/USDT', 'timeframe': '1m'})
+    assert response.status_code == 200 and response.json() == {'total_profit': 1.5}
+    again = client.get('/api/summary/cross_sma', headers={'If-None-Match': response.headers['etag']})
+    assert again.status_code == 304
+
+def test_stored_run_trades_are_revalidated(history_dir, monkeypatch):
+    run_id = HistoryManager.get_store().save_backtest('cross_sma', 'BTC/USDT', '1m', {'fast': 10}, {'total_profit': 1.5},
+                                                      trades=[{'profit': 1.0}, {'profit': 0.5}])
+    response = client.get(f'/api/backtest/results/{run_id}/trades')
+    assert response.status_code == 200 and response.headers['cache-control'] == REVALIDATE
+    assert [t['profit'] for t in response.json()['trades']] == [1.0, 0.5]
+    assert client.get(f'/api/backtest/results/{run_id}/trades',
+                      headers={'If-None-Match': response.headers['etag']}).status_code == 304
+    assert client.get(f'/api/backtest/results/{run_id + 1}/trades').status_code == 404
+    listing = client.get('/api/backtest/results')
+    assert client.get('/api/backtest/results', headers={'If-None-Match': listing.headers['etag']}).status_code == 304
+    # Una base de datos nueva reutiliza el id: la copia anterior del cliente deja de validar
+    monkeypatch.setattr(HistoryManager, 'db_file', str(history_dir / 'new.db'))
+    assert HistoryManager.get_store().save_backtest('cross_sma', 'BTC/USDT', '1m', {'fast': 20}, {'total_profit': -2.0},
+                                                    trades=[{'profit': -2.0}]) == run_id
+    fresh = client.get(f'/api/backtest/results/{run_id}/trades', headers={'If-None-Match': response.headers['etag']})
+    assert fresh.status_code == 200 and [t['profit'] for t in fresh.json()['trades']] == [-2.0]
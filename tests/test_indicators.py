@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.indicators import sma, ema, crossover, ChunkedSMA, ChunkedEMA
+from src.signals import cross_sma_signals, codes_to_labels, position_state, get_vectorized_strategy, get_chunked_strategy
+
+def test_sma_matches_rolling_mean():
+    close = np.arange(1, 11, dtype=float)
+    result = sma(close, 3)
+    assert np.isnan(result[:2]).all()
+    assert result[2:].tolist() == pytest.approx([2, 3, 4, 5, 6, 7, 8, 9])
+
+def test_sma_short_series_is_nan():
+    assert np.isnan(sma(np.array([1.0, 2.0]), 5)).all()
+
+def test_ema_seeded_with_sma():
+    close = np.array([1, 2, 3, 4, 5], dtype=float)
+    result = ema(close, 3)
+    alpha = 2 / 4
+    expected_3 = 2.0
+    expected_4 = alpha * 4 + (1 - alpha) * expected_3
+    assert np.isnan(result[:2]).all()
+    assert result[2] == pytest.approx(expected_3)
+    assert result[3] == pytest.approx(expected_4)
+
+def test_ema_2d_matches_columns_with_late_start():
+    a = np.linspace(100, 120, 30)
+    b = np.concatenate([np.full(10, np.nan), np.linspace(50, 40, 20)])
+    panel = ema(np.column_stack([a, b]), 5)
+    assert panel[:, 0] == pytest.approx(ema(a, 5), nan_ok=True)
+    assert panel[10:, 1] == pytest.approx(ema(b[10:], 5), nan_ok=True)
+
+def test_crossover_codes():
+    fast = np.array([1, 1, 4, 6, 4, np.nan])
+    slow = np.array([5, 5, 5, 5, 5, 5])
+    assert crossover(fast, slow).tolist() == [0, 0, 0, 1, -1, 0]
+
+def test_codes_to_labels_first_bar_has_no_signal():
+    labels = codes_to_labels(np.array([1, 1, 0, -1], dtype=np.int8))
+    assert labels.tolist() == [None, "BUY", "HOLD", "SELL"]
+
+def test_position_state_2d():
+    codes = np.array([[0, 1], [1, 0], [1, -1], [-1, 0]], dtype=np.int8)
+    assert position_state(codes).tolist() == [[0, 1], [1, 1], [1, 0], [0, 0]]
+
+def test_cross_sma_signals_2d_equals_1d():
+    rng = np.random.default_rng(1)
+    close = 100 + np.cumsum(rng.normal(size=(200, 3)), axis=0)
+    codes = cross_sma_signals(close, 5, 20)
+    for col in range(3):
+        assert (codes[:, col] == cross_sma_signals(close[:, col], 5, 20)).all()
+
+def test_get_vectorized_strategy_invalid():
+    with pytest.raises(ValueError) as exc:
+        get_vectorized_strategy("not_a_strategy")
+    assert "Unknown strategy" in str(exc.value)
+
+def test_chunked_indicators_continue_the_series():
+    rng = np.random.default_rng(2)
+    close = 100 + np.cumsum(rng.normal(size=500))
+    for chunked, full in ((ChunkedEMA(20), ema(close, 20)), (ChunkedSMA(20), sma(close, 20))):
+        parts = np.concatenate([chunked.update(close[i:i + 13]) for i in range(0, len(close), 13)])
+        assert parts == pytest.approx(full, nan_ok=True)
+    codes = get_chunked_strategy("cross_ema", 5, 20)
+    streamed = np.concatenate([codes.update(close[i:i + 7]) for i in range(0, len(close), 7)])
+    assert (streamed == get_vectorized_strategy("cross_ema")(close, 5, 20)).all()
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import pandas as pd
+import pytest
+from aiohttp import web
+import src.history_manager as hm
+from src.history_manager import HistoryManager
+from src.ingestor import KlineIngestor, append_history, parse_kline, stream_name
+from src.market_data import MarketDataHub
+
+@pytest.fixture
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(hm, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(hm, 'META_FILE', str(tmp_path / 'history_meta.json'))
+    return tmp_path
+
+def candle(ts, price=100.0):
+    return {'ts': ts, 'open': price, 'high': price + 1, 'low': price - 1, 'close': price, 'volume': 2.0}
+
+def kline_message(symbol, timeframe, ts, closed=True, price=100.0):
+    return {'stream': stream_name(symbol, timeframe), 'data': {'e': 'kline', 'k': {
+        't': int(ts.timestamp() * 1000), 'o': str(price), 'h': str(price + 1), 'l': str(price - 1),
+        'c': str(price), 'v': '2.0', 'x': closed, 'i': timeframe}}}
+
+def test_parse_kline_only_returns_closed_candles():
+    ts = pd.Timestamp('2025-01-01 00:01')
+    name, bar = parse_kline(kline_message('BTC/USDT', '1m', ts))
+    assert name == 'btcusdt@kline_1m'
+    assert bar == candle(ts)
+    assert parse_kline(kline_message('BTC/USDT', '1m', ts, closed=False)) == (None, None)
+    assert parse_kline({'result': None, 'id': 1}) == (None, None)
+
+def test_append_history_appends_and_updates_meta(history_dir):
+    start = pd.Timestamp('2025-01-01')
+    append_history('BTC/USDT', '1m', [candle(start), candle(start + pd.Timedelta(minutes=1))])
+    append_history('BTC/USDT', '1m', [candle(start + pd.Timedelta(minutes=2))])
+    df = HistoryManager.load_history('BTC/USDT', '1m')
+    assert len(df) == 3
+    meta = HistoryManager.get_meta('BTC/USDT', '1m')
+    assert meta['min_date'] == start.isoformat()
+    assert meta['max_date'] == (start + pd.Timedelta(minutes=2)).isoformat()
+    assert meta['filename'] == 'history_BTC-USDT_1m.csv'
+
+def test_append_history_skips_stored_candles(history_dir):
+    start = pd.Timestamp('2025-01-01')
+    append_history('BTC/USDT', '1m', [candle(start + pd.Timedelta(minutes=m)) for m in range(3)])
+    # Velas solapadas o antiguas no se duplican ni hacen retroceder max_date
+    assert append_history('BTC/USDT', '1m', [candle(start + pd.Timedelta(minutes=m), 2.0) for m in (1, 2, 3)]) == 1
+    assert append_history('BTC/USDT', '1m', [candle(start)]) == 0
+    df = HistoryManager.load_history('BTC/USDT', '1m')
+    assert df['ts'].tolist() == list(pd.date_range(start, periods=4, freq='min'))
+    assert HistoryManager.get_meta('BTC/USDT', '1m')['max_date'] == (start + pd.Timedelta(minutes=3)).isoformat()
+
+def test_ingestor_gap_fills_streams_and_reconnects(history_dir):
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None).floor('min')
+    stored = [candle(now - pd.Timedelta(minutes=m)) for m in range(10, 5, -1)]
+    append_history('BTC/USDT', '1m', stored)
+    fetch_calls = []
+
+    def fake_fetch(symbol, timeframe, limit, since=None):
+        fetch_calls.append((symbol, limit, since))
+        ts = pd.date_range(since, now, freq='min')
+        return pd.DataFrame([candle(t, 101.0) for t in ts])
+
+    live = [now + pd.Timedelta(minutes=m) for m in range(4)]
+    connections = []
+
+    async def ws_handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connections.append(request.query['streams'])
+        # Second connection resends the last candle of the first one
+        batch = live[:2] if len(connections) == 1 else live[1:]
+        await ws.send_str(json.dumps(kline_message('ETH/USDT', '5m', now, closed=False)))
+        for ts in batch:
+            await ws.send_str(json.dumps(kline_message('BTC/USDT', '1m', ts, price=102.0)))
+        await ws.close()
+        return ws
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/stream', ws_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        hub = MarketDataHub(lambda *a: None)
+        ingestor = KlineIngestor([('BTC/USDT', '1m'), ('ETH/USDT', '5m')], url=f'http://127.0.0.1:{port}/stream',
+                                 fetch=fake_fetch, hub=hub, reconnect_delay=0.01)
+        try:
+            await ingestor.run(max_connections=2)
+        finally:
+            await runner.cleanup()
+        return ingestor
+
+    ingestor = asyncio.run(asyncio.wait_for(main(), timeout=10))
+    assert connections == ['btcusdt@kline_1m/ethusdt@kline_5m'] * 2
+    # Gap-fill asks only for the closed candles after the last stored one
+    assert fetch_calls[0] == ('BTC/USDT', 5, now - pd.Timedelta(minutes=5))
+    df = HistoryManager.load_history('BTC/USDT', '1m')
+    expected = pd.date_range(now - pd.Timedelta(minutes=10), live[-1], freq='min')
+    assert df['ts'].tolist() == list(expected)
+    assert df['close'].tolist() == [100.0] * 5 + [101.0] * 5 + [102.0] * 4
+    assert HistoryManager.get_meta('BTC/USDT', '1m')['max_date'] == live[-1].isoformat()
+    # No history and no closed candles for ETH/USDT: nothing is written
+    assert HistoryManager.get_meta('ETH/USDT', '5m') is None
+    assert ingestor.written == 9
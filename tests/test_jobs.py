@@ -0,0 +1,159 @@
+import json
+import threading
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+import src.collector as collector
+import src.history_manager as hm
+import src.jobs as jobs
+import src.scheduler as scheduler
+from src.api import app
+from src.downloader import download_history_range
+from src.history_manager import HistoryManager
+from src.jobs import JobManager, get_job_manager
+from src.scheduler import Scheduler
+
+RANGE = ('2024-01-01', '2024-01-05')   # 5761 velas de 1m: 6 páginas
+
+class FlakyExchange:
+    """Serves 1m candles; fails (or blocks) once on a given page."""
+    def __init__(self, fail_on=None, block_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self.block_on = block_on
+        self.blocked = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, symbol, timeframe, limit, since=None):
+        self.calls.append(since)
+        page = len(self.calls)
+        if page == self.fail_on:
+            raise ConnectionError('network blip')
+        if page == self.block_on:
+            self.blocked.set()
+            self.release.wait(5)
+        ts = pd.date_range(since, periods=limit, freq='min')
+        return pd.DataFrame({'ts': ts, 'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 1.0})
+
+@pytest.fixture
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(hm, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(hm, 'META_FILE', str(tmp_path / 'history_meta.json'))
+    monkeypatch.setattr(HistoryManager, 'backend', 'csv')
+    monkeypatch.setattr(scheduler, '_scheduler', Scheduler())
+    return tmp_path
+
+def test_failed_download_keeps_fetched_pages(history_dir):
+    exchange = FlakyExchange(fail_on=6)
+    checkpoint = str(history_dir / 'pages')
+    result = download_history_range('BTC/USDT', '1m', *RANGE, fetch=exchange, checkpoint=checkpoint)
+    assert not result['success'] and result['posterior_completed_pages'] == 5
+    result = download_history_range('BTC/USDT', '1m', *RANGE, fetch=exchange, checkpoint=checkpoint)
+    assert result['success'] and result['posterior_completed_pages'] == 6
+    # Tras el fallo solo se vuelve a pedir la página que faltaba
+    assert len(exchange.calls) == 7
+    assert len(HistoryManager.load_history('BTC/USDT', '1m')) == 5761
+
+def test_cancel_and_resume_download_job(history_dir, monkeypatch):
+    exchange = FlakyExchange(block_on=3)
+    monkeypatch.setattr(collector, 'fetch_ohlcv', exchange)
+    manager = JobManager(str(history_dir / 'jobs'))
+    job = manager.submit('download', {'symbol': 'BTC/USDT', 'timeframe': '1m', 'start_date': RANGE[0], 'end_date': RANGE[1]})
+    assert exchange.blocked.wait(5)
+    manager.cancel(job.id)
+    exchange.release.set()
+    assert manager.wait(job.id, 5).status == 'cancelled'
+    assert job.progress['completed_pages'] == 3
+    with pytest.raises(ValueError):
+        manager.cancel(job.id)
+    manager.resume(job.id)
+    assert manager.wait(job.id, 5).status == 'done'
+    assert job.progress['reused_pages'] == 3 and len(exchange.calls) == 6
+    assert not (history_dir / 'jobs' / job.id / 'pages').exists()
+    saved = json.loads((history_dir / 'jobs' / job.id / 'job.json').read_text())
+    assert saved['status'] == 'done' and saved['result']['success']
+
+def test_cancelled_job_can_be_resumed_immediately(history_dir, monkeypatch):
+    exchange = FlakyExchange(block_on=2)
+    monkeypatch.setattr(collector, 'fetch_ohlcv', exchange)
+    manager = JobManager(str(history_dir / 'jobs'))
+    # El estado final solo se publica cuando el hilo ya no figura como activo
+    published = []
+    set_state = jobs.Job.set
+    def record(job, **fields):
+        if fields.get('status') in jobs.RESUMABLE:
+            published.append(job.id in manager.threads)
+        set_state(job, **fields)
+    monkeypatch.setattr(jobs.Job, 'set', record)
+    job = manager.submit('download', {'symbol': 'BTC/USDT', 'timeframe': '1m', 'start_date': RANGE[0], 'end_date': RANGE[1]})
+    assert exchange.blocked.wait(5)
+    manager.cancel(job.id)
+    exchange.release.set()
+    while job.status != 'cancelled':
+        threading.Event().wait(0.01)
+    manager.resume(job.id)
+    assert published == [False]
+    assert manager.wait(job.id, 5).status == 'done'
+
+def test_interrupted_jobs_are_recovered(history_dir, monkeypatch):
+    monkeypatch.setattr(collector, 'fetch_ohlcv', FlakyExchange())
+    folder = history_dir / 'jobs' / 'abc'
+    folder.mkdir(parents=True)
+    state = {'id': 'abc', 'kind': 'download', 'status': 'running', 'progress': {'completed_pages': 2},
+             'params': {'symbol': 'BTC/USDT', 'timeframe': '1m', 'start_date': RANGE[0], 'end_date': RANGE[1]}}
+    (folder / 'job.json').write_text(json.dumps(state))
+    manager = JobManager(str(history_dir / 'jobs'))
+    assert manager.get('abc').status == 'interrupted'
+    assert manager.resume_interrupted() == ['abc']
+    assert manager.wait('abc', 5).status == 'done'
+
+def test_submit_validation(history_dir):
+    manager = JobManager(str(history_dir / 'jobs'))
+    with pytest.raises(ValueError, match='Unknown job kind'):
+        manager.submit('sweep', {})
+    with pytest.raises(ValueError, match='Missing parameters'):
+        manager.submit('backtest', {'strategy': 'cross_sma'})
+    with pytest.raises(ValueError, match='priority'):
+        manager.submit('download', {}, priority='urgent')
+    # Los jobs de backtest son streaming: solo estrategias con implementación por bloques
+    with pytest.raises(ValueError, match='no chunked implementation'):
+        manager.submit('backtest', {'strategy': 'ema_trend', 'symbol': 'BTC/USDT', 'timeframe': '1m'})
+    assert not (history_dir / 'jobs').exists()
+
+def test_backtest_job_reads_sqlite_history(history_dir, monkeypatch):
+    import os
+    import shutil
+    import numpy as np
+    monkeypatch.setenv('PYTHONPATH', os.getcwd())
+    shutil.copy('config.yaml', history_dir / 'config.yaml')
+    monkeypatch.chdir(history_dir)
+    (history_dir / 'logs').mkdir()
+    monkeypatch.setattr(HistoryManager, 'backend', 'sqlite')
+    monkeypatch.setattr(HistoryManager, 'db_file', str(history_dir / 'history.db'))
+    monkeypatch.setattr(HistoryManager, '_store', None)
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(2).normal(0, 0.003, 2000)))
+    HistoryManager.save_history('BTC/USDT', '1m', pd.DataFrame({
+        'ts': pd.date_range('2024-01-01', periods=2000, freq='min'), 'open': close, 'high': close,
+        'low': close, 'close': close, 'volume': 1.0}))
+    manager = JobManager(str(history_dir / 'jobs'))
+    job = manager.submit('backtest', {'strategy': 'cross_sma', 'symbol': 'BTC/USDT', 'timeframe': '1m',
+                                      'start_date': '2024-01-01 10:00', 'chunksize': 500})
+    assert manager.wait(job.id, 60).status == 'done', job.error
+    assert not (history_dir / 'history_BTC-USDT_1m.csv').exists()
+    result = pd.read_csv(history_dir / job.result['result_file'])
+    assert len(result) == 2000 - 600 and str(result['ts'].iloc[0]) == '2024-01-01 10:00:00'
+
+def test_jobs_endpoints(history_dir, monkeypatch):
+    monkeypatch.setattr(collector, 'fetch_ohlcv', FlakyExchange())
+    monkeypatch.setattr(jobs, '_manager', JobManager(str(history_dir / 'jobs')))
+    client = TestClient(app)
+    data = client.post('/api/jobs', json={'kind': 'download', 'params': {'symbol': 'BTC/USDT', 'timeframe': '1m',
+                                                                         'start_date': RANGE[0], 'end_date': RANGE[1]}}).json()
+    assert data['success']
+    job_id = data['job']['id']
+    get_job_manager().wait(job_id, 5)
+    assert client.get(f'/api/jobs/{job_id}').json()['job']['status'] == 'done'
+    assert [j['id'] for j in client.get('/api/jobs').json()['jobs']] == [job_id]
+    assert not client.post(f'/api/jobs/{job_id}/cancel').json()['success']
+    assert client.get('/api/jobs/missing').status_code == 404
+    assert not client.post('/api/jobs', json={'kind': 'nope', 'params': {}}).json()['success']
@@ -0,0 +1,149 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from src.market_data import MarketDataHub, RollingBuffer
+from src.paper_trading import PaperBot, PaperTradingEngine, make_feed
+
+def bar(i):
+    return {'ts': pd.Timestamp('2025-01-01') + pd.Timedelta(minutes=i), 'open': i, 'high': i + 1,
+            'low': i - 1, 'close': float(i), 'volume': 1.0}
+
+def test_rolling_buffer_windows_are_contiguous_views():
+    buffer = RollingBuffer(4)
+    assert len(buffer.window()['close']) == 0
+    for i in range(10):
+        buffer.append(bar(i))
+        window = buffer.window()
+        expected = np.arange(max(0, i - 3), i + 1, dtype=float)
+        assert window['close'].tolist() == expected.tolist()
+        assert np.shares_memory(window['close'], buffer.values)
+    assert buffer.window(2)['close'].tolist() == [8.0, 9.0]
+    assert buffer.window()['ts'][-1] == np.datetime64(bar(9)['ts'])
+    with pytest.raises(ValueError):
+        buffer.window()['close'][0] = 1
+
+def test_rolling_buffer_resize_keeps_latest_bars():
+    buffer = RollingBuffer(3)
+    for i in range(5):
+        buffer.append(bar(i))
+    bigger = buffer.resized(6)
+    assert bigger.window()['close'].tolist() == [2.0, 3.0, 4.0]
+    bigger.append(bar(5))
+    assert bigger.window()['close'].tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert buffer.resized(2).window()['close'].tolist() == [3.0, 4.0]
+
+class CountingFeed:
+    """Fake upstream feed: emits `n` bars and records how many times it was created."""
+    created = []
+
+    def __init__(self, symbol, timeframe, warmup, n=50):
+        self.n = n
+        CountingFeed.created.append((symbol, timeframe, warmup))
+
+    async def bars(self):
+        for i in range(self.n):
+            await asyncio.sleep(0)
+            yield bar(i)
+
+def test_hub_fans_out_one_feed_to_all_subscribers():
+    CountingFeed.created = []
+
+    async def consume(hub, symbol, received):
+        async for b in hub.feed(symbol, '1m', warmup=10).bars():
+            received.append(b)
+
+    async def main():
+        hub = MarketDataHub(CountingFeed)
+        received = [[] for _ in range(5)]
+        others = []
+        await asyncio.gather(*(consume(hub, 'BTC/USDT', r) for r in received), consume(hub, 'ETH/USDT', others))
+        return hub, received, others
+
+    hub, received, others = asyncio.run(main())
+    assert sorted(CountingFeed.created) == [('BTC/USDT', '1m', 10), ('ETH/USDT', '1m', 10)]
+    assert all(len(r) == 50 for r in received) and len(others) == 50
+    # Every subscriber gets the same bar objects, stored once
+    assert all(a is b for r in received[1:] for a, b in zip(received[0], r))
+    assert hub.streams == {}
+
+def test_late_subscriber_replays_buffer_and_unsubscribe_stops_feed():
+    async def main():
+        hub = MarketDataHub(lambda s, t, w: CountingFeed(s, t, w, n=10**6))
+        first = hub.subscribe('BTC/USDT', '1m', warmup=5)
+        for _ in range(8):
+            await first.get()
+        assert hub.window('BTC/USDT', '1m')['close'].tolist() == [3.0, 4.0, 5.0, 6.0, 7.0]
+        late = hub.subscribe('BTC/USDT', '1m', warmup=3)
+        replay = [late.get_nowait() for _ in range(3)]
+        task = hub.streams[('BTC/USDT', '1m')].task
+        stats = hub.stats()
+        hub.unsubscribe('BTC/USDT', '1m', first)
+        hub.unsubscribe('BTC/USDT', '1m', late)
+        await asyncio.sleep(0)
+        return replay, task, stats, hub
+
+    replay, task, stats, hub = asyncio.run(main())
+    assert [b['close'] for b in replay] == [5.0, 6.0, 7.0]
+    assert all(b['warmup'] for b in replay)
+    assert stats[0]['subscribers'] == 2
+    assert task.cancelled()
+    with pytest.raises(KeyError):
+        hub.window('BTC/USDT', '1m')
+
+def test_late_subscriber_with_larger_warmup_gets_backfilled():
+    fetches = []
+
+    def history_fetch(symbol, timeframe, limit, before):
+        fetches.append((limit, before))
+        end = int((before - bar(0)['ts']) / pd.Timedelta(minutes=1))
+        return pd.DataFrame([bar(i) for i in range(end - limit, end)])
+
+    async def main():
+        hub = MarketDataHub(lambda s, t, w: CountingFeed(s, t, w, n=30), history_fetch)
+        first = hub.subscribe('BTC/USDT', '1m', warmup=5)
+        for _ in range(8):
+            await first.get()
+        late = hub.subscribe('BTC/USDT', '1m', warmup=10)
+        received = []
+        while (item := await late.get()) is not None:
+            received.append(item)
+        return received, hub
+
+    received, hub = asyncio.run(main())
+    # Solo faltaban los 5 bares anteriores al más antiguo del buffer
+    assert fetches == [(5, bar(3)['ts'])]
+    warm = [b['close'] for b in received if b.get('warmup')]
+    assert warm == [float(i) for i in range(-2, 8)]
+    # Sin huecos ni duplicados entre el calentamiento y los bares en vivo
+    assert [b['close'] for b in received] == [float(i) for i in range(-2, 30)]
+
+def test_larger_warmup_before_first_bar_restarts_feed():
+    CountingFeed.created = []
+
+    async def main():
+        hub = MarketDataHub(lambda s, t, w: CountingFeed(s, t, w, n=3))
+        first = hub.subscribe('BTC/USDT', '1m', warmup=5)
+        second = hub.subscribe('BTC/USDT', '1m', warmup=10)
+        return [await first.get() for _ in range(4)], [await second.get() for _ in range(4)]
+
+    first, second = asyncio.run(main())
+    assert [w for _, _, w in CountingFeed.created] == [5, 10]
+    assert first == second and first[-1] is None
+
+def test_live_paper_bots_share_hub_feed(tmp_path):
+    CountingFeed.created = []
+
+    async def main():
+        engine = PaperTradingEngine(state_file=str(tmp_path / 'state.json'))
+        engine.hub = MarketDataHub(CountingFeed)
+        for fast in (3, 4, 5):
+            bot = PaperBot('cross_sma', 'BTC/USDT', '1m', fast=fast, slow=10, source='live')
+            engine.start_bot(bot, make_feed('live', 'BTC/USDT', '1m', warmup=10, hub=engine.hub))
+        await engine.wait()
+        await engine.shutdown()
+        return engine
+
+    engine = asyncio.run(main())
+    assert len(CountingFeed.created) == 1
+    assert all(s['bars_seen'] == 50 and s['status'] == 'finished' for s in engine.status())
@@ -0,0 +1,82 @@
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from src.api import app
+from src.monte_carlo import monte_carlo, robustness_summary, trades_filename
+
+def test_shuffle_keeps_final_profit():
+    profits = [100, -50, 30, -20, 40]
+    report = monte_carlo(profits, n_sims=500, method="shuffle", seed=1)
+    percentiles = report["final_profit"]["percentiles"]
+    assert all(v == pytest.approx(100) for v in percentiles.values())
+    assert report["max_drawdown"]["percentiles"]["5"] <= -50
+    assert report["probability_of_loss"] == 0.0
+
+def test_bootstrap_distribution_and_ruin():
+    profits = np.array([500.0, -600.0])
+    report = monte_carlo(profits, n_sims=2000, method="bootstrap", initial_capital=1000, ruin_pct=0.5, seed=3)
+    assert report["n_trades"] == 2
+    assert sum(report["final_profit"]["histogram"]["counts"]) == 2000
+    # Ruin only happens when the first trade is the loss
+    assert 0.3 < report["risk_of_ruin"] < 0.7
+    assert (report["max_drawdown"]["mean"]) < 0
+
+def test_drawdown_counts_from_initial_capital():
+    report = monte_carlo([-10.0, -10.0], n_sims=10, method="shuffle", seed=0)
+    assert report["max_drawdown"]["percentiles"]["50"] == pytest.approx(-20)
+
+def test_batches_match_sizes(monkeypatch):
+    import src.monte_carlo as mc
+    monkeypatch.setattr(mc, "MAX_BATCH_CELLS", 10)
+    report = monte_carlo(np.arange(-5.0, 5.0), n_sims=25, seed=2)
+    assert sum(report["max_drawdown"]["histogram"]["counts"]) == 25
+
+def test_invalid_inputs():
+    with pytest.raises(ValueError):
+        monte_carlo([], n_sims=10)
+    with pytest.raises(ValueError):
+        monte_carlo([1.0], method="unknown")
+    for n_sims in (0, -1):
+        with pytest.raises(ValueError, match="n_sims"):
+            monte_carlo([1.0, -1.0], n_sims=n_sims)
+
+def test_backtest_summary_skips_disabled_monte_carlo():
+    import pandas as pd
+    from src.backtest import backtest_summary
+    trades = pd.DataFrame({"entry_time": ["2025-01-01 00:00"], "exit_time": ["2025-01-01 01:00"],
+                           "entry_price": [100.0], "exit_price": [101.0], "profit": [1.0], "fees": [0.1],
+                           "exit_reason": ["signal"], "equity": [1001.0]})
+    assert "robustness" in backtest_summary(trades, None, None, 1000.0, monte_carlo_sims=10)
+    assert "robustness" not in backtest_summary(trades, None, None, 1000.0, monte_carlo_sims=0)
+
+def test_robustness_summary_is_compact():
+    summary = robustness_summary(monte_carlo([1.0, -1.0, 2.0], n_sims=100, seed=0))
+    assert "histogram" not in str(summary)
+    assert set(summary["final_profit_percentiles"]) == {"5", "25", "50", "75", "95"}
+
+def test_performance_10k_sims():
+    profits = np.random.default_rng(0).normal(5, 50, 2000)
+    start = time.perf_counter()
+    monte_carlo(profits, n_sims=10000, seed=0)
+    assert time.perf_counter() - start < 5
+
+def test_montecarlo_endpoint(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    path = trades_filename("cross_sma", "BTC/USDT", "1m")
+    (tmp_path / "data" / "strategies" / "cross_sma").mkdir(parents=True)
+    pd.DataFrame({"profit": [10.0, -5.0, 3.0]}).to_csv(path, index=False)
+    client = TestClient(app)
+    body = {"strategy": "cross_sma", "symbol": "BTC-USDT", "timeframe": "1m", "n_sims": 200, "seed": 1}
+    response = client.post("/api/backtest/montecarlo/", json=body)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"]
+    assert data["report"]["n_trades"] == 3
+
+def test_montecarlo_endpoint_missing_trades(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    client = TestClient(app)
+    body = {"strategy": "cross_sma", "symbol": "BTC/USDT", "timeframe": "1m"}
+    assert client.post("/api/backtest/montecarlo/", json=body).status_code == 404
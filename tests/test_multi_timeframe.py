@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.backtest import run_strategy
+from src.expressions import RuleStrategy, rules_spec
+from src.indicators import ema
+from src.multi_timeframe import align_asof, resample_ohlcv
+from src.strategies import register
+from src.timeframes import align_to_candle, candle_open, seconds_to_timeframe
+
+def _candles(n=3000, start='2025-01-01 00:17', freq='min', seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.2, n))
+    return pd.DataFrame({'ts': pd.date_range(start, periods=n, freq=freq), 'open': close - 0.05,
+                         'high': close + 0.1, 'low': close - 0.1, 'close': close, 'volume': 1.0})
+
+def test_candle_open_matches_align_to_candle():
+    ts = pd.date_range('2024-12-28 22:50', periods=50, freq='397min')
+    for timeframe in ('15m', '1h', '4h', '1d', '1w', '1M'):
+        expected = [align_to_candle(t, timeframe, ceil=False) for t in ts]
+        np.testing.assert_array_equal(candle_open(ts.to_numpy(), timeframe), pd.DatetimeIndex(expected).to_numpy())
+    assert seconds_to_timeframe(3600) == '1h' and seconds_to_timeframe(300) == '5m'
+
+def test_resample_matches_pandas_and_drops_partial_first_candle():
+    df = _candles()
+    hourly = resample_ohlcv(df['ts'], {c: df[c].to_numpy() for c in ('open', 'high', 'low', 'close', 'volume')}, '1h')
+    expected = df.set_index('ts').resample('1h').agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}).iloc[1:]
+    np.testing.assert_array_equal(hourly['ts'], expected.index.to_numpy())
+    for col in ('open', 'high', 'low', 'close', 'volume'):
+        np.testing.assert_allclose(hourly[col], expected[col].to_numpy())
+
+def test_align_has_no_look_ahead():
+    base = pd.date_range('2025-01-01 09:00', periods=180, freq='min').to_numpy()
+    hourly = pd.date_range('2025-01-01 09:00', periods=3, freq='h').to_numpy()
+    aligned = align_asof(base, hourly, np.array([9.0, 10.0, 11.0]), '1h', base_timeframe='1m')
+    at = {str(pd.Timestamp(t).time())[:5]: v for t, v in zip(base, aligned)}
+    assert np.isnan(at['09:58']) and at['09:59'] == 9.0 and at['10:58'] == 9.0 and at['10:59'] == 10.0
+    flags = align_asof(base, hourly, np.array([True, False, True]), '1h')
+    assert flags.dtype == bool and not flags[:59].any() and flags[59]
+
+def test_rules_on_prefix_match_full_history():
+    df = _candles()
+    rules = RuleStrategy('cross_over(ema(close, 5), ema(close, 20)) and tf("1h", close > ema(close, 10))',
+                         'cross_under(ema(close, 5), ema(close, 20)) or tf("15m", close < lowest(low, 4))')
+    ts, close, low = df['ts'].to_numpy(), df['close'].to_numpy(), df['low'].to_numpy()
+    full = rules(close, low=low, ts=ts, timeframe='1m')
+    assert (full == 1).any() and (full == -1).any()
+    # Every decision only depends on the candles closed up to it
+    for k in range(100, len(df), 97):
+        assert rules(close[:k], low=low[:k], ts=ts[:k], timeframe='1m')[-1] == full[k - 1]
+    with pytest.raises(ValueError):
+        rules(close, low=low)
+
+def test_higher_timeframe_lines_are_computed_natively():
+    df = _candles()
+    rules = RuleStrategy('close > tf("1h", ema(close, 10))', 'close < 0')
+    hourly = resample_ohlcv(df['ts'], {'close': df['close'].to_numpy()}, '1h')
+    trend = align_asof(df['ts'], hourly['ts'], ema(hourly['close'], 10), '1h')
+    expected = np.where(df['close'].to_numpy() > trend, 1, 0)
+    np.testing.assert_array_equal(rules(df['close'].to_numpy(), ts=df['ts'].to_numpy()), expected)
+    # close on 1m and on 1h are separate nodes: close, close@1h, ema, align, >, 0, <
+    assert len(rules.compile().graph.nodes) == 7
+
+def test_run_strategy_keeps_higher_timeframe_warmup():
+    spec = register(rules_spec('test_mtf', {'params': {'trend': 10}, 'rules': {
+        'buy': 'cross_over(close, ema(close, 30)) and tf("1h", close > ema(close, trend))',
+        'sell': 'cross_under(close, ema(close, 30))'}}))
+    assert spec.timeframes == ('1h',) and spec.warmup({}, '1m') == (29 + 2) * 60
+    df = _candles(6000)
+    start = df['ts'].iloc[4000]
+    full = run_strategy(df, 'test_mtf')
+    trimmed = run_strategy(df, 'test_mtf', start=start)
+    np.testing.assert_array_equal(trimmed['signal'].to_numpy(), full[full['ts'] >= start]['signal'].to_numpy())
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+import src.history_manager as hm
+import src.optimizer as optimizer
+from src.api import app
+from src.backtest import run_strategy
+from src.history_manager import HistoryManager
+from src.optimizer import crowding_distance, optimize, pareto_ranks, propose, select
+from src.simulation import simulate_trades
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(5)
+    n = 3000
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n) + 0.001 * np.sin(np.arange(n) / 150)))
+    ts = pd.date_range("2024-01-01", periods=n, freq="h")
+    return pd.DataFrame({"ts": ts, "open": close, "high": close * 1.003, "low": close * 0.997, "close": close, "volume": 1.0})
+
+def test_pareto_ranks_and_selection():
+    points = np.array([[10, -5], [5, -1], [4, -3], [10, -5], [0, 0], [-1, -1]])
+    assert pareto_ranks(points).tolist() == [0, 0, 1, 0, 0, 1]
+    assert np.isinf(crowding_distance(points[[0, 1, 4]])).sum() == 2
+    # Los no elegibles quedan detrás aunque estén en el frente
+    eligible = np.array([True, True, True, True, False, True])
+    assert select(points, 6, eligible)[-1] == 4
+    assert set(select(points, 3).tolist()) <= {0, 1, 3, 4}
+
+def test_propose_respects_bounds_and_skips_seen():
+    rng = np.random.default_rng(0)
+    space = {"fast": (2, 20), "slow": (10, 60), "stop_loss_pct": (0.0, 0.1)}
+    seen = set()
+    first = propose([], space, 30, rng, seen)
+    children = propose(first[:5], space, 30, rng, seen)
+    for params in first + children:
+        assert 2 <= params["fast"] < params["slow"] <= 60 and isinstance(params["fast"], int)
+        assert 0.0 <= params["stop_loss_pct"] <= 0.1
+    keys = [tuple(sorted(p.items())) for p in first + children]
+    assert len(set(keys)) == len(keys) == 60
+
+def test_evaluation_matches_backtest_engine(history):
+    params = {"fast": 5, "slow": 30, "stop_loss_pct": 0.01, "max_position_size": 0.5}
+    costs = {"max_position_size": 1.0, "stop_loss_pct": None, "fee_pct": 0.001, "slippage_pct": 0.0, "initial_capital": 1000.0}
+    optimizer._init_worker({c: history[c].to_numpy() for c in history}, "cross_sma", None, costs)
+    try:
+        partial = optimizer.evaluate(params, 500)
+        result = optimizer.evaluate(params, len(history))
+    finally:
+        optimizer._SHARED.clear()
+    backtest = run_strategy(history, "cross_sma", {"fast": 5, "slow": 30})
+    trades = simulate_trades(backtest, 0.5, 0.01, 0.001, 0.0, 1000.0)
+    assert result["total_trades"] == len(trades) > partial["total_trades"]
+    assert result["total_profit"] == pytest.approx(trades["profit"].sum())
+    equity = np.concatenate([[0], trades["profit"].cumsum()])
+    assert result["max_drawdown"] == pytest.approx((equity - np.maximum.accumulate(equity)).min())
+
+def test_optimizer_finds_grid_optimum_with_few_evaluations(history):
+    space = {"fast": (2, 20), "slow": (10, 50)}
+    costs = {"max_position_size": 1.0, "stop_loss_pct": None, "fee_pct": 0.001, "slippage_pct": 0.0, "initial_capital": 10000.0}
+    optimizer._init_worker({c: history[c].to_numpy() for c in history}, "cross_sma", None, costs)
+    try:
+        grid = [optimizer.evaluate({"fast": f, "slow": s}, len(history))["total_profit"]
+                for f in range(2, 21) for s in range(10, 51) if f < s]
+    finally:
+        optimizer._SHARED.clear()
+    result = optimize(history, "cross_sma", space, fee_pct=0.001, seed=1)
+    stats = result["stats"]
+    assert stats["cost"] < 0.15 * len(grid)
+    assert stats["proposed"] == stats["pruned"] + stats["full_evaluations"] == len(result["evaluations"]) + stats["pruned"]
+    assert result["front"][0]["total_profit"] >= 0.95 * max(grid)
+    # El frente no contiene candidatos dominados
+    front = np.array([[r["total_profit"], r["max_drawdown"]] for r in result["front"]])
+    assert (pareto_ranks(front) == 0).all()
+    assert result["evaluations"]["generation"].max() < 10
+
+def test_parallel_run_matches_serial(history):
+    kwargs = dict(space={"fast": (2, 20), "slow": (10, 40), "max_position_size": (0.1, 1.0)}, generations=2, batch=9, seed=4)
+    serial = optimize(history, "cross_ema", **kwargs)
+    parallel = optimize(history, "cross_ema", workers=2, **kwargs)
+    assert parallel["front"] == serial["front"]
+    pd.testing.assert_frame_equal(parallel["evaluations"], serial["evaluations"])
+
+def test_optimize_validation(history):
+    with pytest.raises(ValueError, match="Unknown parameters"):
+        optimize(history, "cross_sma", {"period": (2, 10)})
+    with pytest.raises(ValueError, match="fractions"):
+        optimize(history, "cross_sma", fractions=(0.5, 0.25, 1.0))
+    with pytest.raises(ValueError, match="eta"):
+        optimize(history, "cross_sma", eta=1)
+
+def test_optimize_endpoint(history, tmp_path, monkeypatch):
+    monkeypatch.setattr(hm, "HISTORY_DIR", str(tmp_path))
+    monkeypatch.setattr(hm, "META_FILE", str(tmp_path / "history_meta.json"))
+    monkeypatch.setattr(HistoryManager, "backend", "csv")
+    history.to_csv(HistoryManager.get_history_file("BTC/USDT", "1h"), index=False)
+    client = TestClient(app)
+    data = client.post("/api/optimize/", json={"strategy": "cross_sma", "symbol": "BTC-USDT", "timeframe": "1h",
+                                                "space": {"fast": [2, 20], "slow": [10, 40]}, "generations": 2,
+                                                "batch": 9, "seed": 0, "workers": 1}).json()
+    assert data["success"] and data["front"] and data["stats"]["generations"] == 2
+    data = client.post("/api/optimize/", json={"strategy": "cross_sma", "symbol": "BTC-USDT", "timeframe": "1h",
+                                                "space": {"period": [2, 10]}, "workers": 1}).json()
+    assert not data["success"]
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from src.api import app
+from src.history_manager import HistoryManager
+from src.paper_trading import PaperBot, PaperTradingEngine, ReplayFeed, ExchangeFeed, EngineThread, make_feed
+from src.signals import codes_to_labels, get_vectorized_strategy
+from src.simulation import simulate_trades
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(11)
+    close = 100 + np.cumsum(rng.normal(0, 1, 800))
+    low = close - np.abs(rng.normal(0, 1.5, 800))
+    ts = pd.date_range("2025-06-01", periods=800, freq="min")
+    return pd.DataFrame({"ts": ts, "open": close, "high": close + 1, "low": low, "close": close, "volume": 1.0})
+
+RISK = dict(max_position_size=0.5, stop_loss_pct=0.01, fee_pct=0.001, slippage_pct=0.0005, initial_capital=1000)
+
+def run_replay(bots_and_feeds, **engine_kwargs):
+    async def main():
+        engine = PaperTradingEngine(**engine_kwargs)
+        for bot, feed in bots_and_feeds:
+            engine.start_bot(bot, feed)
+        await engine.wait()
+        await engine.shutdown()
+        return engine
+    return asyncio.run(main())
+
+def test_replay_matches_vectorized_backtest(history, tmp_path):
+    bot = PaperBot("cross_sma", "BTC/USDT", "1m", fast=5, slow=20, **RISK)
+    run_replay([(bot, ReplayFeed(history, "1m"))], state_file=str(tmp_path / "state.json"))
+    result = history.copy()
+    result["signal"] = codes_to_labels(get_vectorized_strategy("cross_sma")(history["close"].to_numpy(), 5, 20))
+    expected = simulate_trades(result, **RISK)
+    assert bot.status == "finished"
+    assert len(bot.trades) == len(expected) > 0
+    actual = pd.DataFrame(bot.trades)
+    assert actual["exit_reason"].tolist() == expected["exit_reason"].tolist()
+    assert actual["profit"].to_numpy() == pytest.approx(expected["profit"].to_numpy())
+    assert bot.equity == pytest.approx(expected["equity"].iloc[-1])
+
+def test_many_bots_run_concurrently(history, tmp_path):
+    bots = [(PaperBot("cross_ema", "BTC/USDT", "1m", fast=f, slow=30), ReplayFeed(history, "1m")) for f in range(3, 13)]
+    engine = run_replay(bots, state_file=str(tmp_path / "state.json"))
+    assert len(engine.status()) == 10
+    assert all(s["status"] == "finished" and s["bars_seen"] == 800 for s in engine.status())
+
+def test_stop_and_persist(history, tmp_path):
+    state_file = tmp_path / "state.json"
+    async def main():
+        engine = PaperTradingEngine(state_file=str(state_file), persist_interval=0.01)
+        bot = PaperBot("cross_sma", "BTC/USDT", "1m", fast=5, slow=20)
+        bot_id = engine.start_bot(bot, ReplayFeed(history, "1m", speed=60 * 1000))
+        await asyncio.sleep(0.05)
+        assert await engine.stop_bot(bot_id)
+        assert not await engine.stop_bot("unknown")
+        return bot
+    bot = asyncio.run(main())
+    assert bot.status == "stopped"
+    assert 0 < bot.bars_seen < 800
+    state = json.loads(state_file.read_text())
+    assert state["bots"][0]["bot_id"] == bot.bot_id
+    assert state["bots"][0]["status"] == "stopped"
+
+def test_warmup_bars_do_not_trade():
+    bot = PaperBot("cross_sma", "BTC/USDT", "1m", fast=2, slow=3)
+    for close in [10, 9, 8, 9, 12]:
+        bot.on_bar({"ts": "t", "open": close, "high": close, "low": close, "close": close, "warmup": True})
+    assert bot.signal_long
+    assert bot.position is None and bot.trades == []
+
+def test_exchange_feed_delivers_closed_candles_only(history):
+    now = pd.Timestamp.now(tz="UTC").tz_localize(None).floor("min")
+    df = history.tail(5).copy()
+    df["ts"] = pd.date_range(end=now, periods=5, freq="min")
+    calls = []
+    def fake_fetch(symbol, timeframe, limit, since=None):
+        calls.append((limit, since))
+        return df
+    async def first_bars():
+        bars = []
+        async for bar in ExchangeFeed("BTC/USDT", "1m", fetch=fake_fetch, warmup=4).bars():
+            bars.append(bar)
+            if len(bars) == 4:
+                break
+        return bars
+    bars = asyncio.run(first_bars())
+    assert calls == [(5, None)]
+    # The candle opened at 'now' is still forming
+    assert [b["ts"] for b in bars] == list(df["ts"].iloc[:4])
+    assert all(b["warmup"] for b in bars)
+
+def test_make_feed_unknown_source():
+    with pytest.raises(ValueError):
+        make_feed("unknown", "BTC/USDT", "1m")
+
+def test_engine_thread_is_created_once(monkeypatch):
+    import threading
+    import time
+    import src.paper_trading as pt
+    created = []
+    class SlowEngineThread:
+        def __init__(self):
+            time.sleep(0.05)
+            created.append(self)
+    monkeypatch.setattr(pt, "_engine_thread", None)
+    monkeypatch.setattr(pt, "EngineThread", SlowEngineThread)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pt.get_engine_thread())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Peticiones simultáneas comparten un único bucle de eventos
+    assert len(created) == 1 and all(r is created[0] for r in results)
+
+def test_papertrade_endpoints(monkeypatch, history, tmp_path):
+    import src.paper_trading as pt
+    monkeypatch.setattr(HistoryManager, "load_history", lambda s, t: history)
+    monkeypatch.setattr(pt, "_engine_thread", EngineThread(PaperTradingEngine(state_file=str(tmp_path / "state.json"))))
+    client = TestClient(app)
+    body = {"strategy": "cross_sma", "symbol": "BTC-USDT", "timeframe": "1m", "source": "historical", "fast": 5, "slow": 20}
+    data = client.post("/api/papertrade/start", json=body).json()
+    assert data["success"]
+    bot_id = data["bot_id"]
+    pt._engine_thread.call(pt._engine_thread.engine.wait(bot_id))
+    status = client.get("/api/papertrade/status").json()["bots"]
+    assert status[0]["bot_id"] == bot_id and status[0]["status"] == "finished"
+    trades = client.get("/api/papertrade/trades", params={"bot_id": bot_id}).json()
+    assert trades["trades"] == pt._engine_thread.engine.bots[bot_id].trades
+    assert client.post("/api/papertrade/stop", json={"bot_id": bot_id}).json()["success"]
+    assert client.post("/api/papertrade/stop", json={"bot_id": "nope"}).status_code == 404
+    assert client.get("/api/papertrade/trades", params={"bot_id": "nope"}).status_code == 404
+    bad = client.post("/api/papertrade/start", json=dict(body, source="ftp")).json()
+    assert not bad["success"]
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.history_manager import HistoryManager
+from src.portfolio import load_aligned_history, backtest_portfolio, portfolio_summary, equity_frame
+
+def make_history(start, closes):
+    ts = pd.date_range(start, periods=len(closes), freq="D")
+    closes = np.asarray(closes, dtype=float)
+    return pd.DataFrame({"ts": ts, "open": closes, "high": closes + 1, "low": closes - 1, "close": closes, "volume": 1.0})
+
+@pytest.fixture
+def histories(monkeypatch):
+    data = {
+        "BTC/USDT": make_history("2025-01-01", np.concatenate([np.linspace(100, 80, 20), np.linspace(80, 130, 30)])),
+        "ETH/USDT": make_history("2025-01-11", np.linspace(50, 40, 40)),
+    }
+    monkeypatch.setattr(HistoryManager, "load_meta", lambda: {s: {"1d": {}} for s in data})
+    monkeypatch.setattr(HistoryManager, "load_history", lambda s, t: data[s].copy())
+    return data
+
+def test_load_aligned_history(histories):
+    panel = load_aligned_history("1d")
+    assert panel["symbols"] == ["BTC/USDT", "ETH/USDT"]
+    assert panel["close"].shape == (50, 2)
+    assert np.isnan(panel["close"][:10, 1]).all()
+    assert not np.isnan(panel["close"][10:, 1]).any()
+
+def test_load_aligned_history_no_data(monkeypatch):
+    monkeypatch.setattr(HistoryManager, "load_meta", lambda: {})
+    with pytest.raises(ValueError):
+        load_aligned_history("1d")
+
+def test_backtest_portfolio_equity(histories):
+    panel = load_aligned_history("1d")
+    result = backtest_portfolio(panel, "cross_sma", fast=3, slow=8, initial_capital=1000)
+    assert result["equity"].shape == (50, 2)
+    assert result["total_equity"][0] == pytest.approx(1000)
+    assert result["total_equity"] == pytest.approx(result["equity"].sum(axis=1))
+    # BTC recovers after the cross up, ETH only falls and never crosses up
+    assert result["equity"][-1, 0] > 500
+    assert result["equity"][-1, 1] == pytest.approx(500)
+    assert (result["total_drawdown"] <= 0).all()
+
+def test_portfolio_summary_and_equity_frame(histories):
+    panel = load_aligned_history("1d")
+    result = backtest_portfolio(panel, "cross_ema", fast=3, slow=8, fee_pct=0.001, initial_capital=1000)
+    summary = portfolio_summary(panel, result, 1000)
+    assert set(summary["per_asset"]) == {"BTC/USDT", "ETH/USDT"}
+    assert summary["total_profit"] == pytest.approx(summary["final_equity"] - 1000)
+    assert len(summary["equity_curve"]) == 50
+    assert 0 <= summary["mean_cash_fraction"] <= 1
+    frame = equity_frame(panel, result)
+    assert list(frame.columns) == ["ts", "BTC/USDT", "ETH/USDT", "total"]
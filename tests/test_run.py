@@ -0,0 +1,51 @@
+import asyncio
+import numpy as np
+import pandas as pd
+from src.run import LiveRunner, warmup_bars
+from src.signals import codes_to_labels, get_vectorized_strategy
+
+def make_fetch(calls):
+    """Fake exchange on a 1s timeframe: the candle opened at the current second is still forming."""
+    def fetch(symbol, timeframe, limit, since=None):
+        calls.append((limit, since))
+        now = pd.Timestamp.now(tz='UTC').tz_localize(None).floor('s')
+        end = now if since is None else min(now, since + pd.Timedelta(seconds=limit - 1))
+        ts = pd.date_range(end=end, periods=limit, freq='s') if since is None else pd.date_range(since, end, freq='s')
+        close = 100 + np.sin(ts.astype('int64') // 10**9 / 3.0) * 5
+        return pd.DataFrame({'ts': ts, 'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1.0})
+    return fetch
+
+def test_warmup_bars():
+    assert warmup_bars(50, limit=100) == 150
+    assert warmup_bars(10, limit=100) == 100
+
+def test_on_bar_matches_vectorized_signals():
+    rng = np.random.default_rng(3)
+    close = 100 + np.cumsum(rng.normal(0, 1, 300))
+    events = []
+    runner = LiveRunner('cross_ema', 'BTC/USDT', '1m', fast=5, slow=20, window=50, on_signal=events.append)
+    signals = [runner.on_bar({'ts': i, 'close': c}) for i, c in enumerate(close)]
+    expected = codes_to_labels(get_vectorized_strategy('cross_ema')(close, 5, 20))
+    assert signals[1:] == list(expected[1:])
+    assert [e['signal'] for e in events] == signals[1:]
+
+def test_live_runner_fetches_only_new_candles():
+    calls, events = [], []
+    runner = LiveRunner('cross_sma', 'BTC/USDT', '1s', fast=2, slow=4, window=10,
+                        fetch=make_fetch(calls), close_delay=0.05, on_signal=events.append)
+
+    async def main():
+        task = asyncio.create_task(runner.run())
+        while len(events) < 2:
+            await asyncio.sleep(0.05)
+        window = runner.window()
+        task.cancel()
+        return window
+
+    window = asyncio.run(asyncio.wait_for(main(), timeout=10))
+    # Warm-up window (plus the forming candle) first, then only the candle closed since the last one seen
+    assert calls[0] == (11, None)
+    assert all(limit == 1 for limit, _ in calls[1:])
+    assert events[1]['ts'] - events[0]['ts'] == pd.Timedelta(seconds=1)
+    assert len(window['close']) == 10
+    assert window['ts'][-1] == np.datetime64(events[-1]['ts'])
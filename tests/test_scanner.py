@@ -0,0 +1,89 @@
+import asyncio
+import time
+import numpy as np
+import pandas as pd
+from src.market_data import MarketDataHub
+from src.paper_trading import ReplayFeed
+from src.scanner import Scanner, scan, stack_windows
+from src.signals import codes_to_labels, get_vectorized_strategy, position_state
+
+def history(n, seed, start='2025-01-01'):
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.003, n)))
+    return pd.DataFrame({'ts': pd.date_range(start, periods=n, freq='min'), 'open': close, 'high': close,
+                         'low': close, 'close': close, 'volume': 1.0})
+
+def window(df):
+    return {'ts': df['ts'].to_numpy(), **{f: df[f].to_numpy() for f in ('open', 'high', 'low', 'close', 'volume')}}
+
+def test_stack_windows_aligns_on_common_index():
+    a, b = history(200, 1), history(200, 2)
+    panel = stack_windows({'A': window(a), 'B': window(b)}, 150)
+    assert panel['close'].shape == (150, 2) and panel['ts'][-1] == a['ts'].iloc[-1]
+    # B empieza más tarde y le falta una vela en medio
+    late = b.iloc[100:].drop(index=150)
+    panel = stack_windows({'A': window(a), 'B': window(late)}, 150)
+    assert panel['close'].shape == (150, 2)
+    assert np.isnan(panel['close'][:50, 1]).all() and not np.isnan(panel['close'][50:, 1]).any()
+    assert panel['close'][100, 1] == b['close'].iloc[149]
+
+def test_scan_matches_per_symbol_signals():
+    dfs = {f"S{i}/USDT": history(300, i) for i in range(20)}
+    table = scan(stack_windows({s: window(df) for s, df in dfs.items()}, 300), 'cross_ema', {'fast': 5, 'slow': 20})
+    assert list(table['symbol']) == list(dfs)
+    for row in table.itertuples():
+        codes = get_vectorized_strategy('cross_ema')(dfs[row.symbol]['close'].to_numpy(), 5, 20)
+        assert row.signal == codes_to_labels(codes)[-1]
+        assert row.position == ('long' if position_state(codes)[-1] else 'flat')
+        marked = np.flatnonzero(codes)
+        assert row.bars_since == len(codes) - 1 - marked[-1]
+    assert not table['stale'].any() and {'fast', 'slow'} <= set(table.columns)
+
+def test_scan_many_symbols_is_fast():
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.003, (150, 500)), axis=0))
+    panel = {'ts': pd.date_range('2025-01-01', periods=150, freq='min').to_numpy(),
+             'symbols': [f"S{i}" for i in range(500)], 'close': close}
+    scan(panel, 'cross_sma', {'fast': 10, 'slow': 50})
+    start = time.perf_counter()
+    table = scan(panel, 'cross_sma', {'fast': 10, 'slow': 50})
+    assert len(table) == 500 and time.perf_counter() - start < 0.5
+
+class OpenReplayFeed(ReplayFeed):
+    """Replay that stays open afterwards, like a live feed waiting for the next candle."""
+    async def bars(self):
+        async for bar in super().bars():
+            yield bar
+        await asyncio.Event().wait()
+
+def test_live_scanner_scans_each_closed_candle():
+    dfs = {'BTC/USDT': history(120, 1), 'ETH/USDT': history(120, 2), 'SOL/USDT': history(120, 3)}
+    hub = MarketDataHub(lambda symbol, timeframe, warmup: OpenReplayFeed(dfs[symbol], timeframe))
+    tables = []
+    scanner = Scanner('cross_sma', list(dfs), '1m', {'fast': 5, 'slow': 20}, window=100, hub=hub, on_scan=tables.append)
+
+    async def main():
+        task = asyncio.create_task(scanner.run())
+        while len(tables) < 120:
+            await asyncio.sleep(0.01)
+        task.cancel()
+    asyncio.run(asyncio.wait_for(main(), timeout=10))
+    assert len(tables) == 120
+    last = tables[-1]
+    assert (last['ts'] == dfs['BTC/USDT']['ts'].iloc[-1]).all()
+    expected = scan(stack_windows({s: window(df.iloc[-100:]) for s, df in dfs.items()}, 100), 'cross_sma', {'fast': 5, 'slow': 20})
+    pd.testing.assert_frame_equal(last, expected)
+
+def test_late_symbols_are_scanned_as_stale_after_grace():
+    dfs = {'BTC/USDT': history(60, 1), 'ETH/USDT': history(59, 2)}
+    hub = MarketDataHub(lambda symbol, timeframe, warmup: OpenReplayFeed(dfs[symbol], timeframe))
+    tables = []
+    scanner = Scanner('cross_sma', list(dfs), '1m', {'fast': 5, 'slow': 20}, window=50, hub=hub, grace=0.05,
+                      on_scan=tables.append)
+
+    async def main():
+        task = asyncio.create_task(scanner.run())
+        while len(tables) < 60:
+            await asyncio.sleep(0.01)
+        task.cancel()
+    asyncio.run(asyncio.wait_for(main(), timeout=10))
+    assert tables[-1]['stale'].tolist() == [False, True]
+    assert tables[-1]['ts'].iloc[1] == dfs['ETH/USDT']['ts'].iloc[-1]
@@ -0,0 +1,79 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+import src.scheduler as scheduler
+from src.api import app
+from src.scheduler import JobClass, QueueFull, Scheduler
+
+def test_slots_are_bounded_and_full_queue_rejects():
+    jobs = JobClass('backtest', concurrency=1, max_queue=1)
+    jobs.acquire()
+    waiter = threading.Thread(target=lambda: (jobs.acquire(), jobs.release()))
+    waiter.start()
+    while not jobs.waiters:
+        time.sleep(0.001)
+    with pytest.raises(QueueFull) as e:
+        jobs.acquire()
+    assert e.value.retry_after >= 1
+    jobs.release()
+    waiter.join(1)
+    stats = jobs.stats()
+    assert stats['running'] == 0 and stats['queued'] == 0
+    assert (stats['admitted'], stats['rejected'], stats['completed']) == (2, 1, 2)
+
+def test_priorities_are_served_in_order():
+    jobs = JobClass('download', concurrency=1, max_queue=10)
+    jobs.acquire()
+    order = []
+    def run(priority, name):
+        jobs.acquire(priority)
+        order.append(name)
+        jobs.release()
+    threads = []
+    for i, priority in enumerate(['low', 'normal', 'high', 'normal']):
+        threads.append(threading.Thread(target=run, args=(priority, f"{priority}{i}")))
+        threads[-1].start()
+        while len(jobs.waiters) < i + 1:
+            time.sleep(0.001)
+    jobs.release()
+    for thread in threads:
+        thread.join(1)
+    assert order == ['high2', 'normal1', 'normal3', 'low0']
+
+def test_queue_wait_times_out():
+    jobs = JobClass('sweep', concurrency=1, max_queue=4, max_wait=0.01)
+    jobs.acquire()
+    with pytest.raises(QueueFull, match='timed out'):
+        jobs.acquire()
+    assert jobs.stats()['timed_out'] == 1 and not jobs.waiters
+
+def test_configured_classes():
+    sched = Scheduler({'backtest': {'concurrency': 4}, 'download': {'max_queue': 8},
+                       'export': {'concurrency': 2, 'max_queue': 3}})
+    assert sched.classes['backtest'].concurrency == 4 and sched.classes['backtest'].max_queue == 8
+    assert sched.classes['export'].max_queue == 3
+    with pytest.raises(ValueError):
+        Scheduler({'backtest': {'concurrency': 0}})
+    with pytest.raises(ValueError):
+        with sched.slot('unknown'):
+            pass
+
+def test_queues_leave_threadpool_workers_free():
+    # Por defecto, trabajos en marcha y en cola nunca ocupan todo el threadpool
+    occupied = sum(jobs.concurrency + jobs.max_queue for jobs in Scheduler().classes.values())
+    assert occupied <= scheduler.THREADPOOL_SIZE - scheduler.RESERVED_WORKERS
+    with pytest.raises(ValueError, match='threadpool workers'):
+        Scheduler({'download': {'max_queue': 40}})
+    assert Scheduler({'download': {'max_queue': 40}}, max_workers=100).classes['download'].max_queue == 40
+
+def test_api_rejects_with_429(monkeypatch):
+    monkeypatch.setattr(scheduler, '_scheduler', Scheduler({'backtest': {'concurrency': 1, 'max_queue': 0}}))
+    client = TestClient(app)
+    with scheduler.get_scheduler().slot('backtest'):
+        response = client.post('/api/backtest/', json={'strategy': 'cross_sma', 'symbol': 'BTC/USDT', 'timeframe': '1m'})
+    assert response.status_code == 429 and int(response.headers['retry-after']) >= 1
+    assert client.post('/api/backtest/', json={'strategy': 'cross_sma', 'symbol': 'BTC/USDT', 'timeframe': '1m'},
+                       headers={'X-Priority': 'urgent'}).status_code == 400
+    stats = client.get('/api/scheduler/stats').json()
+    assert stats['backtest']['rejected'] == 1 and stats['backtest']['running'] == 0
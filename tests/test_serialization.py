@@ -0,0 +1,46 @@
+import json
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+import src.serialization as serialization
+from src.api import app
+from src.serialization import dumps, loads, negotiate_encoding, read_json, write_json
+
+client = TestClient(app)
+
+SUMMARY = {'equity_curve': np.cumsum(np.linspace(-1, 1, 1000)), 'max_drawdown': np.float64(-3.5),
+           'total_trades': np.int64(12), 'start_date': pd.Timestamp('2025-01-01 00:00'), 'bad': float('nan')}
+
+def test_dumps_handles_numpy_and_matches_fallback(monkeypatch):
+    fast = dumps(SUMMARY)
+    data = json.loads(fast)
+    assert data['equity_curve'] == SUMMARY['equity_curve'].tolist()
+    assert data['total_trades'] == 12 and data['start_date'] == '2025-01-01 00:00:00' and data['bad'] is None
+    monkeypatch.setattr(serialization, 'orjson', None)
+    assert json.loads(dumps(SUMMARY)) == data
+
+def test_summary_files_are_compact(tmp_path):
+    path = tmp_path / 'summary.json'
+    write_json(str(path), SUMMARY)
+    indented = json.dumps(json.loads(dumps(SUMMARY)), indent=2)
+    assert path.stat().st_size < len(indented) and b'\n' not in path.read_bytes()
+    assert read_json(str(path))['max_drawdown'] == -3.5 and loads(path.read_bytes())['total_trades'] == 12
+
+def test_negotiate_encoding(monkeypatch):
+    monkeypatch.setattr(serialization, 'brotli', None)
+    assert negotiate_encoding('gzip, deflate, br') == 'gzip'
+    assert negotiate_encoding('br;q=1.0, gzip;q=0') is None
+    assert negotiate_encoding('identity') is None and negotiate_encoding(None) is None
+    monkeypatch.setattr(serialization, 'brotli', object())
+    assert negotiate_encoding('gzip, br') == 'br'
+
+def test_responses_are_compressed_when_accepted():
+    plain = client.get('/openapi.json', headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in plain.headers and 'Accept-Encoding' in plain.headers['vary']
+    raw = client.get('/openapi.json', headers={'Accept-Encoding': 'gzip'})
+    assert raw.headers['content-encoding'] == 'gzip'
+    assert raw.json() == plain.json()
+    assert int(raw.headers['content-length']) < len(plain.content) / 3
+    # Small bodies are not worth compressing
+    small = client.get('/ping', headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in small.headers
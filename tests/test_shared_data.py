@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import src.history_manager as hm
+from src.dataset_cache import get_dataset_cache
+from src.history_manager import HistoryManager
+from src.shared_data import SharedDatasetRegistry, attach, detach, publish
+
+def _worker_sum(spec):
+    data = attach(spec)
+    return float(data['close'].sum()), data['close'].flags.writeable, data['ts'][-1]
+
+def test_publish_and_attach_views():
+    arrays = {'ts': np.arange(10).astype('datetime64[m]'), 'close': np.linspace(1, 2, 10),
+              'lines': np.arange(6, dtype=float).reshape(2, 3)}
+    block, spec = publish(arrays)
+    try:
+        views = attach(spec)
+        for key, array in arrays.items():
+            np.testing.assert_array_equal(views[key], array)
+            assert views[key].dtype == array.dtype and not views[key].flags.writeable
+        assert attach(spec) is views
+        with pytest.raises(ValueError):
+            views['close'][0] = 0.0
+        detach(spec)
+    finally:
+        block.close()
+        block.unlink()
+
+def test_object_arrays_rejected():
+    with pytest.raises(ValueError):
+        publish({'symbol': np.array(['BTC/USDT'], dtype=object)})
+
+def test_registry_shares_history_with_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(hm, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(hm, 'META_FILE', str(tmp_path / 'history_meta.json'))
+    monkeypatch.setattr(HistoryManager, 'backend', 'csv')
+    ts = pd.date_range('2025-01-01', periods=500, freq='min')
+    HistoryManager.save_history('BTC/USDT', '1m', pd.DataFrame(
+        {'ts': ts, 'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': np.arange(500, dtype=float), 'volume': 1.0}))
+    with SharedDatasetRegistry() as registry:
+        spec = registry.publish_history('BTC/USDT', '1m')
+        assert registry.publish_history('BTC/USDT', '1m') is spec
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(_worker_sum, [spec] * 4))
+        name = spec['name']
+    assert results == [(float(sum(range(500))), False, np.datetime64('2025-01-01T08:19'))] * 4
+    # The block is unlinked when the registry closes
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+    get_dataset_cache().clear()
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.simulation import simulate_trades, signal_state, TradeSimulator
+
+def make_result(closes, signals, lows=None, opens=None):
+    ts = pd.date_range("2025-06-11 13:55:00", periods=len(closes), freq="min")
+    df = pd.DataFrame({"ts": ts, "close": closes, "signal": signals})
+    df["low"] = lows if lows is not None else closes
+    df["open"] = opens if opens is not None else closes
+    return df
+
+def test_signal_state_ignores_repeated_buys():
+    state = signal_state(np.array([None, "BUY", "HOLD", "BUY", "SELL", "SELL", "BUY"], dtype=object))
+    assert state.tolist() == [0, 1, 1, 1, 0, 0, 1]
+
+def test_simulate_matches_price_difference_without_costs():
+    df = make_result([100, 105, 110, 120, 115], [None, "BUY", None, "SELL", None])
+    trades = simulate_trades(df, max_position_size=1.0, initial_capital=105)
+    assert len(trades) == 1
+    trade = trades.iloc[0]
+    assert trade["entry_price"] == 105
+    assert trade["exit_price"] == 120
+    assert trade["profit"] == pytest.approx(15)
+    assert trade["exit_reason"] == "signal"
+
+def test_simulate_applies_sizing_fees_and_slippage():
+    df = make_result([100, 100, 110], ["BUY", "HOLD", "SELL"])
+    trades = simulate_trades(df, max_position_size=0.5, fee_pct=0.001, slippage_pct=0.01, initial_capital=1000)
+    trade = trades.iloc[0]
+    entry_fill, exit_fill = 101.0, 110 * 0.99
+    quantity = 500 / entry_fill
+    expected = quantity * exit_fill * (1 - 0.001) - 500 * (1 + 0.001)
+    assert trade["quantity"] == pytest.approx(quantity)
+    assert trade["profit"] == pytest.approx(expected)
+    assert trade["equity"] == pytest.approx(1000 + expected)
+
+def test_stop_loss_triggers_on_intrabar_low():
+    closes = [100, 100, 99, 101, 105]
+    lows = [100, 100, 97, 100, 104]
+    df = make_result(closes, ["BUY", None, None, None, "SELL"], lows=lows)
+    trades = simulate_trades(df, stop_loss_pct=0.02, initial_capital=100)
+    trade = trades.iloc[0]
+    assert trade["exit_reason"] == "stop_loss"
+    assert trade["exit_price"] == pytest.approx(98)
+    assert trade["exit_time"] == str(df["ts"].iloc[2])
+
+def test_stop_loss_fills_at_open_on_gap():
+    df = make_result([100, 90, 95], ["BUY", None, "SELL"], lows=[100, 89, 94], opens=[100, 91, 95])
+    trades = simulate_trades(df, stop_loss_pct=0.02)
+    assert trades.iloc[0]["exit_price"] == pytest.approx(91)
+
+def test_stop_loss_closes_trade_left_open():
+    df = make_result([100, 101, 95], ["BUY", None, None], lows=[100, 100, 90])
+    trades = simulate_trades(df, stop_loss_pct=0.05)
+    assert len(trades) == 1
+    assert trades.iloc[0]["exit_reason"] == "stop_loss"
+
+def test_open_trade_at_end_is_ignored():
+    df = make_result([100, 101, 102], ["BUY", None, None])
+    assert simulate_trades(df).empty
+
+def test_equity_compounds_across_trades():
+    df = make_result([100, 110, 100, 110], ["BUY", "SELL", "BUY", "SELL"])
+    trades = simulate_trades(df, max_position_size=1.0, initial_capital=100)
+    assert trades["equity"].tolist() == pytest.approx([110, 121])
+    assert trades["profit"].tolist() == pytest.approx([10, 11])
+
+def test_invalid_position_size():
+    df = make_result([100, 110], ["BUY", "SELL"])
+    with pytest.raises(ValueError):
+        simulate_trades(df, max_position_size=0)
+
+def test_trade_simulator_chunks_match_whole_result():
+    # Stopped out in the first chunk while still long, SELL in the second, a new trade after
+    df = make_result([100, 101, 95, 96, 97, 100, 110, 105, 120],
+                     ["BUY", None, None, None, "SELL", "BUY", None, "HOLD", "SELL"],
+                     lows=[100, 100, 90, 95, 96, 99, 109, 104, 119])
+    whole = simulate_trades(df, stop_loss_pct=0.05, fee_pct=0.001, max_position_size=0.5)
+    sim = TradeSimulator(stop_loss_pct=0.05, fee_pct=0.001, max_position_size=0.5)
+    parts = [sim.update(df.iloc[i:i + 2].reset_index(drop=True)) for i in range(0, len(df), 2)]
+    pd.testing.assert_frame_equal(pd.concat([p for p in parts if len(p)], ignore_index=True), whole)
+    assert whole["exit_reason"].tolist() == ["stop_loss", "signal"]
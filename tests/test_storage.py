@@ -0,0 +1,113 @@
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+import src.history_manager as hm
+from src.api import app
+from src.history_manager import HistoryManager
+from src.storage import SQLiteStore
+
+def candles(start, n, price=100.0):
+    ts = pd.date_range(start, periods=n, freq='min')
+    close = price + np.arange(n, dtype=float)
+    return pd.DataFrame({'ts': ts, 'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': 1.0})
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'history.db'))
+    yield store
+    store.close()
+
+@pytest.fixture
+def sqlite_history(tmp_path, monkeypatch):
+    monkeypatch.setattr(hm, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(hm, 'META_FILE', str(tmp_path / 'history_meta.json'))
+    monkeypatch.setattr(HistoryManager, 'backend', 'sqlite')
+    monkeypatch.setattr(HistoryManager, 'db_file', str(tmp_path / 'history.db'))
+    monkeypatch.setattr(HistoryManager, '_store', None)
+    return tmp_path
+
+def test_write_and_read_range(store):
+    df = candles('2025-01-01', 100)
+    assert store.write_candles('BTC/USDT', '1m', df) == 100
+    # Overlapping download: upserted, not duplicated
+    store.write_candles('BTC/USDT', '1m', candles('2025-01-01 01:30', 20, price=500.0))
+    store.write_candles('ETH/USDT', '1m', candles('2025-01-01', 10))
+    data = store.read_range('BTC/USDT', '1m', start='2025-01-01 01:00', end='2025-01-01 01:35')
+    assert isinstance(data['close'], np.ndarray) and data['close'].dtype == float
+    assert data['ts'][0] == np.datetime64('2025-01-01T01:00')
+    assert len(data['ts']) == 36
+    assert data['close'][-1] == 505.0
+    assert store.date_range('BTC/USDT', '1m') == (pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-01 01:49'))
+    assert store.date_range('BTC/USDT', '5m') is None
+    frame = store.read_frame('ETH/USDT', '1m')
+    pd.testing.assert_frame_equal(frame, candles('2025-01-01', 10), check_freq=False, check_dtype=False)
+    assert store.connection().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+def test_readers_run_concurrently_with_writer(store):
+    store.write_candles('BTC/USDT', '1m', candles('2025-01-01', 1000))
+    counts, errors = [], []
+
+    def reader():
+        try:
+            for _ in range(20):
+                counts.append(len(store.read_range('BTC/USDT', '1m')['ts']))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for i in range(10):
+        store.write_candles('BTC/USDT', '1m', candles(pd.Timestamp('2025-01-02') + pd.Timedelta(minutes=100 * i), 100))
+    for t in threads:
+        t.join()
+    assert not errors
+    assert min(counts) >= 1000 and max(counts) <= 2000
+
+def test_backtest_runs_queryable_by_params(store):
+    first = store.save_backtest('cross_sma', 'BTC/USDT', '1m', {'fast': 10, 'slow': 50}, {'total_profit': 1.5},
+                                [{'profit': 1.0}, {'profit': 0.5}])
+    store.save_backtest('cross_sma', 'BTC/USDT', '1m', {'fast': 5, 'slow': 50}, {'total_profit': -2.0})
+    store.save_backtest('cross_ema', 'ETH/USDT', '5m', {'fast': 10, 'slow': 30}, {'total_profit': 3.0})
+    assert len(store.query_backtests('cross_sma')) == 2
+    runs = store.query_backtests('cross_sma', params={'fast': 10})
+    assert [r['id'] for r in runs] == [first]
+    assert runs[0]['params'] == {'fast': 10, 'slow': 50}
+    assert runs[0]['summary'] == {'total_profit': 1.5}
+    assert [r['strategy'] for r in store.query_backtests(params={'fast': 10})] == ['cross_ema', 'cross_sma']
+    assert store.query_backtests(timeframe='5m')[0]['symbol'] == 'ETH/USDT'
+    assert store.backtest_trades(first) == [{'profit': 1.0}, {'profit': 0.5}]
+
+def test_history_manager_sqlite_backend(sqlite_history):
+    dates = HistoryManager.save_history('BTC/USDT', '1m', candles('2025-01-01', 60))
+    assert dates == (pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-01 00:59'))
+    HistoryManager.append_history('BTC/USDT', '1m', candles('2025-01-01 01:00', 5))
+    meta = HistoryManager.get_meta('BTC/USDT', '1m')
+    assert (meta['min_date'], meta['max_date']) == ('2025-01-01T00:00:00', '2025-01-01T01:04:00')
+    assert len(HistoryManager.load_history('BTC/USDT', '1m')) == 65
+    assert len(HistoryManager.load_range('BTC/USDT', '1m', end='2025-01-01 00:09')['close']) == 10
+    # No CSV file is written with the SQLite backend
+    assert not (sqlite_history / 'history_BTC-USDT_1m.csv').exists()
+    assert HistoryManager.delete_history('BTC/USDT', '1m')
+    with pytest.raises(FileNotFoundError):
+        HistoryManager.load_history('BTC/USDT', '1m')
+
+def test_csv_backend_save_merges_with_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(hm, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(hm, 'META_FILE', str(tmp_path / 'history_meta.json'))
+    monkeypatch.setattr(HistoryManager, 'backend', 'csv')
+    HistoryManager.save_history('BTC/USDT', '1m', candles('2025-01-01', 10))
+    HistoryManager.save_history('BTC/USDT', '1m', candles('2025-01-01 00:05', 10))
+    df = HistoryManager.load_history('BTC/USDT', '1m')
+    assert len(df) == 15 and df['ts'].is_monotonic_increasing
+    assert HistoryManager.load_range('BTC/USDT', '1m', start='2025-01-01 00:10')['close'].tolist() == [105.0, 106.0, 107.0, 108.0, 109.0]
+
+def test_backtest_results_endpoint(sqlite_history):
+    HistoryManager.get_store().save_backtest('cross_sma', 'BTC/USDT', '1m', {'fast': 10, 'slow': 50}, {'total_profit': 1.5})
+    client = TestClient(app)
+    data = client.get('/api/backtest/results', params={'strategy': 'cross_sma', 'symbol': 'BTC-USDT', 'params': '{"fast": 10}'}).json()
+    assert data['success'] and len(data['runs']) == 1
+    assert client.get('/api/backtest/results', params={'params': '{"fast": 11}'}).json()['runs'] == []
+    assert not client.get('/api/backtest/results', params={'params': '[1]'}).json()['success']
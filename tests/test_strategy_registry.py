@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+import src.history_manager as hm
+from src.api import app
+from src.backtest import load_strategy_history, run_strategy
+from src.history_manager import HistoryManager
+from src.signals import codes_to_labels, get_vectorized_strategy
+from src.strategies import StrategySpec, get_spec, list_strategies, register
+
+def history(n, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(size=n))
+    return pd.DataFrame({'ts': pd.date_range('2025-01-01', periods=n, freq='h'), 'open': close,
+                         'high': close + 1, 'low': close - 1, 'close': close, 'volume': 1.0})
+
+def test_builtin_plugins_discovered_lazily():
+    names = [spec.name for spec in list_strategies()]
+    assert {'cross_sma', 'cross_ema'} <= set(names)
+    spec = get_spec('cross_ema')
+    assert spec.params == {'fast': 10, 'slow': 50}
+    assert spec.warmup({'slow': 20}) == 60 and get_spec('cross_sma').warmup() == 50
+    assert spec.fastest() == 'vectorized'
+    with pytest.raises(ValueError, match="Unknown strategy"):
+        get_spec('not_a_strategy')
+
+def test_declared_modules_imported_on_first_use(tmp_path, monkeypatch):
+    import sys
+    # Un spec propio: el del registro global puede haberlo cargado ya otro test
+    (tmp_path / 'lazy_probe_impl.py').write_text('def per_bar(df, fast, slow):\n    return "HOLD"\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    register(StrategySpec('lazy_probe', params={'fast': 1, 'slow': 2}, per_bar='lazy_probe_impl:per_bar'))
+    try:
+        spec = get_spec('lazy_probe')
+        assert spec.describe()['implementations'] == ['per_bar']
+        assert 'lazy_probe_impl' not in sys.modules
+        assert spec.load('per_bar')(None, 1, 2) == 'HOLD' and 'lazy_probe_impl' in sys.modules
+        assert callable(spec.per_bar)
+    finally:
+        from src import strategies
+        strategies._REGISTRY.pop('lazy_probe')
+        sys.modules.pop('lazy_probe_impl', None)
+
+@pytest.mark.parametrize('path', ['vectorized', 'chunked', 'incremental'])
+def test_run_strategy_paths_agree(path):
+    df = history(400)
+    expected = codes_to_labels(get_vectorized_strategy('cross_ema')(df['close'].to_numpy(), 5, 20))
+    result = run_strategy(df, 'cross_ema', {'fast': 5, 'slow': 20}, path=path)
+    assert result['signal'].iloc[1:].tolist() == expected[1:].tolist() and pd.isna(result['signal'].iloc[0])
+
+def test_run_strategy_keeps_only_declared_warmup():
+    df = history(400)
+    params = {'fast': 5, 'slow': 20}
+    start, end = df['ts'].iloc[200], df['ts'].iloc[299]
+    result = run_strategy(df, 'cross_sma', params, start=start, end=end)
+    assert result['ts'].iloc[0] == start and result['ts'].iloc[-1] == end
+    # The SMA only needs `slow` bars: the same signals as a run over the whole history
+    full = run_strategy(df, 'cross_sma', params)
+    assert result['signal'].tolist() == full['signal'].iloc[200:300].tolist()
+
+def test_custom_plugin_registration():
+    calls = []
+
+    def signals(close, length):
+        calls.append(length)
+        return np.where(close > np.roll(close, 1), 1, 0).astype(np.int8)
+
+    register(StrategySpec('above_prev', params={'length': 1}, vectorized=signals))
+    try:
+        result = run_strategy(history(10), 'above_prev', {'length': 3, 'ignored': 1})
+        assert calls == [3] and pd.isna(result['signal'].iloc[0])
+        assert get_spec('above_prev').describe()['implementations'] == ['vectorized']
+        with pytest.raises(ValueError):
+            get_spec('above_prev').load('incremental')
+    finally:
+        from src import strategies
+        strategies._REGISTRY.pop('above_prev')
+
+def test_load_strategy_history_reads_warmup_window(tmp_path, monkeypatch):
+    monkeypatch.setattr(hm, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(hm, 'META_FILE', str(tmp_path / 'history_meta.json'))
+    monkeypatch.setattr(HistoryManager, 'backend', 'sqlite')
+    monkeypatch.setattr(HistoryManager, 'db_file', str(tmp_path / 'history.db'))
+    monkeypatch.setattr(HistoryManager, '_store', None)
+    HistoryManager.save_history('BTC/USDT', '1h', history(400))
+    df = load_strategy_history('BTC/USDT', '1h', 'cross_ema', {'slow': 20}, start='2025-01-10', end='2025-01-12')
+    assert len(df) == 60 + 49
+    assert pd.Timestamp(df['ts'].iloc[0]) == pd.Timestamp('2025-01-10') - pd.Timedelta(hours=60)
+
+def test_strategies_endpoint():
+    data = TestClient(app).get('/api/strategies').json()['strategies']
+    sma = next(s for s in data if s['name'] == 'cross_sma')
+    assert sma['lookback'] == 50 and 'vectorized' in sma['implementations']
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+import src.history_manager as hm
+from src.backtest import run_strategy, stream_backtest, warmup_chunks
+from src.history_manager import HistoryManager
+from src.signals import codes_to_labels, get_vectorized_strategy
+from src.simulation import simulate_trades
+
+SIM = {'max_position_size': 0.5, 'stop_loss_pct': 0.004, 'fee_pct': 0.001, 'slippage_pct': 0.0005}
+
+def history(n, freq='min', seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    return pd.DataFrame({'ts': pd.date_range('2025-01-01', periods=n, freq=freq), 'open': open_,
+                         'high': np.maximum(open_, close) * 1.001, 'low': np.minimum(open_, close) * 0.997,
+                         'close': close, 'volume': 1.0})
+
+def in_memory(df, strategy, fast, slow, tmp_path):
+    result = df.copy()
+    result['signal'] = codes_to_labels(get_vectorized_strategy(strategy)(df['close'].to_numpy(), fast, slow))
+    trades = simulate_trades(result, **SIM)
+    result.to_csv(tmp_path / 'full.csv', index=False)
+    trades.to_csv(tmp_path / 'full_trades.csv', index=False)
+    return trades
+
+def chunks(df, size):
+    return (df.iloc[i:i + size].reset_index(drop=True) for i in range(0, len(df), size))
+
+@pytest.mark.parametrize('strategy', ['cross_sma', 'cross_ema'])
+@pytest.mark.parametrize('size', [7, 1000, 5000])
+def test_stream_matches_in_memory(tmp_path, strategy, size):
+    df = history(2000 if size == 7 else 12000)
+    trades = in_memory(df, strategy, 5, 30, tmp_path)
+    assert (trades['exit_reason'] == 'stop_loss').any() and (trades['exit_reason'] == 'signal').any()
+    out = stream_backtest(chunks(df, size), strategy, 5, 30, str(tmp_path / 'out.csv'), str(tmp_path / 'trades.csv'), **SIM)
+    assert out['rows'] == len(df) and out['start_date'] == str(df['ts'].iloc[0])
+    pd.testing.assert_frame_equal(out['trades'], trades)
+    assert (tmp_path / 'out.csv').read_text() == (tmp_path / 'full.csv').read_text()
+    assert (tmp_path / 'trades.csv').read_text() == (tmp_path / 'full_trades.csv').read_text()
+
+def test_stream_daily_dates_and_no_trades(tmp_path):
+    df = history(40, freq='D')
+    in_memory(df, 'cross_ema', 5, 100, tmp_path)
+    out = stream_backtest(chunks(df, 16), 'cross_ema', 5, 100, str(tmp_path / 'out.csv'), str(tmp_path / 'trades.csv'), **SIM)
+    assert out['trades'].empty
+    assert (tmp_path / 'out.csv').read_text() == (tmp_path / 'full.csv').read_text()
+    assert (tmp_path / 'trades.csv').read_text() == (tmp_path / 'full_trades.csv').read_text()
+
+@pytest.mark.parametrize('size', [7, 400])
+def test_stream_with_start_keeps_warmup_like_in_memory(tmp_path, size):
+    df = history(3000)
+    start = '2025-01-01 20:00'
+    result = run_strategy(df, 'cross_sma', {'fast': 10, 'slow': 50}, start=start)
+    trades = simulate_trades(result, **SIM)
+    result.to_csv(tmp_path / 'full.csv', index=False)
+    out = stream_backtest(warmup_chunks(chunks(df, size), start, 50), 'cross_sma', 10, 50, str(tmp_path / 'out.csv'),
+                          str(tmp_path / 'trades.csv'), start=start, **SIM)
+    assert out['rows'] == len(result) and out['start_date'] == str(pd.Timestamp(start))
+    pd.testing.assert_frame_equal(out['trades'], trades)
+    assert (tmp_path / 'out.csv').read_text() == (tmp_path / 'full.csv').read_text()
+
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_iter_history_chunks_and_range(tmp_path, monkeypatch, backend):
+    monkeypatch.setattr(hm, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(hm, 'META_FILE', str(tmp_path / 'history_meta.json'))
+    monkeypatch.setattr(HistoryManager, 'backend', backend)
+    monkeypatch.setattr(HistoryManager, 'db_file', str(tmp_path / 'history.db'))
+    monkeypatch.setattr(HistoryManager, '_store', None)
+    df = history(1000)
+    HistoryManager.save_history('BTC/USDT', '1m', df)
+    parts = list(HistoryManager.iter_history('BTC/USDT', '1m', 300, start='2025-01-01 01:00', end='2025-01-01 12:00'))
+    assert all(len(p) <= 300 for p in parts)
+    joined = pd.concat(parts, ignore_index=True)
+    expected = df[(df['ts'] >= '2025-01-01 01:00') & (df['ts'] <= '2025-01-01 12:00')].reset_index(drop=True)
+    pd.testing.assert_frame_equal(joined, expected, check_dtype=False)
+
+def test_resume_from_checkpoint(tmp_path):
+    df = history(12000)
+    full = stream_backtest(chunks(df, 1000), 'cross_sma', 5, 30, str(tmp_path / 'full.csv'), str(tmp_path / 'full_trades.csv'), **SIM)
+    checkpoint = str(tmp_path / 'state.pkl')
+
+    def crashing(n):
+        for i, chunk in enumerate(chunks(df, 1000)):
+            if i == n:
+                raise RuntimeError('crash')
+            yield chunk
+    with pytest.raises(RuntimeError):
+        stream_backtest(crashing(5), 'cross_sma', 5, 30, str(tmp_path / 'out.csv'), str(tmp_path / 'trades.csv'),
+                        checkpoint=checkpoint, **SIM)
+    # Restos de un bloque a medio escribir tras el checkpoint
+    with open(tmp_path / 'out.csv', 'a') as f:
+        f.write('2025-01-04 10:00:00,1,2')
+    out = stream_backtest(chunks(df, 1000), 'cross_sma', 5, 30, str(tmp_path / 'out.csv'), str(tmp_path / 'trades.csv'),
+                          checkpoint=checkpoint, **SIM)
+    assert out['rows'] == len(df) and out['start_date'] == full['start_date']
+    pd.testing.assert_frame_equal(out['trades'], full['trades'])
+    assert (tmp_path / 'out.csv').read_text() == (tmp_path / 'full.csv').read_text()
+    assert (tmp_path / 'trades.csv').read_text() == (tmp_path / 'full_trades.csv').read_text()
+    assert not (tmp_path / 'state.pkl').exists()
+
+def test_resume_rejects_changed_history(tmp_path):
+    df = history(3000)
+    checkpoint = str(tmp_path / 'state.pkl')
+    with pytest.raises(RuntimeError):
+        def crashing():
+            yield from chunks(df, 1000)
+            raise RuntimeError('crash')
+        stream_backtest(crashing(), 'cross_sma', 5, 30, str(tmp_path / 'out.csv'), str(tmp_path / 'trades.csv'),
+                        checkpoint=checkpoint, **SIM)
+    shifted = df.assign(ts=df['ts'] + pd.Timedelta('1h'))
+    with pytest.raises(ValueError, match='changed'):
+        stream_backtest(chunks(shifted, 1000), 'cross_sma', 5, 30, str(tmp_path / 'out.csv'), str(tmp_path / 'trades.csv'),
+                        checkpoint=checkpoint, **SIM)
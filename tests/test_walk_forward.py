@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.walk_forward import walk_forward_windows, parameter_grid, score_returns, walk_forward, walk_forward_summary
+from src.portfolio import position_returns
+from src.signals import cross_sma_signals, position_state
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 1, 600))
+    ts = pd.date_range("2025-01-01", periods=600, freq="h")
+    return pd.DataFrame({"ts": ts, "close": close})
+
+def test_walk_forward_windows_rolling():
+    windows = walk_forward_windows(100, 40, 25)
+    assert windows == [(0, 40, 40, 65), (25, 65, 65, 90), (50, 90, 90, 100)]
+
+def test_walk_forward_windows_anchored():
+    windows = walk_forward_windows(100, 40, 30, anchored=True)
+    assert [w[0] for w in windows] == [0, 0]
+    assert windows[-1] == (0, 70, 70, 100)
+
+def test_parameter_grid_skips_invalid():
+    assert parameter_grid([5, 30], [20, 30]) == [(5, 20), (5, 30)]
+
+def test_score_returns():
+    returns = np.array([[0.1, 0.0], [0.1, 0.0]])
+    assert score_returns(returns).tolist() == pytest.approx([0.21, 0.0])
+    assert score_returns(returns, "sharpe")[1] == 0.0
+    with pytest.raises(ValueError):
+        score_returns(returns, "unknown")
+
+def test_walk_forward_stitches_out_of_sample(history):
+    result = walk_forward(history, "cross_sma", [3, 5], [10, 20], train_size=200, test_size=100, initial_capital=1000)
+    assert len(result["windows"]) == 4
+    assert len(result["oos_returns"]) == 400
+    assert len(result["ts"]) == 400
+    assert result["oos_equity"][-1] == pytest.approx(1000 * np.prod(1 + result["oos_returns"]))
+    summary = walk_forward_summary(result, 1000)
+    assert summary["start_date"] == str(history["ts"].iloc[200])
+
+def test_walk_forward_best_params_match_single_run(history):
+    result = walk_forward(history, "cross_sma", [3], [10], train_size=200, test_size=400)
+    window = result["windows"][0]
+    close = history["close"].to_numpy()
+    # The test window starts flat, so a cross on its first bar is not visible
+    codes = cross_sma_signals(close, 3, 10)[200:].copy()
+    codes[0] = 0
+    expected = position_returns(close[200:], position_state(codes))
+    assert (window["fast"], window["slow"]) == (3, 10)
+    assert result["oos_returns"] == pytest.approx(expected)
+
+def test_walk_forward_parallel_matches_serial(history):
+    kwargs = dict(train_size=200, test_size=100, fee_pct=0.001)
+    serial = walk_forward(history, "cross_ema", [3, 5], [10, 20], **kwargs)
+    parallel = walk_forward(history, "cross_ema", [3, 5], [10, 20], workers=2, **kwargs)
+    assert serial["windows"] == parallel["windows"]
+    assert serial["oos_equity"] == pytest.approx(parallel["oos_equity"])
+
+def test_walk_forward_too_short(history):
+    with pytest.raises(ValueError):
+        walk_forward(history.head(50), "cross_sma", [3], [10], train_size=100, test_size=10)